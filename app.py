@@ -4,19 +4,34 @@ app.py
 NeuroDL v2.0 — Flask API with JWT authentication + Flask-SocketIO.
 
 Public endpoints:
-  GET  /                     — health check
+  GET  /                     — health check (liveness)
+  GET  /ready                — readiness: per-model load + warm-up timings (503 until ready)
   POST /auth/register        — create account (patient or doctor)
   POST /auth/login           — get JWT token
   GET  /auth/me              — get current user
   GET  /model-performance    — pre-computed evaluation metrics (public)
+  GET  /metrics/inference    — batching, cache, job, report-client + model memory stats
 
 Protected endpoints (require Authorization: Bearer <token>):
   POST   /patients           — register patient profile
   GET    /patients           — list own patients
   GET    /patients/<id>      — single patient + scan
   DELETE /patients/<id>      — delete patient
-  POST   /predict            — MRI analysis (emits socket progress)
+  POST   /predict            — MRI analysis (emits socket progress + streamed report_chunk;
+                               mode=job → 202 + job_id; tta=1 → test-time augmentation
+                               on low-confidence scans; mc_dropout=1 → MC-dropout entropy;
+                               overlays come back as URLs, images=base64 adds them inline)
+  GET    /jobs/<id>          — status / result of a job-mode /predict
+  POST   /predict-volume     — multi-frame DICOM: batched per-slice classification,
+                               study-level prediction, Grad-CAM for the top-k slices
+  POST   /predict-series     — the same for a series of single-frame slices (zip or multipart),
+                               decoded in a process pool and sorted by slice position
   POST   /compare-gradcam    — frozen vs fine-tuned Grad-CAM comparison
+  GET    /scans/<id>/image/<kind> — a saved scan's Grad-CAM / segmentation overlay
+  GET    /scans/<id>/gradcam?class= — re-render a saved scan's Grad-CAM for any class
+                               (stored all-class maps, no model call)
+  GET    /artifacts/<token>  — short-lived overlay with no saved scan (compare-gradcam,
+                               failed persistence)
   GET    /history            — own scan history
   GET    /history/<id>       — single scan
   DELETE /history/<id>       — delete scan
@@ -31,9 +46,10 @@ Doctor-only endpoints (require role=doctor in JWT):
   POST /doctor/scans/<id>/notes         — add clinical note + verdict
 """
 
-import base64
 import json as _json       # renamed to avoid conflict with flask.json
+import itertools
 import os
+import threading
 import time
 import traceback
 from io import BytesIO
@@ -48,7 +64,7 @@ from src.auth import (
     create_token, hash_password, require_auth,
     require_doctor, verify_password,            # require_doctor added
 )
-from src.config import RESNET50_MODEL_PATH
+from src.config import CUSTOM_MODEL_PATH, META_MODEL_PATH, RESNET50_MODEL_PATH
 from src.database import (
     SessionLocal,
     Patient,
@@ -65,6 +81,7 @@ from src.database import (
     get_patient_profile_by_user,
     get_patients,
     get_scan_by_id,
+    get_scan_gradcam_maps,
     get_scan_image_key,      # NEW
     get_scan_owner_user_id,  # NEW
     get_scans,
@@ -72,19 +89,39 @@ from src.database import (
     get_user_by_id,
     init_db,
     save_scan,
+    update_scan,
 )
 from src.image_storage import (
     new_key as new_image_key,
     save_image as store_image,
     read_image_bytes,
+    load_image_bytes,
     get_signed_url,
     STORAGE_BACKEND,
 )
-from src.gradcam import generate_gradcam, get_gradcam_heatmap
+from src.backends import INFERENCE_BACKEND, MODEL_VARIANT, KerasBackend, load_backend
+from src.batching import MicroBatcher
+from src.cascade import (
+    CASCADE_ENABLED, CASCADE_THRESHOLD, CASCADE_USE_META, LARGE_MODEL_NAME,
+    META_MODEL_NAME, SMALL_MODEL_NAME, Cascade, load_config as load_cascade_config,
+)
+from src.encoding import (
+    GRADCAM_IMAGE_FORMAT, decode_image, encode_image, extension, format_for_key,
+    mimetype, sniff_format, to_base64,
+)
+from src.gradcam import classify_with_gradcam, pack_heatmaps, render_gradcam, unpack_heatmaps
+from src.render import RENDER_HEATMAP_SIDE, fit_within
 from src.inference import gradcam_pseudo_segmentation
 from src.preprocess import load_image, preprocess_classification
-from src.report import generate_report
-from src.utils import load_local_model
+from src.report import generate_report, groq_client
+from src.mc_dropout import MC_DROPOUT_ENABLED, MC_DROPOUT_SAMPLES, estimate_uncertainty
+from src.tta import TTA_ENABLED, needs_tta, run_tta, tta_signature
+from src.series import file_entries, ingest_series, slice_image as series_slice_image, zip_entries
+from src.volume import aggregate_study, classify_volume, load_volume, slice_rgb
+from src.artifacts import ArtifactStore
+from src.jobs import JobQueueFull, JobRunner
+from src.result_cache import ResultCache, content_key
+from src.utils import load_local_model, model_registry_stats
 
 # ─── Initialisation ───────────────────────────────────────────────────────────
 
@@ -109,9 +146,59 @@ CLASS_NAMES = {
 
 DOCTOR_INVITE_CODE = os.environ.get("DOCTOR_INVITE_CODE", "NEURODL-DOCTOR-2026")
 
-classification_model = None
-frozen_model         = None     # pre-fine-tuning checkpoint for Grad-CAM comparison
-app_initialized      = False
+EAGER_MODEL_LOAD       = os.environ.get("EAGER_MODEL_LOAD", "1") == "1"   # load + warm at import
+
+# Overlays in /predict and /compare-gradcam responses: "url" returns only
+# URLs to the image routes; "base64" also inlines the images (per request:
+# images=base64). Served overlays are immutable, so browsers may cache them.
+PREDICT_IMAGE_MODE     = os.environ.get("PREDICT_IMAGE_MODE", "url").lower()
+IMAGE_CACHE_SECONDS    = int(os.environ.get("IMAGE_CACHE_SECONDS", 86400))
+
+# Grad-CAM for every class from one tape; the float16 maps are stored with
+# the scan so /scans/<id>/gradcam?class= can re-render any class later.
+GRADCAM_ALL_CLASSES    = os.environ.get("GRADCAM_ALL_CLASSES", "1") == "1"
+# Also store a copy of the scan, shrunk to ≤ RENDER_HEATMAP_SIDE px, for
+# those re-renders to be drawn on. Off → they are drawn on a blank canvas.
+GRADCAM_STORE_BACKGROUND = os.environ.get("GRADCAM_STORE_BACKGROUND", "1") == "1"
+
+# Test accuracy reported for each model that can decide a scan (model_used).
+# The Custom CNN figure is replaced by cascade.json's when the cascade loads.
+MODEL_ACCURACY = {
+    LARGE_MODEL_NAME: "94.92%",
+    SMALL_MODEL_NAME: "93.20%",
+    META_MODEL_NAME:  "98.78%",
+}
+
+classification_model   = None   # Keras model — Grad-CAM needs its gradients
+classification_backend = None   # forward passes (src.backends, INFERENCE_BACKEND)
+frozen_model           = None   # pre-fine-tuning checkpoint for Grad-CAM comparison
+app_initialized        = False
+readiness              = {"ready": False, "error": None, "models": {}}   # served by /ready
+_init_lock             = threading.Lock()
+model_version          = os.environ.get("MODEL_VERSION", "unversioned")   # part of every result-cache key
+
+result_cache   = ResultCache()
+job_runner     = JobRunner()      # background tail of job-mode /predict
+artifact_store = ArtifactStore()  # overlays with no Scan row, served by /artifacts/<token>
+
+# All classifier forward passes go through one micro-batching worker so
+# concurrent requests share a single batched ResNet50V2 call. The forward
+# function resolves the globals at call time, so the model can be
+# (re)loaded later.
+def _classifier_forward(batch: np.ndarray) -> np.ndarray:
+    """Plain classifier forward pass on the configured inference backend."""
+    if classification_backend is not None:
+        return classification_backend.predict(batch)
+    return classification_model.predict(batch, verbose=0)
+
+
+classification_engine = MicroBatcher(_classifier_forward, name="resnet50v2")
+
+# Cascade mode (CASCADE_ENABLED=1): the custom CNN answers confident scans
+# on its own micro-batcher; uncertain ones escalate to classification_engine.
+cascade_backend = None
+cascade         = None
+cascade_engine  = MicroBatcher(lambda batch: cascade_backend.predict(batch), name="custom_cnn")
 
 
 # ─── CORS preflight ───────────────────────────────────────────────────────────
@@ -129,38 +216,200 @@ def handle_options():
 
 # ─── Startup ──────────────────────────────────────────────────────────────────
 
+def _file_signature(path: str) -> str:
+    """name:size:mtime of a model file, or "unversioned" if it can't be read."""
+    try:
+        st = os.stat(path)
+        return f"{os.path.basename(path)}:{st.st_size}:{int(st.st_mtime)}"
+    except (OSError, TypeError):
+        return "unversioned"
+
+
+def _model_version(path: str, backend=None) -> str:
+    """
+    MODEL_VERSION env var if set, else derived from the model file's size
+    + mtime — retraining or swapping the .keras file invalidates cached results.
+
+    The serving backend (INFERENCE_BACKEND / MODEL_VARIANT) is always
+    folded in — its kind plus its artifact's signature — so a float32
+    result is never served from cache as an int8 one, or the reverse.
+    """
+    version = os.environ.get("MODEL_VERSION") or _file_signature(path)
+    if backend is not None:
+        version += f"|{backend.name}:{_file_signature(backend.path)}"
+    return version
+
+
+def _warm_up(model, predict: bool = True) -> float:
+    """
+    Push one synthetic 224×224 batch through the model (via the micro-
+    batcher for the served classifier, so its worker thread starts too)
+    and through Grad-CAM, so every graph is traced before real traffic.
+    Returns the warm-up time in ms.
+    """
+    t0    = time.time()
+    batch = np.zeros((1, 224, 224, 3), dtype=np.float32)
+    if predict:
+        classification_engine.predict(batch)
+    classify_with_gradcam(model, batch, class_idx=0)
+    if predict and GRADCAM_ALL_CLASSES:
+        classify_with_gradcam(model, batch, class_idx=0, all_classes=True)
+    return round((time.time() - t0) * 1000, 1)
+
+
+def _load_and_warm(name: str, path: str, predict: bool = True):
+    """Load + warm one model, recording timings under readiness["models"][name]."""
+    t0      = time.time()
+    model   = load_local_model(path)
+    entry   = {"path": path, "load_ms": round((time.time() - t0) * 1000, 1)}
+    readiness["models"][name] = entry
+    if name == "classification":
+        # The micro-batcher and result cache resolve these globals, so
+        # they must point at the new model before warm-up runs through them.
+        global classification_model, classification_backend, model_version
+        classification_model   = model
+        classification_backend = (load_backend(path)
+                                  if INFERENCE_BACKEND == "tflite" or MODEL_VARIANT != "float32"
+                                  else KerasBackend(model, path))
+        model_version          = _model_version(path, classification_backend)
+        entry["version"]       = model_version
+        entry["backend"]       = classification_backend.name
+        entry["artifact"]      = classification_backend.path
+    try:
+        entry["warmup_ms"] = _warm_up(model, predict=predict)
+    except Exception as e:
+        # Warm-up is an optimisation — a failure here only means the first
+        # real request pays the tracing cost, so the model is still served.
+        entry["warmup_error"] = str(e)
+        print(f"⚠ Warm-up failed for {name}: {e}")
+    print(f"✓ {name} model ready  ({path}, load {entry['load_ms']:.0f} ms, "
+          f"warm-up {entry.get('warmup_ms', 0):.0f} ms)")
+    return model
+
+
+def _load_cascade():
+    """Custom CNN (+ meta model) for cascade mode, calibrated by evaluate_cascade.py."""
+    global cascade, cascade_backend
+    config = load_cascade_config()
+    if config is None:
+        cascade = None
+        print("⚠ CASCADE_ENABLED but no cascade config — run evaluate_cascade.py; "
+              "serving ResNet50V2 only")
+        return
+
+    custom_accuracy = (config.get("test") or {}).get("custom_accuracy")
+    if custom_accuracy is not None:
+        MODEL_ACCURACY[SMALL_MODEL_NAME] = f"{custom_accuracy:.2%}"
+
+    t0              = time.time()
+    cascade_backend = load_backend(CUSTOM_MODEL_PATH)
+    meta_backend    = load_backend(META_MODEL_PATH) if CASCADE_USE_META else None
+    entry           = {"path": CUSTOM_MODEL_PATH, "load_ms": round((time.time() - t0) * 1000, 1),
+                       "backend": cascade_backend.name}
+    readiness["models"]["cascade"] = entry
+
+    cascade = Cascade(
+        small_predict = cascade_engine.predict,
+        large_predict = classification_engine.predict,
+        meta_predict  = meta_backend.predict if meta_backend is not None else None,
+        temperature   = config["temperature"],
+        threshold     = float(CASCADE_THRESHOLD) if CASCADE_THRESHOLD else config["threshold"],
+    )
+    t0 = time.time()
+    cascade.classify(np.zeros((1, 224, 224, 3), dtype=np.float32))
+    entry["warmup_ms"] = round((time.time() - t0) * 1000, 1)
+    print(f"✓ Cascade ready  (T={cascade.temperature:g}, threshold={cascade.threshold:g}, "
+          f"meta={'on' if meta_backend else 'off'})")
+
+
+def _cache_version(use_tta: bool = False, use_mc: bool = False) -> str:
+    """Model version + the cascade, TTA and MC-dropout settings in effect — all change the result."""
+    version = f"{model_version}|{cascade.signature}" if cascade is not None else model_version
+    if use_tta:
+        version += f"|{tta_signature()}"
+    if use_mc:
+        version += f"|mc:T={MC_DROPOUT_SAMPLES}"
+    return version
+
+
 def load_models():
-    global classification_model, frozen_model
+    global frozen_model
     print("\n" + "=" * 60)
     print("NEURODL v2.0 — STARTUP")
     print("=" * 60)
+    readiness.update({"ready": False, "error": None, "models": {}, "started_at": time.time()})
+
     print("\n[DB] Initialising PostgreSQL database...")
+    t0 = time.time()
     init_db()
+    readiness["db_ms"] = round((time.time() - t0) * 1000, 1)
 
-    print(f"\n[Model] Loading classification model...")
-    classification_model = load_local_model(RESNET50_MODEL_PATH)
-    print(f"✓ Classification model loaded  ({RESNET50_MODEL_PATH})")
+    print(f"\n[Model] Loading + warming classification model...")
+    _load_and_warm("classification", RESNET50_MODEL_PATH)
 
     # Load frozen checkpoint for Grad-CAM comparison (optional)
     frozen_ckpt = "models/checkpoints/ResNet50V2_best.keras"
     if os.path.exists(frozen_ckpt):
-        frozen_model = load_local_model(frozen_ckpt)
-        print(f"✓ Frozen checkpoint loaded  ({frozen_ckpt})")
+        frozen_model = _load_and_warm("frozen", frozen_ckpt, predict=False)
     else:
         frozen_model = None
         print(f"⚠ Frozen checkpoint not found at {frozen_ckpt} — compare-gradcam will use single model")
 
+    if CASCADE_ENABLED:
+        _load_cascade()
+
+    if MC_DROPOUT_ENABLED:
+        t0 = time.time()
+        try:
+            estimate_uncertainty(classification_model, np.zeros((1, 224, 224, 3), dtype=np.float32))
+            readiness["models"]["classification"]["mc_dropout_warmup_ms"] = round((time.time() - t0) * 1000, 1)
+            print(f"✓ MC dropout head traced  (T={MC_DROPOUT_SAMPLES})")
+        except Exception as e:
+            print(f"⚠ MC dropout unavailable: {e}")
+
+    readiness["ready"]    = True
+    readiness["total_ms"] = round((time.time() - readiness["started_at"]) * 1000, 1)
     print("\n" + "=" * 60)
-    print("ALL SYSTEMS READY")
+    print(f"ALL SYSTEMS READY  ({readiness['total_ms'] / 1000:.1f}s)")
     print("=" * 60 + "\n")
 
 
+def ensure_initialized() -> bool:
+    """
+    Load + warm everything exactly once per process. Called eagerly at
+    import (EAGER_MODEL_LOAD=1) and again by the before_request fallback,
+    which only does work if the eager attempt was skipped or failed.
+    """
+    global app_initialized
+    if app_initialized:
+        return True
+    with _init_lock:
+        if app_initialized:
+            return True
+        try:
+            load_models()
+            app_initialized = True
+        except Exception as e:
+            readiness.update({"ready": False, "error": str(e)})
+            print(f"✗ Startup failed — will retry on next request:\n{traceback.format_exc()}")
+            raise
+    return True
+
+
 @app.before_request
 def initialize():
-    global app_initialized
-    if not app_initialized:
-        load_models()
-        app_initialized = True
+    # /ready must answer immediately — it reports loading, never triggers it.
+    if not app_initialized and request.endpoint != "ready":
+        ensure_initialized()
+
+
+# Spawned process-pool workers (src/series.py) re-import this script as
+# __mp_main__; they only decode DICOM and must never load the models.
+if EAGER_MODEL_LOAD and __name__ != "__mp_main__":
+    try:
+        ensure_initialized()
+    except Exception:
+        pass    # logged above; /ready reports the error, first request retries
 
 
 # ─── Socket progress helper ───────────────────────────────────────────────────
@@ -177,6 +426,15 @@ def emit_progress(socket_id: str, step: str, status: str,
     )
 
 
+def emit_report_chunk(socket_id: str, index: int, text: str):
+    socketio.emit(
+        "report_chunk",
+        {"index": index, "text": text},
+        room=socket_id,
+        namespace="/",
+    )
+
+
 # ─── Health Check ─────────────────────────────────────────────────────────────
 
 @app.route("/", methods=["GET"])
@@ -186,10 +444,28 @@ def home():
         "service":  "NeuroDL Brain Tumor Detection API",
         "version":  "2.0.0",
         "model":    "ResNet50V2",
-        "accuracy": "94.92%",
+        "accuracy": MODEL_ACCURACY[LARGE_MODEL_NAME],
     })
 
 
+@app.route("/ready", methods=["GET"])
+def ready():
+    """
+    Readiness probe for the load balancer — 200 only once the DB is
+    initialised and every model is loaded and warmed, 503 before that.
+    Kept separate from / so liveness doesn't depend on model loading.
+    """
+    body = {
+        "ready":    readiness["ready"],
+        "status":   "ready" if readiness["ready"] else ("error" if readiness["error"] else "loading"),
+        "error":    readiness["error"],
+        "db_ms":    readiness.get("db_ms"),
+        "total_ms": readiness.get("total_ms"),
+        "models":   readiness["models"],
+    }
+    return jsonify(body), 200 if readiness["ready"] else 503
+
+
 # ─── Auth Routes ──────────────────────────────────────────────────────────────
 
 @app.route("/auth/register", methods=["POST"])
@@ -367,12 +643,415 @@ def patient_delete(current_user, patient_id):
         return jsonify({"error": "Failed to delete patient"}), 500
 
 
+# ─── Predict Helpers ──────────────────────────────────────────────────────────
+
+def _classify_image(image_np: np.ndarray, socket_id: str, t0: float,
+                    use_tta: bool = False, timings: dict = None,
+                    use_mc: bool = False) -> tuple:
+    """
+    Stages 1-2 of /predict: preprocess → ResNet50V2 (via the micro-batcher),
+    or the custom-CNN-first cascade when enabled. With use_tta, a result
+    below TTA_CONFIDENCE_THRESHOLD is re-run as one augmented batch
+    through ResNet50V2 and replaced by the averaged softmax. With use_mc,
+    ResNet50V2's dropout head is sampled MC_DROPOUT_SAMPLES times for
+    predictive entropy / mutual information (the prediction is unchanged).
+
+    Per-stage wall time (ms) is written into `timings` when given.
+
+    Returns:
+        tuple: (preprocessed (1, 224, 224, 3), predictions (num_classes,) float32,
+                model_used str, extras dict of cacheable tta_* / mc_* fields)
+    """
+    timings      = {} if timings is None else timings
+    preprocessed = preprocess_classification(image_np)
+    timings["preprocess_ms"] = round((time.time() - t0) * 1000, 1)
+    emit_progress(socket_id, "preprocess", "done", duration=round(time.time()-t0, 2))
+
+    emit_progress(socket_id, "resnet", "running")
+    t0 = time.time()
+    if cascade is not None:
+        predictions, used = cascade.classify(preprocessed)
+        model_used        = used[0]
+    else:
+        predictions = classification_engine.predict(preprocessed)
+        model_used  = LARGE_MODEL_NAME
+    predictions = np.asarray(predictions[0], dtype=np.float32)
+    timings["classify_ms"] = round((time.time() - t0) * 1000, 1)
+
+    extras = {"tta_views": 0, "tta_variance": None, "tta_agreement": None,
+              "single_pass_confidence": float(np.max(predictions)),
+              "mc_samples": 0, "mc_entropy": None, "mc_mutual_information": None,
+              "mc_class_std": None}
+    timings["tta_ms"] = 0.0
+    if use_tta and needs_tta(predictions):
+        t1 = time.time()
+        # The single pass is reused as the identity view when it came
+        # from ResNet50V2; otherwise ResNet50V2 sees the original too.
+        result = run_tta(
+            classification_engine.predict, preprocessed,
+            base_predictions=predictions if model_used == LARGE_MODEL_NAME else None,
+        )
+        predictions = result.pop("predictions")
+        model_used  = LARGE_MODEL_NAME      # the averaged views are ResNet50V2's
+        extras.update(result)
+        timings["tta_ms"] = round((time.time() - t1) * 1000, 1)
+        print(f"[PREDICT] TTA: {extras['tta_views']} views, confidence "
+              f"{extras['single_pass_confidence']:.2%} → {float(np.max(predictions)):.2%} "
+              f"({timings['tta_ms']:.0f} ms)")
+
+    if use_mc:
+        t1 = time.time()
+        try:
+            # Backbone once, dropout head MC_DROPOUT_SAMPLES times in one call
+            mc = estimate_uncertainty(classification_model, preprocessed)[0]
+            extras.update({
+                "mc_samples":            MC_DROPOUT_SAMPLES,
+                "mc_entropy":            mc["predictive_entropy"],
+                "mc_mutual_information": mc["mutual_information"],
+                "mc_class_std":          mc["predicted_class_std"],
+            })
+            print(f"[PREDICT] MC dropout: entropy {mc['predictive_entropy']:.3f}, "
+                  f"MI {mc['mutual_information']:.3f}")
+        except Exception as e:
+            print(f"[PREDICT] ⚠ MC dropout skipped: {e}")
+        timings["mc_dropout_ms"] = round((time.time() - t1) * 1000, 1)
+    emit_progress(socket_id, "resnet", "done", message=model_used,
+                  duration=round(time.time()-t0, 2))
+
+    return preprocessed, predictions, model_used, extras
+
+
+def _visualise(image_np: np.ndarray, preprocessed: np.ndarray,
+               predicted_class: int, socket_id: str) -> dict:
+    """
+    Stage 3 of /predict: Grad-CAM + pseudo-segmentation (tumour only).
+
+    Returns:
+        dict: heatmap (h, w) float32 or None,
+              heatmaps (classes, h, w) float32 or None (GRADCAM_ALL_CLASSES),
+              gradcam_image encoded bytes (PNG by default) or None,
+              segment_image encoded bytes (JPEG by default) or None
+        — encoded once (src/encoding.py); stored and base64'd as-is.
+    """
+    visuals = {"heatmap": None, "heatmaps": None, "gradcam_image": None, "segment_image": None}
+    if predicted_class == 2:
+        print("[PREDICT] No tumour — skipping visual analysis")
+        return visuals
+
+    print("[PREDICT] Tumour detected — running visual analysis...")
+    emit_progress(socket_id, "gradcam", "running")
+    t0 = time.time()
+    # One forward + backward pass yields both the raw heatmap (for
+    # pseudo-segmentation) and the rendered overlay — plus, with
+    # GRADCAM_ALL_CLASSES, every other class's map from the same tape.
+    gradcam = classify_with_gradcam(
+        model=classification_model, img_array=preprocessed,
+        class_idx=predicted_class, original_image=image_np,
+        all_classes=GRADCAM_ALL_CLASSES,
+    )
+    if gradcam is None:
+        print("[PREDICT] ✗ Grad-CAM: fused pass failed")
+    else:
+        visuals["heatmap"]  = gradcam["heatmap"]
+        visuals["heatmaps"] = gradcam.get("heatmaps")
+        if gradcam["overlay"]:
+            visuals["gradcam_image"] = gradcam["overlay"]
+            print("[PREDICT] ✓ Grad-CAM complete")
+    emit_progress(socket_id, "gradcam", "done", duration=round(time.time()-t0, 2))
+
+    emit_progress(socket_id, "segmentation", "running")
+    t0 = time.time()
+    if visuals["heatmap"] is not None:
+        try:
+            buf = gradcam_pseudo_segmentation(image=image_np, heatmap=visuals["heatmap"])
+            buf.seek(0)
+            visuals["segment_image"] = buf.getvalue()
+            print("[PREDICT] ✓ Pseudo-segmentation complete")
+        except Exception as e:
+            print(f"[PREDICT] ✗ Segmentation: {e}")
+    emit_progress(socket_id, "segmentation", "done", duration=round(time.time()-t0, 2))
+
+    return visuals
+
+
+def _analyse_image(image_np: np.ndarray, socket_id: str, t0: float,
+                   use_tta: bool = False, timings: dict = None,
+                   use_mc: bool = False) -> dict:
+    """
+    Model-side stages of /predict (1-3). Depends only on the pixels, the
+    loaded model and the TTA / MC-dropout switches (part of the cache
+    key), so the returned dict is what the result cache stores:
+    predictions, the tta_* / mc_* fields + the _visualise() fields.
+    """
+    preprocessed, predictions, model_used, extras = _classify_image(
+        image_np, socket_id, t0, use_tta, timings, use_mc,
+    )
+    visuals = _visualise(image_np, preprocessed, int(np.argmax(predictions)), socket_id)
+    return {"predictions": predictions, "model_used": model_used, **extras, **visuals}
+
+
+def _emit_cached_stages(socket_id: str, predictions: np.ndarray,
+                        duration: float, visuals: bool = True):
+    """Tell the progress UI the model stages finished (served from cache)."""
+    stages = ["preprocess", "resnet"]
+    if visuals and int(np.argmax(predictions)) != 2:
+        stages += ["gradcam", "segmentation"]
+    for step in stages:
+        emit_progress(socket_id, step, "done", message="cached", duration=duration)
+
+
+def _classification_response(predictions: np.ndarray, patient_id: int, cached: bool,
+                             model_used: str = LARGE_MODEL_NAME) -> dict:
+    """The /predict response body as far as classification alone can fill it."""
+    predicted_class = int(np.argmax(predictions))
+    confidence      = float(predictions[predicted_class])
+    class_name      = CLASS_NAMES.get(predicted_class, "Unknown")
+    print(f"[PREDICT] Result: {class_name}  ({confidence:.2%})")
+
+    return {
+        "final_class":            predicted_class,
+        "class_name":             class_name,
+        "confidence":             f"{confidence:.2%}",
+        "model_used":             model_used,
+        "model_accuracy":         MODEL_ACCURACY.get(model_used, "N/A"),
+        "segmentation_performed": False,
+        "gradcam_performed":      False,
+        "segment_image_url":      None,   # set once the overlays are stored;
+        "gradcam_image_url":      None,   # base64 *_image fields only with images=base64
+        "report":                 None,
+        "scan_id":                None,
+        "patient_id":             patient_id,
+        "class_probabilities":    {
+            CLASS_NAMES[i]: float(predictions[i]) for i in range(len(predictions))
+        },
+        "cached":                 cached,
+    }
+
+
+def _uncertainty(analysis: dict):
+    """The "uncertainty" block of a /predict response, or None without TTA."""
+    if not analysis.get("tta_views"):
+        return None
+    variance = np.asarray(analysis["tta_variance"], dtype=np.float32)
+    top      = int(np.argmax(analysis["predictions"]))
+    return {
+        "method":                 "tta",
+        "views":                  int(analysis["tta_views"]),
+        "agreement":              round(float(analysis["tta_agreement"]), 4),
+        "single_pass_confidence": f"{analysis['single_pass_confidence']:.2%}",
+        "predicted_class_std":    round(float(np.sqrt(variance[top])), 4),
+        "class_variance":         {
+            CLASS_NAMES[i]: round(float(variance[i]), 6) for i in range(len(variance))
+        },
+    }
+
+
+def _mc_dropout(analysis: dict):
+    """The "mc_dropout" block of a /predict response, or None if it didn't run."""
+    if not analysis.get("mc_samples"):
+        return None
+    return {
+        "samples":             int(analysis["mc_samples"]),
+        "predictive_entropy":  round(float(analysis["mc_entropy"]), 4),
+        "mutual_information":  round(float(analysis["mc_mutual_information"]), 4),
+        "predicted_class_std": round(float(analysis["mc_class_std"]), 4),
+    }
+
+
+def _persist_image(kind: str, image_bytes: bytes):
+    """
+    Store one overlay for later viewing (doctor portal / history) and
+    return its storage key, or None. Every scan row owns its own copy, so
+    deleting one scan never orphans another. Best-effort: a storage
+    failure must never break the live result the patient is about to see.
+    """
+    try:
+        fmt = sniff_format(image_bytes)
+        key = new_image_key(kind, extension(fmt))
+        if store_image(key, image_bytes, mimetype(fmt)):
+            return key
+    except Exception as e:
+        print(f"[PREDICT] ⚠ {kind} persistence skipped: {e}")
+    return None
+
+
+def _persist_gradcam_maps(heatmaps, image_np: np.ndarray) -> dict:
+    """
+    Scan columns for the all-class Grad-CAM maps: the packed float16 maps,
+    plus — with GRADCAM_STORE_BACKGROUND — a JPEG of the scan shrunk to
+    the render grid (≤ RENDER_HEATMAP_SIDE px) to re-render them over.
+    Empty if there are no maps. Best-effort, like _persist_image: a
+    background that fails to store just leaves the maps without one.
+    """
+    if heatmaps is None:
+        return {}
+    fields = {"gradcam_maps": pack_heatmaps(heatmaps)}
+    if GRADCAM_STORE_BACKGROUND and image_np is not None and image_np.ndim == 3:
+        try:
+            fields["gradcam_base_key"] = _persist_image("base", encode_image(fit_within(image_np), "jpeg"))
+        except Exception as e:
+            print(f"[PREDICT] ⚠ Grad-CAM background persistence skipped: {e}")
+    return fields
+
+
+def _inline_images() -> bool:
+    """True if this request opted into base64 overlays (images=base64, or PREDICT_IMAGE_MODE)."""
+    field = request.form.get("images") or request.args.get("images")
+    return (field or PREDICT_IMAGE_MODE).lower() == "base64"
+
+
+def _overlay_fields(kind: str, image_bytes: bytes, owner_user_id: int,
+                    scan_id=None, key=None, inline: bool = False) -> dict:
+    """
+    Response fields for one overlay: <kind>_image_url and <kind>_image_type,
+    plus the base64 <kind>_image only when `inline`.
+
+    A persisted overlay on a saved scan is served by its scan's image
+    route; anything else is parked in the artifact store for
+    ARTIFACT_TTL_SECONDS so the URL still works.
+    """
+    image_type = mimetype(sniff_format(image_bytes))
+    if scan_id is not None and key:
+        url = f"/scans/{scan_id}/image/{kind}"
+    else:
+        token = artifact_store.put(owner_user_id, image_bytes, image_type)
+        url   = f"/artifacts/{token}" if token else None
+    fields = {f"{kind}_image_url": url, f"{kind}_image_type": image_type}
+    if inline or url is None:
+        fields[f"{kind}_image"] = to_base64(image_bytes)
+    return fields
+
+
+def _write_report(socket_id: str, response: dict, confidence: float, report_context: dict):
+    """
+    Stage 4 of /predict: LLM report. Returns the text, or None.
+
+    With a socket attached the report is streamed — every token chunk
+    goes to the client as a "report_chunk" event while Groq is still
+    writing; the assembled text is returned for persistence as before.
+    """
+    emit_progress(socket_id, "report", "running")
+    t0          = time.time()
+    report_text = None
+    chunks      = itertools.count()
+    on_chunk    = (lambda text: emit_report_chunk(socket_id, next(chunks), text)) if socket_id else None
+    try:
+        report_text = generate_report(
+            class_name             = response["class_name"],
+            confidence             = confidence,
+            segmentation_performed = response["segmentation_performed"],
+            gradcam_performed      = response["gradcam_performed"],
+            model_accuracy         = response["model_accuracy"],
+            model_name             = response["model_used"],
+            on_chunk               = on_chunk,
+            **report_context,
+        )
+        if report_text:
+            print(f"[PREDICT] ✓ Report generated ({len(report_text)} chars)")
+    except Exception as e:
+        print(f"[PREDICT] ✗ Report: {e}")
+    emit_progress(socket_id, "report", "done", duration=round(time.time()-t0, 2))
+    return report_text
+
+
+def _run_predict_job(job, image_np, preprocessed, predictions, extras, analysis, cache_key,
+                     socket_id, file_name, symptoms, report_context, inline=False):
+    """
+    Background half of a job-mode /predict: DB row first, then Grad-CAM,
+    pseudo-segmentation and the report, patching the Scan row and the
+    job result as each artifact lands.
+    """
+    response   = job.to_dict()["result"]
+    confidence = float(np.max(predictions))
+    fields     = analysis if analysis is not None else extras
+
+    job.stage("database", "running")
+    scan_id = save_scan(
+        predicted_class    = response["class_name"],
+        confidence_score   = confidence,
+        file_name          = file_name,
+        patient_id         = response["patient_id"],
+        symptoms           = symptoms,
+        predictive_entropy = fields.get("mc_entropy"),
+        mutual_information = fields.get("mc_mutual_information"),
+    )
+    job.stage("database", "done", scan_id=scan_id)
+    emit_progress(socket_id, "database", "done", message=f"scan_id={scan_id}")
+
+    if analysis is None:
+        # Visuals not cached yet — compute them (coalesced with any
+        # identical in-flight request) and cache the complete result.
+        job.stage("gradcam", "running")
+        analysis, _ = result_cache.get_or_compute(cache_key, lambda: {
+            "predictions": predictions,
+            "model_used":  response["model_used"],
+            **extras,
+            **_visualise(image_np, preprocessed, response["final_class"], socket_id),
+        })
+
+    if analysis["gradcam_image"] is not None:
+        key  = _persist_image("gradcam", analysis["gradcam_image"])
+        maps = _persist_gradcam_maps(analysis.get("heatmaps"), image_np)
+        update_scan(scan_id, gradcam_performed=True, gradcam_image_key=key, **maps)
+        response["gradcam_performed"] = True
+        fields = _overlay_fields(
+            "gradcam", analysis["gradcam_image"], job.owner_user_id, scan_id, key, inline,
+        )
+        if maps:
+            fields["gradcam_classes_url"] = f"/scans/{scan_id}/gradcam"
+        job.stage("gradcam", "done", gradcam_performed=True, **fields)
+    else:
+        job.stage("gradcam", "done")
+
+    if analysis["segment_image"] is not None:
+        key = _persist_image("segment", analysis["segment_image"])
+        update_scan(scan_id, segmentation_performed=True, segment_image_key=key)
+        response["segmentation_performed"] = True
+        job.stage("segmentation", "done", segmentation_performed=True, **_overlay_fields(
+            "segment", analysis["segment_image"], job.owner_user_id, scan_id, key, inline,
+        ))
+    else:
+        job.stage("segmentation", "done")
+
+    job.stage("report", "running")
+    report_text = _write_report(socket_id, response, confidence, report_context)
+    if report_text:
+        update_scan(scan_id, report_text=report_text)
+    job.stage("report", "done", report=report_text)
+    print(f"[PREDICT] ✓ Job {job.id} complete — scan_id={scan_id}\n")
+
+
 # ─── Predict Route ────────────────────────────────────────────────────────────
 
 @app.route("/predict", methods=["POST"])
 @require_auth
 def predict(current_user):
+    """
+    MRI analysis. Form fields: image (required), symptoms, socket_id, mode, tta,
+    mc_dropout.
+
+    mode=job — respond 202 with the classification and a job_id as soon as
+    ResNet50V2 has run; Grad-CAM, segmentation, the report and DB
+    persistence continue in the background (poll GET /jobs/<job_id> or
+    follow the socket progress events). Any other value runs every stage
+    before responding.
+
+    tta=1|0 — switch test-time augmentation on/off for this request
+    (default: TTA_ENABLED). It only runs when the single-pass confidence
+    is below TTA_CONFIDENCE_THRESHOLD; the response then carries an
+    "uncertainty" block, and "timings" always shows what it cost.
+
+    mc_dropout=1|0 — MC-dropout uncertainty for this request (default:
+    MC_DROPOUT_ENABLED): predictive entropy and mutual information in the
+    "mc_dropout" block, also stored on the Scan row.
+    """
     socket_id = request.form.get("socket_id")
+    job_mode  = (request.form.get("mode") or request.args.get("mode")) == "job"
+    tta_field = request.form.get("tta") or request.args.get("tta")
+    use_tta   = TTA_ENABLED if tta_field is None else tta_field.lower() in ("1", "true", "yes")
+    mc_field  = request.form.get("mc_dropout") or request.args.get("mc_dropout")
+    use_mc    = MC_DROPOUT_ENABLED if mc_field is None else mc_field.lower() in ("1", "true", "yes")
+    inline    = _inline_images()
 
     if "image" not in request.files:
         return jsonify({"error": "No image provided"}), 400
@@ -394,145 +1073,107 @@ def predict(current_user):
         print(f"[PREDICT] ⚠ Ignored client-supplied patient_id={raw_pid} "
               f"(does not belong to {current_user['email']}) — using own profile {patient_id}")
 
+    report_context = {
+        "patient_id":       patient_id,
+        "patient_name":     own_profile.get("name") or current_user.get("full_name"),
+        "patient_age":      own_profile.get("age"),
+        "patient_gender":   own_profile.get("gender"),
+        "patient_symptoms": symptoms,
+    }
+
     print(f"\n{'='*55}")
     print(f"[PREDICT] User      : {current_user['email']}")
     print(f"[PREDICT] File      : {file.filename}")
     print(f"[PREDICT] Patient ID: {patient_id or 'not provided'}")
     print(f"[PREDICT] Socket ID : {socket_id or 'none'}")
+    print(f"[PREDICT] Mode      : {'job' if job_mode else 'sync'}"
+          f"{' + tta' if use_tta else ''}{' + mc-dropout' if use_mc else ''}")
     print(f"{'='*55}")
 
     try:
-        # Stage 1: Preprocess
+        # Stage 1: Decode + cache lookup. Stages 1-3 are pure functions of
+        # the pixels and the model, so a re-upload of the same scan is
+        # served from the result cache without touching the model.
         emit_progress(socket_id, "preprocess", "running")
-        t0           = time.time()
-        image_np     = load_image(file)
-        preprocessed = preprocess_classification(image_np)
-        emit_progress(socket_id, "preprocess", "done", duration=round(time.time()-t0, 2))
+        t0        = time.time()
+        timings   = {}
+        image_np  = load_image(file)
+        cache_key = content_key(image_np, _cache_version(use_tta, use_mc))
+
+        if job_mode:
+            # Only classification runs on the request thread; the visual
+            # stages are computed (and cached) by the background job.
+            preprocessed = None
+            extras       = {}
+            analysis     = result_cache.get(cache_key)
+            cached       = analysis is not None
+            if cached:
+                predictions = analysis["predictions"]
+                model_used  = analysis.get("model_used", LARGE_MODEL_NAME)
+            else:
+                preprocessed, predictions, model_used, extras = _classify_image(
+                    image_np, socket_id, t0, use_tta, timings, use_mc,
+                )
+        else:
+            analysis, cached = result_cache.get_or_compute(
+                cache_key, lambda: _analyse_image(image_np, socket_id, t0, use_tta, timings, use_mc),
+            )
+            predictions = analysis["predictions"]
+            model_used  = analysis.get("model_used", LARGE_MODEL_NAME)
 
-        # Stage 2: ResNet50V2
-        emit_progress(socket_id, "resnet", "running")
-        t0              = time.time()
-        predictions     = classification_model.predict(preprocessed, verbose=0)
-        predicted_class = int(np.argmax(predictions[0]))
-        confidence      = float(predictions[0][predicted_class])
-        class_name      = CLASS_NAMES.get(predicted_class, "Unknown")
-        emit_progress(socket_id, "resnet", "done", duration=round(time.time()-t0, 2))
+        if cached:
+            print(f"[PREDICT] ✓ Result cache hit ({cache_key[:12]})")
+            _emit_cached_stages(socket_id, predictions, duration=round(time.time()-t0, 2))
 
-        class_probabilities = {
-            CLASS_NAMES[i]: float(predictions[0][i])
-            for i in range(len(predictions[0]))
-        }
-        print(f"[PREDICT] Result: {class_name}  ({confidence:.2%})")
+        response   = _classification_response(predictions, patient_id, cached, model_used)
+        confidence = float(np.max(predictions))
+        fields     = analysis if analysis is not None else {"predictions": predictions, **extras}
+        response["uncertainty"] = _uncertainty(fields)
+        response["mc_dropout"]  = _mc_dropout(fields)
 
-        response = {
-            "final_class":            predicted_class,
-            "class_name":             class_name,
-            "confidence":             f"{confidence:.2%}",
-            "model_used":             "ResNet50V2",
-            "model_accuracy":         "94.92%",
-            "segmentation_performed": False,
-            "gradcam_performed":      False,
-            "segment_image":          None,
-            "gradcam_image":          None,
-            "report":                 None,
-            "scan_id":                None,
-            "patient_id":             patient_id,
-            "class_probabilities":    class_probabilities,
-        }
-        # Storage keys — populated below if persistence succeeds. Kept
-        # separate from `response` since these are internal (never sent
-        # to the browser); the browser already has the base64 image.
+        if job_mode:
+            try:
+                job = job_runner.submit(
+                    int(current_user["sub"]),
+                    lambda job: _run_predict_job(
+                        job, image_np, preprocessed, predictions, extras, analysis, cache_key,
+                        socket_id, file.filename, symptoms, report_context, inline,
+                    ),
+                    initial_result=response,
+                )
+            except JobQueueFull as e:
+                print(f"[PREDICT] ✗ Job queue full: {e}")
+                return jsonify({"error": "Server busy", "message": "Too many analyses in progress — retry shortly"}), 503
+            response.update({"job_id": job.id, "status": job.status,
+                             "job_url": f"/jobs/{job.id}",
+                             "timings": {**timings, "total_ms": round((time.time()-t0) * 1000, 1)}})
+            print(f"[PREDICT] → Job {job.id} queued")
+            return jsonify(response), 202
+
+        # Overlays are persisted first; the response gets their URLs once
+        # the Scan row exists (base64 copies only when asked for). Storage
+        # keys are internal and never sent to the browser.
         gradcam_image_key = None
         segment_image_key = None
+        gradcam_maps      = {}
+        scan_id           = None
 
-        # Stage 3: Grad-CAM + Segmentation (tumour only)
-        if predicted_class != 2:
-            print("[PREDICT] Tumour detected — running visual analysis...")
-            raw_heatmap = None
-
-            emit_progress(socket_id, "gradcam", "running")
-            t0 = time.time()
-            try:
-                raw_heatmap = get_gradcam_heatmap(
-                    model=classification_model, img_array=preprocessed,
-                    class_idx=predicted_class,
-                )
-            except Exception as e:
-                print(f"[PREDICT] ✗ Raw heatmap: {e}")
+        if analysis["gradcam_image"] is not None:
+            response["gradcam_performed"] = True
+            gradcam_image_key             = _persist_image("gradcam", analysis["gradcam_image"])
+            gradcam_maps                  = _persist_gradcam_maps(analysis.get("heatmaps"), image_np)
 
-            try:
-                gradcam_b64 = generate_gradcam(
-                    model=classification_model, img_array=preprocessed,
-                    class_idx=predicted_class, original_image=image_np,
-                )
-                if gradcam_b64:
-                    response["gradcam_image"]     = gradcam_b64
-                    response["gradcam_performed"] = True
-                    print("[PREDICT] ✓ Grad-CAM complete")
-
-                    # Persist for later viewing (doctor portal / history).
-                    # Best-effort: a storage failure must never break the
-                    # live result the patient is about to see.
-                    try:
-                        key = new_image_key("gradcam")
-                        if store_image(key, base64.b64decode(gradcam_b64)):
-                            gradcam_image_key = key
-                    except Exception as e:
-                        print(f"[PREDICT] ⚠ Grad-CAM persistence skipped: {e}")
-            except Exception as e:
-                print(f"[PREDICT] ✗ Grad-CAM: {e}")
-            emit_progress(socket_id, "gradcam", "done", duration=round(time.time()-t0, 2))
-
-            emit_progress(socket_id, "segmentation", "running")
-            t0 = time.time()
-            if raw_heatmap is not None:
-                try:
-                    buf = gradcam_pseudo_segmentation(image=image_np, heatmap=raw_heatmap)
-                    buf.seek(0)
-                    segment_bytes = buf.getvalue()
-                    response["segment_image"]          = base64.b64encode(segment_bytes).decode()
-                    response["segmentation_performed"] = True
-                    print("[PREDICT] ✓ Pseudo-segmentation complete")
-
-                    try:
-                        key = new_image_key("segment")
-                        if store_image(key, segment_bytes):
-                            segment_image_key = key
-                    except Exception as e:
-                        print(f"[PREDICT] ⚠ Segmentation persistence skipped: {e}")
-                except Exception as e:
-                    print(f"[PREDICT] ✗ Segmentation: {e}")
-            emit_progress(socket_id, "segmentation", "done", duration=round(time.time()-t0, 2))
-        else:
-            print("[PREDICT] No tumour — skipping visual analysis")
+        if analysis["segment_image"] is not None:
+            response["segmentation_performed"] = True
+            segment_image_key                  = _persist_image("segment", analysis["segment_image"])
 
         # Stage 4: LLM Report
-        emit_progress(socket_id, "report", "running")
-        t0 = time.time()
-        try:
-            report_text = generate_report(
-                class_name             = class_name,
-                confidence             = confidence,
-                segmentation_performed = response["segmentation_performed"],
-                gradcam_performed      = response["gradcam_performed"],
-                model_accuracy         = "94.92%",
-                patient_id             = patient_id,
-                patient_name           = own_profile.get("name") or current_user.get("full_name"),
-                patient_age            = own_profile.get("age"),
-                patient_gender         = own_profile.get("gender"),
-                patient_symptoms       = symptoms,
-            )
-            response["report"] = report_text
-            if report_text:
-                print(f"[PREDICT] ✓ Report generated ({len(report_text)} chars)")
-        except Exception as e:
-            print(f"[PREDICT] ✗ Report: {e}")
-        emit_progress(socket_id, "report", "done", duration=round(time.time()-t0, 2))
+        response["report"] = _write_report(socket_id, response, confidence, report_context)
 
         # Stage 5: Save to database
         try:
             scan_id = save_scan(
-                predicted_class        = class_name,
+                predicted_class        = response["class_name"],
                 confidence_score       = confidence,
                 segmentation_performed = response["segmentation_performed"],
                 gradcam_performed      = response["gradcam_performed"],
@@ -542,12 +1183,24 @@ def predict(current_user):
                 symptoms               = symptoms,
                 gradcam_image_key      = gradcam_image_key,
                 segment_image_key      = segment_image_key,
+                predictive_entropy     = analysis.get("mc_entropy"),
+                mutual_information     = analysis.get("mc_mutual_information"),
+                **gradcam_maps,
             )
             response["scan_id"] = scan_id
+            if gradcam_maps:
+                response["gradcam_classes_url"] = f"/scans/{scan_id}/gradcam"
             print(f"[PREDICT] ✓ Saved — scan_id={scan_id}\n")
         except Exception as e:
             print(f"[PREDICT] ✗ DB save: {e}")
 
+        for kind, key in (("gradcam", gradcam_image_key), ("segment", segment_image_key)):
+            if analysis[f"{kind}_image"] is not None:
+                response.update(_overlay_fields(
+                    kind, analysis[f"{kind}_image"], int(current_user["sub"]), scan_id, key, inline,
+                ))
+
+        response["timings"] = {**timings, "total_ms": round((time.time()-t0) * 1000, 1)}
         return jsonify(response), 200
 
     except ValueError as ve:
@@ -559,8 +1212,231 @@ def predict(current_user):
         return jsonify({"error": "Prediction failed"}), 500
 
 
+@app.route("/jobs/<job_id>", methods=["GET"])
+@require_auth
+def job_status(current_user, job_id):
+    """Poll a job-mode /predict. Visible to the submitting user or any doctor."""
+    job = job_runner.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Job {job_id} not found or expired"}), 404
+    if current_user.get("role") != "doctor" and job.owner_user_id != int(current_user["sub"]):
+        return jsonify({"error": "You do not have access to this job"}), 403
+    return jsonify(job.to_dict()), 200
+
+
+# ─── Volume Routes ────────────────────────────────────────────────────────────
+
+def _analyse_volume(frames: np.ndarray, load_slice, socket_id: str, patient_id: int,
+                    file_name: str, symptoms: str, t0: float, timings: dict,
+                    names: list = None) -> dict:
+    """
+    Shared tail of /predict-volume and /predict-series: batched adaptive
+    slice classification, study aggregation, Grad-CAM for the top-k
+    slices (full-resolution RGB from `load_slice(index)`) and the Scan row.
+
+    Returns:
+        dict: the response body
+    """
+    emit_progress(socket_id, "resnet", "running")
+    t1      = time.time()
+    sampled = classify_volume(frames, classification_engine.predict)
+    study   = aggregate_study(sampled["indices"], sampled["probs"])
+    timings["classify_ms"] = round((time.time() - t1) * 1000, 1)
+    emit_progress(socket_id, "resnet", "done", message=LARGE_MODEL_NAME,
+                  duration=round(time.time()-t1, 2))
+    print(f"[VOLUME] Classified {len(sampled['indices'])}/{sampled['n_slices']} slices "
+          f"({sampled['stopped_by']}, {sampled['elapsed_ms']:.0f} ms)")
+
+    response = _classification_response(study["probs"], patient_id, cached=False)
+    response["volume"] = {
+        "frames":     sampled["n_slices"],
+        "classified": int(len(sampled["indices"])),
+        "coarse":     sampled["coarse"],
+        "refined":    sampled["refined"],
+        "complete":   sampled["complete"],
+        "stopped_by": sampled["stopped_by"],
+        "top_k":      len(study["top_slices"]),
+    }
+    response["slices"] = [
+        {
+            "index":               int(index),
+            "class_name":          CLASS_NAMES.get(int(np.argmax(probs)), "Unknown"),
+            "suspicion":           round(float(score), 4),
+            "class_probabilities": {
+                CLASS_NAMES[i]: round(float(probs[i]), 4) for i in range(len(probs))
+            },
+            **({"file": names[int(index)]} if names is not None else {}),
+        }
+        for index, probs, score in zip(sampled["indices"], sampled["probs"], study["suspicion"])
+    ]
+
+    # Grad-CAM only for the top-k suspicious slices, and only for a tumour study
+    emit_progress(socket_id, "gradcam", "running")
+    t1                = time.time()
+    top_slices        = []
+    gradcam_image_key = None
+    predicted_class   = response["final_class"]
+    for index in study["top_slices"]:
+        entry = {"index": index, "gradcam_image": None}
+        if predicted_class != 2:
+            image_np = load_slice(index)
+            gradcam  = classify_with_gradcam(
+                model=classification_model, img_array=preprocess_classification(image_np),
+                class_idx=predicted_class, original_image=image_np,
+            )
+            if gradcam is not None and gradcam["overlay"]:
+                entry["gradcam_image"]      = to_base64(gradcam["overlay"])
+                entry["gradcam_image_type"] = mimetype(sniff_format(gradcam["overlay"]))
+                if gradcam_image_key is None:
+                    gradcam_image_key = _persist_image("gradcam", gradcam["overlay"])
+        top_slices.append(entry)
+    timings["gradcam_ms"] = round((time.time() - t1) * 1000, 1)
+    emit_progress(socket_id, "gradcam", "done", duration=round(time.time()-t1, 2))
+
+    response["top_slices"] = top_slices
+    if top_slices and top_slices[0]["gradcam_image"]:
+        response["gradcam_image"]      = top_slices[0]["gradcam_image"]
+        response["gradcam_image_type"] = top_slices[0]["gradcam_image_type"]
+        response["gradcam_performed"]  = True
+
+    try:
+        response["scan_id"] = save_scan(
+            predicted_class   = response["class_name"],
+            confidence_score  = float(np.max(study["probs"])),
+            gradcam_performed = response["gradcam_performed"],
+            file_name         = file_name,
+            patient_id        = patient_id,
+            symptoms          = symptoms,
+            gradcam_image_key = gradcam_image_key,
+        )
+        print(f"[VOLUME] ✓ Saved — scan_id={response['scan_id']}\n")
+    except Exception as e:
+        print(f"[VOLUME] ✗ DB save: {e}")
+
+    response["timings"] = {**timings, "total_ms": round((time.time()-t0) * 1000, 1)}
+    return response
+
+
+@app.route("/predict-volume", methods=["POST"])
+@require_auth
+def predict_volume(current_user):
+    """
+    Study-level analysis of a multi-frame DICOM. Form fields: image
+    (required, .dcm), symptoms, socket_id.
+
+    Every frame is windowed in one pass; slices are classified in batches
+    through ResNet50V2 with adaptive sampling (src/volume.py) so large
+    volumes stay within VOLUME_MAX_SLICES / VOLUME_BUDGET_MS. The study
+    prediction aggregates the VOLUME_TOP_K most suspicious slices, and
+    Grad-CAM is rendered for those slices only.
+    """
+    socket_id = request.form.get("socket_id")
+    if "image" not in request.files:
+        return jsonify({"error": "No image provided"}), 400
+
+    file = request.files["image"]
+    if file.filename == "":
+        return jsonify({"error": "Empty filename"}), 400
+
+    symptoms    = (request.form.get("symptoms") or "").strip() or None
+    own_profile = get_or_create_patient_profile(user_id=int(current_user["sub"]))
+
+    print(f"\n{'='*55}")
+    print(f"[VOLUME] User      : {current_user['email']}")
+    print(f"[VOLUME] File      : {file.filename}")
+    print(f"{'='*55}")
+
+    try:
+        emit_progress(socket_id, "preprocess", "running")
+        t0      = time.time()
+        frames  = load_volume(file)
+        timings = {"decode_ms": round((time.time() - t0) * 1000, 1)}
+        emit_progress(socket_id, "preprocess", "done", duration=round(time.time()-t0, 2))
+
+        response = _analyse_volume(
+            frames, lambda index: slice_rgb(frames[index]), socket_id,
+            own_profile["id"], file.filename, symptoms, t0, timings,
+        )
+        return jsonify(response), 200
+
+    except ValueError as ve:
+        emit_progress(socket_id, "preprocess", "error", message=str(ve))
+        return jsonify({"error": "Invalid file", "message": str(ve)}), 400
+    except Exception:
+        emit_progress(socket_id, "preprocess", "error", message="Unexpected error")
+        print(f"[VOLUME] Unexpected error:\n{traceback.format_exc()}")
+        return jsonify({"error": "Volume prediction failed"}), 500
+
+
+@app.route("/predict-series", methods=["POST"])
+@require_auth
+def predict_series(current_user):
+    """
+    Study-level analysis of a series of single-frame DICOM slices. Form
+    fields: series (a .zip of slices) OR slices (repeated, one .dcm each),
+    symptoms, socket_id.
+
+    Zip entries are streamed from the upload — never extracted to disk —
+    and decoded in a process pool (src/series.py), sorted by
+    ImagePositionPatient / InstanceNumber, then analysed exactly like
+    /predict-volume.
+    """
+    socket_id = request.form.get("socket_id")
+    archive   = request.files.get("series")
+    slices    = [f for f in request.files.getlist("slices") if f.filename]
+    if (archive is None or archive.filename == "") and not slices:
+        return jsonify({"error": "No series provided (send a 'series' zip or 'slices' files)"}), 400
+
+    symptoms    = (request.form.get("symptoms") or "").strip() or None
+    own_profile = get_or_create_patient_profile(user_id=int(current_user["sub"]))
+    file_name   = f"{len(slices)} slices" if slices else archive.filename
+
+    print(f"\n{'='*55}")
+    print(f"[SERIES] User      : {current_user['email']}")
+    print(f"[SERIES] Upload    : {file_name}")
+    print(f"{'='*55}")
+
+    try:
+        emit_progress(socket_id, "preprocess", "running")
+        t0      = time.time()
+        entries = file_entries(slices) if slices else zip_entries(archive.stream)
+        series  = ingest_series(entries)
+        timings = {"decode_ms": round((time.time() - t0) * 1000, 1)}
+        emit_progress(socket_id, "preprocess", "done", duration=round(time.time()-t0, 2))
+
+        names = series["names"]
+
+        def load_slice(index):
+            # Full resolution only for the few top-k slices that get Grad-CAM
+            name = names[index]
+            return slice_rgb(series_slice_image(series["readers"][name](), name))
+
+        response = _analyse_volume(
+            series["frames"], load_slice, socket_id, own_profile["id"],
+            file_name, symptoms, t0, timings, names=names,
+        )
+        response["volume"].update({"sorted_by": series["sorted_by"], "skipped": series["skipped"]})
+        return jsonify(response), 200
+
+    except ValueError as ve:
+        emit_progress(socket_id, "preprocess", "error", message=str(ve))
+        return jsonify({"error": "Invalid series", "message": str(ve)}), 400
+    except Exception:
+        emit_progress(socket_id, "preprocess", "error", message="Unexpected error")
+        print(f"[SERIES] Unexpected error:\n{traceback.format_exc()}")
+        return jsonify({"error": "Series prediction failed"}), 500
+
+
 # ─── Grad-CAM Comparison Route ────────────────────────────────────────────────
 
+def _gradcam_overlay(model, preprocessed: np.ndarray, class_idx: int, image_np: np.ndarray):
+    """Encoded Grad-CAM overlay bytes for one model, or None."""
+    gradcam = classify_with_gradcam(
+        model=model, img_array=preprocessed, class_idx=class_idx, original_image=image_np,
+    )
+    return gradcam["overlay"] if gradcam is not None else None
+
+
 @app.route("/compare-gradcam", methods=["POST"])
 @require_auth
 def compare_gradcam(current_user):
@@ -576,39 +1452,43 @@ def compare_gradcam(current_user):
         image_np     = load_image(file)
         preprocessed = preprocess_classification(image_np)
 
-        predictions     = classification_model.predict(preprocessed, verbose=0)
+        predictions     = classification_engine.predict(preprocessed)
         predicted_class = int(np.argmax(predictions[0]))
         confidence      = float(predictions[0][predicted_class])
         class_name      = CLASS_NAMES.get(predicted_class, "Unknown")
         print(f"[COMPARE] Prediction: {class_name} ({confidence:.2%})")
 
-        finetuned_b64 = generate_gradcam(
-            model=classification_model, img_array=preprocessed,
-            class_idx=predicted_class, original_image=image_np,
-        )
+        # Encoded overlays (raw bytes) — never saved, so served as artifacts
+        overlays = {"finetuned": _gradcam_overlay(classification_model, preprocessed,
+                                                  predicted_class, image_np)}
         print("[COMPARE] ✓ Fine-tuned Grad-CAM generated")
 
-        frozen_b64       = None
-        frozen_available = frozen_model is not None
+        overlays["frozen"] = None
+        frozen_available   = frozen_model is not None
         if frozen_model is not None:
             try:
-                frozen_b64 = generate_gradcam(
-                    model=frozen_model, img_array=preprocessed,
-                    class_idx=predicted_class, original_image=image_np,
-                )
+                overlays["frozen"] = _gradcam_overlay(frozen_model, preprocessed,
+                                                      predicted_class, image_np)
                 print("[COMPARE] ✓ Frozen Grad-CAM generated")
             except Exception as e:
                 print(f"[COMPARE] ✗ Frozen Grad-CAM failed: {e}")
         else:
             print("[COMPARE] ⚠ Frozen model not loaded")
 
-        return jsonify({
-            "frozen":           frozen_b64,
-            "finetuned":        finetuned_b64,
+        response = {
             "class_name":       class_name,
             "confidence":       f"{confidence:.2%}",
             "frozen_available": frozen_available,
-        }), 200
+            "image_type":       mimetype(GRADCAM_IMAGE_FORMAT),
+        }
+        inline = _inline_images()
+        owner  = int(current_user["sub"])
+        for name, data in overlays.items():
+            token                   = artifact_store.put(owner, data, mimetype(sniff_format(data))) if data else None
+            response[f"{name}_url"] = f"/artifacts/{token}" if token else None
+            if inline or (data and token is None):
+                response[name] = to_base64(data) if data else None
+        return jsonify(response), 200
 
     except Exception:
         print(f"[COMPARE] Error:\n{traceback.format_exc()}")
@@ -716,12 +1596,90 @@ def scan_image(current_user, scan_id, kind):
         image_bytes = read_image_bytes(key)
         if image_bytes is None:
             return jsonify({"error": "Image file missing on disk"}), 404
-        return Response(image_bytes, mimetype="image/png")
+        # Keys are unique per image and never rewritten — safe to cache
+        response = Response(image_bytes, mimetype=mimetype(format_for_key(key)))
+        response.headers["Cache-Control"] = f"private, max-age={IMAGE_CACHE_SECONDS}, immutable"
+        return response
     except Exception:
         print(f"[SCAN_IMAGE] Error:\n{traceback.format_exc()}")
         return jsonify({"error": "Failed to fetch image"}), 500
 
 
+def _gradcam_class_index(value, num_classes: int):
+    """?class= as an index ("1") or a class name ("Meningioma Tumor"); None if invalid."""
+    value = (value or "").strip()
+    if value.isdigit():
+        index = int(value)
+    else:
+        names = {name.lower(): i for i, name in CLASS_NAMES.items()}
+        index = names.get(value.lower())
+    return index if index is not None and 0 <= index < num_classes else None
+
+
+@app.route("/scans/<int:scan_id>/gradcam", methods=["GET"])
+@require_auth
+def scan_gradcam(current_user, scan_id):
+    """
+    Re-renders a saved scan's Grad-CAM for any class: ?class=<index|name>.
+
+    /predict stores every class's 7×7 map (float16, one backward pass —
+    see GRADCAM_ALL_CLASSES) plus, with GRADCAM_STORE_BACKGROUND, a
+    shrunk copy of the scan to draw on (else a blank canvas), so this
+    only decodes, blends and encodes; the model is never touched. Same
+    access rule as /scans/<id>/image/<kind>.
+    """
+    try:
+        owner_user_id = get_scan_owner_user_id(scan_id)
+        if owner_user_id is None:
+            return jsonify({"error": f"Scan {scan_id} not found"}), 404
+        if current_user.get("role") != "doctor" and owner_user_id != int(current_user["sub"]):
+            return jsonify({"error": "You do not have access to this scan"}), 403
+
+        stored = get_scan_gradcam_maps(scan_id)
+        if stored is None:
+            return jsonify({"error": "No Grad-CAM maps were saved for this scan"}), 404
+        heatmaps  = unpack_heatmaps(stored[0])
+        class_idx = _gradcam_class_index(request.args.get("class"), len(heatmaps))
+        if class_idx is None:
+            return jsonify({"error": f"class must be an index 0–{len(heatmaps) - 1} or a class name"}), 400
+
+        if stored[1]:
+            background = load_image_bytes(stored[1])
+            if background is None:
+                return jsonify({"error": "Grad-CAM background missing from storage"}), 404
+            background = decode_image(background)
+        else:
+            background = np.zeros((RENDER_HEATMAP_SIDE, RENDER_HEATMAP_SIDE, 3), dtype=np.uint8)
+
+        image_bytes = render_gradcam(background, heatmaps[class_idx])
+        response    = Response(image_bytes, mimetype=mimetype(sniff_format(image_bytes)))
+        response.headers["Cache-Control"] = f"private, max-age={IMAGE_CACHE_SECONDS}"
+        return response
+    except Exception:
+        print(f"[SCAN_GRADCAM] Error:\n{traceback.format_exc()}")
+        return jsonify({"error": "Failed to render Grad-CAM"}), 500
+
+
+@app.route("/artifacts/<token>", methods=["GET"])
+@require_auth
+def artifact(current_user, token):
+    """
+    Serves a short-lived overlay that has no saved scan behind it
+    (/compare-gradcam heatmaps, or a /predict overlay whose storage write
+    or DB save failed). Same owner-or-doctor rule as the scan routes;
+    unknown and expired tokens are indistinguishable.
+    """
+    item = artifact_store.get(token)
+    if item is None:
+        return jsonify({"error": "Artifact not found or expired"}), 404
+    owner_user_id, image_bytes, image_type = item
+    if current_user.get("role") != "doctor" and owner_user_id != int(current_user["sub"]):
+        return jsonify({"error": "You do not have access to this artifact"}), 403
+    response = Response(image_bytes, mimetype=image_type)
+    response.headers["Cache-Control"] = f"private, max-age={artifact_store.ttl_seconds}, immutable"
+    return response
+
+
 # ─── Stats / Analytics ────────────────────────────────────────────────────────
 
 @app.route("/stats", methods=["GET"])
@@ -818,6 +1776,23 @@ def model_performance():
         return jsonify({"error": "Failed to read performance data"}), 500
 
 
+# ─── Inference Metrics (public) ──────────────────────────────────────────────
+
+@app.route("/metrics/inference", methods=["GET"])
+def inference_metrics():
+    """Queue depth + batch-size histograms for tuning INFERENCE_MAX_* settings."""
+    return jsonify({
+        "classification": classification_engine.stats(),
+        "result_cache":   result_cache.stats(),
+        "artifacts":      artifact_store.stats(),
+        "jobs":           job_runner.stats(),
+        "report_client":  groq_client.stats(),
+        "models":         model_registry_stats(),
+        "cascade":        cascade.stats() if cascade is not None else None,
+        "cascade_engine": cascade_engine.stats(),
+    }), 200
+
+
 # ─── Doctor Routes ────────────────────────────────────────────────────────────
 
 @app.route("/doctor/stats", methods=["GET"])
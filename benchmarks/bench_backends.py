@@ -0,0 +1,96 @@
+"""
+benchmarks/bench_backends.py
+────────────────────────────
+Keras Model.predict vs TFLite/XNNPACK: per-call latency and resident memory.
+
+Each backend runs in its own subprocess, so the RSS figures are what one
+serving worker would hold for that backend alone (interpreter + weights
++ runtime), not a mix of both.
+
+Uses an untrained ResNet50V2 classifier with the same layout as
+train_all_models.py, so no model files are needed.
+
+RUN:
+  python benchmarks/bench_backends.py [--calls 30] [--batch 1 8]
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+
+
+def _run_backend(name, keras_path, tflite_dir, batch_sizes, calls, queue):
+    os.environ["TFLITE_MODEL_DIR"] = tflite_dir
+    import tensorflow as tf  # noqa: F401  — runtime import counts towards the baseline
+    from src.backends import load_backend
+
+    rss0    = _rss_mb()
+    backend = load_backend(keras_path, name)
+    rss_load = _rss_mb() - rss0
+
+    results = {}
+    for bs in batch_sizes:
+        batch = np.random.default_rng(0).random((bs, 224, 224, 3), dtype=np.float32)
+        backend.predict(batch)                     # warm-up / allocate
+        samples = []
+        for _ in range(calls):
+            t0 = time.perf_counter()
+            backend.predict(batch)
+            samples.append(time.perf_counter() - t0)
+        results[bs] = (np.median(samples) * 1000, np.percentile(samples, 95) * 1000)
+    queue.put((name, rss_load, _rss_mb() - rss0, results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[3])
+    parser.add_argument("--calls", type=int, default=30)
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 8])
+    args = parser.parse_args()
+
+    from benchmarks.bench_gradcam import build_classifier
+    from src.backends import export_tflite, tflite_path_for
+    from src.utils import load_local_model
+
+    workdir    = tempfile.mkdtemp(prefix="bench_backends_")
+    keras_path = os.path.join(workdir, "ResNet50V2.keras")
+    tflite_dir = os.path.join(workdir, "tflite")
+    build_classifier().save(keras_path)
+    export_tflite(load_local_model(keras_path), tflite_path_for(keras_path, tflite_dir))
+
+    ctx   = mp.get_context("spawn")
+    queue = ctx.Queue()
+    rows  = []
+    for name in ("keras", "tflite"):
+        p = ctx.Process(target=_run_backend,
+                        args=(name, keras_path, tflite_dir, args.batch, args.calls, queue))
+        p.start()
+        rows.append(queue.get())
+        p.join()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    print("=" * 70)
+    print(f"BACKEND COMPARISON  (ResNet50V2, 224×224, {args.calls} calls, CPU)")
+    print("=" * 70)
+    print(f"  {'backend':<8} {'batch':>5} {'median (ms)':>12} {'p95 (ms)':>10} "
+          f"{'RSS load (MB)':>14} {'RSS total (MB)':>15}")
+    for name, rss_load, rss_total, results in rows:
+        for bs, (median, p95) in results.items():
+            print(f"  {name:<8} {bs:>5} {median:>12.1f} {p95:>10.1f} "
+                  f"{rss_load:>14.0f} {rss_total:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+benchmarks/bench_clean_mask.py
+──────────────────────────────
+src.inference._clean_mask on a noisy mask: the previous implementation
+(full-resolution morphology, `scores[labels == i].mean()` per component)
+vs the bounded working grid + np.bincount statistics.
+
+The masks hold 36 separate blobs plus salt noise, so dozens of components
+survive the morphology — exactly where the per-component loop was
+O(components × pixels).
+
+RUN:
+  python benchmarks/bench_clean_mask.py [--sizes 512 1024 2048] [--noise 0.01] [--calls 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from src.inference import CLEAN_MASK_MAX_SIDE, _clean_mask
+
+
+def legacy_clean_mask(binary_mask, raw_scores):
+    """Raw-score branch of _clean_mask before v2.1 (per-component prints dropped)."""
+    mask = (cv2.GaussianBlur(binary_mask.astype(np.float32), (21, 21), sigmaX=8, sigmaY=8) > 0.25).astype(np.uint8)
+    H, W = mask.shape
+    k = max(15, min(H, W) // 20)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (k, k)), iterations=2)
+    k = max(7, min(H, W) // 40)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (k, k)), iterations=1)
+    n, labels, _, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    if n <= 1:
+        return mask, n - 1
+    best = max(range(1, n), key=lambda i: float(raw_scores[labels == i].mean()))
+    return (labels == best).astype(np.uint8), n - 1
+
+
+def noisy_mask(size: int, noise: float, grid: int = 6, seed: int = 0) -> tuple:
+    """grid × grid jittered discs (one component each) + salt noise, and their score map."""
+    rng     = np.random.default_rng(seed)
+    mask    = np.zeros((size, size), np.uint8)
+    scores  = np.zeros((size, size), np.float32)
+    spacing = size / grid
+    for gy in range(grid):
+        for gx in range(grid):
+            cx = int((gx + 0.5 + rng.uniform(-0.1, 0.1)) * spacing)
+            cy = int((gy + 0.5 + rng.uniform(-0.1, 0.1)) * spacing)
+            r  = int(spacing * rng.uniform(0.12, 0.2))
+            cv2.circle(mask, (cx, cy), r, 1, -1)
+            cv2.circle(scores, (cx, cy), r, float(rng.uniform(0.5, 0.95)), -1)   # one confidence per blob
+    mask  |= (rng.random((size, size)) < noise).astype(np.uint8)
+    return mask, scores
+
+
+def median_ms(fn, calls: int) -> float:
+    samples = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return float(np.median(samples) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[3])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[512, 1024, 2048])
+    parser.add_argument("--noise", type=float, default=0.01)
+    parser.add_argument("--calls", type=int, default=3)
+    args = parser.parse_args()
+
+    print("=" * 74)
+    print(f"_clean_mask  (raw-score branch, noise {args.noise}, working grid ≤ {CLEAN_MASK_MAX_SIDE} px)")
+    print("=" * 74)
+    print(f"  {'size':>6} {'components':>11} {'legacy':>10} {'new':>9} {'speedup':>8} {'IoU':>6}")
+
+    for size in args.sizes:
+        mask, scores = noisy_mask(size, args.noise)
+        old, n = legacy_clean_mask(mask, scores)
+        new    = _clean_mask(mask, raw_scores=scores)
+        t_old  = median_ms(lambda: legacy_clean_mask(mask, scores), args.calls)
+        t_new  = median_ms(lambda: _clean_mask(mask, raw_scores=scores), args.calls)
+        agree  = np.logical_and(old, new).sum() / max(1, np.logical_or(old, new).sum())
+        print(f"  {size:>5}² {n:>11} {t_old:>8.1f}ms {t_new:>7.1f}ms {t_old / t_new:>7.1f}× {agree:>6.3f}")
+
+    print("\n  IoU = overlap of the selected component with the legacy result")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+benchmarks/bench_decode.py
+──────────────────────────
+Upload decoding: full-resolution PIL decode (the previous _load_standard)
+vs the reduced decode in src/preprocess.py (JPEG draft / Image.reduce
+down to DECODE_MAX_SIDE), for oversized JPEG and PNG uploads.
+
+Sources are Examples/Example.jpeg upscaled, so no dataset is needed.
+
+RUN:
+  python benchmarks/bench_decode.py [--calls 10] [--sizes 2000 4000 6000]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image
+
+from src.preprocess import DECODE_MAX_SIDE, _decode_reduced
+
+EXAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       "Examples", "Example.jpeg")
+
+
+def legacy_decode(data: bytes) -> np.ndarray:
+    return np.array(Image.open(io.BytesIO(data)).convert("RGB"), dtype=np.uint8)
+
+
+def reduced_decode(data: bytes) -> np.ndarray:
+    return np.array(_decode_reduced(Image.open(io.BytesIO(data))).convert("RGB"), dtype=np.uint8)
+
+
+def median_ms(fn, calls: int) -> float:
+    fn()
+    samples = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return float(np.median(samples) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[3])
+    parser.add_argument("--calls", type=int, default=10)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 4000, 6000])
+    args = parser.parse_args()
+
+    example = Image.open(EXAMPLE).convert("RGB")
+
+    print("=" * 78)
+    print(f"UPLOAD DECODING  (DECODE_MAX_SIDE={DECODE_MAX_SIDE}, {args.calls} calls)")
+    print("=" * 78)
+    print(f"  {'upload':<16} {'full (ms)':>10} {'full MB':>8} "
+          f"{'reduced (ms)':>13} {'reduced MB':>11} {'shape':>14}")
+    for side in args.sizes:
+        image = example.resize((side, side * 3 // 4))
+        for fmt in ("JPEG", "PNG"):
+            buf = io.BytesIO()
+            image.save(buf, format=fmt, quality=92)
+            data = buf.getvalue()
+
+            full    = legacy_decode(data)
+            reduced = reduced_decode(data)
+            t_full  = median_ms(lambda: legacy_decode(data), args.calls)
+            t_red   = median_ms(lambda: reduced_decode(data), args.calls)
+            print(f"  {fmt + ' ' + str(side) + 'px':<16} {t_full:>10.1f} {full.nbytes / 1e6:>8.1f} "
+                  f"{t_red:>13.1f} {reduced.nbytes / 1e6:>11.1f} "
+                  f"{f'{reduced.shape[1]}×{reduced.shape[0]}':>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+benchmarks/bench_dicom.py
+─────────────────────────
+DICOM upload → uint8 RGB: the previous _load_dicom (temp file + dcmread
+on the path + float32 rescale/window of the whole array) vs the
+in-memory loader with LUT windowing in src/preprocess.py.
+
+Synthetic uncompressed CT-like files (int16, slope/intercept + window
+tags), so no dataset is needed.
+
+RUN:
+  python benchmarks/bench_dicom.py [--calls 10]
+"""
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pydicom
+from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.uid import ExplicitVRLittleEndian, SecondaryCaptureImageStorage, generate_uid
+from werkzeug.datastructures import FileStorage
+
+from src.preprocess import load_image
+
+CASES = {
+    "512² single":         (None, 512),
+    "2048² single":        (None, 2048),
+    "64 × 512² multi":     (64, 512),
+}
+
+
+def make_dicom(frames, side) -> bytes:
+    rng    = np.random.default_rng(0)
+    shape  = (frames, side, side) if frames else (side, side)
+    pixels = rng.integers(-1024, 3000, shape).astype(np.int16)
+
+    ds = Dataset()
+    ds.file_meta = FileMetaDataset()
+    ds.file_meta.TransferSyntaxUID          = ExplicitVRLittleEndian
+    ds.file_meta.MediaStorageSOPClassUID    = SecondaryCaptureImageStorage
+    ds.file_meta.MediaStorageSOPInstanceUID = generate_uid()
+    ds.SOPClassUID, ds.SOPInstanceUID = SecondaryCaptureImageStorage, generate_uid()
+    ds.Rows = ds.Columns = side
+    ds.SamplesPerPixel, ds.PhotometricInterpretation = 1, "MONOCHROME2"
+    ds.BitsAllocated, ds.BitsStored, ds.HighBit, ds.PixelRepresentation = 16, 16, 15, 1
+    ds.RescaleSlope, ds.RescaleIntercept = 1, -1024
+    ds.WindowCenter, ds.WindowWidth      = 40, 400
+    if frames:
+        ds.NumberOfFrames = frames
+    ds.PixelData = pixels.tobytes()
+    buf = io.BytesIO()
+    try:
+        ds.save_as(buf, enforce_file_format=True)
+    except TypeError:
+        ds.save_as(buf, write_like_original=False)
+    return buf.getvalue()
+
+
+def legacy_load(data: bytes) -> np.ndarray:
+    """The previous _load_dicom, minus its log lines."""
+    with tempfile.NamedTemporaryFile(suffix=".dcm", delete=False) as tmp:
+        tmp.write(data)
+        tmp_path = tmp.name
+    try:
+        ds = pydicom.dcmread(tmp_path)
+    finally:
+        os.unlink(tmp_path)
+    px = ds.pixel_array.astype(np.float32)
+    px = px * float(getattr(ds, "RescaleSlope", 1)) + float(getattr(ds, "RescaleIntercept", 0))
+    lower = float(ds.WindowCenter) - float(ds.WindowWidth) / 2.0
+    upper = float(ds.WindowCenter) + float(ds.WindowWidth) / 2.0
+    px = np.clip(px, lower, upper)
+    px = np.clip((px - lower) / (upper - lower) * 255.0, 0, 255).astype(np.uint8)
+    if px.ndim == 3:
+        px = px[px.shape[0] // 2]
+    return np.stack([px] * 3, axis=-1)
+
+
+def new_load(data: bytes) -> np.ndarray:
+    return load_image(FileStorage(stream=io.BytesIO(data), filename="scan.dcm"))
+
+
+def median_ms(fn, calls: int) -> float:
+    fn()
+    samples = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return float(np.median(samples) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[3])
+    parser.add_argument("--calls", type=int, default=10)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print(f"DICOM LOADING  ({args.calls} calls)")
+    print("=" * 70)
+    print(f"  {'file':<18} {'size (MB)':>10} {'legacy (ms)':>12} {'in-memory (ms)':>15} {'speed-up':>9}")
+
+    sys.stdout, real_stdout = io.StringIO(), sys.stdout     # silence the loader's log lines
+    rows = []
+    try:
+        for name, (frames, side) in CASES.items():
+            data = make_dicom(frames, side)
+            assert np.abs(legacy_load(data).astype(int) - new_load(data)).max() <= 1
+            rows.append((name, len(data) / 1e6,
+                         median_ms(lambda: legacy_load(data), args.calls),
+                         median_ms(lambda: new_load(data), args.calls)))
+    finally:
+        sys.stdout = real_stdout
+
+    for name, size, old, new in rows:
+        print(f"  {name:<18} {size:>10.1f} {old:>12.1f} {new:>15.1f} {old / new:>8.1f}×")
+    print("\n✓ Outputs match the legacy pipeline within 1 grey level")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+benchmarks/bench_encoding.py
+────────────────────────────
+Overlay encoding cost per image: encode time and encoded bytes for the
+formats src/encoding.py can produce, on a Grad-CAM overlay and a
+segmentation overlay of a synthetic MRI slice.
+
+"legacy" is the path /predict used before v2.1 for the Grad-CAM image:
+Pillow PNG (zlib 6) → base64 in gradcam.py → base64-decode in app.py for
+storage → base64 again for the response. The other rows encode once and
+base64 once (the JSON response still needs it).
+
+RUN:
+  python benchmarks/bench_encoding.py [--sizes 512 1024] [--calls 3]
+"""
+
+import argparse
+import base64
+import os
+import sys
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from src.encoding import encode_image, to_base64
+from src.render import heatmap_overlay, mask_overlay
+
+CONFIGS = [
+    ("png  level 1",   "png",  1,   "cv2"),
+    ("png  level 3",   "png",  3,   "cv2"),
+    ("png  level 6",   "png",  6,   "cv2"),
+    ("png  pillow 6",  "png",  6,   "pillow"),
+    ("jpeg q95",       "jpeg", 95,  "cv2"),
+    ("jpeg q85",       "jpeg", 85,  "cv2"),
+    ("webp q90",       "webp", 90,  "cv2"),
+    ("webp q80",       "webp", 80,  "cv2"),
+    ("webp lossless",  "webp", 101, "cv2"),
+]
+
+
+def slice_rgb(size: int, seed: int = 0) -> np.ndarray:
+    """An elliptical 'head' with texture and noise — compresses like a real slice."""
+    rng    = np.random.default_rng(seed)
+    y, x   = np.mgrid[:size, :size] / size - 0.5
+    head   = np.exp(-((y / 0.38) ** 2 + (x / 0.32) ** 2) ** 3)
+    detail = cv2.GaussianBlur(rng.random((size, size)).astype(np.float32), (0, 0), size / 100)
+    grey   = np.clip(head * (120 + 400 * (detail - 0.5)) + rng.normal(0, 4, (size, size)), 0, 255)
+    return np.repeat(grey.astype(np.uint8)[..., None], 3, axis=-1)
+
+
+def legacy(rgb: np.ndarray) -> str:
+    buf = BytesIO()
+    Image.fromarray(rgb).save(buf, format="PNG")
+    b64    = base64.b64encode(buf.getvalue()).decode("utf-8")      # gradcam.py
+    stored = base64.b64decode(b64)                                 # app.py → storage
+    return base64.b64encode(stored).decode()                       # app.py → response
+
+
+def median_ms(fn, calls: int) -> float:
+    fn()
+    samples = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return float(np.median(samples) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[3])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[512, 1024])
+    parser.add_argument("--calls", type=int, default=3)
+    args = parser.parse_args()
+
+    print("=" * 72)
+    print("OVERLAY ENCODING  (time = encode + one base64 for the response)")
+    print("=" * 72)
+
+    for size in args.sizes:
+        scan = slice_rgb(size)
+        mask = np.zeros((size, size), np.uint8)
+        cv2.circle(mask, (size // 2, size // 3), size // 8, 1, -1)
+        images = {
+            "gradcam": heatmap_overlay(scan, np.random.default_rng(1).random((7, 7)).astype(np.float32)),
+            "segment": mask_overlay(scan, mask),
+        }
+        for kind, rgb in images.items():
+            print(f"\n  {size}² {kind} overlay")
+            print(f"    {'config':<15} {'time':>9} {'KB':>8} {'vs legacy':>10}")
+            if kind == "gradcam":
+                t_legacy = median_ms(lambda: legacy(rgb), args.calls)
+                size_kb  = len(base64.b64decode(legacy(rgb))) / 1024
+                print(f"    {'legacy':<15} {t_legacy:>7.1f}ms {size_kb:>8.0f} {'':>10}")
+            for label, fmt, quality, encoder in CONFIGS:
+                encoded = encode_image(rgb, fmt, quality, encoder)
+                ms      = median_ms(lambda: to_base64(encode_image(rgb, fmt, quality, encoder)), args.calls)
+                ratio   = f"{t_legacy / ms:>9.1f}×" if kind == "gradcam" else ""
+                print(f"    {label:<15} {ms:>7.1f}ms {len(encoded) / 1024:>8.0f} {ratio:>10}")
+
+    print("\n  defaults: Grad-CAM png level 1, segmentation jpeg q95 (src/encoding.py)")
+
+
+if __name__ == "__main__":
+    main()
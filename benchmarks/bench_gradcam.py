@@ -0,0 +1,109 @@
+"""
+benchmarks/bench_gradcam.py
+───────────────────────────
+Per-call Grad-CAM latency: legacy eager path vs the cached tf.function graph.
+
+The legacy path is reproduced inline exactly as src/gradcam.py used to run
+it — rebuild the conv extractor on every call, then walk the ResNet and
+Sequential layers eagerly inside GradientTape with next(...) index searches.
+
+Uses an untrained ResNet50V2 classifier with the same layout as
+train_all_models.py, so no model files are needed.
+
+RUN:
+  python benchmarks/bench_gradcam.py [--calls 20]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras import layers
+
+from src.gradcam import RESNET_LAST_CONV_LAYER, get_gradcam_heatmap
+
+
+def build_classifier() -> tf.keras.Model:
+    base = tf.keras.applications.ResNet50V2(
+        include_top=False, weights=None, input_shape=(224, 224, 3),
+    )
+    return tf.keras.Sequential([
+        base,
+        layers.GlobalAveragePooling2D(),
+        layers.BatchNormalization(),
+        layers.Dense(256, activation="relu"),
+        layers.Dropout(0.5),
+        layers.Dense(4, activation="softmax"),
+    ], name="ResNet50V2")
+
+
+def legacy_heatmap(model, img_array, class_idx, layer_name=RESNET_LAST_CONV_LAYER):
+    resnet = next(l for l in model.layers if "resnet50v2" in l.name.lower())
+    extractor = tf.keras.Model(resnet.input, resnet.get_layer(layer_name).output)
+
+    with tf.GradientTape() as tape:
+        conv_outputs = extractor(tf.cast(img_array, tf.float32), training=False)
+        tape.watch(conv_outputs)
+        conv_idx = next(i for i, l in enumerate(resnet.layers) if l.name == layer_name)
+        x = conv_outputs
+        for layer in resnet.layers[conv_idx + 1:]:
+            x = layer(x, training=False)
+        resnet_idx = next(
+            i for i, l in enumerate(model.layers) if "resnet50v2" in l.name.lower()
+        )
+        for layer in model.layers[resnet_idx + 1:]:
+            x = layer(x, training=False)
+        class_score = x[:, class_idx]
+
+    grads   = tape.gradient(class_score, conv_outputs)
+    pooled  = tf.reduce_mean(grads, axis=(0, 1, 2))
+    heatmap = tf.maximum(tf.squeeze(conv_outputs[0] @ pooled[..., tf.newaxis]), 0).numpy()
+    return heatmap / heatmap.max() if heatmap.max() > 0 else heatmap
+
+
+def time_calls(fn, calls: int) -> tuple:
+    t0    = time.perf_counter()
+    fn()
+    first = time.perf_counter() - t0
+
+    samples = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return first * 1000, np.median(samples) * 1000, np.percentile(samples, 95) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--calls", type=int, default=20)
+    args = parser.parse_args()
+
+    model = build_classifier()
+    img   = np.random.default_rng(0).random((1, 224, 224, 3), dtype=np.float32)
+
+    print("=" * 70)
+    print(f"GRAD-CAM LATENCY  ({args.calls} calls, 224×224, CPU)")
+    print("=" * 70)
+    print(f"  {'path':<18} {'first (ms)':>12} {'median (ms)':>12} {'p95 (ms)':>10}")
+
+    for name, fn in (
+        ("legacy eager",   lambda: legacy_heatmap(model, img, 0)),
+        ("cached graph",   lambda: get_gradcam_heatmap(model, img, 0)),
+    ):
+        first, median, p95 = time_calls(fn, args.calls)
+        print(f"  {name:<18} {first:>12.1f} {median:>12.1f} {p95:>10.1f}")
+
+    np.testing.assert_allclose(
+        legacy_heatmap(model, img, 0), get_gradcam_heatmap(model, img, 0), atol=1e-4,
+    )
+    print("\n✓ Heatmaps match between paths")
+
+
+if __name__ == "__main__":
+    main()
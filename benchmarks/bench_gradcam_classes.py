@@ -0,0 +1,101 @@
+"""
+benchmarks/bench_gradcam_classes.py
+───────────────────────────────────
+Grad-CAM for every class: one single-class pass per class (what showing
+the runner-up class used to cost) vs classify_with_gradcam(all_classes=True)
+— one forward pass and the softmax Jacobian w.r.t. conv5_block3_out in a
+single tape — plus the size of the stored maps and the model-free
+re-render behind /scans/<id>/gradcam.
+
+Uses an untrained ResNet50V2 classifier with the same layout as
+train_all_models.py, so no model files are needed.
+
+RUN:
+  python benchmarks/bench_gradcam_classes.py [--calls 10] [--size 512]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras import layers
+
+from src.encoding import decode_image, encode_image
+from src.gradcam import (
+    classify_with_gradcam, get_gradcam_heatmap, pack_heatmaps, render_gradcam, unpack_heatmaps,
+)
+
+
+def build_classifier() -> tf.keras.Model:
+    base = tf.keras.applications.ResNet50V2(
+        include_top=False, weights=None, input_shape=(224, 224, 3),
+    )
+    return tf.keras.Sequential([
+        base,
+        layers.GlobalAveragePooling2D(),
+        layers.BatchNormalization(),
+        layers.Dense(256, activation="relu"),
+        layers.Dropout(0.5),
+        layers.Dense(4, activation="softmax"),
+    ], name="ResNet50V2")
+
+
+def median_ms(fn, calls: int) -> float:
+    fn()                                                   # trace / warm up
+    samples = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return float(np.median(samples) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[3])
+    parser.add_argument("--calls", type=int, default=10)
+    parser.add_argument("--size",  type=int, default=512, help="scan side for the re-render")
+    args = parser.parse_args()
+
+    model = build_classifier()
+    rng   = np.random.default_rng(0)
+    img   = rng.random((1, 224, 224, 3), dtype=np.float32)
+    scan  = rng.integers(0, 255, (args.size, args.size, 3), dtype=np.uint8)
+
+    def per_class():
+        return [get_gradcam_heatmap(model, img, class_idx=c) for c in range(4)]
+
+    def all_classes():
+        return classify_with_gradcam(model, img, class_idx=0, all_classes=True)["heatmaps"]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        t_loop  = median_ms(per_class, args.calls)
+        t_one   = median_ms(lambda: get_gradcam_heatmap(model, img, class_idx=0), args.calls)
+        t_jac   = median_ms(all_classes, args.calls)
+        maps    = all_classes()
+        blob    = pack_heatmaps(maps)
+        base    = encode_image(scan, "jpeg")
+        t_draw  = median_ms(lambda: render_gradcam(decode_image(base), unpack_heatmaps(blob)[1]),
+                            args.calls)
+
+    print("=" * 62)
+    print(f"ALL-CLASS GRAD-CAM  (ResNet50V2, 224×224, {args.calls} calls, CPU)")
+    print("=" * 62)
+    print(f"  {'single class, one pass':<36} {t_one:>9.1f} ms")
+    print(f"  {'4 classes, 4 passes':<36} {t_loop:>9.1f} ms")
+    print(f"  {'4 classes, one tape (Jacobian)':<36} {t_jac:>9.1f} ms  ({t_loop / t_jac:.1f}×)")
+    print(f"  {f're-render one class at {args.size}² (no model)':<36} {t_draw:>9.1f} ms")
+    print(f"\n  stored maps: {maps.shape} float16 → {len(blob)} B per scan")
+
+    np.testing.assert_allclose(maps, np.stack(per_class()), atol=1e-4)
+    print("✓ Jacobian maps match the per-class passes")
+
+
+if __name__ == "__main__":
+    main()
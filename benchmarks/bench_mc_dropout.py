@@ -0,0 +1,84 @@
+"""
+benchmarks/bench_mc_dropout.py
+──────────────────────────────
+MC-dropout overhead per scan: the plain forward pass vs T full dropout
+passes vs src.mc_dropout (backbone once + one batched head call).
+
+Uses an untrained ResNet50V2 classifier with the same layout as
+train_all_models.py, so no model files are needed.
+
+RUN:
+  python benchmarks/bench_mc_dropout.py [--calls 10] [--samples 10 20 50]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras import layers
+
+from src.mc_dropout import estimate_uncertainty
+
+
+def build_classifier() -> tf.keras.Model:
+    base = tf.keras.applications.ResNet50V2(
+        include_top=False, weights=None, input_shape=(224, 224, 3),
+    )
+    return tf.keras.Sequential([
+        base,
+        layers.GlobalAveragePooling2D(),
+        layers.BatchNormalization(),
+        layers.Dense(256, activation="relu"),
+        layers.Dropout(0.5),
+        layers.Dense(4, activation="softmax"),
+    ], name="ResNet50V2")
+
+
+def naive_mc(forward, img, samples: int) -> np.ndarray:
+    """T full forward passes with dropout on — what MC dropout costs unsplit."""
+    return np.stack([forward(img).numpy()[0] for _ in range(samples)])
+
+
+def median_ms(fn, calls: int) -> float:
+    fn()                                            # trace / warm up
+    samples = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return float(np.median(samples) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[3])
+    parser.add_argument("--calls",   type=int, default=10)
+    parser.add_argument("--samples", type=int, nargs="+", default=[10, 20, 50])
+    args = parser.parse_args()
+
+    model   = build_classifier()
+    img     = np.random.default_rng(0).random((1, 224, 224, 3), dtype=np.float32)
+    plain   = tf.function(lambda x: model(x, training=False))
+    dropout = tf.function(lambda x: model(x, training=True))   # BN in training mode too — upper bound
+
+    print("=" * 70)
+    print(f"MC DROPOUT OVERHEAD  ({args.calls} calls, 224×224, CPU)")
+    print("=" * 70)
+    base = median_ms(lambda: plain(img), args.calls)
+    print(f"  single forward pass         : {base:8.1f} ms")
+    print(f"\n  {'T':>4} {'T full passes (ms)':>20} {'split head (ms)':>17} {'overhead':>10}")
+
+    for t in args.samples:
+        naive = median_ms(lambda: naive_mc(dropout, img, t), max(1, args.calls // 5))
+        split = median_ms(lambda: estimate_uncertainty(model, img, samples=t), args.calls)
+        print(f"  {t:>4} {naive:>20.1f} {split:>17.1f} {split / base:>9.2f}×")
+
+    print("\n  'overhead' = split-head MC dropout relative to the single forward pass")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+benchmarks/bench_predict_payload.py
+───────────────────────────────────
+/predict response body with overlays inlined as base64 (images=base64,
+the only behaviour before v2.1) vs overlay URLs (the default now):
+JSON bytes on the wire and flask.jsonify serialisation time.
+
+Overlays are a Grad-CAM PNG and a segmentation JPEG of a synthetic slice
+rendered and encoded exactly as /predict does (src/render.py,
+src/encoding.py defaults). The URL mode's images are fetched separately
+and are cacheable by the browser; their bytes are listed for reference.
+
+RUN:
+  python benchmarks/bench_predict_payload.py [--sizes 512 1024 2048] [--calls 20]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+from flask import Flask, jsonify
+
+from src.encoding import encode_overlay, mimetype, sniff_format, to_base64
+from src.render import heatmap_overlay, mask_overlay
+
+
+def overlays(size: int) -> dict:
+    rng  = np.random.default_rng(0)
+    y, x = np.mgrid[:size, :size] / size - 0.5
+    head = np.exp(-((y / 0.38) ** 2 + (x / 0.32) ** 2) ** 3)
+    grey = np.clip(head * 140 + rng.normal(0, 6, (size, size)), 0, 255).astype(np.uint8)
+    scan = np.repeat(grey[..., None], 3, axis=-1)
+    mask = np.zeros((size, size), np.uint8)
+    cv2.circle(mask, (size // 2, size // 3), size // 8, 1, -1)
+    return {
+        "gradcam": encode_overlay(heatmap_overlay(scan, rng.random((7, 7)).astype(np.float32)), "gradcam"),
+        "segment": encode_overlay(mask_overlay(scan, mask), "segment"),
+    }
+
+
+def response(images: dict, inline: bool) -> dict:
+    body = {
+        "final_class": 0, "class_name": "Glioma Tumor", "confidence": "85.00%",
+        "model_used": "ResNet50V2", "model_accuracy": "94.92%",
+        "segmentation_performed": True, "gradcam_performed": True,
+        "report": "FINDINGS: " + "x" * 1500, "scan_id": 42, "patient_id": 1,
+        "class_probabilities": {"Glioma Tumor": 0.85, "Meningioma Tumor": 0.05,
+                                "No Tumor": 0.05, "Pituitary Tumor": 0.05},
+        "cached": False, "uncertainty": None, "mc_dropout": None,
+        "timings": {"preprocess_ms": 12.4, "classify_ms": 61.0, "total_ms": 1840.2},
+    }
+    for kind, data in images.items():
+        body[f"{kind}_image_url"]  = f"/scans/42/image/{kind}"
+        body[f"{kind}_image_type"] = mimetype(sniff_format(data))
+        if inline:
+            body[f"{kind}_image"] = to_base64(data)
+    return body
+
+
+def median_ms(fn, calls: int) -> float:
+    fn()
+    samples = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return float(np.median(samples) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[3])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[512, 1024, 2048])
+    parser.add_argument("--calls", type=int, default=20)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    print("=" * 74)
+    print("/predict RESPONSE PAYLOAD  (base64 inline vs overlay URLs)")
+    print("=" * 74)
+    print(f"  {'size':>6} {'mode':>7} {'JSON KB':>9} {'base64 + jsonify':>17} {'images KB (separate)':>21}")
+
+    with app.app_context():
+        for size in args.sizes:
+            images = overlays(size)
+            raw_kb = sum(len(d) for d in images.values()) / 1024
+            for mode, inline in (("base64", True), ("url", False)):
+                body_kb = len(jsonify(response(images, inline)).get_data()) / 1024
+                ms      = median_ms(lambda: jsonify(response(images, inline)).get_data(), args.calls)
+                extra   = f"{raw_kb:>21.0f}" if not inline else f"{'—':>21}"
+                print(f"  {size:>5}² {mode:>7} {body_kb:>9.1f} {ms:>15.2f}ms {extra}")
+
+    print("\n  time = building the body (incl. base64) + jsonify + get_data, median")
+
+
+if __name__ == "__main__":
+    main()
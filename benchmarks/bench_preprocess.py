@@ -0,0 +1,88 @@
+"""
+benchmarks/bench_preprocess.py
+──────────────────────────────
+Preprocessing latency: the previous skimage pipeline vs the cv2 engine in
+src/preprocess.py, for single images of several sizes and for a batch.
+
+The legacy path is reproduced inline exactly as src/preprocess.py used to
+run it — skimage resize on float64, _ensure_rgb, astype, /255,
+expand_dims — and is run twice per image for the classification +
+segmentation tensors, as /predict and the U-Net path did.
+
+RUN:
+  python benchmarks/bench_preprocess.py [--calls 20] [--batch 32]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image
+from skimage.transform import resize
+
+from src.preprocess import CLASSIFICATION_SIZE, preprocess_batch, preprocess_both
+
+EXAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       "Examples", "Example.jpeg")
+
+
+def legacy_preprocess(image, size=CLASSIFICATION_SIZE):
+    img = resize(image, (size, size), mode="constant", preserve_range=True)
+    if img.ndim == 2:
+        img = np.stack([img] * 3, axis=-1)
+    img = img.astype(np.float32) / 255.0
+    return np.expand_dims(img, axis=0)
+
+
+def legacy_both(image):
+    return legacy_preprocess(image), legacy_preprocess(image)
+
+
+def median_ms(fn, calls: int) -> float:
+    fn()
+    samples = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return float(np.median(samples) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[3])
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--batch", type=int, default=32)
+    args = parser.parse_args()
+
+    example = np.array(Image.open(EXAMPLE).convert("RGB"))
+    images  = {
+        "512×512":           np.array(Image.fromarray(example).resize((512, 512))),
+        f"{example.shape[1]}×{example.shape[0]} (Example)": example,
+        "4000×3000":         np.array(Image.fromarray(example).resize((4000, 3000))),
+    }
+
+    print("=" * 70)
+    print(f"PREPROCESSING  (classification + segmentation tensors, {args.calls} calls)")
+    print("=" * 70)
+    print(f"  {'input':<24} {'skimage (ms)':>13} {'cv2 engine (ms)':>16} {'speed-up':>9}")
+    for name, image in images.items():
+        old = median_ms(lambda: legacy_both(image), args.calls)
+        new = median_ms(lambda: preprocess_both(image), args.calls)
+        print(f"  {name:<24} {old:>13.1f} {new:>16.2f} {old / new:>8.1f}×")
+
+    batch = [images["512×512"]] * args.batch
+    old   = median_ms(lambda: np.concatenate([legacy_preprocess(i) for i in batch]),
+                      max(1, args.calls // 4))
+    new   = median_ms(lambda: preprocess_batch(batch), args.calls)
+    print(f"\n  batch of {args.batch} × 512²      {old:>13.1f} {new:>16.2f} {old / new:>8.1f}×")
+
+    diff = np.abs(legacy_preprocess(example) - preprocess_both(example)[0])
+    print(f"\n  Parity on Example.jpeg: mean |Δ| {diff.mean():.4f}, max |Δ| {diff.max():.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+benchmarks/bench_pseudo_seg.py
+──────────────────────────────
+Grad-CAM pseudo-segmentation mask: the previous implementation (cubic
+upsampling, blur, np.percentile per tightening step and morphology all
+at full resolution) vs src.inference.pseudo_segmentation_mask (bounded
+working grid, one np.partition for every threshold, only the final mask
+upsampled).
+
+The 7×7 Grad-CAM maps are a single hotspot, two competing hotspots and
+pure noise — the last one is the worst case for component labelling.
+
+RUN:
+  python benchmarks/bench_pseudo_seg.py [--sizes 512 1024 2048 4096] [--calls 3]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from src.inference import PSEUDO_SEG_MAX_SIDE, pseudo_segmentation_mask
+
+
+def legacy_pseudo_mask(heatmap, H, W, top_percent=10.0):
+    """Mask step of gradcam_pseudo_segmentation before v2.1 (prints dropped)."""
+    hm = np.clip(cv2.resize(heatmap.astype(np.float32), (W, H), interpolation=cv2.INTER_CUBIC), 0.0, 1.0)
+    sigma = min(H, W) / 50
+    k = int(sigma * 4) | 1
+    hm = cv2.GaussianBlur(hm, (k, k), sigmaX=sigma, sigmaY=sigma)
+    if hm.max() > 0:
+        hm = hm / hm.max()
+    hm_masked = hm.copy()
+    by, bx = int(H * 0.10), int(W * 0.10)
+    hm_masked[:by, :] = 0
+    hm_masked[-by:, :] = 0
+    hm_masked[:, :bx] = 0
+    hm_masked[:, -bx:] = 0
+    nonzero = hm_masked[hm_masked > 0]
+    if len(nonzero) == 0:
+        hm_masked = hm.copy()
+        nonzero = hm_masked[hm_masked > 0]
+
+    def select(pct):
+        t = np.percentile(nonzero, 100 - pct)
+        nl, lb, st, _ = cv2.connectedComponentsWithStats((hm_masked > t).astype(np.uint8), connectivity=8)
+        pl = int(lb[np.unravel_index(np.argmax(hm_masked), hm_masked.shape)])
+        if pl == 0 and nl > 1:
+            pl = int(np.argmax(st[1:, cv2.CC_STAT_AREA])) + 1
+        if pl == 0 or nl <= 1:
+            return None, 0
+        sel = (lb == pl).astype(np.uint8)
+        return sel, sel.sum()
+
+    sel, area = select(top_percent)
+    if sel is None:
+        return None
+    if area > int(H * W * 0.25):
+        for pct in [7.0, 5.0, 3.0]:
+            m2, a2 = select(pct)
+            if m2 is not None and a2 <= int(H * W * 0.25):
+                sel = m2
+                break
+    k = max(7, min(H, W) // 40)
+    return cv2.morphologyEx(sel, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (k, k)), iterations=1)
+
+
+def cams() -> dict:
+    rng   = np.random.default_rng(3)
+    focal = np.zeros((7, 7), np.float32)
+    focal[2, 4], focal[3, 4] = 1.0, 0.6
+    twin  = np.zeros((7, 7), np.float32)
+    twin[2, 2], twin[4, 5]   = 1.0, 0.9
+    return {"focal": focal, "twin": twin, "noise": rng.random((7, 7)).astype(np.float32)}
+
+
+def median_ms(fn, calls: int) -> float:
+    samples = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return float(np.median(samples) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[3])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[512, 1024, 2048, 4096])
+    parser.add_argument("--calls", type=int, default=3)
+    args = parser.parse_args()
+
+    print("=" * 66)
+    print(f"Pseudo-segmentation mask  (working grid ≤ {PSEUDO_SEG_MAX_SIDE} px)")
+    print("=" * 66)
+    print(f"  {'size':>6} {'cam':>6} {'legacy':>10} {'new':>9} {'speedup':>8} {'IoU':>6}")
+
+    for size in args.sizes:
+        for name, cam in cams().items():
+            with contextlib.redirect_stdout(io.StringIO()):
+                old   = legacy_pseudo_mask(cam, size, size)
+                new   = pseudo_segmentation_mask(cam, size, size)
+                t_old = median_ms(lambda: legacy_pseudo_mask(cam, size, size), args.calls)
+                t_new = median_ms(lambda: pseudo_segmentation_mask(cam, size, size), args.calls)
+            agree = np.logical_and(old, new).sum() / max(1, np.logical_or(old, new).sum())
+            print(f"  {size:>5}² {name:>6} {t_old:>8.1f}ms {t_new:>7.1f}ms {t_old / t_new:>7.1f}× {agree:>6.3f}")
+
+    print("\n  IoU = overlap of the new mask with the legacy full-resolution mask")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+benchmarks/bench_render.py
+──────────────────────────
+Overlay rendering at 512²–4096²: the previous float32 renderers of
+src/gradcam.py (heatmap) and src/inference.py (segmentation mask) vs the
+shared uint8 renderer in src/render.py.
+
+Peak Python-heap memory (tracemalloc, which sees NumPy buffers) is
+reported next to the median time; the input image and mask are allocated
+before measuring and not counted.
+
+RUN:
+  python benchmarks/bench_render.py [--sizes 512 2048 4096] [--calls 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+import src.render as render
+from src.render import RENDER_HEATMAP_SIDE, RENDER_STRIPE_ROWS, heatmap_overlay, mask_overlay
+
+
+def legacy_heatmap_overlay(background, heatmap):
+    """src/gradcam._render_overlay's blend before v2.1 (float32, full resolution)."""
+    H, W = background.shape[:2]
+    hm = np.clip(cv2.resize(heatmap, (W, H), interpolation=cv2.INTER_CUBIC), 0.0, 1.0)
+    sigma = min(H, W) / 40
+    k = int(sigma * 4) | 1
+    hm = cv2.GaussianBlur(hm, (k, k), sigmaX=sigma, sigmaY=sigma)
+    if hm.max() > 0:
+        hm = hm / hm.max()
+    jet = cv2.cvtColor(cv2.applyColorMap(np.uint8(255 * hm), cv2.COLORMAP_JET), cv2.COLOR_BGR2RGB)
+    out = 0.55 * jet.astype(np.float32) + 0.45 * background.astype(np.float32)
+    return np.clip(out, 0, 255).astype(np.uint8)
+
+
+def legacy_mask_overlay(image, mask):
+    """src/inference._render_mask_overlay's blend before v2.1."""
+    H, W = image.shape[:2]
+    canvas = image.astype(np.float32)
+    fill = np.zeros_like(canvas)
+    fill[mask == 1] = render.FILL_COLOR
+    m3 = mask[:, :, None].astype(np.float32)
+    canvas = canvas * (1 - m3 * render.FILL_ALPHA) + fill * m3 * render.FILL_ALPHA
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+    layer = np.zeros_like(canvas)
+    cv2.drawContours(layer, contours, -1, render.BORDER_COLOR, thickness=3)
+    b3 = cv2.drawContours(np.zeros((H, W), np.uint8), contours, -1, 255, thickness=3)[:, :, None] / 255.0
+    canvas = canvas * (1 - b3 * render.BORDER_ALPHA) + layer * b3 * render.BORDER_ALPHA
+    return np.clip(canvas, 0, 255).astype(np.uint8)
+
+
+def lesion(size: int) -> np.ndarray:
+    """An ellipse plus a disc — a lesion covering a few percent of the scan."""
+    mask = np.zeros((size, size), np.uint8)
+    cv2.ellipse(mask, (size // 2, size // 3), (size // 6, size // 8), 20, 0, 360, 1, -1)
+    cv2.circle(mask, (size // 5, 4 * size // 5), size // 12, 1, -1)
+    return mask
+
+
+def measure(fn, calls: int) -> tuple:
+    """(median ms, peak MB of one call)"""
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    samples = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return float(np.median(samples) * 1000), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[3])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[512, 2048, 4096])
+    parser.add_argument("--calls", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    cam = rng.random((7, 7)).astype(np.float32)
+
+    print("=" * 78)
+    print(f"OVERLAY RENDERING  (stripes {RENDER_STRIPE_ROWS} rows, heatmap grid ≤ {RENDER_HEATMAP_SIDE} px)")
+    print("=" * 78)
+    print(f"  {'size':>6} {'overlay':>8} {'legacy':>10} {'peak MB':>8} {'uint8':>9} {'peak MB':>8} "
+          f"{'speedup':>8} {'max Δ':>6}")
+
+    for size in args.sizes:
+        image = rng.integers(0, 256, (size, size, 3), dtype=np.uint8)
+        mask  = lesion(size)
+        cases = [
+            ("heatmap", lambda: legacy_heatmap_overlay(image, cam), lambda: heatmap_overlay(image, cam)),
+            ("mask",    lambda: legacy_mask_overlay(image, mask),   lambda: mask_overlay(image, mask)),
+        ]
+        for label, old, new in cases:
+            t_old, m_old = measure(old, args.calls)
+            t_new, m_new = measure(new, args.calls)
+            delta = int(np.abs(old().astype(np.int16) - new().astype(np.int16)).max())
+            print(f"  {size:>5}² {label:>8} {t_old:>8.1f}ms {m_old:>8.1f} {t_new:>7.1f}ms {m_new:>8.1f} "
+                  f"{t_old / t_new:>7.1f}× {delta:>6}")
+
+    print("\n  peak MB includes the uint8 output image (size² × 3 bytes);")
+    print("  max Δ = largest per-pixel difference from the legacy renderer (grey levels)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+benchmarks/bench_series.py
+──────────────────────────
+/predict-series ingestion at 100–500 slices: a zip of shuffled
+single-frame 512×512 int16 DICOM slices, decoded
+
+  naive   — extract to a temp dir, dcmread each file, window at full
+            resolution and stack the whole volume
+  series  — src.series: entries streamed from the zip in memory, decoded
+            to 224×224 thumbnails inline (--workers 0) or in the process
+            pool, then sorted
+
+Peak Python-heap memory (tracemalloc, which sees NumPy buffers) is
+reported next to the time. With --classify, the series result also goes
+through src.volume's adaptive classification on an untrained ResNet50V2.
+
+RUN:
+  python benchmarks/bench_series.py [--slices 100 250 500] [--workers 0 4] [--classify]
+"""
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pydicom
+from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.uid import ExplicitVRLittleEndian, SecondaryCaptureImageStorage, generate_uid
+
+from src.preprocess import dicom_pixels, window_to_uint8
+from src.series import ingest_series, zip_entries
+from src.volume import classify_volume
+
+
+def make_slice(pixels: np.ndarray, z: float, instance: int) -> bytes:
+    ds = Dataset()
+    ds.file_meta = FileMetaDataset()
+    ds.file_meta.TransferSyntaxUID          = ExplicitVRLittleEndian
+    ds.file_meta.MediaStorageSOPClassUID    = SecondaryCaptureImageStorage
+    ds.file_meta.MediaStorageSOPInstanceUID = generate_uid()
+    ds.SOPClassUID, ds.SOPInstanceUID = SecondaryCaptureImageStorage, ds.file_meta.MediaStorageSOPInstanceUID
+    ds.Rows, ds.Columns = pixels.shape
+    ds.SamplesPerPixel, ds.PhotometricInterpretation = 1, "MONOCHROME2"
+    ds.BitsAllocated, ds.BitsStored, ds.HighBit, ds.PixelRepresentation = 16, 16, 15, 1
+    ds.RescaleSlope, ds.RescaleIntercept, ds.WindowCenter, ds.WindowWidth = 1, -1024, 40, 400
+    ds.ImagePositionPatient, ds.ImageOrientationPatient = [0, 0, z], [1, 0, 0, 0, 1, 0]
+    ds.InstanceNumber = instance
+    ds.PixelData      = pixels.tobytes()
+    buf = io.BytesIO()
+    try:
+        ds.save_as(buf, enforce_file_format=True)           # pydicom ≥ 3
+    except TypeError:
+        ds.save_as(buf, write_like_original=False)          # pydicom 2.x
+    return buf.getvalue()
+
+
+def make_zip(n: int, size: int) -> bytes:
+    rng   = np.random.default_rng(0)
+    order = rng.permutation(n)
+    buf   = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        for i in order:
+            pixels = rng.integers(0, 2000, (size, size), dtype=np.int16)
+            zf.writestr(f"IMG{i:04d}.dcm", make_slice(pixels, float(i), int(i) + 1))
+    return buf.getvalue()
+
+
+def naive(data: bytes) -> np.ndarray:
+    with tempfile.TemporaryDirectory() as tmp:
+        zipfile.ZipFile(io.BytesIO(data)).extractall(tmp)
+        slices = [pydicom.dcmread(os.path.join(tmp, name)) for name in sorted(os.listdir(tmp))]
+        slices.sort(key=lambda ds: float(ds.ImagePositionPatient[2]))
+        return np.stack([window_to_uint8(ds, dicom_pixels(ds), verbose=False) for ds in slices])
+
+
+def measure(fn) -> tuple:
+    """(ms, peak MB, result)"""
+    tracemalloc.start()
+    t0     = time.perf_counter()
+    result = fn()
+    ms     = (time.perf_counter() - t0) * 1000
+    peak   = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return ms, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[3])
+    parser.add_argument("--slices",   type=int, nargs="+", default=[100, 250, 500])
+    parser.add_argument("--size",     type=int, default=512)
+    parser.add_argument("--workers",  type=int, nargs="+", default=[0, 4])
+    parser.add_argument("--classify", action="store_true")
+    args = parser.parse_args()
+
+    predict = None
+    if args.classify:
+        import tensorflow as tf
+        model   = tf.keras.applications.ResNet50V2(weights=None, classes=4, classifier_activation="softmax")
+        forward = tf.function(lambda x: model(x, training=False), reduce_retracing=True)
+        predict = lambda batch: forward(tf.convert_to_tensor(batch)).numpy()   # noqa: E731
+
+    print("=" * 78)
+    print(f"SERIES INGESTION  ({args.size}² int16 slices, zipped, shuffled; {os.cpu_count()} CPU)")
+    print("=" * 78)
+    print(f"  {'slices':>6} {'zip MB':>7} {'path':>12} {'time':>9} {'peak MB':>9}")
+
+    for n in args.slices:
+        data = make_zip(n, args.size)
+        ms, peak, _ = measure(lambda: naive(data))
+        print(f"  {n:>6} {len(data) / 1e6:>7.1f} {'naive':>12} {ms:>7.0f}ms {peak:>9.1f}")
+        for workers in args.workers:
+            if workers > 1:                                 # start the pool outside the timing
+                ingest_series(zip_entries(io.BytesIO(data)), workers=workers)
+            ms, peak, result = measure(
+                lambda: ingest_series(zip_entries(io.BytesIO(data)), workers=workers),
+            )
+            label = "inline" if workers <= 1 else f"{workers} procs"
+            print(f"  {'':>6} {'':>7} {label:>12} {ms:>7.0f}ms {peak:>9.1f}")
+        if predict is not None:
+            t0      = time.perf_counter()
+            sampled = classify_volume(result["frames"], predict)
+            print(f"  {'':>6} {'':>7} {'+ classify':>12} {(time.perf_counter() - t0) * 1000:>7.0f}ms "
+                  f"  ({len(sampled['indices'])}/{n} slices, {sampled['stopped_by']})")
+
+    print("\n  peak MB = Python-heap peak in this process (pool workers excluded);")
+    print("  the zip itself is held by the caller and not counted")
+
+
+if __name__ == "__main__":
+    main()
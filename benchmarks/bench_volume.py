@@ -0,0 +1,98 @@
+"""
+benchmarks/bench_volume.py
+──────────────────────────
+/predict-volume slice classification cost: every slice one at a time
+vs every slice in batches vs src.volume's adaptive sampling (batched,
+VOLUME_MAX_SLICES / VOLUME_BUDGET_MS), plus the one-pass windowing of the
+whole volume.
+
+Uses an untrained ResNet50V2 classifier with the same layout as
+train_all_models.py, so no model files are needed. Volumes are synthetic
+int16 CT-like stacks.
+
+RUN:
+  python benchmarks/bench_volume.py [--frames 32 128] [--size 256] [--batch 16]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras import layers
+
+from src.preprocess import preprocess_batch, preprocess_classification, window_to_uint8
+from src.volume import VOLUME_BUDGET_MS, VOLUME_MAX_SLICES, classify_volume
+
+
+class FakeDataset:
+    """Just the attributes window_to_uint8 reads."""
+    RescaleSlope, RescaleIntercept, WindowCenter, WindowWidth = 1, -1024, 40, 400
+
+
+def build_classifier() -> tf.keras.Model:
+    base = tf.keras.applications.ResNet50V2(
+        include_top=False, weights=None, input_shape=(224, 224, 3),
+    )
+    return tf.keras.Sequential([
+        base,
+        layers.GlobalAveragePooling2D(),
+        layers.BatchNormalization(),
+        layers.Dense(256, activation="relu"),
+        layers.Dropout(0.5),
+        layers.Dense(4, activation="softmax"),
+    ], name="ResNet50V2")
+
+
+def timed_ms(fn) -> tuple:
+    t0     = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - t0) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[3])
+    parser.add_argument("--frames", type=int, nargs="+", default=[32, 128])
+    parser.add_argument("--size",   type=int, default=256)
+    parser.add_argument("--batch",  type=int, default=16)
+    args = parser.parse_args()
+
+    model   = build_classifier()
+    forward = tf.function(lambda x: model(x, training=False), reduce_retracing=True)
+    predict = lambda batch: forward(tf.convert_to_tensor(batch)).numpy()   # noqa: E731
+    predict(np.zeros((1, 224, 224, 3), np.float32))                        # trace / warm up
+    predict(np.zeros((args.batch, 224, 224, 3), np.float32))
+
+    print("=" * 78)
+    print(f"VOLUME INFERENCE  ({args.size}² slices, batch {args.batch}, "
+          f"max {VOLUME_MAX_SLICES} slices / {VOLUME_BUDGET_MS:.0f} ms, CPU)")
+    print("=" * 78)
+    print(f"  {'frames':>6} {'window':>9} {'per-slice':>11} {'batched':>10} "
+          f"{'adaptive':>10} {'classified':>11}")
+
+    rng = np.random.default_rng(0)
+    for n in args.frames:
+        stored = rng.integers(0, 2000, (n, args.size, args.size), dtype=np.int16)
+        window_ms, frames = timed_ms(lambda: window_to_uint8(FakeDataset, stored))
+
+        single_ms, _ = timed_ms(lambda: [predict(preprocess_classification(f)) for f in frames])
+        batched_ms, _ = timed_ms(lambda: [
+            predict(preprocess_batch(frames[i:i + args.batch]))
+            for i in range(0, n, args.batch)
+        ])
+        adaptive_ms, result = timed_ms(
+            lambda: classify_volume(frames, predict, batch_size=args.batch),
+        )
+        print(f"  {n:>6} {window_ms:>7.1f}ms {single_ms:>9.0f}ms {batched_ms:>8.0f}ms "
+              f"{adaptive_ms:>8.0f}ms {len(result['indices']):>5}/{n} ({result['stopped_by']})")
+
+    print("\n  per-slice = one classifier call per slice (all slices); batched = all slices,")
+    print("  --batch per call; adaptive = src.volume.classify_volume within its budgets")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+evaluate_cascade.py
+───────────────────
+Calibrates and evaluates the custom-CNN → ResNet50V2 cascade served when
+CASCADE_ENABLED=1 (see src/cascade.py).
+
+  1. Validation split (train_all_models.py's 20% of Training, no
+     augmentation): fit the custom CNN's softmax temperature by NLL, then
+     pick the LOWEST threshold whose cascade accuracy stays within
+     --max-drop of the escalation target (ResNet50V2, or the meta model
+     with --meta) — the lowest threshold escalates the fewest scans
+  2. Test set (exactly evaluate_models.py's generator): report the
+     escalation rate, cascade vs full-model accuracy and per-class
+     accuracy at that threshold, plus a sweep of other thresholds
+  3. Write models/cascade.json, which the server reads at startup
+
+RUN:
+  python evaluate_cascade.py [--max-drop 0.005] [--meta]
+
+OUTPUTS:
+  models/cascade.json
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+from sklearn.metrics import accuracy_score
+from tensorflow.keras.preprocessing.image import ImageDataGenerator
+
+from src.cascade import fit_temperature, temperature_scale
+from src.config import CUSTOM_MODEL_PATH, META_MODEL_PATH, RESNET50_MODEL_PATH
+from src.utils import load_local_model
+
+# ─── Configuration ────────────────────────────────────────────────────────────
+
+TRAIN_DATA_DIR = 'data/raw_dataset/Training'
+TEST_DATA_DIR  = 'data/raw_dataset/Testing'
+IMG_SIZE       = 224
+BATCH_SIZE     = 32
+VAL_SPLIT      = 0.2      # must match train_all_models.py
+OUTPUT_PATH    = os.environ.get('CASCADE_CONFIG', os.path.join('models', 'cascade.json'))
+
+THRESHOLDS = np.round(np.arange(0.50, 1.00, 0.01), 2)
+
+
+# ─── Data ─────────────────────────────────────────────────────────────────────
+
+def validation_generator():
+    datagen = ImageDataGenerator(rescale=1.0 / 255.0, validation_split=VAL_SPLIT)
+    return datagen.flow_from_directory(
+        TRAIN_DATA_DIR,
+        target_size = (IMG_SIZE, IMG_SIZE),
+        batch_size  = BATCH_SIZE,
+        class_mode  = 'categorical',
+        subset      = 'validation',
+        shuffle     = False,
+    )
+
+
+def test_generator():
+    datagen = ImageDataGenerator(rescale=1.0 / 255.0)
+    return datagen.flow_from_directory(
+        TEST_DATA_DIR,
+        target_size = (IMG_SIZE, IMG_SIZE),
+        batch_size  = BATCH_SIZE,
+        class_mode  = 'categorical',
+        shuffle     = False,
+    )
+
+
+def all_predictions(models: dict, generator) -> dict:
+    preds = {}
+    for name, model in models.items():
+        if name == 'meta':
+            continue
+        generator.reset()
+        preds[name] = model.predict(generator, verbose=1)
+    if 'meta' in models:
+        preds['meta'] = models['meta'].predict(
+            np.column_stack((preds['resnet'], preds['custom'])), verbose=0,
+        )
+    return preds
+
+
+# ─── Cascade simulation ───────────────────────────────────────────────────────
+
+def simulate(preds: dict, temperature: float, threshold: float, target: str) -> tuple:
+    """(final class per row, escalated mask) — mirrors Cascade.classify."""
+    calib     = temperature_scale(preds['custom'], temperature)
+    escalated = calib.max(axis=1) < threshold
+    final     = np.where(escalated, np.argmax(preds[target], axis=1), np.argmax(calib, axis=1))
+    return final, escalated
+
+
+def summarise(y_true, preds, temperature, threshold, target, class_labels) -> dict:
+    final, escalated = simulate(preds, temperature, threshold, target)
+    return {
+        'threshold':         float(threshold),
+        'escalation_rate':   float(escalated.mean()),
+        'cascade_accuracy':  float(accuracy_score(y_true, final)),
+        'target_accuracy':   float(accuracy_score(y_true, np.argmax(preds[target], axis=1))),
+        'custom_accuracy':   float(accuracy_score(y_true, np.argmax(preds['custom'], axis=1))),
+        'accepted_accuracy': (float(accuracy_score(y_true[~escalated], final[~escalated]))
+                              if (~escalated).any() else None),
+        'per_class': {
+            cls: {
+                'cascade_accuracy': float(accuracy_score(y_true[y_true == i], final[y_true == i])),
+                'escalation_rate':  float(escalated[y_true == i].mean()),
+            }
+            for i, cls in enumerate(class_labels) if np.any(y_true == i)
+        },
+    }
+
+
+# ─── Main ─────────────────────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[3])
+    parser.add_argument('--max-drop', type=float, default=0.005,
+                        help='max validation accuracy drop vs the escalation target')
+    parser.add_argument('--meta', action='store_true',
+                        help='escalate to the meta ensemble instead of ResNet50V2 alone')
+    args   = parser.parse_args()
+    target = 'meta' if args.meta else 'resnet'
+
+    print('=' * 70)
+    print(f'CASCADE CALIBRATION  (custom CNN → {target}, max drop {args.max_drop:.2%})')
+    print('=' * 70)
+
+    models = {
+        'resnet': load_local_model(RESNET50_MODEL_PATH),
+        'custom': load_local_model(CUSTOM_MODEL_PATH),
+    }
+    if args.meta:
+        models['meta'] = load_local_model(META_MODEL_PATH)
+
+    # ── Validation: temperature + threshold ───────────────────────
+    val_gen   = validation_generator()
+    val_preds = all_predictions(models, val_gen)
+    y_val     = val_gen.classes
+
+    temperature = fit_temperature(val_preds['custom'], y_val)
+    print(f'\n✓ Temperature (validation NLL): {temperature:.2f}')
+
+    target_acc = accuracy_score(y_val, np.argmax(val_preds[target], axis=1))
+    threshold  = THRESHOLDS[-1]
+    for t in THRESHOLDS:
+        final, _ = simulate(val_preds, temperature, t, target)
+        if accuracy_score(y_val, final) >= target_acc - args.max_drop:
+            threshold = t
+            break
+    print(f'✓ Threshold: {threshold:.2f}  ({target} validation accuracy {target_acc:.2%})')
+
+    # ── Test: escalation rate + accuracy impact ───────────────────
+    test_gen     = test_generator()
+    class_labels = list(test_gen.class_indices.keys())
+    test_preds   = all_predictions(models, test_gen)
+    y_test       = test_gen.classes
+
+    chosen = summarise(y_test, test_preds, temperature, threshold, target, class_labels)
+    sweep  = [
+        {k: v for k, v in summarise(y_test, test_preds, temperature, t, target, class_labels).items()
+         if k != 'per_class'}
+        for t in THRESHOLDS[::5]
+    ]
+
+    print(f'\n{"=" * 50}')
+    print(f'  Escalation rate : {chosen["escalation_rate"]:.2%}')
+    print(f'  Cascade acc     : {chosen["cascade_accuracy"]:.2%}')
+    print(f'  {target:<15} : {chosen["target_accuracy"]:.2%}  '
+          f'({(chosen["cascade_accuracy"] - chosen["target_accuracy"]) * 100:+.2f} pts)')
+    print(f'  Custom CNN acc  : {chosen["custom_accuracy"]:.2%}')
+    print(f'{"=" * 50}')
+    for cls, m in chosen['per_class'].items():
+        print(f'  {cls:<20} {m["cascade_accuracy"] * 100:.2f}%  '
+              f'(escalated {m["escalation_rate"]:.0%})')
+
+    print(f'\n  {"threshold":>9} {"escalated":>10} {"accuracy":>9}')
+    for row in sweep:
+        print(f'  {row["threshold"]:>9.2f} {row["escalation_rate"]:>10.2%} '
+              f'{row["cascade_accuracy"]:>9.2%}')
+
+    os.makedirs(os.path.dirname(OUTPUT_PATH) or '.', exist_ok=True)
+    with open(OUTPUT_PATH, 'w') as f:
+        json.dump({
+            'temperature': temperature,
+            'threshold':   float(threshold),
+            'target':      target,
+            'max_drop':    args.max_drop,
+            'validation':  {'target_accuracy': float(target_acc), 'images': int(len(y_val))},
+            'test':        chosen,
+            'sweep':       sweep,
+            'created_at':  datetime.utcnow().isoformat() + 'Z',
+        }, f, indent=2)
+    print(f'\n✓ Cascade config saved → {OUTPUT_PATH}')
+    if args.meta:
+        print('  Serve with CASCADE_ENABLED=1 CASCADE_USE_META=1')
+    else:
+        print('  Serve with CASCADE_ENABLED=1')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+export_tflite.py
+────────────────
+Exports the served Keras models to TFLite for the XNNPACK backend
+(INFERENCE_BACKEND=tflite, see src/backends.py) and checks parity.
+
+For every model that exists locally:
+  1. Convert models/<name>.keras → models/tflite/<name>.tflite (float32,
+     dynamic batch)
+  2. Run the same batch through Keras and the TFLite interpreter —
+     images from data/sample resized to the model's input; the meta model
+     gets the stacked ResNet50V2 + custom CNN softmax for those images
+  3. Assert top-1 agreement is exact and every output value is within
+     --atol of Keras. A model that fails has its .tflite file removed,
+     so servers never pick up a divergent export.
+
+RUN:
+  python export_tflite.py [--atol 1e-4] [--out models/tflite]
+
+OUTPUTS:
+  models/tflite/ResNet50V2.tflite
+  models/tflite/new_custom_model.tflite
+  models/tflite/meta_model.tflite
+  models/tflite/seg_model3.tflite
+"""
+
+import argparse
+import glob
+import os
+import sys
+
+import numpy as np
+from PIL import Image
+
+from src.backends import TFLiteBackend, export_tflite, parity_report, tflite_path_for
+from src.config import (
+    CUSTOM_MODEL_PATH, META_MODEL_PATH, RESNET50_MODEL_PATH, SEGMENTATION_MODEL_PATH,
+)
+from src.utils import load_local_model
+
+# ─── Config ───────────────────────────────────────────────────────────────────
+
+SAMPLE_DIR = 'data/sample'
+
+MODELS = [
+    # (keras path,            custom_loss, kind)
+    (RESNET50_MODEL_PATH,     False,       'classifier'),
+    (CUSTOM_MODEL_PATH,       False,       'classifier'),
+    (META_MODEL_PATH,         False,       'meta'),
+    (SEGMENTATION_MODEL_PATH, True,        'segmentation'),
+]
+
+
+# ─── Parity inputs ────────────────────────────────────────────────────────────
+
+def sample_batch(height: int, width: int) -> np.ndarray:
+    """data/sample/* resized to (height, width), scaled to [0, 1] like serving."""
+    paths = sorted(glob.glob(os.path.join(SAMPLE_DIR, '*.jpg')))
+    if not paths:
+        sys.exit(f'No sample images found in {SAMPLE_DIR}')
+    images = [
+        np.asarray(Image.open(p).convert('RGB').resize((width, height)), dtype=np.float32) / 255.0
+        for p in paths
+    ]
+    return np.stack(images)
+
+
+def meta_batch() -> np.ndarray:
+    """Stacked base-model softmax for the samples — the meta model's real input."""
+    preds = []
+    for path in (RESNET50_MODEL_PATH, CUSTOM_MODEL_PATH):
+        model = load_local_model(path)
+        preds.append(model.predict(sample_batch(*model.input_shape[1:3]), verbose=0))
+    return np.column_stack(preds).astype(np.float32)
+
+
+# ─── Main ─────────────────────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[3])
+    parser.add_argument('--atol', type=float, default=1e-4,
+                        help='max |keras - tflite| per output value')
+    parser.add_argument('--out',  default=None, help='output dir (default: TFLITE_MODEL_DIR)')
+    args = parser.parse_args()
+
+    print('=' * 70)
+    print('TFLITE EXPORT + PARITY CHECK')
+    print('=' * 70)
+
+    failures = []
+    for keras_path, custom_loss, kind in MODELS:
+        if not os.path.exists(keras_path):
+            print(f'\n⚠ {keras_path} not found — skipped')
+            continue
+
+        out_path = tflite_path_for(keras_path, args.out)
+        model    = load_local_model(keras_path, custom_loss=custom_loss)
+        size     = export_tflite(model, out_path)
+        print(f'\n✓ {keras_path} → {out_path}  ({size / 1024 ** 2:.1f} MB)')
+
+        batch     = meta_batch() if kind == 'meta' else sample_batch(*model.input_shape[1:3])
+        reference = model.predict(batch, verbose=0)
+        candidate = TFLiteBackend(out_path).predict(batch)
+        report    = parity_report(
+            reference.reshape(len(batch), -1) if kind == 'segmentation' else reference,
+            candidate.reshape(len(batch), -1) if kind == 'segmentation' else candidate,
+        )
+
+        ok = report['max_abs_diff'] <= args.atol
+        if kind != 'segmentation':
+            ok = ok and report['top1_agreement'] == 1.0
+            print(f'  top-1 agreement : {report["top1_agreement"]:.0%}')
+        print(f'  max |Δ|         : {report["max_abs_diff"]:.2e}  (atol {args.atol:.0e})'
+              f'  {"✓" if ok else "✗"}')
+
+        if not ok:
+            os.remove(out_path)
+            failures.append(keras_path)
+            print(f'  ✗ Parity failed — {out_path} removed')
+
+    print('\n' + '=' * 70)
+    if failures:
+        print(f'PARITY FAILED: {", ".join(failures)}')
+        sys.exit(1)
+    print('ALL EXPORTS WITHIN TOLERANCE — set INFERENCE_BACKEND=tflite to serve them')
+
+
+if __name__ == '__main__':
+    main()
@@ -339,8 +339,12 @@ const APIRequest = ({ image, patientId = null, symptoms = "" }) => {
           {/* Heatmap viewer */}
           <HeatmapViewer
             image={image}
+            gradcamUrl={response.gradcam_image_url}
+            segmentUrl={response.segment_image_url}
             gradcamImage={response.gradcam_image}
             segmentImage={response.segment_image}
+            gradcamType={response.gradcam_image_type}
+            segmentType={response.segment_image_type}
             className={response.class_name}
           />
           {response && !response.error && (
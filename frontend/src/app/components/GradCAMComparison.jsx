@@ -1,6 +1,7 @@
 "use client";
 import React, { useState } from "react";
 import { useAuth } from "../context/AuthContext";
+import { useAuthImage } from "../lib/useAuthImage";
 
 /**
  * GradCAMComparison.jsx  —  NeuroDL v2.0
@@ -61,7 +62,7 @@ const HeatmapCard = ({ title, badge, badgeStyle, src, caption, highlight, empty
     <div style={{ aspectRatio: "1/1", background: "#000", overflow: "hidden", position: "relative" }}>
       {src ? (
         <img
-          src={`data:image/png;base64,${src}`}
+          src={src}
           alt={title}
           style={{ width: "100%", height: "100%", objectFit: "cover", display: "block" }}
         />
@@ -104,6 +105,11 @@ const GradCAMComparison = ({ image, className }) => {
   const [error,    setError]    = useState(null);
   const [expanded, setExpanded] = useState(false);
 
+  // Overlays arrive as /artifacts/<token> URLs (base64 only with images=base64)
+  const dataUrl      = (b64) => (b64 ? `data:${result.image_type || "image/png"};base64,${b64}` : null);
+  const frozenSrc    = useAuthImage(result?.frozen_url, result ? dataUrl(result.frozen) : null);
+  const finetunedSrc = useAuthImage(result?.finetuned_url, result ? dataUrl(result.finetuned) : null);
+
   const runComparison = async () => {
     setLoading(true); setError(null); setExpanded(true);
     try {
@@ -250,7 +256,7 @@ const GradCAMComparison = ({ image, className }) => {
                   title="🥶 Frozen ResNet50V2"
                   badge="ImageNet weights only"
                   badgeStyle={{ background: "#fee2e2", color: "#991b1b" }}
-                  src={result.frozen}
+                  src={frozenSrc}
                   caption="Backbone never trained on brain MRI. Grad-CAM gradients flow through ImageNet features — typically highlights skull edges, ventricles, or background texture rather than the tumour."
                   highlight={false}
                   empty={!result.frozen_available && (
@@ -280,7 +286,7 @@ const GradCAMComparison = ({ image, className }) => {
                   title="🔥 Fine-tuned ResNet50V2"
                   badge="✓ Trained on brain MRI"
                   badgeStyle={{ background: "#dcfce7", color: "#14532d" }}
-                  src={result.finetuned}
+                  src={finetunedSrc}
                   caption="Backbone fine-tuned at lr=1e-5 on 7K+ brain MRI scans. Grad-CAM gradients now flow through MRI-specific features — heatmap focuses on the tumour region, not background anatomy."
                   highlight={true}
                 />
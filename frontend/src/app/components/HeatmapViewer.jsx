@@ -1,5 +1,6 @@
 "use client";
 import React, { useState, useRef, useCallback, useEffect } from "react";
+import { useAuthImage } from "../lib/useAuthImage";
 
 /**
  * HeatmapViewer.jsx  —  NeuroDL v2.0
@@ -15,8 +16,12 @@ import React, { useState, useRef, useCallback, useEffect } from "react";
  *
  * Props:
  *   image         (File)          — original uploaded image file
- *   gradcamImage  (string | null) — base64 PNG from /predict
- *   segmentImage  (string | null) — base64 JPEG from /predict
+ *   gradcamUrl    (string | null) — gradcam_image_url from /predict (fetched with auth)
+ *   segmentUrl    (string | null) — segment_image_url from /predict
+ *   gradcamImage  (string | null) — base64 image, only with images=base64 (PNG by default)
+ *   segmentImage  (string | null) — base64 image, only with images=base64 (JPEG by default)
+ *   gradcamType   (string)        — gradcam_image_type mimetype, default "image/png"
+ *   segmentType   (string)        — segment_image_type mimetype, default "image/jpeg"
  *   className     (string)        — predicted class name e.g. "Glioma Tumor"
  */
 
@@ -25,28 +30,31 @@ const LABELS = {
   gradcam: { icon: "🔥", text: "Grad-CAM heatmap", badge: "Explainability",   badgeStyle: { background: "#fef9c3", color: "#854d0e" } },
 };
 
-const HeatmapViewer = ({ image, gradcamImage, segmentImage, className }) => {
+const HeatmapViewer = ({
+  image, gradcamUrl, segmentUrl, gradcamImage, segmentImage, className,
+  gradcamType = "image/png", segmentType = "image/jpeg",
+}) => {
   const [pos,        setPos]        = useState(50);   // 0–100 %
   const [overlay,    setOverlay]    = useState("segment");
   const [isDragging, setIsDragging] = useState(false);
   const containerRef = useRef(null);
   const originalURL  = image ? URL.createObjectURL(image) : null;
-  const hasTumour    = gradcamImage || segmentImage;
+  const gradcamSrc   = useAuthImage(gradcamUrl, gradcamImage ? `data:${gradcamType};base64,${gradcamImage}` : null);
+  const segmentSrc   = useAuthImage(segmentUrl, segmentImage ? `data:${segmentType};base64,${segmentImage}` : null);
+  const hasGradcam   = Boolean(gradcamUrl || gradcamImage);
+  const hasSegment   = Boolean(segmentUrl || segmentImage);
+  const hasTumour    = hasGradcam || hasSegment;
 
   // Cleanup object URL on unmount
   useEffect(() => () => { if (originalURL) URL.revokeObjectURL(originalURL); }, []);
 
   // Fallback: if segment is missing but gradcam is present, switch view
   useEffect(() => {
-    if (!segmentImage && gradcamImage) setOverlay("gradcam");
-  }, [segmentImage, gradcamImage]);
+    if (!hasSegment && hasGradcam) setOverlay("gradcam");
+  }, [hasSegment, hasGradcam]);
 
   const overlayDataURL =
-    overlay === "segment" && segmentImage
-      ? `data:image/jpeg;base64,${segmentImage}`
-      : overlay === "gradcam" && gradcamImage
-      ? `data:image/png;base64,${gradcamImage}`
-      : null;
+    overlay === "segment" ? segmentSrc : overlay === "gradcam" ? gradcamSrc : null;
 
   // ── Shared slider handler ──────────────────────────────────────
   const handleMove = useCallback((clientX) => {
@@ -135,7 +143,7 @@ const HeatmapViewer = ({ image, gradcamImage, segmentImage, className }) => {
         </div>
 
         {/* Toggle pills — only show if both overlays exist */}
-        {segmentImage && gradcamImage && (
+        {hasSegment && hasGradcam && (
           <div style={{ display: "flex", gap: 6 }}>
             {["segment", "gradcam"].map((key) => {
               const l      = LABELS[key];
@@ -310,7 +318,7 @@ const HeatmapViewer = ({ image, gradcamImage, segmentImage, className }) => {
 
       {/* ── Info boxes ── */}
       <div style={{ marginTop: 16, display: "flex", flexDirection: "column", gap: 8 }}>
-        {overlay === "segment" && segmentImage && (
+        {overlay === "segment" && hasSegment && (
           <div style={{
             display: "flex", gap: 10, alignItems: "flex-start",
             background: "#f0fdf4", border: "1px solid #bbf7d0",
@@ -325,7 +333,7 @@ const HeatmapViewer = ({ image, gradcamImage, segmentImage, className }) => {
           </div>
         )}
 
-        {overlay === "gradcam" && gradcamImage && (
+        {overlay === "gradcam" && hasGradcam && (
           <div style={{
             display: "flex", gap: 10, alignItems: "flex-start",
             background: "#fffbeb", border: "1px solid #fde68a",
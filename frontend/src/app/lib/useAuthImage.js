@@ -0,0 +1,49 @@
+"use client";
+import { useEffect, useState } from "react";
+import { useAuth } from "../context/AuthContext";
+
+const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:5001";
+
+/**
+ * useAuthImage — blob: URL for an auth-gated overlay path from the API
+ * (/scans/<id>/image/<kind> or /artifacts/<token>).
+ *
+ * <img src="..."> can't carry a Bearer token, so the bytes come through
+ * authFetch (the backend's Cache-Control still lets the browser cache
+ * them). Returns `fallback` — e.g. a base64 data: URL from an
+ * images=base64 response — when there is no path, and null while loading.
+ */
+export function useAuthImage(path, fallback = null) {
+  const { authFetch } = useAuth();
+  // The blob URL is tagged with its path, so a new path never shows the
+  // previous (already revoked) image while its own bytes load.
+  const [image, setImage] = useState({ path: null, url: null });
+
+  useEffect(() => {
+    setImage({ path: null, url: null });
+    if (!path) return undefined;
+    let objectUrl;
+    let cancelled = false;
+    (async () => {
+      try {
+        const res = await authFetch(`${API_URL}${path}`);
+        if (!res.ok) throw new Error(`image ${res.status}`);
+        objectUrl = URL.createObjectURL(await res.blob());
+        if (cancelled) {
+          URL.revokeObjectURL(objectUrl);   // cleanup already ran
+          return;
+        }
+        setImage({ path, url: objectUrl });
+      } catch {
+        if (!cancelled) setImage({ path: null, url: null });
+      }
+    })();
+    return () => {
+      cancelled = true;
+      if (objectUrl) URL.revokeObjectURL(objectUrl);
+    };
+  }, [path]);
+
+  if (!path) return fallback;
+  return image.path === path ? image.url : null;
+}
@@ -0,0 +1,263 @@
+"""
+quantize_models.py
+──────────────────
+Post-training quantization of the classifier and the segmentation model,
+with an accuracy gate before anything is published for serving.
+
+For each model and each variant (float16, int8):
+  1. Convert with src.backends.export_tflite. int8 is calibrated on a
+     representative set drawn from data/ — CALIBRATION_SIZE images
+     spread evenly across the class folders of the training split
+     (falls back to data/sample if the raw dataset isn't present)
+  2. Evaluate:
+       classifier   → the same test generator and metrics as
+                      evaluate_models.py (accuracy, macro F1, per-class
+                      accuracy, confusion matrix), float Keras model as
+                      the baseline
+       segmentation → mean Dice of the quantized mask vs the float
+                      model's mask on the test images (no ground-truth
+                      masks ship with the dataset)
+  3. Publish to models/quantized/ only if the drop vs the float model is
+     within --max-drop; a failing variant is deleted and recorded as
+     unpublished in manifest.json, so the server can never load it
+
+Serve a published variant with MODEL_VARIANT=int8 (or float16).
+
+RUN:
+  python quantize_models.py [--max-drop 0.01] [--calibration 200] [--variants int8 float16]
+
+OUTPUTS:
+  models/quantized/ResNet50V2.int8.tflite      (+ .float16)
+  models/quantized/seg_model3.int8.tflite      (+ .float16)
+  models/quantized/manifest.json
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+from PIL import Image
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+
+from src.backends import QUANTIZED_MODEL_DIR, TFLiteBackend, export_tflite, quantized_path_for
+from src.config import RESNET50_MODEL_PATH, SEGMENTATION_MODEL_PATH
+from src.utils import load_local_model
+
+# ─── Config ───────────────────────────────────────────────────────────────────
+
+TRAIN_DATA_DIR = 'data/raw_dataset/Training'
+TEST_DATA_DIR  = 'data/raw_dataset/Testing'     # same split as evaluate_models.py
+SAMPLE_DIR     = 'data/sample'
+IMG_SIZE       = 224
+BATCH_SIZE     = 32
+IMAGE_EXTS     = ('.jpg', '.jpeg', '.png')
+
+MODELS = [
+    # (keras path,            custom_loss, kind)
+    (RESNET50_MODEL_PATH,     False,       'classifier'),
+    (SEGMENTATION_MODEL_PATH, True,        'segmentation'),
+]
+
+
+# ─── Data ─────────────────────────────────────────────────────────────────────
+
+def _load(path: str, size: tuple) -> np.ndarray:
+    img = Image.open(path).convert('RGB').resize((size[1], size[0]))
+    return np.asarray(img, dtype=np.float32) / 255.0
+
+
+def calibration_paths(n: int, seed: int = 0) -> list:
+    """n training images, spread evenly across class folders."""
+    classes = sorted(d for d in glob.glob(os.path.join(TRAIN_DATA_DIR, '*')) if os.path.isdir(d))
+    if not classes:
+        print(f'⚠ {TRAIN_DATA_DIR} not found — calibrating on {SAMPLE_DIR}')
+        return sorted(glob.glob(os.path.join(SAMPLE_DIR, '*.jpg')))
+
+    rng, paths = np.random.default_rng(seed), []
+    per_class  = max(1, n // len(classes))
+    for cls in classes:
+        files = sorted(f for f in glob.glob(os.path.join(cls, '*')) if f.lower().endswith(IMAGE_EXTS))
+        take  = min(per_class, len(files))
+        paths.extend(rng.choice(files, size=take, replace=False).tolist())
+    return paths
+
+
+def representative_dataset(paths: list, size: tuple):
+    def gen():
+        for path in paths:
+            yield [_load(path, size)[np.newaxis]]
+    return gen
+
+
+def test_generator():
+    """Exactly evaluate_models.py's generator: rescale 1/255, 224², unshuffled."""
+    from tensorflow.keras.preprocessing.image import ImageDataGenerator
+    datagen = ImageDataGenerator(rescale=1.0 / 255.0)
+    return datagen.flow_from_directory(
+        TEST_DATA_DIR,
+        target_size = (IMG_SIZE, IMG_SIZE),
+        batch_size  = BATCH_SIZE,
+        class_mode  = 'categorical',
+        shuffle     = False,
+    )
+
+
+# ─── Evaluation ───────────────────────────────────────────────────────────────
+
+def predict_generator(predict, generator) -> np.ndarray:
+    generator.reset()
+    return np.concatenate([predict(generator[i][0]) for i in range(len(generator))])
+
+
+def classifier_metrics(y_true: np.ndarray, preds: np.ndarray, class_labels: list) -> dict:
+    """The metrics evaluate_models.py reports, as a dict."""
+    y_pred = np.argmax(preds, axis=1)
+    report = classification_report(y_true, y_pred, target_names=class_labels,
+                                   output_dict=True, zero_division=0)
+    return {
+        'accuracy':  float(accuracy_score(y_true, y_pred)),
+        'macro_f1':  float(report['macro avg']['f1-score']),
+        'per_class': {
+            cls: float(accuracy_score(y_true[y_true == i], y_pred[y_true == i]))
+            for i, cls in enumerate(class_labels) if np.any(y_true == i)
+        },
+        'confusion_matrix': confusion_matrix(y_true, y_pred).tolist(),
+    }
+
+
+def mean_dice(reference: np.ndarray, candidate: np.ndarray, threshold: float = 0.5) -> float:
+    a = reference.reshape(len(reference), -1) > threshold
+    b = candidate.reshape(len(candidate), -1) > threshold
+    inter = (a & b).sum(axis=1)
+    total = a.sum(axis=1) + b.sum(axis=1)
+    dice  = np.where(total == 0, 1.0, 2 * inter / np.maximum(total, 1))
+    return float(dice.mean())
+
+
+def segmentation_inputs(size: tuple, limit: int = 200) -> np.ndarray:
+    paths = sorted(f for f in glob.glob(os.path.join(TEST_DATA_DIR, '*', '*'))
+                   if f.lower().endswith(IMAGE_EXTS))
+    paths = paths[::max(1, len(paths) // limit)][:limit] or \
+            sorted(glob.glob(os.path.join(SAMPLE_DIR, '*.jpg')))
+    return np.stack([_load(p, size) for p in paths])
+
+
+def batched(predict, x: np.ndarray) -> np.ndarray:
+    return np.concatenate([predict(x[i:i + BATCH_SIZE]) for i in range(0, len(x), BATCH_SIZE)])
+
+
+def _sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+# ─── Main ─────────────────────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[3])
+    parser.add_argument('--max-drop',    type=float, default=0.01,
+                        help='max accuracy (classifier) / Dice (segmentation) drop vs float')
+    parser.add_argument('--calibration', type=int,   default=200,
+                        help='representative images for int8 calibration')
+    parser.add_argument('--variants',    nargs='+',  default=['int8', 'float16'],
+                        choices=['int8', 'float16'])
+    args = parser.parse_args()
+
+    print('=' * 70)
+    print(f'POST-TRAINING QUANTIZATION  (max drop {args.max_drop:.2%})')
+    print('=' * 70)
+
+    have_test = os.path.isdir(TEST_DATA_DIR)
+    if not have_test:
+        print(f'⚠ {TEST_DATA_DIR} not found — classifier variants cannot be gated and '
+              f'will not be published')
+
+    os.makedirs(QUANTIZED_MODEL_DIR, exist_ok=True)
+    manifest = {'created_at': datetime.utcnow().isoformat() + 'Z',
+                'max_drop': args.max_drop, 'models': {}}
+    calib    = calibration_paths(args.calibration)
+    print(f'\nCalibration set: {len(calib)} images')
+
+    for keras_path, custom_loss, kind in MODELS:
+        if not os.path.exists(keras_path):
+            print(f'\n⚠ {keras_path} not found — skipped')
+            continue
+
+        stem  = os.path.splitext(os.path.basename(keras_path))[0]
+        model = load_local_model(keras_path, custom_loss=custom_loss)
+        size  = tuple(model.input_shape[1:3])
+        print(f'\n── {stem} ({kind}) ' + '─' * (50 - len(stem)))
+
+        if kind == 'classifier' and have_test:
+            gen          = test_generator()
+            class_labels = list(gen.class_indices.keys())
+            baseline     = classifier_metrics(
+                gen.classes, predict_generator(lambda x: model.predict(x, verbose=0), gen),
+                class_labels,
+            )
+            base_score = baseline['accuracy']
+        elif kind == 'segmentation':
+            seg_inputs = segmentation_inputs(size)
+            seg_ref    = batched(lambda x: model.predict(x, verbose=0), seg_inputs)
+            baseline, base_score = {'dice_vs_float': 1.0}, 1.0
+        else:
+            baseline, base_score = None, None
+        print(f'  float32 baseline : {base_score if base_score is None else f"{base_score:.4f}"}')
+
+        entries = {}
+        for variant in args.variants:
+            out_path = quantized_path_for(keras_path, variant)
+            nbytes   = export_tflite(model, out_path, variant,
+                                     representative_data=representative_dataset(calib, size))
+            engine   = TFLiteBackend(out_path)
+
+            if kind == 'classifier' and have_test:
+                metrics = classifier_metrics(gen.classes, predict_generator(engine.predict, gen),
+                                             class_labels)
+                score   = metrics['accuracy']
+            elif kind == 'segmentation':
+                score   = mean_dice(seg_ref, batched(engine.predict, seg_inputs))
+                metrics = {'dice_vs_float': score}
+            else:
+                metrics, score = None, None
+
+            drop      = None if score is None else base_score - score
+            published = drop is not None and drop <= args.max_drop
+            entries[variant] = {
+                'path':      out_path,
+                'bytes':     nbytes,
+                'sha256':    _sha256(out_path) if published else None,
+                'baseline':  baseline,
+                'metrics':   metrics,
+                'drop':      drop,
+                'published': published,
+            }
+            if published:
+                print(f'  ✓ {variant:<8} {nbytes / 1024 ** 2:6.1f} MB  score {score:.4f}  '
+                      f'drop {drop:+.4f}  → published')
+            else:
+                os.remove(out_path)
+                reason = 'no test set' if drop is None else f'drop {drop:+.4f} > {args.max_drop}'
+                print(f'  ✗ {variant:<8} refused ({reason}) — artifact removed')
+
+        manifest['models'][stem] = entries
+
+    manifest_path = os.path.join(QUANTIZED_MODEL_DIR, 'manifest.json')
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    print(f'\n✓ Manifest written → {manifest_path}')
+
+    if not any(v['published'] for m in manifest['models'].values() for v in m.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+src/artifacts.py
+────────────────
+Short-lived store for overlay images that have no Scan row to live on
+(NeuroDL v2.1).
+
+/predict returns overlays as URLs instead of base64 strings in the JSON
+body. Saved scans point at /scans/<id>/image/<kind>; everything else —
+/compare-gradcam heatmaps, or a /predict overlay whose storage write or
+DB save failed — is parked here and served from /artifacts/<token>.
+
+Tokens are random 128-bit hex strings and every artifact records its
+owner, so the route still applies the usual owner-or-doctor check.
+Artifacts live in memory only, expire after ARTIFACT_TTL_SECONDS and are
+evicted oldest-first once ARTIFACT_MAX_BYTES is reached.
+
+Environment variables:
+    ARTIFACT_TTL_SECONDS : how long an unsaved overlay stays fetchable (default: 600)
+    ARTIFACT_MAX_BYTES   : in-memory budget in bytes                   (default: 64 MB)
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# ─── Configuration ────────────────────────────────────────────────────────────
+
+ARTIFACT_TTL_SECONDS = int(os.environ.get("ARTIFACT_TTL_SECONDS", 600))
+ARTIFACT_MAX_BYTES   = int(os.environ.get("ARTIFACT_MAX_BYTES", 64 * 1024 ** 2))
+
+
+# ─── Store ────────────────────────────────────────────────────────────────────
+
+class ArtifactStore:
+    """
+    In-memory, TTL- and byte-bounded map of token → (owner, bytes, mimetype).
+
+    Args:
+        ttl_seconds : lifetime of each artifact
+        max_bytes   : total budget; the oldest artifacts are evicted first
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = ARTIFACT_TTL_SECONDS,
+        max_bytes:   int = ARTIFACT_MAX_BYTES,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes   = max(0, int(max_bytes))
+
+        self._lock     = threading.Lock()
+        self._items    = OrderedDict()     # token → (owner_user_id, data, mimetype, expires_at)
+        self._bytes    = 0
+        self._counters = {"stored": 0, "served": 0, "expired": 0, "evicted": 0}
+
+    def put(self, owner_user_id: int, data: bytes, mimetype: str):
+        """Store one image and return its token, or None if it exceeds the budget."""
+        if len(data) > self.max_bytes:
+            print(f"[Artifacts] ⚠ {len(data)} B artifact exceeds ARTIFACT_MAX_BYTES — not stored")
+            return None
+        token = uuid.uuid4().hex
+        with self._lock:
+            self._prune()
+            while self._items and self._bytes + len(data) > self.max_bytes:
+                _, (_, old, _, _) = self._items.popitem(last=False)
+                self._bytes -= len(old)
+                self._counters["evicted"] += 1
+            self._items[token] = (owner_user_id, data, mimetype, time.time() + self.ttl_seconds)
+            self._bytes += len(data)
+            self._counters["stored"] += 1
+        return token
+
+    def get(self, token: str):
+        """Return (owner_user_id, data, mimetype), or None if unknown or expired."""
+        with self._lock:
+            self._prune()
+            item = self._items.get(token)
+            if item is None:
+                return None
+            self._counters["served"] += 1
+            return item[:3]
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._prune()
+            return {"items": len(self._items), "bytes": self._bytes,
+                    "max_bytes": self.max_bytes, "ttl_seconds": self.ttl_seconds,
+                    **self._counters}
+
+    # ── Internals ─────────────────────────────────────────────────
+
+    def _prune(self) -> None:
+        """Drop expired artifacts (caller holds _lock). Insertion order = expiry order."""
+        now = time.time()
+        while self._items:
+            token, (_, data, _, expires_at) = next(iter(self._items.items()))
+            if expires_at > now:
+                break
+            del self._items[token]
+            self._bytes -= len(data)
+            self._counters["expired"] += 1
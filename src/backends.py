@@ -0,0 +1,278 @@
+"""
+src/backends.py
+───────────────
+Pluggable inference backends for NeuroDL v2.1.
+
+Every forward pass used for serving goes through a backend exposing one
+method — predict(batch) → np.ndarray — so app.py and src/inference.py
+don't care what executes the graph:
+
+  keras  : Model.predict on the .keras artifact (the original path)
+  tflite : the same graph exported to .tflite and run by the TFLite
+           interpreter with the XNNPACK CPU delegate — far less per-call
+           overhead than Model.predict on our CPU-only nodes
+
+Grad-CAM still needs gradients, so the Keras model stays loaded for it;
+the backend only replaces plain forward passes (classification, the
+ensemble, segmentation).
+
+TFLite artifacts live next to the Keras ones under TFLITE_MODEL_DIR with
+the same stem (models/ResNet50V2.keras → models/tflite/ResNet50V2.tflite)
+and are produced by `python export_tflite.py`. If the .tflite file is
+missing, load_backend falls back to Keras with a warning rather than
+failing the worker.
+
+Quantized variants (MODEL_VARIANT=float16 | int8) are TFLite-only and
+come from `python quantize_models.py`, which publishes them to
+QUANTIZED_MODEL_DIR together with manifest.json. A variant is served
+only if the manifest marks it as published (i.e. it passed the accuracy
+gate); otherwise the float model is used.
+
+Environment variables:
+    INFERENCE_BACKEND   : "keras" | "tflite"              (default: "keras")
+    MODEL_VARIANT       : "float32" | "float16" | "int8"  (default: "float32";
+                          anything else implies the tflite backend)
+    TFLITE_MODEL_DIR    : directory of exported models    (default: "models/tflite")
+    QUANTIZED_MODEL_DIR : published quantized variants    (default: "models/quantized")
+    TFLITE_NUM_THREADS  : XNNPACK threads per interpreter (default: os.cpu_count())
+"""
+
+import json
+import os
+import threading
+import warnings
+
+import numpy as np
+
+from src.utils import load_local_model
+
+# ─── Configuration ────────────────────────────────────────────────────────────
+
+INFERENCE_BACKEND   = os.environ.get("INFERENCE_BACKEND", "keras").lower()
+MODEL_VARIANT       = os.environ.get("MODEL_VARIANT", "float32").lower()
+TFLITE_MODEL_DIR    = os.environ.get("TFLITE_MODEL_DIR", os.path.join("models", "tflite"))
+QUANTIZED_MODEL_DIR = os.environ.get("QUANTIZED_MODEL_DIR", os.path.join("models", "quantized"))
+TFLITE_NUM_THREADS  = int(os.environ.get("TFLITE_NUM_THREADS", os.cpu_count() or 1))
+
+BACKENDS = ("keras", "tflite")
+VARIANTS = ("float32", "float16", "int8")
+
+
+def _interpreter_class():
+    """LiteRT's interpreter when installed, else the one bundled with TF."""
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+# ─── Backends ─────────────────────────────────────────────────────────────────
+
+class KerasBackend:
+    """Model.predict on a Keras model — the reference implementation."""
+
+    name = "keras"
+
+    def __init__(self, model, path: str = None):
+        self.model = model
+        self.path  = path
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        return np.asarray(self.model.predict(batch, verbose=0))
+
+
+class TFLiteBackend:
+    """
+    A .tflite model on the TFLite interpreter (XNNPACK delegate on CPU).
+
+    The interpreter is not thread-safe, so calls are serialised with a
+    lock — the micro-batcher already funnels classification through one
+    thread, so this only matters for ad-hoc callers. The input tensor is
+    resized (and re-allocated) only when the batch size changes.
+    """
+
+    name = "tflite"
+
+    def __init__(self, path: str, num_threads: int = TFLITE_NUM_THREADS):
+        self.path = path
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")     # tf.lite.Interpreter deprecation notice
+            self._interpreter = _interpreter_class()(
+                model_path=path, num_threads=max(1, int(num_threads)),
+            )
+        self._input       = self._interpreter.get_input_details()[0]
+        self._output      = self._interpreter.get_output_details()[0]
+        self._batch_shape = None
+        self._lock        = threading.Lock()
+
+    @property
+    def input_shape(self) -> tuple:
+        return tuple(int(d) for d in self._input["shape_signature"])
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        batch = np.ascontiguousarray(batch, dtype=self._input["dtype"])
+        with self._lock:
+            if batch.shape != self._batch_shape:
+                self._interpreter.resize_tensor_input(self._input["index"], batch.shape)
+                self._interpreter.allocate_tensors()
+                self._input       = self._interpreter.get_input_details()[0]
+                self._output      = self._interpreter.get_output_details()[0]
+                self._batch_shape = batch.shape
+            self._interpreter.set_tensor(self._input["index"], batch)
+            self._interpreter.invoke()
+            return self._interpreter.get_tensor(self._output["index"]).copy()
+
+
+def forward(model, batch: np.ndarray) -> np.ndarray:
+    """Forward pass on either a backend or a bare Keras model."""
+    if isinstance(model, (KerasBackend, TFLiteBackend)):
+        return model.predict(batch)
+    return np.asarray(model.predict(batch, verbose=0))
+
+
+# ─── Loading ──────────────────────────────────────────────────────────────────
+
+_tflite_cache = {}              # (path, size, mtime_ns) → TFLiteBackend
+_tflite_lock  = threading.Lock()
+
+
+def tflite_path_for(keras_path: str, model_dir: str = None) -> str:
+    """models/ResNet50V2.keras → <TFLITE_MODEL_DIR>/ResNet50V2.tflite"""
+    stem = os.path.splitext(os.path.basename(keras_path))[0]
+    return os.path.join(model_dir or TFLITE_MODEL_DIR, f"{stem}.tflite")
+
+
+def quantized_path_for(keras_path: str, variant: str, model_dir: str = None) -> str:
+    """models/ResNet50V2.keras, "int8" → <QUANTIZED_MODEL_DIR>/ResNet50V2.int8.tflite"""
+    stem = os.path.splitext(os.path.basename(keras_path))[0]
+    return os.path.join(model_dir or QUANTIZED_MODEL_DIR, f"{stem}.{variant}.tflite")
+
+
+def read_manifest(model_dir: str = None) -> dict:
+    """manifest.json written by quantize_models.py, or {} if there is none."""
+    path = os.path.join(model_dir or QUANTIZED_MODEL_DIR, "manifest.json")
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def published_variant_path(keras_path: str, variant: str):
+    """Path of a quantized variant that passed the accuracy gate, else None."""
+    stem  = os.path.splitext(os.path.basename(keras_path))[0]
+    entry = read_manifest().get("models", {}).get(stem, {}).get(variant)
+    if not entry or not entry.get("published"):
+        return None
+    path = quantized_path_for(keras_path, variant)
+    return path if os.path.exists(path) else None
+
+
+def load_backend(keras_path: str, backend: str = None, custom_loss: bool = False,
+                 variant: str = None):
+    """
+    Return a backend serving the model at keras_path.
+
+    Keras models come from the process-wide registry (src.utils); TFLite
+    interpreters are cached here the same way, keyed on file size + mtime
+    so a re-export is picked up on the next call.
+
+    Args:
+        keras_path  : path of the .keras artifact (also names the .tflite one)
+        backend     : "keras" | "tflite" (default: INFERENCE_BACKEND)
+        custom_loss : forwarded to load_local_model (segmentation model)
+        variant     : "float32" | "float16" | "int8" (default: MODEL_VARIANT)
+
+    Raises:
+        ValueError        : unknown backend or variant name
+        FileNotFoundError : neither artifact exists
+    """
+    backend = (backend or INFERENCE_BACKEND).lower()
+    variant = (variant or MODEL_VARIANT).lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown INFERENCE_BACKEND '{backend}' — expected one of {BACKENDS}")
+    if variant not in VARIANTS:
+        raise ValueError(f"Unknown MODEL_VARIANT '{variant}' — expected one of {VARIANTS}")
+
+    if variant != "float32":
+        path = published_variant_path(keras_path, variant)
+        if path is not None:
+            return _cached_tflite(path)
+        print(f"[Backend] ⚠ No published {variant} variant of {keras_path} — "
+              f"run quantize_models.py; serving the float model")
+
+    if backend == "tflite":
+        path = tflite_path_for(keras_path)
+        if os.path.exists(path):
+            return _cached_tflite(path)
+        print(f"[Backend] ⚠ {path} not found — run export_tflite.py; "
+              f"falling back to Keras for {keras_path}")
+
+    return KerasBackend(load_local_model(keras_path, custom_loss=custom_loss), keras_path)
+
+
+def _cached_tflite(path: str) -> TFLiteBackend:
+    st  = os.stat(path)
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    with _tflite_lock:
+        if key not in _tflite_cache:
+            for stale in [k for k in _tflite_cache if k[0] == key[0]]:
+                del _tflite_cache[stale]
+            _tflite_cache[key] = TFLiteBackend(path)
+            print(f"[Backend] ✓ TFLite/XNNPACK engine loaded ({path})")
+        return _tflite_cache[key]
+
+
+def parity_report(reference: np.ndarray, candidate: np.ndarray) -> dict:
+    """
+    Compare two backends' outputs for the same batch: largest absolute
+    difference and, for (N, C) class outputs, top-1 agreement.
+    """
+    reference = np.asarray(reference, dtype=np.float32)
+    candidate = np.asarray(candidate, dtype=np.float32)
+    report    = {"max_abs_diff": float(np.max(np.abs(reference - candidate)))}
+    if reference.ndim == 2:
+        report["top1_agreement"] = float(np.mean(
+            np.argmax(reference, axis=1) == np.argmax(candidate, axis=1)
+        ))
+    return report
+
+
+def export_tflite(model, out_path: str, variant: str = "float32",
+                  representative_data=None) -> int:
+    """
+    Convert a Keras model to a .tflite file with a dynamic batch
+    dimension. Returns the size of the written file in bytes.
+
+    Args:
+        variant             : "float32" — plain conversion
+                              "float16" — weights stored as fp16
+                              "int8"    — full-integer post-training
+                                          quantization (float I/O kept, so
+                                          callers feed the same tensors)
+        representative_data : callable yielding [batch] lists of float32
+                              inputs — required for int8 calibration
+    """
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if variant == "float16":
+        converter.optimizations               = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif variant == "int8":
+        if representative_data is None:
+            raise ValueError("int8 quantization needs representative_data for calibration")
+        converter.optimizations             = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset    = representative_data
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    elif variant != "float32":
+        raise ValueError(f"Unknown variant '{variant}' — expected one of {VARIANTS}")
+    flatbuf = converter.convert()
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    tmp = f"{out_path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(flatbuf)
+    os.replace(tmp, out_path)     # servers never see a half-written model
+    return len(flatbuf)
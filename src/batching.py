@@ -0,0 +1,219 @@
+"""
+src/batching.py
+───────────────
+Dynamic micro-batching for classifier inference in NeuroDL v2.1.
+
+Every /predict used to call `classification_model.predict` with a batch
+of one, so N concurrent uploads meant N tiny ResNet50V2 forward passes
+fighting over the same CPU cores. The MicroBatcher puts a single worker
+thread in front of the model: request threads enqueue their
+preprocessed tensors, the worker groups whatever has arrived (up to
+INFERENCE_MAX_BATCH_SIZE rows, waiting at most INFERENCE_MAX_WAIT_MS
+for stragglers), runs ONE forward pass and hands every caller back
+exactly its own rows.
+
+Under no load the only extra cost is the wait window (a few ms); under
+load, throughput scales with the batch size instead of the request
+count.
+
+Environment variables:
+    INFERENCE_MAX_BATCH_SIZE : max rows per forward pass   (default: 16)
+    INFERENCE_MAX_WAIT_MS    : max time the first queued request waits
+                               for others to join its batch (default: 5)
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+# ─── Configuration ────────────────────────────────────────────────────────────
+
+MAX_BATCH_SIZE = int(os.environ.get("INFERENCE_MAX_BATCH_SIZE", 16))
+MAX_WAIT_MS    = float(os.environ.get("INFERENCE_MAX_WAIT_MS", 5))
+
+
+# ─── Engine ───────────────────────────────────────────────────────────────────
+
+class _Pending:
+    """One submitted request waiting for its rows."""
+
+    __slots__ = ("batch", "rows", "future", "enqueued_at")
+
+    def __init__(self, batch: np.ndarray):
+        self.batch       = batch
+        self.rows        = batch.shape[0]
+        self.future      = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class MicroBatcher:
+    """
+    Queue-and-batch front end for a `predict_fn(batch) -> np.ndarray`.
+
+    predict_fn is only ever called from the single worker thread, so the
+    wrapped model never sees concurrent calls. Requests may carry more
+    than one row (e.g. a TTA batch); they are never split across forward
+    passes, and a request larger than max_batch_size runs on its own.
+
+    Args:
+        predict_fn     : callable mapping (N, ...) float32 → (N, classes)
+        max_batch_size : max rows per forward pass
+        max_wait_ms    : max time the oldest request waits for company
+        name           : label used in log lines and stats
+    """
+
+    def __init__(
+        self,
+        predict_fn,
+        max_batch_size: int   = MAX_BATCH_SIZE,
+        max_wait_ms:    float = MAX_WAIT_MS,
+        name:           str   = "classifier",
+    ):
+        self.predict_fn     = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait       = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name           = name
+
+        self._queue  = deque()
+        self._cond   = threading.Condition()
+        self._worker = None
+
+        # ── Stats (guarded by _cond) ──────────────────────────────
+        self._queued_rows          = 0
+        self._max_queued_rows      = 0
+        self._requests             = 0
+        self._batches              = 0
+        self._rows                 = 0
+        self._errors               = 0
+        self._batch_size_histogram = {}
+        self._queue_depth_histogram = {}
+        self._total_wait_s         = 0.0
+        self._total_compute_s      = 0.0
+
+    # ── Public API ────────────────────────────────────────────────
+
+    def predict(self, batch: np.ndarray, timeout: float = None) -> np.ndarray:
+        """
+        Submit a (n, ...) batch and block until its n output rows are ready.
+
+        Raises whatever predict_fn raised for the batch this request
+        was grouped into, or concurrent.futures.TimeoutError.
+        """
+        return self.submit(batch).result(timeout=timeout)
+
+    def submit(self, batch: np.ndarray) -> Future:
+        """Non-blocking variant of predict() — returns a Future of the rows."""
+        batch = np.asarray(batch, dtype=np.float32)
+        if batch.ndim < 2 or batch.shape[0] == 0:
+            raise ValueError(f"Expected a non-empty batch, got shape {batch.shape}")
+
+        pending = _Pending(batch)
+        with self._cond:
+            self._ensure_worker()
+            self._queue.append(pending)
+            self._requests        += 1
+            self._queued_rows     += pending.rows
+            self._max_queued_rows  = max(self._max_queued_rows, self._queued_rows)
+            self._cond.notify()
+        return pending.future
+
+    def stats(self) -> dict:
+        """Snapshot of queue depth, batch-size histogram and timing totals."""
+        with self._cond:
+            batches = self._batches or 1
+            return {
+                "name":                  self.name,
+                "max_batch_size":        self.max_batch_size,
+                "max_wait_ms":           round(self.max_wait * 1000, 3),
+                "queue_depth":           self._queued_rows,
+                "max_queue_depth":       self._max_queued_rows,
+                "requests":              self._requests,
+                "batches":               self._batches,
+                "rows":                  self._rows,
+                "errors":                self._errors,
+                "avg_batch_size":        round(self._rows / batches, 3),
+                "avg_wait_ms":           round(1000 * self._total_wait_s / max(self._requests, 1), 3),
+                "avg_compute_ms":        round(1000 * self._total_compute_s / batches, 3),
+                "batch_size_histogram":  {str(k): v for k, v in sorted(self._batch_size_histogram.items())},
+                "queue_depth_histogram": {str(k): v for k, v in sorted(self._queue_depth_histogram.items())},
+            }
+
+    # ── Worker ────────────────────────────────────────────────────
+
+    def _ensure_worker(self):
+        """Start the worker on first use (caller holds _cond)."""
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._run, name=f"microbatch-{self.name}", daemon=True,
+            )
+            self._worker.start()
+
+    def _next_batch(self) -> list:
+        """Block for the first request, then gather more until full or the deadline passes."""
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+
+            first    = self._queue.popleft()
+            items    = [first]
+            rows     = first.rows
+            deadline = first.enqueued_at + self.max_wait
+
+            while rows < self.max_batch_size:
+                if self._queue:
+                    if rows + self._queue[0].rows > self.max_batch_size:
+                        break
+                    nxt   = self._queue.popleft()
+                    rows += nxt.rows
+                    items.append(nxt)
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            # Queue depth as seen by this dispatch, including the rows taken
+            depth = self._queued_rows
+            self._queue_depth_histogram[depth] = self._queue_depth_histogram.get(depth, 0) + 1
+            self._queued_rows -= rows
+            return items
+
+    def _run(self):
+        while True:
+            items = self._next_batch()
+            rows  = sum(p.rows for p in items)
+            start = time.monotonic()
+
+            try:
+                batch = items[0].batch if len(items) == 1 else np.concatenate(
+                    [p.batch for p in items], axis=0,
+                )
+                output = np.asarray(self.predict_fn(batch))
+                if output.shape[0] != rows:
+                    raise RuntimeError(
+                        f"[Batching] {self.name}: predict_fn returned {output.shape[0]} "
+                        f"rows for a batch of {rows}"
+                    )
+            except Exception as e:
+                with self._cond:
+                    self._errors += 1
+                for p in items:
+                    p.future.set_exception(e)
+                continue
+
+            elapsed = time.monotonic() - start
+            with self._cond:
+                self._batches += 1
+                self._rows    += rows
+                self._batch_size_histogram[rows] = self._batch_size_histogram.get(rows, 0) + 1
+                self._total_compute_s += elapsed
+                self._total_wait_s    += sum(start - p.enqueued_at for p in items)
+
+            offset = 0
+            for p in items:
+                p.future.set_result(output[offset:offset + p.rows])
+                offset += p.rows
@@ -0,0 +1,152 @@
+"""
+src/cascade.py
+──────────────
+Confidence-based classifier cascade for /predict (NeuroDL v2.1).
+
+The custom CNN from train_all_models.py is far cheaper than ResNet50V2
+and most scans — especially clear "No Tumor" ones — are easy. With the
+cascade enabled, every scan goes to the custom CNN first; its softmax is
+temperature-calibrated and, if the top class clears the threshold, that
+answer is final. Otherwise the scan escalates to ResNet50V2, and — when
+CASCADE_USE_META is on — the meta model combines both base predictions
+exactly as evaluate_models.py stacks them ([resnet, custom]).
+
+Temperature and threshold come from models/cascade.json, written by
+`python evaluate_cascade.py`, which fits the temperature on the
+validation split and reports the escalation rate and accuracy on the
+evaluate_models.py test set. Without that file the cascade stays off —
+an uncalibrated threshold would silently trade accuracy for speed.
+
+Environment variables:
+    CASCADE_ENABLED   : "1" to serve through the cascade      (default: "0")
+    CASCADE_CONFIG    : calibration file from evaluate_cascade (default: "models/cascade.json")
+    CASCADE_THRESHOLD : override the calibrated threshold     (optional)
+    CASCADE_USE_META  : "1" to stack ResNet + CNN through the meta model on escalation
+"""
+
+import json
+import os
+import threading
+
+import numpy as np
+
+# ─── Configuration ────────────────────────────────────────────────────────────
+
+CASCADE_ENABLED   = os.environ.get("CASCADE_ENABLED", "0") == "1"
+CASCADE_CONFIG    = os.environ.get("CASCADE_CONFIG", os.path.join("models", "cascade.json"))
+CASCADE_THRESHOLD = os.environ.get("CASCADE_THRESHOLD")
+CASCADE_USE_META  = os.environ.get("CASCADE_USE_META", "0") == "1"
+
+SMALL_MODEL_NAME = "Custom CNN"
+LARGE_MODEL_NAME = "ResNet50V2"
+META_MODEL_NAME  = "Meta-Model (Ensemble)"
+
+
+# ─── Calibration ──────────────────────────────────────────────────────────────
+
+def temperature_scale(probs: np.ndarray, temperature: float) -> np.ndarray:
+    """
+    Re-calibrate softmax outputs: softmax(log(p) / T). The models end in
+    a softmax layer, so log(p) recovers the logits up to a per-row
+    constant, which softmax ignores.
+    """
+    logits = np.log(np.clip(np.asarray(probs, dtype=np.float64), 1e-12, 1.0)) / temperature
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp    = np.exp(logits)
+    return (exp / exp.sum(axis=1, keepdims=True)).astype(np.float32)
+
+
+def fit_temperature(probs: np.ndarray, labels: np.ndarray,
+                    grid: np.ndarray = None) -> float:
+    """Temperature minimising negative log-likelihood on held-out data."""
+    grid   = np.linspace(0.5, 5.0, 91) if grid is None else grid
+    labels = np.asarray(labels, dtype=int)
+    nll    = [
+        -np.mean(np.log(np.clip(temperature_scale(probs, t)[np.arange(len(labels)), labels],
+                                1e-12, 1.0)))
+        for t in grid
+    ]
+    return float(grid[int(np.argmin(nll))])
+
+
+def load_config(path: str = CASCADE_CONFIG):
+    """cascade.json as a dict, or None if it hasn't been generated."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+# ─── Cascade ──────────────────────────────────────────────────────────────────
+
+class Cascade:
+    """
+    Two-stage classifier: accept the small model's calibrated answer when
+    confident, escalate the rest.
+
+    Args:
+        small_predict : batch → (N, C) softmax of the custom CNN
+        large_predict : batch → (N, C) softmax of ResNet50V2
+        meta_predict  : optional (N, 2C) → (N, C) softmax of the meta model
+        temperature   : calibration temperature for the small model
+        threshold     : calibrated confidence needed to accept
+    """
+
+    def __init__(self, small_predict, large_predict, meta_predict=None,
+                 temperature: float = 1.0, threshold: float = 0.9):
+        self.small_predict = small_predict
+        self.large_predict = large_predict
+        self.meta_predict  = meta_predict
+        self.temperature   = float(temperature)
+        self.threshold     = float(threshold)
+
+        self._lock     = threading.Lock()
+        self._counters = {"rows": 0, "accepted": 0, "escalated": 0}
+
+    @property
+    def signature(self) -> str:
+        """Identifies the decision rule — part of the result-cache key."""
+        return (f"cascade:T={self.temperature:g}:t={self.threshold:g}"
+                f":meta={int(self.meta_predict is not None)}")
+
+    def classify(self, batch: np.ndarray) -> tuple:
+        """
+        Returns:
+            tuple: (probs (N, C) float32, model_used list[str] per row)
+        """
+        small = np.asarray(self.small_predict(batch), dtype=np.float32)
+        calib = temperature_scale(small, self.temperature)
+        keep  = calib.max(axis=1) >= self.threshold
+
+        probs      = calib.copy()
+        model_used = [SMALL_MODEL_NAME] * len(batch)
+        escalate   = np.flatnonzero(~keep)
+        if escalate.size:
+            large = np.asarray(self.large_predict(batch[escalate]), dtype=np.float32)
+            if self.meta_predict is not None:
+                stacked = np.column_stack((large, small[escalate]))
+                probs[escalate] = np.asarray(self.meta_predict(stacked), dtype=np.float32)
+                name = META_MODEL_NAME
+            else:
+                probs[escalate] = large
+                name = LARGE_MODEL_NAME
+            for i in escalate:
+                model_used[i] = name
+
+        with self._lock:
+            self._counters["rows"]      += len(batch)
+            self._counters["accepted"]  += int(keep.sum())
+            self._counters["escalated"] += int(escalate.size)
+        return probs, model_used
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._counters["rows"]
+            return {
+                "temperature":     self.temperature,
+                "threshold":       self.threshold,
+                "meta":            self.meta_predict is not None,
+                "escalation_rate": round(self._counters["escalated"] / rows, 4) if rows else None,
+                **self._counters,
+            }
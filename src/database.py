@@ -28,7 +28,7 @@ from datetime import datetime
 
 from sqlalchemy import (
     Column, Integer, String, Float, Boolean,
-    DateTime, Text, ForeignKey, or_, create_engine,
+    DateTime, Text, LargeBinary, ForeignKey, or_, create_engine, inspect, text,
 )
 from sqlalchemy.orm import declarative_base, sessionmaker, relationship
 
@@ -139,6 +139,10 @@ class Scan(Base):
     symptoms               = Column(Text,        nullable=True)  # reason for THIS scan
     gradcam_image_key      = Column(String(255), nullable=True)  # storage key, NOT the image itself
     segment_image_key      = Column(String(255), nullable=True)  # resolved via image_storage.py
+    predictive_entropy     = Column(Float,       nullable=True)  # MC dropout (nats), NULL if not run
+    mutual_information     = Column(Float,       nullable=True)
+    gradcam_maps           = Column(LargeBinary, nullable=True)  # float16 (classes, 7, 7) .npy, ~0.5 KB
+    gradcam_base_key       = Column(String(255), nullable=True)  # ≤ RENDER_HEATMAP_SIDE background, optional
 
     patient = relationship("Patient",       back_populates="scans")
     notes   = relationship("ClinicalNote",  back_populates="scan",
@@ -158,6 +162,9 @@ class Scan(Base):
             "symptoms":               self.symptoms,
             "has_gradcam_image":      bool(self.gradcam_image_key),
             "has_segment_image":      bool(self.segment_image_key),
+            "predictive_entropy":     self.predictive_entropy,
+            "mutual_information":     self.mutual_information,
+            "has_gradcam_maps":       bool(self.gradcam_maps),
         }
 
 
@@ -199,9 +206,30 @@ class ClinicalNote(Base):
 
 def init_db():
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
     print("✓ PostgreSQL database initialised")
 
 
+def _add_missing_columns():
+    """
+    create_all() never alters a table that already exists, so columns
+    added to a model later (e.g. Scan.predictive_entropy) are missing on
+    older databases. Add any such NULLable columns in place.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'))
+                print(f"✓ Added column {table.name}.{column.name} ({col_type})")
+
+
 # ─── User CRUD ────────────────────────────────────────────────────────────────
 
 def create_user(email: str, password_hash: str, full_name: str,
@@ -351,7 +379,9 @@ def delete_patient(patient_id: int) -> bool:
 def save_scan(predicted_class, confidence_score, segmentation_performed=False,
               gradcam_performed=False, file_name=None, report_text=None,
               patient_id=None, symptoms=None,
-              gradcam_image_key=None, segment_image_key=None) -> int:
+              gradcam_image_key=None, segment_image_key=None,
+              predictive_entropy=None, mutual_information=None,
+              gradcam_maps=None, gradcam_base_key=None) -> int:
     db = SessionLocal()
     try:
         scan = Scan(
@@ -365,6 +395,10 @@ def save_scan(predicted_class, confidence_score, segmentation_performed=False,
             symptoms               = symptoms or None,
             gradcam_image_key      = gradcam_image_key or None,
             segment_image_key      = segment_image_key or None,
+            predictive_entropy     = predictive_entropy,
+            mutual_information     = mutual_information,
+            gradcam_maps           = gradcam_maps or None,
+            gradcam_base_key       = gradcam_base_key or None,
         )
         db.add(scan); db.commit(); db.refresh(scan)
         print(f"✓ Scan saved — id={scan.id}, class='{scan.predicted_class}'")
@@ -375,6 +409,39 @@ def save_scan(predicted_class, confidence_score, segmentation_performed=False,
         db.close()
 
 
+# Columns update_scan() may touch — artifacts that land after the row exists.
+_UPDATABLE_SCAN_FIELDS = {
+    "segmentation_performed", "gradcam_performed", "report_text",
+    "gradcam_image_key", "segment_image_key",
+    "gradcam_maps", "gradcam_base_key",
+}
+
+
+def update_scan(scan_id: int, **fields) -> bool:
+    """
+    Patch an existing scan as background artifacts arrive (async /predict
+    jobs). Only _UPDATABLE_SCAN_FIELDS are accepted. Returns False if the
+    scan no longer exists (e.g. deleted while the job was running).
+    """
+    unknown = set(fields) - _UPDATABLE_SCAN_FIELDS
+    if unknown:
+        raise ValueError(f"Cannot update scan fields: {sorted(unknown)}")
+
+    db = SessionLocal()
+    try:
+        scan = db.query(Scan).filter(Scan.id == scan_id).first()
+        if not scan: return False
+        for name, value in fields.items():
+            setattr(scan, name, value)
+        db.commit()
+        print(f"✓ Scan updated — id={scan_id}, fields={sorted(fields)}")
+        return True
+    except Exception:
+        db.rollback(); raise
+    finally:
+        db.close()
+
+
 def get_scan_image_key(scan_id: int, kind: str):
     """kind: 'gradcam' | 'segment'. Returns the storage key, or None."""
     db = SessionLocal()
@@ -387,6 +454,18 @@ def get_scan_image_key(scan_id: int, kind: str):
         db.close()
 
 
+def get_scan_gradcam_maps(scan_id: int):
+    """(packed all-class heatmaps, background storage key or None) for one scan, or None."""
+    db = SessionLocal()
+    try:
+        scan = db.query(Scan).filter(Scan.id == scan_id).first()
+        if not scan or not scan.gradcam_maps:
+            return None
+        return scan.gradcam_maps, scan.gradcam_base_key
+    finally:
+        db.close()
+
+
 def get_scan_owner_user_id(scan_id: int):
     """Resolves scan -> patient -> user_id, for ownership checks. None if not found/orphaned."""
     db = SessionLocal()
@@ -464,7 +543,7 @@ def delete_scan(scan_id: int) -> bool:
     try:
         scan = db.query(Scan).filter(Scan.id == scan_id).first()
         if not scan: return False
-        for key in (scan.gradcam_image_key, scan.segment_image_key):
+        for key in (scan.gradcam_image_key, scan.segment_image_key, scan.gradcam_base_key):
             if key:
                 delete_image(key)
         db.delete(scan); db.commit()
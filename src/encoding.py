@@ -0,0 +1,174 @@
+"""
+src/encoding.py
+───────────────
+Overlay image encoding (NeuroDL v2.1).
+
+Every rendered overlay is encoded exactly once, here, to raw bytes. The
+same bytes go to the storage writer (src/image_storage.py) and to the
+response serializer — /predict base64s them once for JSON and never
+decodes a base64 string back to store it.
+
+Formats ("png" | "jpeg" | "webp") are chosen per overlay kind; the
+storage key extension and the served mimetype follow the format, and
+stored bytes are identified by their magic number (`sniff_format`), so
+changing the format never breaks already-saved scans.
+
+cv2.imencode is the default encoder: ~4× faster than Pillow's PNG
+writer at zlib level 1 (for ~5% more bytes) and identical for JPEG.
+Pillow is kept as a fallback / alternative (IMAGE_ENCODER=pillow).
+
+Environment variables:
+    GRADCAM_IMAGE_FORMAT : Grad-CAM overlay format                   (default: png)
+    SEGMENT_IMAGE_FORMAT : segmentation overlay format              (default: jpeg)
+    IMAGE_PNG_LEVEL      : zlib level 0–9 (Pillow's default was 6)  (default: 1)
+    IMAGE_JPEG_QUALITY   : JPEG quality 1–100                       (default: 95)
+    IMAGE_WEBP_QUALITY   : WebP quality 1–100; 101 = lossless       (default: 90)
+    IMAGE_ENCODER        : "cv2" | "pillow"                         (default: cv2)
+"""
+
+import base64
+import os
+from io import BytesIO
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# ─── Configuration ────────────────────────────────────────────────────────────
+
+GRADCAM_IMAGE_FORMAT = os.environ.get("GRADCAM_IMAGE_FORMAT", "png").lower()
+SEGMENT_IMAGE_FORMAT = os.environ.get("SEGMENT_IMAGE_FORMAT", "jpeg").lower()
+IMAGE_PNG_LEVEL      = int(os.environ.get("IMAGE_PNG_LEVEL", "1"))
+IMAGE_JPEG_QUALITY   = int(os.environ.get("IMAGE_JPEG_QUALITY", "95"))
+IMAGE_WEBP_QUALITY   = int(os.environ.get("IMAGE_WEBP_QUALITY", "90"))
+IMAGE_ENCODER        = os.environ.get("IMAGE_ENCODER", "cv2").lower()
+
+# format → (file extension, mimetype)
+FORMATS = {
+    "png":  (".png",  "image/png"),
+    "jpeg": (".jpg",  "image/jpeg"),
+    "webp": (".webp", "image/webp"),
+}
+
+
+def _normalise(fmt: str) -> str:
+    fmt = fmt.lower()
+    fmt = "jpeg" if fmt == "jpg" else fmt
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported image format {fmt!r} (expected one of {sorted(FORMATS)})")
+    return fmt
+
+
+# Overlay kind → configured format ("jpg" is accepted as an alias)
+KIND_FORMATS = {}
+for _kind, _fmt in (("gradcam", GRADCAM_IMAGE_FORMAT), ("segment", SEGMENT_IMAGE_FORMAT)):
+    try:
+        KIND_FORMATS[_kind] = _normalise(_fmt)
+    except ValueError:
+        raise ValueError(f"{_kind.upper()}_IMAGE_FORMAT must be one of {sorted(FORMATS)}, got {_fmt!r}")
+
+
+def extension(fmt: str) -> str:
+    """".png" / ".jpg" / ".webp" """
+    return FORMATS[_normalise(fmt)][0]
+
+
+def mimetype(fmt: str) -> str:
+    """"image/png" / "image/jpeg" / "image/webp" """
+    return FORMATS[_normalise(fmt)][1]
+
+
+def sniff_format(data: bytes) -> str:
+    """Format of encoded image bytes from their magic number (default: png)."""
+    head = bytes(data[:12])
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return "png"
+
+
+def format_for_key(key: str) -> str:
+    """Format implied by a storage key's extension (keys predating v2.1 are .png)."""
+    ext = os.path.splitext(key or "")[1].lower()
+    for fmt, (fmt_ext, _) in FORMATS.items():
+        if ext == fmt_ext:
+            return fmt
+    return "png"
+
+
+# ─── Encoding ─────────────────────────────────────────────────────────────────
+
+def _quality(fmt: str, quality) -> int:
+    if quality is not None:
+        return int(quality)
+    return {"png": IMAGE_PNG_LEVEL, "jpeg": IMAGE_JPEG_QUALITY, "webp": IMAGE_WEBP_QUALITY}[fmt]
+
+
+def _encode_cv2(rgb: np.ndarray, fmt: str, quality: int) -> bytes:
+    params = {
+        "png":  [cv2.IMWRITE_PNG_COMPRESSION, quality],
+        "jpeg": [cv2.IMWRITE_JPEG_QUALITY, quality],
+        "webp": [cv2.IMWRITE_WEBP_QUALITY, quality],
+    }[fmt]
+    image = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR) if rgb.ndim == 3 else rgb
+    ok, buf = cv2.imencode(extension(fmt), image, params)
+    if not ok:
+        raise ValueError(f"cv2.imencode failed for {fmt}")
+    return buf.tobytes()
+
+
+def _encode_pillow(rgb: np.ndarray, fmt: str, quality: int) -> bytes:
+    options = {
+        "png":  {"compress_level": quality},
+        "jpeg": {"quality": quality},
+        "webp": {"lossless": True} if quality > 100 else {"quality": quality},
+    }[fmt]
+    buf = BytesIO()
+    Image.fromarray(rgb).save(buf, format=fmt.upper(), **options)
+    return buf.getvalue()
+
+
+def encode_image(rgb: np.ndarray, fmt: str = "png", quality: int = None,
+                 encoder: str = None) -> bytes:
+    """
+    Encode a uint8 RGB (or greyscale) image once.
+
+    Args:
+        rgb     : (H, W, 3) or (H, W) uint8
+        fmt     : "png" | "jpeg" | "webp"
+        quality : PNG zlib level / JPEG or WebP quality; None → the env default
+        encoder : "cv2" | "pillow"; None → IMAGE_ENCODER. cv2 falls back
+                  to Pillow if it cannot write the format.
+
+    Returns:
+        bytes: the encoded image
+    """
+    fmt     = _normalise(fmt)
+    quality = _quality(fmt, quality)
+    rgb     = np.ascontiguousarray(rgb, dtype=np.uint8)
+    if (encoder or IMAGE_ENCODER) == "pillow":
+        return _encode_pillow(rgb, fmt, quality)
+    try:
+        return _encode_cv2(rgb, fmt, quality)
+    except (cv2.error, ValueError) as e:
+        print(f"[Encode] ⚠ cv2 {fmt} encode failed ({e}) — using Pillow")
+        return _encode_pillow(rgb, fmt, quality)
+
+
+def encode_overlay(rgb: np.ndarray, kind: str) -> bytes:
+    """Encode an overlay in the format configured for its kind ("gradcam" | "segment")."""
+    return encode_image(rgb, KIND_FORMATS[kind])
+
+
+def decode_image(data: bytes) -> np.ndarray:
+    """Encoded bytes (any of FORMATS) → (H, W, 3) uint8 RGB — e.g. a stored background."""
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("cv2.imdecode could not decode the image bytes")
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+def to_base64(data: bytes) -> str:
+    """The single base64 step for JSON responses."""
+    return base64.b64encode(data).decode("ascii")
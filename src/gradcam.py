@@ -7,22 +7,37 @@ Extracts gradients from ResNet50V2's final conv layer to produce a
 jet-colormap heatmap overlay that visually explains WHY the model
 predicted a given class.
 
-Output: base64-encoded PNG string, ready to embed in JSON responses.
+Output: the overlay encoded once by src/encoding.py (GRADCAM_IMAGE_FORMAT,
+PNG by default) — raw bytes from classify_with_gradcam for storage and
+the response serializer, a base64 string from generate_gradcam.
+
+The split conv-extractor / head graph is built ONCE per (model, layer)
+and compiled as a tf.function with a fixed input signature — see
+_get_grad_graph. Every later call just executes the traced graph.
+
+All-class maps (v2.1): classify_with_gradcam(all_classes=True) takes the
+Jacobian of the whole softmax w.r.t. conv5_block3_out in one tape
+(vectorised by pfor), so every class's heatmap comes from a single
+forward + backward pass. The raw (C, 7, 7) maps are packed as float16
+(`pack_heatmaps`, ~0.5 KB) and stored with the scan, and `render_gradcam`
+re-renders any class from them later without the model.
 
 This module is responsible ONLY for the visual explanation heatmap.
 Tumour segmentation (pixel-level boundary detection) is handled
 separately by the U-Net model in src/inference.py.
 """
 
-import base64
+import threading
 import traceback
+import weakref
 from io import BytesIO
 from typing import Optional
 
-import cv2
 import numpy as np
 import tensorflow as tf
-from PIL import Image
+
+from src.encoding import encode_overlay, to_base64
+from src.render import HEATMAP_ALPHA, ORIGINAL_ALPHA, heatmap_overlay  # noqa: F401
 
 
 # ─── Constants ────────────────────────────────────────────────────────────────
@@ -37,13 +52,90 @@ from PIL import Image
 # This is the standard Grad-CAM target for ResNet50V2 at ImageNet resolution.
 RESNET_LAST_CONV_LAYER = "conv5_block3_out"
 
-# Blend weights: 0.55 heatmap / 0.45 original keeps brain anatomy visible.
-HEATMAP_ALPHA  = 0.55
-ORIGINAL_ALPHA = 0.45
+# Blend weights (0.55 heatmap / 0.45 original) live in src/render.py.
+
+
+# Compiled Grad-CAM graphs: model → {layer_name: tf.function}. Weak keys so
+# a model that is dropped (e.g. replaced on reload) takes its graphs with it.
+_GRAD_GRAPHS       = weakref.WeakKeyDictionary()
+_GRAD_GRAPHS_LOCK  = threading.Lock()
 
 
 # ─── Public API ───────────────────────────────────────────────────────────────
 
+def classify_with_gradcam(
+    model: tf.keras.Model,
+    img_array: np.ndarray,
+    class_idx: int = None,
+    original_image: np.ndarray = None,
+    layer_name: str = RESNET_LAST_CONV_LAYER,
+    all_classes: bool = False,
+) -> Optional[dict]:
+    """
+    Softmax, raw heatmap AND rendered overlay from one forward + one backward pass.
+
+    get_gradcam_heatmap and generate_gradcam each redo the full forward
+    pass and GradientTape; calling both for the same scan (as /predict
+    does for tumour cases) doubles the model compute. This fused call
+    records a single tape and derives everything from it.
+
+    Args:
+        model          : Loaded ResNet50V2 Keras model
+        img_array      : Preprocessed image, shape (1, H, W, 3), values in [0, 1]
+        class_idx      : Class to explain. None → the model's own top-1
+                         prediction from this same forward pass.
+        original_image : Optional full-resolution uint8 RGB array (H, W, 3)
+                         used as the overlay background.
+        layer_name     : Target conv layer name
+        all_classes    : Also return every class's heatmap, from the
+                         Jacobian of the softmax in the same single tape.
+
+    Returns:
+        dict with keys:
+          "predictions" : (1, num_classes) float32 softmax
+          "class_idx"   : int — the class the heatmap explains
+          "heatmap"     : (h, w) float32 in [0, 1]
+          "heatmaps"    : (num_classes, h, w) float32 in [0, 1] — only
+                          with all_classes=True
+          "overlay"     : encoded overlay bytes (GRADCAM_IMAGE_FORMAT),
+                          or None if rendering failed
+        or None if the forward/backward pass itself fails.
+    """
+    heatmaps = None
+    try:
+        if all_classes:
+            conv_outputs, predictions, jacobian = _run_jacobian_graph(
+                model, img_array, layer_name,
+            )
+            heatmaps  = _pool_heatmaps(conv_outputs, jacobian)
+            class_idx = int(np.argmax(predictions[0])) if class_idx is None else int(class_idx)
+            heatmap   = heatmaps[class_idx]
+        else:
+            conv_outputs, predictions, grads, class_idx = _run_grad_graph(
+                model, img_array, class_idx, layer_name,
+            )
+            heatmap = _pool_heatmap(conv_outputs, grads)
+    except Exception:
+        print(f"[Grad-CAM] Fused pass failed:\n{traceback.format_exc()}")
+        return None
+
+    try:
+        overlay = _render_overlay(img_array, heatmap, original_image)
+    except Exception:
+        print(f"[Grad-CAM] Overlay rendering failed:\n{traceback.format_exc()}")
+        overlay = None
+
+    result = {
+        "predictions": predictions,
+        "class_idx":   class_idx,
+        "heatmap":     heatmap,
+        "overlay":     overlay,
+    }
+    if heatmaps is not None:
+        result["heatmaps"] = heatmaps
+    return result
+
+
 def get_gradcam_heatmap(
     model: tf.keras.Model,
     img_array: np.ndarray,
@@ -68,8 +160,7 @@ def get_gradcam_heatmap(
         np.ndarray (H, W) float32 in [0, 1], or None if computation fails.
     """
     try:
-        grad_model_tuple = _build_grad_model(model, layer_name)
-        return _compute_heatmap(grad_model_tuple, img_array, class_idx, layer_name)
+        return _compute_heatmap(model, img_array, class_idx, layer_name)
     except Exception:
         print(f"[Grad-CAM] Heatmap extraction failed:\n{traceback.format_exc()}")
         return None
@@ -98,20 +189,45 @@ def generate_gradcam(
         layer_name     : Name of the target conv layer to extract gradients from
 
     Returns:
-        Base64-encoded PNG string of the heatmap overlay,
-        or None if generation fails.
+        Base64 string of the heatmap overlay (GRADCAM_IMAGE_FORMAT, PNG by
+        default), or None if generation fails.
     """
     try:
-        grad_model_tuple = _build_grad_model(model, layer_name)
-        heatmap          = _compute_heatmap(grad_model_tuple, img_array, class_idx, layer_name)
-        overlay_b64      = _render_overlay(img_array, heatmap, original_image)
-        return overlay_b64
+        heatmap = _compute_heatmap(model, img_array, class_idx, layer_name)
+        return to_base64(_render_overlay(img_array, heatmap, original_image))
 
     except Exception:
         print(f"[Grad-CAM] Generation failed:\n{traceback.format_exc()}")
         return None
 
 
+def render_gradcam(background: np.ndarray, heatmap: np.ndarray) -> bytes:
+    """
+    Render one stored heatmap over a uint8 RGB background and encode it —
+    the same overlay classify_with_gradcam produces, with no model involved.
+    """
+    return encode_overlay(heatmap_overlay(background, heatmap), "gradcam")
+
+
+def pack_heatmaps(heatmaps: np.ndarray) -> bytes:
+    """
+    (num_classes, h, w) heatmaps in [0, 1] → compact float16 .npy bytes
+    (~0.5 KB for 4 × 7×7). float16 keeps ~3 significant digits, far below
+    what the 8-bit colormap can show.
+    """
+    buf = BytesIO()
+    np.save(buf, np.asarray(heatmaps, dtype=np.float16), allow_pickle=False)
+    return buf.getvalue()
+
+
+def unpack_heatmaps(blob: bytes) -> np.ndarray:
+    """Inverse of pack_heatmaps → (num_classes, h, w) float32."""
+    heatmaps = np.load(BytesIO(blob), allow_pickle=False)
+    if heatmaps.ndim != 3:
+        raise ValueError(f"Expected (classes, h, w) heatmaps, got shape {heatmaps.shape}")
+    return heatmaps.astype(np.float32)
+
+
 # ─── Internal Helpers ─────────────────────────────────────────────────────────
 
 def _build_grad_model(
@@ -119,26 +235,30 @@ def _build_grad_model(
     layer_name: str,
 ) -> tuple:
     """
-    Build a conv extractor sub-model and return it alongside the full model.
+    Build a conv extractor sub-model and the list of layers that follow it.
 
     Keras 3 Sequential models do not expose .output symbolically, so we
     build a functional extractor: resnet_input -> conv_layer_output
-    and manually complete the forward pass inside GradientTape.
+    and complete the forward pass through `head_layers` inside
+    GradientTape.
 
     Args:
         model      : Full Sequential classification model
         layer_name : Name of the target conv layer inside ResNet50V2
 
     Returns:
-        tuple: (conv_extractor, resnet_submodel, model)
+        tuple: (conv_extractor, head_layers)
+          head_layers = remaining ResNet layers after layer_name, then the
+                        Sequential classification head
 
     Raises:
         ValueError: If ResNet50V2 submodel or layer_name not found
     """
+    resnet_idx      = None
     resnet_submodel = None
-    for layer in model.layers:
+    for i, layer in enumerate(model.layers):
         if "resnet50v2" in layer.name.lower():
-            resnet_submodel = layer
+            resnet_idx, resnet_submodel = i, layer
             break
 
     if resnet_submodel is None:
@@ -162,11 +282,98 @@ def _build_grad_model(
         name    = "conv_extractor",
     )
 
-    return conv_extractor, resnet_submodel, model
+    resnet_layers = resnet_submodel.layers
+    conv_idx      = resnet_layers.index(conv_layer)
+    head_layers   = resnet_layers[conv_idx + 1:] + model.layers[resnet_idx + 1:]
+
+    return conv_extractor, head_layers
+
+
+def _get_grad_graph(model: tf.keras.Model, layer_name: str):
+    """
+    Return the compiled Grad-CAM graph for (model, layer_name), building it once.
+
+    The graph maps (images (N, H, W, 3) float32, class_idx int32 scalar)
+    to (conv_outputs, predictions, grads, class_idx). A negative
+    class_idx means "explain the top-1 class of this forward pass".
+    The input signature is fixed, so it is traced exactly once.
+    """
+    with _GRAD_GRAPHS_LOCK:
+        per_model = _GRAD_GRAPHS.setdefault(model, {})
+        graph     = per_model.get(layer_name)
+        if graph is not None:
+            return graph
+
+        conv_extractor, head_layers = _build_grad_model(model, layer_name)
+        image_shape = tuple(conv_extractor.input.shape[1:])
+
+        @tf.function(input_signature=[
+            tf.TensorSpec(shape=(None,) + image_shape, dtype=tf.float32),
+            tf.TensorSpec(shape=(),                    dtype=tf.int32),
+        ])
+        def grad_graph(images, class_idx):
+            with tf.GradientTape() as tape:
+                conv_outputs = conv_extractor(images, training=False)
+                tape.watch(conv_outputs)
+                x = conv_outputs
+                for layer in head_layers:
+                    x = layer(x, training=False)
+                predictions = x
+                class_idx   = tf.where(
+                    class_idx < 0,
+                    tf.cast(tf.argmax(predictions[0]), tf.int32),
+                    class_idx,
+                )
+                class_score = tf.gather(predictions, class_idx, axis=1)
+            grads = tape.gradient(class_score, conv_outputs)
+            return conv_outputs, predictions, grads, class_idx
+
+        per_model[layer_name] = grad_graph
+        print(f"[Grad-CAM] Compiled graph for {model.name}/{layer_name}")
+        return grad_graph
+
+
+def _get_jacobian_graph(model: tf.keras.Model, layer_name: str):
+    """
+    Return the compiled all-class graph for (model, layer_name), building it once.
+
+    Maps images (1, H, W, 3) float32 to (conv_outputs, predictions,
+    jacobian), where jacobian is d softmax[0] / d conv_outputs with shape
+    (num_classes, 1, h, w, c): one tape, one forward pass, and a backward
+    pass per class vectorised by pfor. Cached next to the single-class
+    graph under the key (layer_name, "jacobian").
+    """
+    with _GRAD_GRAPHS_LOCK:
+        per_model = _GRAD_GRAPHS.setdefault(model, {})
+        graph     = per_model.get((layer_name, "jacobian"))
+        if graph is not None:
+            return graph
+
+        conv_extractor, head_layers = _build_grad_model(model, layer_name)
+        image_shape = tuple(conv_extractor.input.shape[1:])
+
+        @tf.function(input_signature=[
+            tf.TensorSpec(shape=(None,) + image_shape, dtype=tf.float32),
+        ])
+        def jacobian_graph(images):
+            with tf.GradientTape() as tape:
+                conv_outputs = conv_extractor(images, training=False)
+                tape.watch(conv_outputs)
+                x = conv_outputs
+                for layer in head_layers:
+                    x = layer(x, training=False)
+                predictions  = x
+                class_scores = predictions[0]
+            jacobian = tape.jacobian(class_scores, conv_outputs)
+            return conv_outputs, predictions, jacobian
+
+        per_model[(layer_name, "jacobian")] = jacobian_graph
+        print(f"[Grad-CAM] Compiled all-class graph for {model.name}/{layer_name}")
+        return jacobian_graph
 
 
 def _compute_heatmap(
-    grad_model_tuple: tuple,
+    model: tf.keras.Model,
     img_array: np.ndarray,
     class_idx: int,
     layer_name: str,
@@ -176,52 +383,90 @@ def _compute_heatmap(
 
     1. Extract conv_outputs via the functional conv_extractor
     2. Watch conv_outputs inside GradientTape
-    3. Manually complete the forward pass through remaining layers
+    3. Complete the forward pass through the remaining layers
     4. Gradient of class_score w.r.t. conv_outputs
-    5. Pool -> weight -> ReLU -> normalise -> power-boost
+    5. Pool -> weight -> ReLU -> normalise
 
-    The power-boost (^2) concentrates the hot region so that only the
-    genuinely most-activated area shows as red/yellow, suppressing the
-    diffuse warm background that otherwise spreads across the whole brain.
+    Steps 1-4 run inside the cached tf.function from _get_grad_graph.
 
     Returns:
         np.ndarray: 2D heatmap normalised to [0, 1], shape (h, w)
     """
-    conv_extractor, resnet_submodel, model = grad_model_tuple
-    img_tensor = tf.cast(img_array, tf.float32)
+    conv_outputs, _, grads, _ = _run_grad_graph(
+        model, img_array, class_idx, layer_name,
+    )
+    return _pool_heatmap(conv_outputs, grads)
 
-    with tf.GradientTape() as tape:
-        conv_outputs = conv_extractor(img_tensor, training=False)
-        tape.watch(conv_outputs)
 
-        # Complete forward pass through remaining ResNet layers
-        resnet_layers = resnet_submodel.layers
-        conv_idx = next(
-            i for i, l in enumerate(resnet_layers) if l.name == layer_name
-        )
-        x = conv_outputs
-        for layer in resnet_layers[conv_idx + 1:]:
-            x = layer(x, training=False)
-
-        # Continue through the Sequential classification head
-        sequential_layers = model.layers
-        resnet_layer_idx  = next(
-            i for i, l in enumerate(sequential_layers)
-            if "resnet50v2" in l.name.lower()
-        )
-        for layer in sequential_layers[resnet_layer_idx + 1:]:
-            x = layer(x, training=False)
+def _run_grad_graph(
+    model: tf.keras.Model,
+    img_array: np.ndarray,
+    class_idx: Optional[int],
+    layer_name: str,
+) -> tuple:
+    """
+    One forward pass + one backward pass through the compiled graph.
 
-        predictions = x
-        class_score = predictions[:, class_idx]
+    When class_idx is None the target class is the argmax of the softmax
+    produced by this same forward pass, so callers that don't yet know
+    the prediction need no separate classification call.
 
-    grads = tape.gradient(class_score, conv_outputs)
+    Returns:
+        tuple: (conv_outputs, predictions np.ndarray (1, C), grads, class_idx)
+    """
+    graph = _get_grad_graph(model, layer_name)
+    conv_outputs, predictions, grads, class_idx = graph(
+        tf.convert_to_tensor(img_array, dtype=tf.float32),
+        tf.constant(-1 if class_idx is None else int(class_idx), dtype=tf.int32),
+    )
 
     if grads is None:
         raise RuntimeError(
             "GradientTape returned None - gradients could not be computed."
         )
 
+    return conv_outputs, predictions.numpy(), grads, int(class_idx)
+
+
+def _run_jacobian_graph(
+    model: tf.keras.Model,
+    img_array: np.ndarray,
+    layer_name: str,
+) -> tuple:
+    """
+    One forward pass + the batched backward pass for every class.
+
+    Returns:
+        tuple: (conv_outputs, predictions np.ndarray (1, C), jacobian (C, 1, h, w, c))
+    """
+    graph = _get_jacobian_graph(model, layer_name)
+    conv_outputs, predictions, jacobian = graph(
+        tf.convert_to_tensor(img_array, dtype=tf.float32),
+    )
+
+    if jacobian is None:
+        raise RuntimeError(
+            "GradientTape returned None - the Jacobian could not be computed."
+        )
+
+    return conv_outputs, predictions.numpy(), jacobian
+
+
+def _pool_heatmaps(conv_outputs, jacobian) -> np.ndarray:
+    """_pool_heatmap for every class at once → (C, h, w) float32, each in [0, 1]."""
+    pooled   = tf.reduce_mean(jacobian, axis=(1, 2, 3))                       # (C, c)
+    heatmaps = tf.einsum("hwk,ck->chw", conv_outputs[0], pooled)
+    heatmaps = tf.maximum(heatmaps, 0).numpy()
+
+    # Normalise each class's map to [0, 1] on its own
+    max_vals = heatmaps.max(axis=(1, 2), keepdims=True)
+    heatmaps = np.divide(heatmaps, max_vals, out=heatmaps, where=max_vals > 0)
+
+    return heatmaps.astype(np.float32)
+
+
+def _pool_heatmap(conv_outputs, grads) -> np.ndarray:
+    """Pool gradients -> weight conv channels -> ReLU -> normalise to [0, 1]."""
     # Pool gradients over spatial dims, weight each feature map channel
     pooled_grads = tf.reduce_mean(grads, axis=(0, 1, 2))   # (c,)
     conv_out_sq  = conv_outputs[0]                          # (h, w, c)
@@ -244,23 +489,21 @@ def _render_overlay(
     img_array: np.ndarray,
     heatmap: np.ndarray,
     original_image: np.ndarray = None,
-) -> str:
+) -> bytes:
     """
-    Convert the raw heatmap into a coloured overlay and return as base64 PNG.
+    Convert the raw heatmap into a coloured overlay, encoded once.
 
     When original_image is supplied the heatmap is rendered at the
     full original scan resolution instead of the 128x128 preprocessed copy.
 
     Steps:
       1. Choose background: original_image if provided, else img_array[0]*255
-      2. Resize heatmap to background dimensions (bicubic - smoother edges)
-      3. Gaussian smooth to remove upsampling block artefacts
-      4. Apply COLORMAP_JET (blue=low, green=mid, red=high activation)
-      5. Alpha-blend heatmap over background
-      6. Encode PNG -> base64
+      2. src.render.heatmap_overlay: bicubic upsample + Gaussian smooth on a
+         bounded grid, COLORMAP_JET LUT, uint8 alpha blend over the background
+      3. Encode in GRADCAM_IMAGE_FORMAT (src/encoding.py)
 
     Returns:
-        str: Base64-encoded PNG of the blended overlay
+        bytes: the encoded overlay (PNG by default)
     """
     # ── Choose background image ───────────────────────────────────
     if original_image is not None and original_image.ndim == 3:
@@ -270,39 +513,6 @@ def _render_overlay(
         background = np.uint8(img_array[0] * 255)
         print(f"[Grad-CAM] Overlaying on preprocessed image {background.shape}")
 
-    H, W = background.shape[:2]
-
-    # ── Upsample heatmap (bicubic for smooth edges) ───────────────
-    heatmap_resized = cv2.resize(heatmap, (W, H), interpolation=cv2.INTER_CUBIC)
-    heatmap_resized = np.clip(heatmap_resized, 0.0, 1.0)
-
-    # ── Smooth to remove blocky upsampling artefacts ──────────────
-    sigma = min(H, W) / 40
-    k     = int(sigma * 4) | 1
-    heatmap_resized = cv2.GaussianBlur(
-        heatmap_resized, (k, k), sigmaX=sigma, sigmaY=sigma
-    )
-    # Re-normalise after smoothing so peak is still 1.0
-    hmx = heatmap_resized.max()
-    if hmx > 0:
-        heatmap_resized = heatmap_resized / hmx
-
-    # ── Jet colormap (blue -> green -> red) ───────────────────────
-    heatmap_uint8 = np.uint8(255 * heatmap_resized)
-    jet_heatmap   = cv2.applyColorMap(heatmap_uint8, cv2.COLORMAP_JET)  # BGR
-    jet_heatmap   = cv2.cvtColor(jet_heatmap, cv2.COLOR_BGR2RGB)        # -> RGB
-
-    # ── Alpha blend heatmap over background ───────────────────────
-    overlay = (
-        HEATMAP_ALPHA  * jet_heatmap.astype(np.float32) +
-        ORIGINAL_ALPHA * background.astype(np.float32)
-    )
-    overlay = np.clip(overlay, 0, 255).astype(np.uint8)
-
-    # ── Encode as base64 PNG ──────────────────────────────────────
-    pil_image = Image.fromarray(overlay)
-    buffer    = BytesIO()
-    pil_image.save(buffer, format="PNG")
-    buffer.seek(0)
-
-    return base64.b64encode(buffer.getvalue()).decode("utf-8")
\ No newline at end of file
+    # ── Smoothed jet heatmap blended in uint8 (src/render.py), ────
+    # ── encoded once (src/encoding.py) ────────────────────────────
+    return render_gradcam(background, heatmap)
\ No newline at end of file
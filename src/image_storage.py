@@ -1,7 +1,9 @@
 """
 src/image_storage.py
 ─────────────────────
-Backend-agnostic storage for Grad-CAM / segmentation heatmap PNGs.
+Backend-agnostic storage for Grad-CAM / segmentation heatmap images
+(PNG / JPEG / WebP — whatever src/encoding.py produced; the key's
+extension records the format).
 
 Everything elsewhere in the app deals only in opaque "keys"
 (e.g. "scans/3f9a1c2b_gradcam.png") — never a filesystem path, never
@@ -41,18 +43,19 @@ def _get_s3_client():
     return _s3_client
 
 
-def new_key(scan_kind: str) -> str:
+def new_key(scan_kind: str, extension: str = ".png") -> str:
     """
     Generate a globally-unique storage key. UUID-based (not scan_id-based)
     so the image can be written BEFORE the Scan row exists — no chicken
     -egg ordering problem, no second "update" query needed.
 
-    scan_kind: "gradcam" | "segment"
+    scan_kind: "gradcam" | "segment" | "base" (Grad-CAM re-render background)
+    extension: ".png" | ".jpg" | ".webp" — the encoded format
     """
-    return f"scans/{uuid.uuid4().hex}_{scan_kind}.png"
+    return f"scans/{uuid.uuid4().hex}_{scan_kind}{extension}"
 
 
-def save_image(key: str, png_bytes: bytes) -> bool:
+def save_image(key: str, png_bytes: bytes, content_type: str = "image/png") -> bool:
     """Write image bytes under `key`. Returns True on success, False on failure (never raises)."""
     try:
         if STORAGE_BACKEND == "s3":
@@ -60,7 +63,7 @@ def save_image(key: str, png_bytes: bytes) -> bool:
                 print("[Storage] ⚠ S3_IMAGE_BUCKET not set — skipping image persistence")
                 return False
             _get_s3_client().put_object(
-                Bucket=S3_BUCKET, Key=key, Body=png_bytes, ContentType="image/png",
+                Bucket=S3_BUCKET, Key=key, Body=png_bytes, ContentType=content_type,
             )
         else:
             path = os.path.join(LOCAL_IMAGE_DIR, key)
@@ -84,6 +87,17 @@ def read_image_bytes(key: str) -> bytes | None:
         return None
 
 
+def load_image_bytes(key: str) -> bytes | None:
+    """Image bytes from either backend — for server-side re-rendering, not for serving."""
+    if STORAGE_BACKEND != "s3":
+        return read_image_bytes(key)
+    try:
+        return _get_s3_client().get_object(Bucket=S3_BUCKET, Key=key)["Body"].read()
+    except Exception as e:
+        print(f"[Storage] ✗ Failed to fetch image '{key}': {e}")
+        return None
+
+
 def get_signed_url(key: str, expires: int = SIGNED_URL_EXPIRY) -> str | None:
     """S3 backend only — time-limited presigned URL, never a public link."""
     try:
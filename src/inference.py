@@ -1,30 +1,52 @@
+import os
+
 import numpy as np
 from PIL import Image
 from io import BytesIO
+from src.backends import forward, load_backend
+from src.encoding import encode_overlay
 from src.preprocess import preprocess_segmentation, preprocess_classification
+from src.render import BORDER_ALPHA, BORDER_COLOR, FILL_ALPHA, FILL_COLOR, mask_overlay
 from skimage.transform import resize
 import cv2
 
 
 # ─── Overlay constants ────────────────────────────────────────────────────────
 
-FILL_COLOR   = (255, 220, 0)   # Warm yellow fill
-BORDER_COLOR = (255, 140, 0)   # Orange-amber border (contrasts on fill)
-FILL_ALPHA   = 0.35            # Fill transparency — image still clearly visible
-BORDER_ALPHA = 0.90            # Border nearly opaque for sharp boundary
+# FILL_* / BORDER_* colours and alphas now live with the shared uint8
+# renderer in src/render.py (imported above for existing callers).
+
+# _clean_mask runs its morphology at most this many px on the long side
+CLEAN_MASK_MAX_SIDE = int(os.environ.get("CLEAN_MASK_MAX_SIDE", "512"))
+
+# pseudo_segmentation_mask thresholds + selects on at most this many px
+PSEUDO_SEG_MAX_SIDE = int(os.environ.get("PSEUDO_SEG_MAX_SIDE", "512"))
 
 
 # ─── Mask post-processing ─────────────────────────────────────────────────────
 
+def _odd(size: float, minimum: int = 3) -> int:
+    """Nearest odd kernel size ≥ minimum."""
+    return max(minimum, int(round(size)) | 1)
+
+
 def _clean_mask(
     binary_mask: np.ndarray,
     raw_scores: np.ndarray = None,
     gradcam_hint: np.ndarray = None,
+    max_side: int = None,
 ) -> np.ndarray:
     """
     Post-process a raw binary segmentation mask to remove noise and
     smooth boundaries before overlaying on the image.
 
+    The morphology runs on a working grid of at most CLEAN_MASK_MAX_SIDE
+    px on the long side — kernels are scaled with the grid, so the
+    result matches full resolution up to boundary rounding — and only the
+    selected component is mapped back to (H, W). Component statistics
+    come from one connectedComponentsWithStats call plus one np.bincount
+    over the label image, never a per-component pass over the pixels.
+
     Component selection priority:
       1. gradcam_hint  — pick the component whose centroid is closest to
                          the Grad-CAM peak activation. Most reliable because
@@ -36,25 +58,33 @@ def _clean_mask(
         binary_mask  : (H, W) uint8 array with values 0 or 1
         raw_scores   : (H, W) float32 raw model predictions
         gradcam_hint : (h, w) float32 Grad-CAM heatmap in [0, 1]
+        max_side     : working-grid long side (default: CLEAN_MASK_MAX_SIDE)
 
     Returns:
         np.ndarray : cleaned (H, W) uint8 mask
     """
-    mask = binary_mask.astype(np.uint8)
+    max_side = CLEAN_MASK_MAX_SIDE if max_side is None else max_side
+    H, W     = binary_mask.shape
+    scale    = min(1.0, max_side / max(H, W))
+    h, w     = max(1, round(H * scale)), max(1, round(W * scale))
 
     # ── Step 1: smooth float version, re-threshold ────────────────
-    mask_f    = mask.astype(np.float32)
-    mask_blur = cv2.GaussianBlur(mask_f, (21, 21), sigmaX=8, sigmaY=8)
+    # On a reduced grid, INTER_AREA turns the mask into coverage
+    # fractions — the blur then sees what it would at full size.
+    mask_f = binary_mask.astype(np.float32)
+    if scale < 1.0:
+        mask_f = cv2.resize(mask_f, (w, h), interpolation=cv2.INTER_AREA)
+    mask_blur = cv2.GaussianBlur(mask_f, (_odd(21 * scale), _odd(21 * scale)),
+                                 sigmaX=8 * scale, sigmaY=8 * scale)
     mask      = (mask_blur > 0.25).astype(np.uint8)
 
     # ── Step 2: closing — fill holes ─────────────────────────────
-    H, W    = mask.shape
-    k_close = max(15, min(H, W) // 20)
+    k_close = max(3, round(max(15, min(H, W) // 20) * scale))
     kernel_close = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (k_close, k_close))
     mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel_close, iterations=2)
 
     # ── Step 3: opening — remove small blobs ─────────────────────
-    k_open = max(7, min(H, W) // 40)
+    k_open = max(3, round(max(7, min(H, W) // 40) * scale))
     kernel_open = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (k_open, k_open))
     mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel_open, iterations=1)
 
@@ -64,60 +94,48 @@ def _clean_mask(
     )
 
     if num_labels <= 1:
-        return mask
-
-    if gradcam_hint is not None:
-        # ── Priority 1: closest centroid to Grad-CAM peak ─────────
-        # The Grad-CAM heatmap encodes where the classifier focused.
-        # Whichever segmentation component is nearest that peak is
-        # almost certainly the actual tumour region.
-        hint = cv2.resize(
-            gradcam_hint.astype(np.float32), (W, H),
-            interpolation=cv2.INTER_LINEAR,
-        )
-        peak_y, peak_x = np.unravel_index(np.argmax(hint), hint.shape)
-        print(f"[CleanMask] GradCAM peak → ({peak_x}, {peak_y})")
-
-        best_id   = 1
-        best_dist = float("inf")
-        for i in range(1, num_labels):
-            cx, cy = centroids[i]
-            dist   = (cx - peak_x) ** 2 + (cy - peak_y) ** 2
-            area   = stats[i, cv2.CC_STAT_AREA]
-            print(f"[CleanMask] Component {i}: centroid=({cx:.0f},{cy:.0f}), "
-                  f"dist²={dist:.0f}, area={area}")
-            if dist < best_dist:
-                best_dist = dist
-                best_id   = i
-
-        print(f"[CleanMask] ✓ Selected component {best_id} by GradCAM proximity")
-        mask = (labels == best_id).astype(np.uint8)
-
-    elif raw_scores is not None:
-        # ── Priority 2: highest mean model confidence ─────────────
-        scores = raw_scores.astype(np.float32)
-        if scores.shape != (H, W):
-            scores = cv2.resize(scores, (W, H), interpolation=cv2.INTER_LINEAR)
-
-        best_id    = 1
-        best_score = -1.0
-        for i in range(1, num_labels):
-            mean_score = float(scores[labels == i].mean())
-            print(f"[CleanMask] Component {i}: mean_score={mean_score:.4f}")
-            if mean_score > best_score:
-                best_score = mean_score
-                best_id    = i
-
-        print(f"[CleanMask] ✓ Selected component {best_id} by raw score")
-        mask = (labels == best_id).astype(np.uint8)
-
+        selected = mask
     else:
-        # ── Fallback: largest area ────────────────────────────────
-        areas      = stats[1:, cv2.CC_STAT_AREA]
-        largest_id = int(np.argmax(areas)) + 1
-        mask       = (labels == largest_id).astype(np.uint8)
-
-    return mask
+        areas = stats[1:, cv2.CC_STAT_AREA]
+        if gradcam_hint is not None:
+            # ── Priority 1: closest centroid to Grad-CAM peak ─────
+            # The Grad-CAM heatmap encodes where the classifier focused.
+            # Whichever segmentation component is nearest that peak is
+            # almost certainly the actual tumour region.
+            hint = cv2.resize(
+                gradcam_hint.astype(np.float32), (w, h),
+                interpolation=cv2.INTER_LINEAR,
+            )
+            peak_y, peak_x = np.unravel_index(np.argmax(hint), hint.shape)
+            dist    = ((centroids[1:, 0] - peak_x) ** 2 + (centroids[1:, 1] - peak_y) ** 2)
+            best_id = int(np.argmin(dist)) + 1
+            print(f"[CleanMask] ✓ Selected component {best_id}/{num_labels - 1} by GradCAM "
+                  f"proximity (peak ({peak_x}, {peak_y}), area={areas[best_id - 1]})")
+
+        elif raw_scores is not None:
+            # ── Priority 2: highest mean model confidence ─────────
+            # Per-label score sums in one bincount over the label image
+            scores = raw_scores.astype(np.float32)
+            if scores.shape != (h, w):
+                interp = cv2.INTER_AREA if scores.shape[0] > h else cv2.INTER_LINEAR
+                scores = cv2.resize(scores, (w, h), interpolation=interp)
+            sums    = np.bincount(labels.ravel(), weights=scores.ravel(), minlength=num_labels)
+            means   = sums[1:] / areas
+            best_id = int(np.argmax(means)) + 1
+            print(f"[CleanMask] ✓ Selected component {best_id}/{num_labels - 1} by raw score "
+                  f"(mean={means[best_id - 1]:.4f})")
+
+        else:
+            # ── Fallback: largest area ────────────────────────────
+            best_id = int(np.argmax(areas)) + 1
+
+        selected = (labels == best_id).astype(np.uint8)
+
+    # ── Step 5: back to (H, W) ───────────────────────────────────
+    if scale < 1.0:
+        selected = (cv2.resize(selected.astype(np.float32), (W, H),
+                               interpolation=cv2.INTER_LINEAR) > 0.5).astype(np.uint8)
+    return selected
 
 
 # ─── Overlay rendering ────────────────────────────────────────────────────────
@@ -143,7 +161,7 @@ def overlay_mask_on_image(
         alpha          : Fill transparency (0 = invisible, 1 = opaque)
 
     Returns:
-        BytesIO: JPEG-encoded overlaid image
+        BytesIO: overlaid image in SEGMENT_IMAGE_FORMAT (JPEG by default)
     """
     H, W = image.shape[:2]
 
@@ -157,137 +175,83 @@ def overlay_mask_on_image(
 
     if binary_mask.sum() == 0:
         print("[Overlay] Mask empty after cleaning — returning original image")
-        buf = BytesIO()
-        Image.fromarray(image).save(buf, format="JPEG", quality=95)
-        buf.seek(0)
-        return buf
+        return _encode_segment(image)
 
     print(f"[Overlay] Active pixels after clean: "
           f"{binary_mask.sum()} / {binary_mask.size} "
           f"({100 * binary_mask.mean():.1f}%)")
 
-    # ── Work in float32 for blending ──────────────────────────────
-    canvas = image.astype(np.float32)
-
-    # ── Layer 1: semi-transparent fill ────────────────────────────
-    fill      = np.zeros_like(canvas)
-    fill[binary_mask == 1] = FILL_COLOR
-
-    mask_3ch  = binary_mask[:, :, np.newaxis].astype(np.float32)
-    canvas    = canvas * (1 - mask_3ch * FILL_ALPHA) + fill * mask_3ch * FILL_ALPHA
+    # ── Fill + contour border, blended in uint8 (src/render.py) ───
+    result = mask_overlay(image, binary_mask)
 
-    # ── Layer 2: contour border ───────────────────────────────────
-    # Find contours on the cleaned binary mask
-    contours, _ = cv2.findContours(
-        binary_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE
-    )
-
-    # Draw thick border onto a separate layer, then alpha-blend it
-    border_layer = np.zeros_like(canvas)
-    cv2.drawContours(border_layer, contours, -1, BORDER_COLOR, thickness=3)
-
-    border_mask_gray = cv2.drawContours(
-        np.zeros((H, W), dtype=np.uint8), contours, -1, 255, thickness=3
-    )
-    border_mask_3ch  = border_mask_gray[:, :, np.newaxis].astype(np.float32) / 255.0
-
-    canvas = (
-        canvas * (1 - border_mask_3ch * BORDER_ALPHA)
-        + border_layer * border_mask_3ch * BORDER_ALPHA
-    )
+    # ── Encode once (src/encoding.py) ─────────────────────────────
+    return _encode_segment(result)
 
-    # ── Encode ────────────────────────────────────────────────────
-    result = np.clip(canvas, 0, 255).astype(np.uint8)
-    buf    = BytesIO()
-    Image.fromarray(result).save(buf, format="JPEG", quality=95)
-    buf.seek(0)
 
-    return buf
+# ─── Direct mask renderer (no _clean_mask re-selection) ──────────────────────
 
+def _encode_segment(image: np.ndarray) -> BytesIO:
+    """Encode a segmentation overlay once, in SEGMENT_IMAGE_FORMAT."""
+    return BytesIO(encode_overlay(image, "segment"))
 
-# ─── Direct mask renderer (no _clean_mask re-selection) ──────────────────────
 
 def _render_mask_overlay(image: np.ndarray, mask: np.ndarray) -> BytesIO:
     """
     Render a pre-selected binary mask onto the image directly.
     Does NOT call _clean_mask — mask is already the correct region.
     """
-    H, W = image.shape[:2]
-
     if mask.sum() == 0:
-        buf = BytesIO()
-        Image.fromarray(image).save(buf, format="JPEG", quality=95)
-        buf.seek(0)
-        return buf
-
-    canvas = image.astype(np.float32)
-
-    # Semi-transparent yellow fill
-    fill             = np.zeros_like(canvas)
-    fill[mask == 1]  = FILL_COLOR
-    mask_3ch         = mask[:, :, np.newaxis].astype(np.float32)
-    canvas           = canvas * (1 - mask_3ch * FILL_ALPHA) + fill * mask_3ch * FILL_ALPHA
-
-    # Orange border
-    contours, _      = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
-    border_layer     = np.zeros_like(canvas)
-    cv2.drawContours(border_layer, contours, -1, BORDER_COLOR, thickness=3)
-    border_gray      = cv2.drawContours(
-        np.zeros((H, W), dtype=np.uint8), contours, -1, 255, thickness=3
-    )
-    border_3ch       = border_gray[:, :, np.newaxis].astype(np.float32) / 255.0
-    canvas           = (
-        canvas * (1 - border_3ch * BORDER_ALPHA)
-        + border_layer * border_3ch * BORDER_ALPHA
-    )
-
-    result = np.clip(canvas, 0, 255).astype(np.uint8)
-    buf    = BytesIO()
-    Image.fromarray(result).save(buf, format="JPEG", quality=95)
-    buf.seek(0)
-    return buf
+        return _encode_segment(image)
+    return _encode_segment(mask_overlay(image, mask))
 
 
 # ─── Grad-CAM pseudo-segmentation ────────────────────────────────────────────
 
-def gradcam_pseudo_segmentation(
-    image: np.ndarray,
-    heatmap: np.ndarray,
-    top_percent: float = 10.0,
-) -> BytesIO:
+def _top_thresholds(values: np.ndarray, percents) -> np.ndarray:
     """
-    Create a tumour region overlay from the Grad-CAM heatmap.
+    np.percentile(values, 100 - p) for every p in `percents` (linear
+    interpolation), from ONE np.partition over all the order statistics
+    involved instead of a sort per percentile.
+    """
+    n    = values.size
+    pos  = (n - 1) * (100.0 - np.asarray(percents, dtype=np.float64)) / 100.0
+    lo   = np.floor(pos).astype(np.intp)
+    hi   = np.minimum(lo + 1, n - 1)
+    part = np.partition(values, np.unique(np.concatenate([lo, hi])))
+    a, b = part[lo].astype(np.float64), part[hi].astype(np.float64)
+    return a + (b - a) * (pos - lo)
 
-    APPROACH — "contains peak pixel":
-      1. Resize + smooth heatmap to original image resolution
-      2. Zero out 10% border (eliminates skull/background artifacts)
-      3. Threshold at top-N percentile (10% = focused, not diffuse)
-      4. Select the connected component containing the peak pixel
-      5. If component > 25% of image, tighten threshold and retry
-      6. Light morphological closing (iterations=1) to fill holes
-      7. Render via _render_mask_overlay (skips _clean_mask entirely)
 
-    Key design decisions:
-      - top_percent=10 (not 20): 20% creates regions large enough to
-        span brain tissue AND facial structures in sagittal views.
-        10% stays tightly focused around the true hotspot.
-      - "contains peak pixel" beats centroid/mean-score: the blob that
-        physically includes the Grad-CAM maximum IS the tumour region.
-      - Area cap (25%): if the selected region is unreasonably large,
-        tighten threshold until it's a plausible tumour size.
-      - _render_mask_overlay: skips the _clean_mask inside
-        overlay_mask_on_image which would redo component selection
-        and potentially select the wrong component again.
+def pseudo_segmentation_mask(
+    heatmap: np.ndarray,
+    height: int,
+    width: int,
+    top_percent: float = 10.0,
+    max_side: int = None,
+):
     """
-    H, W = image.shape[:2]
+    Binary tumour mask (height, width) from a Grad-CAM heatmap, or None.
+
+    Everything up to the final mask — upsampling, smoothing, border
+    suppression, thresholding, component selection and closing — runs on
+    a working grid of at most PSEUDO_SEG_MAX_SIDE px on the long side
+    (kernels and σ scale with the grid). The thresholds for every
+    tightening step come from one partition of the heatmap values, and
+    only the selected mask is upsampled. See gradcam_pseudo_segmentation
+    for the approach.
+    """
+    max_side = PSEUDO_SEG_MAX_SIDE if max_side is None else max_side
+    H, W     = height, width
+    scale    = min(1.0, max_side / max(H, W))
+    h, w     = max(1, round(H * scale)), max(1, round(W * scale))
 
-    # ── 1. Resize to full image resolution ───────────────────────
-    hm = cv2.resize(heatmap.astype(np.float32), (W, H),
+    # ── 1. Resize to the working grid ────────────────────────────
+    hm = cv2.resize(heatmap.astype(np.float32), (w, h),
                     interpolation=cv2.INTER_CUBIC)
     hm = np.clip(hm, 0.0, 1.0)
 
     # ── 2. Smooth to remove upsampling block artefacts ────────────
-    sigma = min(H, W) / 50
+    sigma = min(h, w) / 50
     k     = int(sigma * 4) | 1
     hm    = cv2.GaussianBlur(hm, (k, k), sigmaX=sigma, sigmaY=sigma)
     mx    = hm.max()
@@ -296,59 +260,103 @@ def gradcam_pseudo_segmentation(
 
     # ── 3. Zero out 10% border ────────────────────────────────────
     hm_masked      = hm.copy()
-    by, bx         = int(H * 0.10), int(W * 0.10)
+    by, bx         = int(h * 0.10), int(w * 0.10)
     hm_masked[:by,  :]  = 0
     hm_masked[-by:, :]  = 0
     hm_masked[:,  :bx]  = 0
     hm_masked[:, -bx:]  = 0
 
-    # ── 4. Percentile threshold on non-zero region ────────────────
     nonzero = hm_masked[hm_masked > 0]
     if len(nonzero) == 0:
-        hm_masked = hm.copy()
+        hm_masked = hm
         nonzero   = hm_masked[hm_masked > 0]
-
-    def _threshold_and_select(pct):
-        """Return (selected_mask, area) for a given top_percent."""
-        t           = np.percentile(nonzero, 100 - pct)
-        bmask       = (hm_masked > t).astype(np.uint8)
-        nl, lb, st, _ = cv2.connectedComponentsWithStats(bmask, connectivity=8)
-        py, px      = np.unravel_index(np.argmax(hm_masked), hm_masked.shape)
-        pl          = int(lb[py, px])
+    if len(nonzero) == 0:
+        return None
+
+    # ── 4. All candidate thresholds from one partition ────────────
+    # Start at top_percent, tighten if the region is too large (>25%)
+    percents   = [top_percent, 7.0, 5.0, 3.0]
+    thresholds = _top_thresholds(nonzero, percents)
+    peak       = np.unravel_index(np.argmax(hm_masked), hm_masked.shape)
+    max_area   = int(h * w * 0.25)
+
+    def _select(t):
+        """(mask, area) of the component holding the peak (else the largest)."""
+        nl, lb, st, _ = cv2.connectedComponentsWithStats(
+            (hm_masked > t).astype(np.uint8), connectivity=8,
+        )
+        pl = int(lb[peak])
         if pl == 0 and nl > 1:
             pl = int(np.argmax(st[1:, cv2.CC_STAT_AREA])) + 1
         if pl == 0 or nl <= 1:
             return None, 0
-        sel  = (lb == pl).astype(np.uint8)
-        return sel, sel.sum()
-
-    # Start at top_percent, tighten if region is too large (>25% image)
-    max_area  = int(H * W * 0.25)
-    sel_mask, area = _threshold_and_select(top_percent)
+        return (lb == pl).astype(np.uint8), int(st[pl, cv2.CC_STAT_AREA])
 
+    sel_mask, area = _select(thresholds[0])
     if sel_mask is None:
-        buf = BytesIO()
-        Image.fromarray(image).save(buf, format="JPEG", quality=95)
-        buf.seek(0)
-        return buf
+        return None
 
     if area > max_area:
-        print(f"[PseudoSeg] Area {area/H/W*100:.1f}% too large, tightening...")
-        for pct in [7.0, 5.0, 3.0]:
-            m2, a2 = _threshold_and_select(pct)
+        print(f"[PseudoSeg] Area {area/h/w*100:.1f}% too large, tightening...")
+        for pct, t in zip(percents[1:], thresholds[1:]):
+            m2, a2 = _select(t)
             if m2 is not None and a2 <= max_area:
                 sel_mask, area = m2, a2
-                print(f"[PseudoSeg] Tightened to {pct}% → area={a2/H/W*100:.1f}%")
+                print(f"[PseudoSeg] Tightened to {pct}% → area={a2/h/w*100:.1f}%")
                 break
 
-    print(f"[PseudoSeg] Final area: {area} px ({area/H/W*100:.1f}%)")
+    print(f"[PseudoSeg] Final area: {area/h/w*100:.1f}% of the image "
+          f"(working grid {w}×{h})")
 
     # ── 5. Light closing (iterations=1) ──────────────────────────
-    k_close      = max(7, min(H, W) // 40)
-    kernel       = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (k_close, k_close))
-    sel_mask     = cv2.morphologyEx(sel_mask, cv2.MORPH_CLOSE, kernel, iterations=1)
+    k_close  = max(3, round(max(7, min(H, W) // 40) * scale))
+    kernel   = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (k_close, k_close))
+    sel_mask = cv2.morphologyEx(sel_mask, cv2.MORPH_CLOSE, kernel, iterations=1)
+
+    # ── 6. Only the final mask goes back to (H, W) ───────────────
+    if scale < 1.0:
+        sel_mask = (cv2.resize(sel_mask.astype(np.float32), (W, H),
+                               interpolation=cv2.INTER_LINEAR) > 0.5).astype(np.uint8)
+    return sel_mask
+
+
+def gradcam_pseudo_segmentation(
+    image: np.ndarray,
+    heatmap: np.ndarray,
+    top_percent: float = 10.0,
+) -> BytesIO:
+    """
+    Create a tumour region overlay from the Grad-CAM heatmap.
 
-    # ── 6. Render — bypass _clean_mask ───────────────────────────
+    APPROACH — "contains peak pixel" (pseudo_segmentation_mask):
+      1. Resize + smooth heatmap to a working grid (≤ PSEUDO_SEG_MAX_SIDE px)
+      2. Zero out 10% border (eliminates skull/background artifacts)
+      3. Threshold at top-N percentile (10% = focused, not diffuse)
+      4. Select the connected component containing the peak pixel
+      5. If component > 25% of image, tighten threshold and retry
+         (every candidate threshold comes from the same partition)
+      6. Light morphological closing (iterations=1) to fill holes
+      7. Upsample the final mask, render via _render_mask_overlay
+         (skips _clean_mask entirely)
+
+    Key design decisions:
+      - top_percent=10 (not 20): 20% creates regions large enough to
+        span brain tissue AND facial structures in sagittal views.
+        10% stays tightly focused around the true hotspot.
+      - "contains peak pixel" beats centroid/mean-score: the blob that
+        physically includes the Grad-CAM maximum IS the tumour region.
+      - Area cap (25%): if the selected region is unreasonably large,
+        tighten threshold until it's a plausible tumour size.
+      - Working grid: the heatmap is 7×7, so nothing is lost by
+        thresholding at ≤ 512 px; only the boundary is re-interpolated.
+      - _render_mask_overlay: skips the _clean_mask inside
+        overlay_mask_on_image which would redo component selection
+        and potentially select the wrong component again.
+    """
+    H, W     = image.shape[:2]
+    sel_mask = pseudo_segmentation_mask(heatmap, H, W, top_percent)
+    if sel_mask is None:
+        return _encode_segment(image)
     return _render_mask_overlay(image, sel_mask)
 
 
@@ -374,7 +382,7 @@ def inference_segmentation_with_overlay(
         PIL.Image : Overlaid result image
     """
     preprocessed = preprocess_segmentation(image)
-    prediction   = seg_model.predict(preprocessed)
+    prediction   = forward(seg_model, preprocessed)
 
     raw_mask = prediction[0]  # (H, W, 1) or (H, W)
     print(f"[Seg] Raw mask — min: {raw_mask.min():.4f}, "
@@ -403,6 +411,10 @@ def inference_classification(image: np.ndarray, model_paths: list) -> np.ndarray
     """
     Run both base classifiers and return stacked softmax predictions.
 
+    Each model runs on the configured inference backend (src.backends);
+    models are cached process-wide, so only the first call loads them —
+    every later call is a plain forward pass.
+
     Args:
         image       : (H, W, 3) uint8 RGB array
         model_paths : [resnet_path, custom_cnn_path]
@@ -410,12 +422,10 @@ def inference_classification(image: np.ndarray, model_paths: list) -> np.ndarray
     Returns:
         np.ndarray : (1, 8) combined predictions
     """
-    from src.utils import load_local_model
-
-    models = [load_local_model(p) for p in model_paths]
+    backends     = [load_backend(p) for p in model_paths]
     preprocessed = preprocess_classification(image)
 
-    predictions = [m.predict(preprocessed) for m in models]
+    predictions = [b.predict(preprocessed) for b in backends]
     combined    = np.column_stack(predictions)
 
     print(f"[Cls] Combined predictions shape: {combined.shape}")
@@ -430,11 +440,11 @@ def meta_pred(combined_preds: np.ndarray, meta_model) -> np.ndarray:
 
     Args:
         combined_preds : (1, 8) stacked softmax from both base models
-        meta_model     : Loaded Keras meta model
+        meta_model     : Meta model backend (src.backends.load_backend) or Keras model
 
     Returns:
         np.ndarray : (1,) predicted class indices
     """
-    probs        = meta_model.predict(combined_preds)
+    probs        = forward(meta_model, combined_preds)
     class_preds  = np.argmax(probs, axis=1)
     return class_preds
\ No newline at end of file
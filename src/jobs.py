@@ -0,0 +1,179 @@
+"""
+src/jobs.py
+───────────
+Bounded background job runner for asynchronous /predict (NeuroDL v2.1).
+
+In job mode /predict answers with the classification as soon as
+ResNet50V2 has run, and hands the slow tail — Grad-CAM, pseudo-
+segmentation, the Groq report (60s timeout) and DB persistence — to a
+fixed-size worker pool. The HTTP worker is free again immediately;
+clients follow progress over Socket.IO as before, or poll /jobs/<id>.
+
+Jobs live in memory only. Finished jobs are kept for JOB_TTL_SECONDS
+so clients can collect their result, then dropped; everything durable
+is on the Scan row, which the job updates as each artifact lands.
+
+Environment variables:
+    JOB_WORKERS     : background worker threads               (default: 4)
+    JOB_QUEUE_LIMIT : jobs allowed to wait beyond the workers (default: 32)
+                      — further submissions raise JobQueueFull
+    JOB_TTL_SECONDS : how long finished jobs stay pollable    (default: 3600)
+"""
+
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# ─── Configuration ────────────────────────────────────────────────────────────
+
+JOB_WORKERS     = int(os.environ.get("JOB_WORKERS",     4))
+JOB_QUEUE_LIMIT = int(os.environ.get("JOB_QUEUE_LIMIT", 32))
+JOB_TTL_SECONDS = int(os.environ.get("JOB_TTL_SECONDS", 3600))
+
+
+class JobQueueFull(RuntimeError):
+    """Raised by JobRunner.submit when every worker and queue slot is taken."""
+
+
+# ─── Job ──────────────────────────────────────────────────────────────────────
+
+class Job:
+    """
+    Mutable state for one background job. All access goes through the
+    runner's lock, so readers always see a consistent snapshot.
+
+    status : "queued" | "running" | "done" | "error"
+    stages : {stage_name: "running" | "done" | "error"} in arrival order
+    result : dict the job fills in as artifacts land
+    """
+
+    def __init__(self, owner_user_id: int, result: dict, lock: threading.Lock):
+        self.id            = uuid.uuid4().hex
+        self.owner_user_id = owner_user_id
+        self.status        = "queued"
+        self.stages        = {}
+        self.result        = dict(result)
+        self.error         = None
+        self.created_at    = time.time()
+        self.updated_at    = self.created_at
+        self.finished_at   = None
+        self._lock         = lock
+
+    def stage(self, name: str, status: str, **result_fields) -> None:
+        """Record a stage transition and merge any new result fields."""
+        with self._lock:
+            self.stages[name] = status
+            self.result.update(result_fields)
+            self.updated_at   = time.time()
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "job_id":      self.id,
+                "status":      self.status,
+                "stages":      dict(self.stages),
+                "result":      dict(self.result),
+                "error":       self.error,
+                "created_at":  self.created_at,
+                "updated_at":  self.updated_at,
+                "finished_at": self.finished_at,
+            }
+
+
+# ─── Runner ───────────────────────────────────────────────────────────────────
+
+class JobRunner:
+    """
+    Fixed-size thread pool with a hard cap on outstanding jobs.
+
+    Args:
+        workers     : worker threads
+        queue_limit : jobs that may wait for a free worker
+        ttl_seconds : retention for finished jobs
+    """
+
+    def __init__(
+        self,
+        workers:     int = JOB_WORKERS,
+        queue_limit: int = JOB_QUEUE_LIMIT,
+        ttl_seconds: int = JOB_TTL_SECONDS,
+    ):
+        self.workers     = max(1, int(workers))
+        self.queue_limit = max(0, int(queue_limit))
+        self.ttl_seconds = ttl_seconds
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="predict-job",
+        )
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_limit)
+        self._lock  = threading.Lock()
+        self._jobs  = {}
+
+    def submit(self, owner_user_id: int, fn, initial_result: dict = None) -> Job:
+        """
+        Queue fn(job) on the pool and return the Job immediately.
+
+        Raises:
+            JobQueueFull: if workers + queue_limit jobs are already outstanding
+        """
+        if not self._slots.acquire(blocking=False):
+            raise JobQueueFull(
+                f"{self.workers + self.queue_limit} jobs already outstanding"
+            )
+
+        job = Job(owner_user_id, initial_result or {}, self._lock)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+
+        try:
+            self._executor.submit(self._run, job, fn)
+        except Exception:
+            self._slots.release()
+            with self._lock:
+                self._jobs.pop(job.id, None)
+            raise
+        return job
+
+    def get(self, job_id: str):
+        """Return the Job, or None if unknown or expired."""
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {"workers": self.workers, "queue_limit": self.queue_limit,
+                    "jobs": counts}
+
+    # ── Internals ─────────────────────────────────────────────────
+
+    def _run(self, job: Job, fn) -> None:
+        with self._lock:
+            job.status = "running"
+        try:
+            fn(job)
+            status, error = "done", None
+        except Exception as e:
+            print(f"[Jobs] ✗ Job {job.id} failed:\n{traceback.format_exc()}")
+            status, error = "error", str(e)
+        finally:
+            self._slots.release()
+        with self._lock:
+            job.status      = status
+            job.error       = error
+            job.finished_at = job.updated_at = time.time()
+
+    def _prune(self) -> None:
+        """Drop finished jobs older than the TTL (caller holds _lock)."""
+        cutoff  = time.time() - self.ttl_seconds
+        expired = [jid for jid, j in self._jobs.items()
+                   if j.finished_at is not None and j.finished_at < cutoff]
+        for jid in expired:
+            del self._jobs[jid]
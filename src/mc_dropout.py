@@ -0,0 +1,139 @@
+"""
+src/mc_dropout.py
+─────────────────
+Monte-Carlo dropout uncertainty for /predict (NeuroDL v2.1).
+
+The ResNet50V2 head (and the custom CNN) were trained with Dropout, but
+serving always runs with training=False, so a scan gets a single softmax
+and no measure of how sure the network really is. MC dropout samples T
+softmaxes with dropout switched ON and reads uncertainty off their
+spread:
+
+  predictive entropy  H[mean_t p_t]                — total uncertainty
+  mutual information  H[mean_t p_t] - mean_t H[p_t] — the model's own
+                      (epistemic) uncertainty, high when the dropout
+                      samples disagree with each other
+
+Everything before the model's first Dropout layer is deterministic, so
+the model is split there: the backbone runs ONCE, its features are tiled
+T times, and the head runs as a single batched call with only the
+Dropout layers in training mode (BatchNormalization stays in inference
+mode). Both halves are compiled as tf.functions once per model.
+
+Environment variables:
+    MC_DROPOUT_ENABLED : "1" to estimate on every /predict by default (default: "0";
+                         /predict's `mc_dropout` form field overrides per request)
+    MC_DROPOUT_SAMPLES : dropout samples T per scan                    (default: 20)
+"""
+
+import os
+import threading
+import weakref
+
+import numpy as np
+import tensorflow as tf
+
+# ─── Configuration ────────────────────────────────────────────────────────────
+
+MC_DROPOUT_ENABLED = os.environ.get("MC_DROPOUT_ENABLED", "0") == "1"
+MC_DROPOUT_SAMPLES = int(os.environ.get("MC_DROPOUT_SAMPLES", "20"))
+
+# Compiled (backbone, head) pairs per model. Weak keys so a reloaded model
+# takes its graphs with it — same scheme as src/gradcam.py.
+_GRAPHS      = weakref.WeakKeyDictionary()
+_GRAPHS_LOCK = threading.Lock()
+
+
+# ─── Model split ──────────────────────────────────────────────────────────────
+
+def split_at_dropout(model) -> tuple:
+    """
+    (backbone layers, head layers) of a Sequential model — every
+    classifier train_all_models.py builds — split before the first Dropout.
+
+    Raises:
+        ValueError : not a Sequential model, or no Dropout layer
+    """
+    if not isinstance(model, tf.keras.Sequential):
+        raise ValueError(f"MC dropout needs a Sequential model, got {type(model).__name__}")
+    chain = list(model.layers)
+    first = next((i for i, l in enumerate(chain) if isinstance(l, tf.keras.layers.Dropout)), None)
+    if first is None:
+        raise ValueError(f"Model '{model.name}' has no Dropout layer")
+    return chain[:first], chain[first:]
+
+
+def _build_graphs(model) -> tuple:
+    backbone_layers, head_layers = split_at_dropout(model)
+
+    @tf.function(reduce_retracing=True)
+    def backbone(batch):
+        x = batch
+        for layer in backbone_layers:
+            x = layer(x, training=False)
+        return x
+
+    @tf.function(reduce_retracing=True)
+    def head(features, samples):
+        # (N, ...) → (N·T, ...): every row repeated T times, one call
+        x = tf.repeat(features, samples, axis=0)
+        for layer in head_layers:
+            x = layer(x, training=isinstance(layer, tf.keras.layers.Dropout))
+        return x
+
+    return backbone, head
+
+
+def _get_graphs(model) -> tuple:
+    with _GRAPHS_LOCK:
+        graphs = _GRAPHS.get(model)
+        if graphs is None:
+            graphs = _GRAPHS[model] = _build_graphs(model)
+        return graphs
+
+
+# ─── Sampling + metrics ───────────────────────────────────────────────────────
+
+def sample_probs(model, batch: np.ndarray, samples: int = None) -> np.ndarray:
+    """
+    T dropout samples per image.
+
+    Returns:
+        np.ndarray: (N, T, C) float32 softmax
+    """
+    samples        = MC_DROPOUT_SAMPLES if samples is None else int(samples)
+    backbone, head = _get_graphs(model)
+    features       = backbone(tf.convert_to_tensor(batch, dtype=tf.float32))
+    probs          = head(features, tf.constant(samples)).numpy()
+    return probs.reshape(len(batch), samples, -1).astype(np.float32)
+
+
+def _entropy(p: np.ndarray, axis: int = -1) -> np.ndarray:
+    p = np.clip(p, 1e-12, 1.0)
+    return -np.sum(p * np.log(p), axis=axis)
+
+
+def uncertainty_metrics(probs: np.ndarray) -> dict:
+    """
+    Args:
+        probs : (T, C) dropout samples for one image
+
+    Returns:
+        dict: mean (C,) float32, predictive_entropy, mutual_information,
+              predicted_class_std (nats / probability units)
+    """
+    probs = np.asarray(probs, dtype=np.float64)
+    mean  = probs.mean(axis=0)
+    total = float(_entropy(mean))
+    top   = int(np.argmax(mean))
+    return {
+        "mean":                mean.astype(np.float32),
+        "predictive_entropy":  total,
+        "mutual_information":  max(0.0, total - float(_entropy(probs).mean())),
+        "predicted_class_std": float(probs[:, top].std()),
+    }
+
+
+def estimate_uncertainty(model, batch: np.ndarray, samples: int = None) -> list:
+    """uncertainty_metrics() for every image in the batch (one head call in total)."""
+    return [uncertainty_metrics(p) for p in sample_probs(model, batch, samples)]
@@ -5,21 +5,52 @@ Image preprocessing for NeuroDL v2.0.
 
 Handles three input formats:
   - JPEG / PNG  — standard pipeline (unchanged from v1.0)
-  - DICOM .dcm  — new in v2.0 (Upgrade 2)
+  - DICOM .dcm  — new in v2.0 (Upgrade 2); parsed in memory since v2.1
 
 Public functions:
   load_image(file_storage)          → np.ndarray (H, W, 3) uint8
-  preprocess_classification(image)  → np.ndarray (1, 128, 128, 3) float32
-  preprocess_segmentation(image)    → np.ndarray (1, 256, 256, 3) float32
+  preprocess_classification(image)  → np.ndarray (1, 224, 224, 3) float32
+  preprocess_segmentation(image)    → np.ndarray (1, 224, 224, 3) float32
+  preprocess_both(image)            → (classification, segmentation) tensors in one pass
+  preprocess_batch(images, size)    → np.ndarray (N, size, size, 3) float32
   process_predictions(r, c)         → np.ndarray combined predictions
+
+Resize + normalise engine (v2.1): every tensor is produced by ONE
+cv2.resize of the decoded uint8 image (INTER_AREA when shrinking,
+INTER_LINEAR when enlarging) into a reusable per-thread buffer, then ONE
+fused divide-by-255 written straight into the float32 output — channel
+fix-up (grayscale / RGBA) happens in that same write via broadcasting
+and slicing, so no full-size float64 or intermediate RGB copies exist.
+The output itself is always a fresh array (or the caller's `out=`):
+tensors outlive the call — the result cache, background jobs — so they
+must never alias a thread's scratch buffer.
+
+Reduced-resolution decoding (v2.1): nothing downstream needs more than
+DECODE_MAX_SIDE px on the long side (the models take 224×224; Grad-CAM
+and segmentation overlays are rendered at the decoded size). JPEGs are
+therefore decoded with PIL's draft mode — the DCT-domain 1/2, 1/4, 1/8
+scaling built into libjpeg, so a 4000px phone photo never exists at full
+size in memory — and other formats are shrunk with Image.reduce right
+after decoding. Either way the result stays at or just above
+DECODE_MAX_SIDE. Before any pixel is decoded, the header dimensions
+(after draft) are checked against DECODE_PIXEL_BUDGET, so a
+decompression bomb is rejected without allocating its buffer.
+
+Environment variables:
+    DECODE_MAX_SIDE     : long side to decode down to (at or just above)  (default: 1024)
+    DECODE_PIXEL_BUDGET : max pixels a decode may allocate, else reject (default: 40000000)
 """
 
+import math
+import os
+import threading
 import traceback
+from io import BytesIO
 
+import cv2
 import numpy as np
 import pydicom
 from PIL import Image
-from skimage.transform import resize
 
 
 # ─── Constants ────────────────────────────────────────────────────────────────
@@ -27,6 +58,14 @@ from skimage.transform import resize
 CLASSIFICATION_SIZE = 224   # Changed from 128 → matches training and ResNet50V2 native size
 SEGMENTATION_SIZE   = 224   # U-Net (VGG16 backbone, unchanged)
 
+DECODE_MAX_SIDE     = int(os.environ.get("DECODE_MAX_SIDE", "1024"))
+DECODE_PIXEL_BUDGET = int(os.environ.get("DECODE_PIXEL_BUDGET", "40000000"))
+
+# dtypes cv2.resize handles natively; anything else is cast to float32 first
+_CV2_DTYPES = (np.uint8, np.uint16, np.int16, np.float32, np.float64)
+
+_scratch = threading.local()    # per-thread resize buffers, keyed by (shape, dtype)
+
 
 # ─── Public API ───────────────────────────────────────────────────────────────
 
@@ -56,7 +95,7 @@ def load_image(file_storage) -> np.ndarray:
         return _load_standard(file_storage)
 
 
-def preprocess_classification(image: np.ndarray) -> np.ndarray:
+def preprocess_classification(image: np.ndarray, out: np.ndarray = None) -> np.ndarray:
     """
     Preprocess a single image for classification.
 
@@ -64,27 +103,18 @@ def preprocess_classification(image: np.ndarray) -> np.ndarray:
     normalises pixel values to [0, 1], and adds a batch dimension.
 
     Args:
-        image : RGB image array, shape (H, W, 3), any dtype
+        image : RGB image array, shape (H, W, 3), (H, W) or (H, W, 4), any dtype
+        out   : optional float32 (1, 224, 224, 3) array to write into
 
     Returns:
-        np.ndarray: shape (1, 128, 128, 3), float32, values in [0, 1]
+        np.ndarray: shape (1, 224, 224, 3), float32, values in [0, 1]
     """
-    img = resize(
-        image,
-        (CLASSIFICATION_SIZE, CLASSIFICATION_SIZE),
-        mode="constant",
-        preserve_range=True,
-    )
-
-    img = _ensure_rgb(img)
-    img = img.astype(np.float32) / 255.0
-    img = np.expand_dims(img, axis=0)          # Add batch dimension
-
+    img = _resize_normalise(image, CLASSIFICATION_SIZE, out)
     print(f"[Preprocess] Classification ready — shape: {img.shape}")
     return img
 
 
-def preprocess_segmentation(image: np.ndarray) -> np.ndarray:
+def preprocess_segmentation(image: np.ndarray, out: np.ndarray = None) -> np.ndarray:
     """
     Preprocess a single image for U-Net segmentation.
 
@@ -92,26 +122,55 @@ def preprocess_segmentation(image: np.ndarray) -> np.ndarray:
     normalises pixel values to [0, 1], and adds a batch dimension.
 
     Args:
-        image : RGB image array, shape (H, W, 3), any dtype
+        image : RGB image array, shape (H, W, 3), (H, W) or (H, W, 4), any dtype
+        out   : optional float32 (1, 224, 224, 3) array to write into
 
     Returns:
-        np.ndarray: shape (1, 256, 256, 3), float32, values in [0, 1]
+        np.ndarray: shape (1, 224, 224, 3), float32, values in [0, 1]
     """
     print(f"[Preprocess] Original image shape: {image.shape}")
+    img = _resize_normalise(image, SEGMENTATION_SIZE, out)
+    print(f"[Preprocess] Segmentation ready — shape: {img.shape}")
+    return img
 
-    img = resize(
-        image,
-        (SEGMENTATION_SIZE, SEGMENTATION_SIZE),
-        mode="constant",
-        preserve_range=True,
-    )
 
-    img = _ensure_rgb(img)
-    img = img.astype(np.float32) / 255.0
-    img = np.expand_dims(img, axis=0)          # Add batch dimension
+def preprocess_both(image: np.ndarray) -> tuple:
+    """
+    Classification and segmentation tensors from one pass over the image.
+
+    While both models use the same input size the image is resized and
+    normalised once; the segmentation tensor is a copy of that result, so
+    callers may still modify either independently.
+
+    Returns:
+        tuple: (classification (1, C, C, 3), segmentation (1, S, S, 3)) float32
+    """
+    cls = _resize_normalise(image, CLASSIFICATION_SIZE)
+    seg = cls.copy() if SEGMENTATION_SIZE == CLASSIFICATION_SIZE else \
+          _resize_normalise(image, SEGMENTATION_SIZE)
+    return cls, seg
 
-    print(f"[Preprocess] Segmentation ready — shape: {img.shape}")
-    return img
+
+def preprocess_batch(images, size: int = CLASSIFICATION_SIZE,
+                     out: np.ndarray = None) -> np.ndarray:
+    """
+    Preprocess many images straight into one (N, size, size, 3) batch —
+    each image is resized into the thread's scratch buffer and normalised
+    directly into its row, with no per-image tensors or np.stack copy.
+
+    Args:
+        images : sequence of image arrays (any size / channel layout)
+        size   : output side length (default: CLASSIFICATION_SIZE)
+        out    : optional float32 (N, size, size, 3) array to write into
+
+    Returns:
+        np.ndarray: (N, size, size, 3) float32 in [0, 1]
+    """
+    images = list(images)
+    out    = _output(out, (len(images), size, size, 3))
+    for i, image in enumerate(images):
+        _resize_normalise(image, size, out[i:i + 1])
+    return out
 
 
 def process_predictions(
@@ -150,23 +209,61 @@ def _load_standard(file_storage) -> np.ndarray:
     """
     try:
         image_bytes = file_storage.read()
-        from io import BytesIO
-        pil_image   = Image.open(BytesIO(image_bytes)).convert("RGB")
+        pil_image   = _decode_reduced(Image.open(BytesIO(image_bytes))).convert("RGB")
         return np.array(pil_image, dtype=np.uint8)
+    except Image.DecompressionBombError as e:
+        raise ValueError(f"Image too large: {e}")
+    except ValueError:
+        raise
     except Exception as e:
         raise ValueError(f"Cannot read image file '{file_storage.filename}': {e}")
 
 
+def _decode_reduced(pil_image: Image.Image, max_side: int = None,
+                    budget: int = None) -> Image.Image:
+    """
+    Decode an opened (header-only) PIL image at the smallest resolution
+    that is still ≥ max_side on its long side.
+
+    Raises:
+        ValueError : the decode would exceed the pixel budget
+    """
+    max_side = DECODE_MAX_SIDE if max_side is None else max_side
+    budget   = DECODE_PIXEL_BUDGET if budget is None else budget
+    w, h     = pil_image.size
+    scale    = max_side / max(w, h)
+    target   = (max(1, math.ceil(w * scale)), max(1, math.ceil(h * scale)))
+
+    if scale < 1 and pil_image.format == "JPEG":
+        pil_image.draft("RGB", target)          # libjpeg scales while decoding
+    dw, dh = pil_image.size
+    if dw * dh > budget:
+        raise ValueError(
+            f"Image too large: {w}×{h} would decode to {dw * dh / 1e6:.0f} MP "
+            f"(limit {budget / 1e6:.0f} MP)"
+        )
+
+    pil_image.load()
+    factor = min(dw // target[0], dh // target[1]) if scale < 1 else 1
+    if factor >= 2:
+        pil_image = pil_image.reduce(factor)
+    if (dw, dh) != (w, h) or factor >= 2:
+        print(f"[Preprocess] Reduced decode {w}×{h} → {pil_image.size[0]}×{pil_image.size[1]}")
+    return pil_image
+
+
 def _load_dicom(file_storage) -> np.ndarray:
     """
     Load a DICOM (.dcm) file and convert it to a uint8 RGB numpy array.
 
     DICOM Pipeline:
-      1. Read raw pixel data via pydicom
-      2. Apply RescaleSlope + RescaleIntercept metadata corrections
-      3. Apply window-leveling (WindowCenter + WindowWidth) for brain tissue
-      4. Clip and normalise to uint8 [0, 255]
-      5. Convert grayscale → RGB (3-channel)
+      1. Parse the upload in memory (read_dicom) — no temp file; pixel
+         data is deferred and its declared size checked against the budget
+      2. Decode only the frame that is used (the middle one for multi-frame)
+      3. RescaleSlope/Intercept + WindowCenter/Width → uint8 RGB in one
+         pass (window_to_uint8): a lookup table for 8/16-bit integer data
+      4. RGB (SamplesPerPixel = 3) DICOMs are colour images, not HU —
+         they are returned unwindowed
 
     Brain tissue defaults if DICOM metadata is missing:
       WindowCenter = 40  HU  (brain tissue midpoint)
@@ -182,66 +279,20 @@ def _load_dicom(file_storage) -> np.ndarray:
         ValueError: If the DICOM file cannot be parsed
     """
     try:
-        import tempfile, os
-        from io import BytesIO
-
-        # pydicom needs a file path — write to a temp file
-        image_bytes = file_storage.read()
-        with tempfile.NamedTemporaryFile(suffix=".dcm", delete=False) as tmp:
-            tmp.write(image_bytes)
-            tmp_path = tmp.name
-
-        try:
-            ds = pydicom.dcmread(tmp_path)
-        finally:
-            os.unlink(tmp_path)              # Always clean up temp file
-
-        # ── Step 1: Raw pixel array ───────────────────────────────
-        pixel_array = ds.pixel_array.astype(np.float32)
-        print(f"[Preprocess/DICOM] Raw pixel array shape: {pixel_array.shape}, "
-              f"range: [{pixel_array.min():.0f}, {pixel_array.max():.0f}]")
-
-        # ── Step 2: Rescale (HU conversion) ──────────────────────
-        slope     = float(getattr(ds, "RescaleSlope",     1))
-        intercept = float(getattr(ds, "RescaleIntercept", 0))
-        pixel_array = pixel_array * slope + intercept
-        print(f"[Preprocess/DICOM] After HU rescale: "
-              f"[{pixel_array.min():.0f}, {pixel_array.max():.0f}] HU")
-
-        # ── Step 3: Window leveling ───────────────────────────────
-        # Extract WindowCenter / WindowWidth — may be a list (multi-window DICOM)
-        raw_center = getattr(ds, "WindowCenter", 40)
-        raw_width  = getattr(ds, "WindowWidth",  400)
-
-        center = float(raw_center[0]) if hasattr(raw_center, "__iter__") else float(raw_center)
-        width  = float(raw_width[0])  if hasattr(raw_width,  "__iter__") else float(raw_width)
-
-        lower = center - width / 2.0
-        upper = center + width / 2.0
-        print(f"[Preprocess/DICOM] Window: center={center}, width={width} "
-              f"→ [{lower:.0f}, {upper:.0f}] HU")
-
-        pixel_array = np.clip(pixel_array, lower, upper)
-
-        # ── Step 4: Normalise to uint8 [0, 255] ──────────────────
-        pixel_array = ((pixel_array - lower) / (upper - lower) * 255.0)
-        pixel_array = np.clip(pixel_array, 0, 255).astype(np.uint8)
-
-        # ── Step 5: Grayscale → RGB ───────────────────────────────
-        if pixel_array.ndim == 2:
-            # Standard single-slice grayscale DICOM
-            rgb = np.stack([pixel_array] * 3, axis=-1)
-        elif pixel_array.ndim == 3 and pixel_array.shape[2] == 3:
-            # Already RGB (rare but possible)
-            rgb = pixel_array
-        elif pixel_array.ndim == 3:
-            # Multi-frame DICOM — use middle frame
-            mid = pixel_array.shape[0] // 2
-            frame = pixel_array[mid]
-            rgb = np.stack([frame] * 3, axis=-1)
-            print(f"[Preprocess/DICOM] Multi-frame DICOM — using frame {mid}")
+        ds     = read_dicom(_dicom_source(file_storage))
+        frames = dicom_frame_count(ds)
+        index  = frames // 2 if frames > 1 else None
+        if index is not None:
+            print(f"[Preprocess/DICOM] Multi-frame DICOM ({frames} frames) — using frame {index}")
+
+        pixels = dicom_pixels(ds, index)
+        print(f"[Preprocess/DICOM] Stored pixels {pixels.shape} {pixels.dtype}")
+        if int(getattr(ds, "SamplesPerPixel", 1)) == 3:
+            rgb = _colour_to_uint8(pixels)
+        elif pixels.ndim == 2:
+            rgb = window_to_uint8(ds, pixels, rgb=True)
         else:
-            raise ValueError(f"Unexpected DICOM pixel array shape: {pixel_array.shape}")
+            raise ValueError(f"Unexpected DICOM pixel array shape: {pixels.shape}")
 
         print(f"[Preprocess/DICOM] Final RGB shape: {rgb.shape}")
         return rgb
@@ -257,28 +308,183 @@ def _load_dicom(file_storage) -> np.ndarray:
         raise ValueError(f"Failed to process DICOM file: {traceback.format_exc()}")
 
 
-# ─── Shared Utility ───────────────────────────────────────────────────────────
+# ─── DICOM helpers ────────────────────────────────────────────────────────────
+
+def _dicom_source(file_storage):
+    """The upload's own stream when it can seek, else its bytes in a BytesIO."""
+    stream = getattr(file_storage, "stream", None)
+    if stream is not None and hasattr(stream, "seek"):
+        try:
+            stream.seek(0)
+            return stream
+        except Exception:
+            pass
+    return BytesIO(file_storage.read())
+
 
-def _ensure_rgb(img: np.ndarray) -> np.ndarray:
+def read_dicom(source, budget: int = None):
     """
-    Ensure image has exactly 3 channels (RGB).
+    Parse a DICOM dataset from bytes or a seekable file-like object
+    without touching disk. Elements over 64 KB (the pixel data) are
+    deferred, so nothing is decoded until dicom_pixels() asks for it —
+    and the declared Rows × Columns × frames is checked against `budget`
+    (default: DECODE_PIXEL_BUDGET) first.
 
-    Handles:
-      - Grayscale (H, W)       → repeat channel 3 times
-      - RGBA (H, W, 4)         → drop alpha channel
-      - RGB (H, W, 3)          → pass through unchanged
+    Raises:
+        ValueError : no image in the dataset, or it exceeds the budget
+        pydicom.errors.InvalidDicomError : not a DICOM file
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = BytesIO(source)
+    ds = pydicom.dcmread(source, defer_size="64 KB")
+    if "PixelData" not in ds or "Rows" not in ds:
+        raise ValueError("DICOM file contains no image (PixelData missing)")
+    budget = DECODE_PIXEL_BUDGET if budget is None else budget
+    total  = int(ds.Rows) * int(ds.Columns) * dicom_frame_count(ds)
+    if total > budget:
+        raise ValueError(
+            f"DICOM too large: {dicom_frame_count(ds)} × {ds.Rows}×{ds.Columns} "
+            f"= {total / 1e6:.0f} MP (limit {budget / 1e6:.0f} MP)"
+        )
+    return ds
+
+
+def dicom_frame_count(ds) -> int:
+    return int(getattr(ds, "NumberOfFrames", 1) or 1)
+
+
+def dicom_pixels(ds, index: int = None) -> np.ndarray:
+    """
+    Stored pixel values — every frame, or only frame `index`. With
+    pydicom ≥ 3 only that frame is decoded; 2.x decodes the whole array.
+    Colour data comes back as RGB.
+    """
+    try:
+        from pydicom.pixels import pixel_array
+    except ImportError:                                     # pydicom 2.x
+        from pydicom.pixel_data_handlers.util import convert_color_space
+        pixels = ds.pixel_array
+        if index is not None and dicom_frame_count(ds) > 1:
+            pixels = pixels[index]
+        if str(getattr(ds, "PhotometricInterpretation", "")).startswith("YBR"):
+            pixels = convert_color_space(pixels, ds.PhotometricInterpretation, "RGB")
+        return pixels
+    return pixel_array(ds, index=index)
+
+
+def _window_params(ds) -> tuple:
+    """(slope, intercept, lower, upper) — lower/upper in rescaled units."""
+    slope      = float(getattr(ds, "RescaleSlope",     1) or 1)
+    intercept  = float(getattr(ds, "RescaleIntercept", 0) or 0)
+    # WindowCenter / WindowWidth may be multi-valued (several presets) — use the first
+    raw_center = getattr(ds, "WindowCenter", 40)
+    raw_width  = getattr(ds, "WindowWidth",  400)
+    center = float(raw_center[0]) if hasattr(raw_center, "__iter__") else float(raw_center)
+    width  = float(raw_width[0])  if hasattr(raw_width,  "__iter__") else float(raw_width)
+    width  = max(width, 1.0)
+    return slope, intercept, center - width / 2.0, center + width / 2.0
+
+
+def window_to_uint8(ds, pixels: np.ndarray, rgb: bool = False,
+                    verbose: bool = True) -> np.ndarray:
+    """
+    Rescale (slope/intercept) + window-level stored pixels to uint8 in a
+    single vectorised pass — any number of frames at once.
+
+    8/16-bit integer data (every CT/MR series we receive) goes through a
+    lookup table over all 2^bits stored codes: one gather, no float
+    copy of the volume. Other dtypes take one fused float32 pass.
 
     Args:
-        img : Image array of any channel count
+        pixels  : (..., H, W) stored values from dicom_pixels
+        rgb     : return (..., H, W, 3) grey-as-RGB
+        verbose : log the window (off for per-slice series decoding)
 
     Returns:
-        np.ndarray: (H, W, 3) array
+        np.ndarray: uint8, pixels.shape (+ (3,) when rgb)
     """
-    if img.ndim == 2:
-        return np.stack([img] * 3, axis=-1)
-    if img.ndim == 3 and img.shape[2] == 4:
-        return img[:, :, :3]
-    return img
+    slope, intercept, lower, upper = _window_params(ds)
+    if verbose:
+        print(f"[Preprocess/DICOM] Window: [{lower:.0f}, {upper:.0f}] "
+              f"(slope={slope:g}, intercept={intercept:g})")
+
+    if pixels.dtype.kind in "iu" and pixels.dtype.itemsize <= 2:
+        codes_dtype = np.uint8 if pixels.dtype.itemsize == 1 else np.uint16
+        codes       = np.arange(1 << (8 * pixels.dtype.itemsize), dtype=codes_dtype)
+        values      = codes.view(pixels.dtype).astype(np.float64) * slope + intercept
+        lut         = ((np.clip(values, lower, upper) - lower) / (upper - lower) * 255.0).astype(np.uint8)
+        out         = lut[np.ascontiguousarray(pixels).view(codes_dtype)]
+    else:
+        scale = slope * 255.0 / (upper - lower)
+        out   = np.multiply(pixels, np.float32(scale), dtype=np.float32)
+        out  += np.float32((intercept - lower) * 255.0 / (upper - lower))
+        np.clip(out, 0, 255, out=out)
+        out   = out.astype(np.uint8)
+
+    if not rgb:
+        return out
+    if out.ndim == 2:
+        return cv2.cvtColor(out, cv2.COLOR_GRAY2RGB)
+    return np.repeat(out[..., None], 3, axis=-1)
+
+
+def _colour_to_uint8(pixels: np.ndarray) -> np.ndarray:
+    """RGB DICOM pixels → uint8 (16-bit colour is scaled down, not windowed)."""
+    if pixels.dtype == np.uint8:
+        return pixels
+    peak = float(pixels.max()) or 1.0
+    return (pixels.astype(np.float32) * (255.0 / peak)).astype(np.uint8)
+
+
+# ─── Resize + normalise engine ────────────────────────────────────────────────
+
+def _output(out, shape: tuple) -> np.ndarray:
+    if out is None:
+        return np.empty(shape, dtype=np.float32)
+    if out.shape != shape or out.dtype != np.float32:
+        raise ValueError(f"out must be float32 {shape}, got {out.dtype} {out.shape}")
+    return out
+
+
+def _scratch_buffer(shape: tuple, dtype) -> np.ndarray:
+    buffers = getattr(_scratch, "buffers", None)
+    if buffers is None:
+        buffers = _scratch.buffers = {}
+    key = (shape, np.dtype(dtype).str)
+    buf = buffers.get(key)
+    if buf is None:
+        buf = buffers[key] = np.empty(shape, dtype=dtype)
+    return buf
+
+
+def _resize_normalise(image: np.ndarray, size: int, out: np.ndarray = None) -> np.ndarray:
+    """
+    One image → (1, size, size, 3) float32 in [0, 1].
+
+    The resize runs on the source dtype (uint8 for every decoded upload)
+    into a per-thread scratch buffer; the /255 normalisation, the batch
+    dimension and the grayscale → RGB / RGBA → RGB fix-up all happen in
+    the single write into `out`.
+    """
+    image = np.asarray(image)
+    if image.ndim not in (2, 3):
+        raise ValueError(f"Expected an (H, W) or (H, W, C) image, got shape {image.shape}")
+    if image.dtype.type not in _CV2_DTYPES:
+        image = image.astype(np.float32)
+    if image.ndim == 3 and image.shape[2] == 1:
+        image = image[:, :, 0]
+    if image.ndim == 3 and image.shape[2] > 4:
+        image = image[:, :, :3]
+
+    h, w   = image.shape[:2]
+    interp = cv2.INTER_AREA if (h > size or w > size) else cv2.INTER_LINEAR
+    dst    = _scratch_buffer((size, size) + image.shape[2:], image.dtype)
+    cv2.resize(np.ascontiguousarray(image), (size, size), dst=dst, interpolation=interp)
+
+    out = _output(out, (1, size, size, 3))
+    src = dst[..., None] if dst.ndim == 2 else dst[..., :3]
+    np.divide(src, np.float32(255.0), out=out[0], casting="unsafe")
+    return out
 
 
 # ─── Self-test ────────────────────────────────────────────────────────────────
@@ -291,14 +497,14 @@ if __name__ == "__main__":
     out_c  = preprocess_classification(sample)
     out_s  = preprocess_segmentation(sample)
 
-    assert out_c.shape == (1, 128, 128, 3), f"Classification shape wrong: {out_c.shape}"
-    assert out_s.shape == (1, 256, 256, 3), f"Segmentation shape wrong: {out_s.shape}"
+    assert out_c.shape == (1, CLASSIFICATION_SIZE, CLASSIFICATION_SIZE, 3), f"Classification shape wrong: {out_c.shape}"
+    assert out_s.shape == (1, SEGMENTATION_SIZE, SEGMENTATION_SIZE, 3), f"Segmentation shape wrong: {out_s.shape}"
     assert out_c.max() <= 1.0 and out_c.min() >= 0.0, "Classification not normalised"
     assert out_s.max() <= 1.0 and out_s.min() >= 0.0, "Segmentation not normalised"
 
     # Grayscale handling test
     gray = np.random.randint(0, 255, (300, 300), dtype=np.uint8)
     out_g = preprocess_classification(gray)
-    assert out_g.shape == (1, 128, 128, 3), f"Grayscale shape wrong: {out_g.shape}"
+    assert out_g.shape == (1, CLASSIFICATION_SIZE, CLASSIFICATION_SIZE, 3), f"Grayscale shape wrong: {out_g.shape}"
 
     print("✓ All self-tests passed")
\ No newline at end of file
@@ -0,0 +1,175 @@
+"""
+src/render.py
+─────────────
+Overlay rendering shared by every overlay path (NeuroDL v2.1):
+src/gradcam.py's heatmap overlay and src/inference.py's segmentation
+overlays.
+
+The previous renderers promoted the full-resolution scan to float32 and
+built several more full-size float32 canvases (fill layer, 3-channel
+mask, border layer, border mask) — roughly 50 bytes per pixel at peak.
+Here everything stays uint8:
+
+  heatmap_overlay  — the heatmap is upsampled + smoothed on a working
+                     grid of at most RENDER_HEATMAP_SIDE px, quantised,
+                     and only then resized to full size as uint8; the
+                     jet colouring (a precomputed RGB LUT) and the
+                     cv2.addWeighted blend run stripe by stripe
+  mask_overlay     — only the mask's bounding box is touched; fill and
+                     border are per-channel LUTs (v → v·(1−α) + α·colour)
+                     applied with cv2.LUT and copied in under the mask
+
+Scratch buffers are at most RENDER_STRIPE_ROWS rows tall, so the peak on
+top of the output image is ~1 byte per pixel (the uint8 heatmap) plus a
+few stripes. Outputs are new arrays; inputs are never modified.
+
+Environment variables:
+    RENDER_STRIPE_ROWS  : rows blended per stripe                   (default: 256)
+    RENDER_HEATMAP_SIDE : long side of the heatmap smoothing grid  (default: 512)
+"""
+
+import os
+
+import cv2
+import numpy as np
+
+# ─── Configuration ────────────────────────────────────────────────────────────
+
+RENDER_STRIPE_ROWS  = int(os.environ.get("RENDER_STRIPE_ROWS", "256"))
+RENDER_HEATMAP_SIDE = int(os.environ.get("RENDER_HEATMAP_SIDE", "512"))
+
+# Grad-CAM blend: 0.55 heatmap / 0.45 original keeps brain anatomy visible
+HEATMAP_ALPHA  = 0.55
+ORIGINAL_ALPHA = 0.45
+
+# Segmentation overlay
+FILL_COLOR       = (255, 220, 0)   # Warm yellow fill
+BORDER_COLOR     = (255, 140, 0)   # Orange-amber border (contrasts on fill)
+FILL_ALPHA       = 0.35            # Fill transparency — image still clearly visible
+BORDER_ALPHA     = 0.90            # Border nearly opaque for sharp boundary
+BORDER_THICKNESS = 3
+
+
+# ─── Lookup tables ────────────────────────────────────────────────────────────
+
+def _blend_lut(color: tuple, alpha: float) -> np.ndarray:
+    """(1, 256, 3) uint8 per-channel LUT: v → round(v·(1−α) + α·colour)."""
+    v   = np.arange(256, dtype=np.float32)[:, None]
+    lut = v * (1.0 - alpha) + alpha * np.asarray(color, dtype=np.float32)[None, :]
+    return np.clip(np.rint(lut), 0, 255).astype(np.uint8)[None]
+
+
+# Jet in RGB order, shaped for cv2.applyColorMap's user-colormap form
+JET_RGB_LUT = cv2.cvtColor(
+    cv2.applyColorMap(np.arange(256, dtype=np.uint8)[:, None], cv2.COLORMAP_JET),
+    cv2.COLOR_BGR2RGB,
+)                                                           # (256, 1, 3)
+
+FILL_LUT   = _blend_lut(FILL_COLOR, FILL_ALPHA)
+BORDER_LUT = _blend_lut(BORDER_COLOR, BORDER_ALPHA)
+
+
+def _stripes(height: int, rows: int = None):
+    rows = max(1, RENDER_STRIPE_ROWS if rows is None else rows)
+    for y in range(0, height, rows):
+        yield slice(y, min(height, y + rows))
+
+
+# ─── Heatmap overlay ──────────────────────────────────────────────────────────
+
+def heatmap_uint8(heatmap: np.ndarray, width: int, height: int,
+                  max_side: int = None) -> np.ndarray:
+    """
+    Grad-CAM heatmap → (height, width) uint8 at display size.
+
+    Bicubic upsampling, a Gaussian of σ = min side / 40 to hide the 7×7
+    blocks, and re-normalisation to a peak of 255 — computed on a grid of
+    at most `max_side` px, which only the final uint8 resize leaves.
+    """
+    max_side = RENDER_HEATMAP_SIDE if max_side is None else max_side
+    scale    = min(1.0, max_side / max(height, width))
+    w, h     = max(1, round(width * scale)), max(1, round(height * scale))
+
+    hm    = cv2.resize(np.asarray(heatmap, dtype=np.float32), (w, h), interpolation=cv2.INTER_CUBIC)
+    np.clip(hm, 0.0, 1.0, out=hm)
+    sigma = min(h, w) / 40
+    k     = int(sigma * 4) | 1
+    hm    = cv2.GaussianBlur(hm, (k, k), sigmaX=sigma, sigmaY=sigma)
+    peak  = hm.max()
+    hm   *= np.float32(255.0 / peak) if peak > 0 else np.float32(255.0)
+    hm    = hm.astype(np.uint8)
+    if (w, h) != (width, height):
+        hm = cv2.resize(hm, (width, height), interpolation=cv2.INTER_LINEAR)
+    return hm
+
+
+def fit_within(image: np.ndarray, max_side: int = None) -> np.ndarray:
+    """`image` shrunk (INTER_AREA) so its long side is ≤ max_side (default: RENDER_HEATMAP_SIDE)."""
+    max_side = RENDER_HEATMAP_SIDE if max_side is None else max_side
+    h, w     = image.shape[:2]
+    scale    = max_side / max(h, w)
+    if scale >= 1.0:
+        return image
+    return cv2.resize(image, (max(1, round(w * scale)), max(1, round(h * scale))),
+                      interpolation=cv2.INTER_AREA)
+
+
+def heatmap_overlay(background: np.ndarray, heatmap: np.ndarray) -> np.ndarray:
+    """
+    Jet-coloured heatmap alpha-blended over an RGB background.
+
+    Args:
+        background : (H, W, 3) uint8 RGB
+        heatmap    : (h, w) float heatmap in [0, 1] (any resolution)
+
+    Returns:
+        np.ndarray: (H, W, 3) uint8 RGB
+    """
+    background = np.ascontiguousarray(background, dtype=np.uint8)
+    H, W       = background.shape[:2]
+    heat       = heatmap_uint8(heatmap, W, H)
+    out        = np.empty_like(background)
+    for rows in _stripes(H):
+        jet = cv2.applyColorMap(heat[rows], JET_RGB_LUT)
+        cv2.addWeighted(jet, HEATMAP_ALPHA, background[rows], ORIGINAL_ALPHA, 0.0, dst=out[rows])
+    return out
+
+
+# ─── Mask overlay ─────────────────────────────────────────────────────────────
+
+def mask_overlay(image: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """
+    Semi-transparent fill + contour border of a binary mask over an RGB image.
+
+    Args:
+        image : (H, W, 3) uint8 RGB
+        mask  : (H, W) uint8, non-zero = region
+
+    Returns:
+        np.ndarray: (H, W, 3) uint8 RGB — a copy of `image` if the mask is empty
+    """
+    out  = np.array(image, dtype=np.uint8, copy=True, order="C")
+    mask = np.ascontiguousarray(mask, dtype=np.uint8)
+    x, y, w, h = cv2.boundingRect(mask)
+    if w == 0 or h == 0:
+        return out
+
+    # Bounding box grown by the half-thickness the border spills outside
+    H, W = mask.shape
+    pad  = BORDER_THICKNESS // 2 + 1
+    x0, y0 = max(0, x - pad), max(0, y - pad)
+    x1, y1 = min(W, x + w + pad), min(H, y + h + pad)
+    roi, roi_mask = out[y0:y1, x0:x1], mask[y0:y1, x0:x1]
+
+    contours, _ = cv2.findContours(roi_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+    border      = cv2.drawContours(np.zeros_like(roi_mask), contours, -1, 255,
+                                   thickness=BORDER_THICKNESS)
+
+    for rows in _stripes(y1 - y0):
+        stripe = roi[rows]
+        fill   = roi_mask[rows] != 0
+        line   = border[rows] != 0
+        # Fill first, then the border over it — as the float renderer layered them
+        np.copyto(stripe, cv2.LUT(stripe, FILL_LUT), where=fill[..., None])
+        np.copyto(stripe, cv2.LUT(stripe, BORDER_LUT), where=line[..., None])
+    return out
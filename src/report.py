@@ -19,27 +19,48 @@ Setup:
     1. Create a free key at https://console.groq.com/keys
     2. Set GROQ_API_KEY in your environment (.env / EC2 env / etc.)
 
+Streaming: pass on_chunk to generate_report and the request is made
+with stream=True. Groq then answers with Server-Sent Events
+("data: {...}" lines, terminated by "data: [DONE]"); each content delta
+is handed to on_chunk as it arrives, and the assembled text is returned
+when the stream closes — so the caller persists exactly what it would
+have got without streaming.
+
+Every call goes through groq_client (src/report_client.py): a pooled
+keep-alive session with a concurrency cap, Retry-After-aware retries
+and a circuit breaker. When Groq is rate-limiting or down, the report
+is simply "not available" — the scan is never held hostage to it.
+
 Environment variables:
-    GROQ_API_KEY : required — no key, no report (fails gracefully, see below)
-    GROQ_MODEL   : model id (default: "llama-3.1-8b-instant" — fast + free-tier
-                   friendly; swap to "llama-3.3-70b-versatile" for higher
-                   quality at a small latency/cost increase)
+    GROQ_API_KEY  : required — no key, no report (fails gracefully, see below)
+    GROQ_MODEL    : model id (default: "llama-3.1-8b-instant" — fast + free-tier
+                    friendly; swap to "llama-3.3-70b-versatile" for higher
+                    quality at a small latency/cost increase)
+    GROQ_ENDPOINT : chat completions URL (default: Groq's; point it at any
+                    OpenAI-compatible server, e.g. a local stand-in)
 """
 
+import json
 import os
 import traceback
 from datetime import datetime
+from typing import Callable
 
 import requests
 
+from src.report_client import ReportClient, ReportUnavailable
+
 # ─── Configuration ────────────────────────────────────────────────────────────
 
 GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
 GROQ_MODEL   = os.environ.get("GROQ_MODEL", "llama-3.1-8b-instant")
 
-GROQ_ENDPOINT   = "https://api.groq.com/openai/v1/chat/completions"
+GROQ_ENDPOINT   = os.environ.get("GROQ_ENDPOINT", "https://api.groq.com/openai/v1/chat/completions")
 REQUEST_TIMEOUT = 60   # Groq is far faster than local Ollama inference
 
+# One pooled, rate-limited client for every report — see src/report_client.py
+groq_client = ReportClient(name="groq")
+
 
 # ─── Clinical Knowledge Base ──────────────────────────────────────────────────
 # Injected per-class to keep llama3.1:8b radiologically grounded.
@@ -183,11 +204,13 @@ def generate_report(
     segmentation_performed: bool,
     gradcam_performed:      bool,
     model_accuracy:         str  = "94.92%",
+    model_name:             str  = "ResNet50V2",
     patient_id:             int  = None,
     patient_name:           str  = None,
     patient_age:            int  = None,
     patient_gender:         str  = None,
     patient_symptoms:       str  = None,
+    on_chunk:               Callable[[str], None] = None,
 ) -> str | None:
     """
     Generate a detailed ~2-page clinical radiology report via Groq.
@@ -200,12 +223,16 @@ def generate_report(
         confidence             : Confidence score as float e.g. 0.9245
         segmentation_performed : Whether pseudo-segmentation ran
         gradcam_performed      : Whether Grad-CAM ran
-        model_accuracy         : Model accuracy string
+        model_accuracy         : Accuracy string of the model that decided
+        model_name             : That model — response["model_used"]
         patient_id             : DB primary key (int)
         patient_name           : Full name from the account (users.full_name)
         patient_age            : Age in years
         patient_gender         : Male / Female / Other
         patient_symptoms       : Free-text reason for THIS scan
+        on_chunk               : Optional callback — if given, the report is
+                                 streamed and each text delta is passed to it
+                                 as soon as Groq produces it
 
     Returns:
         Formatted report string, or None if Groq is unavailable/unconfigured.
@@ -224,6 +251,7 @@ def generate_report(
             segmentation_performed = segmentation_performed,
             gradcam_performed      = gradcam_performed,
             model_accuracy         = model_accuracy,
+            model_name             = model_name,
             patient_id             = patient_id,
             patient_name           = patient_name,
             patient_age            = patient_age,
@@ -237,23 +265,28 @@ def generate_report(
             "temperature": 0.25,   # Low = consistent, factual, clinical tone
             "top_p":       0.9,
             "max_tokens":  1400,   # ~2 pages of clinical text
+            "stream":      on_chunk is not None,
         }
         headers = {
             "Authorization": f"Bearer {GROQ_API_KEY}",
             "Content-Type":  "application/json",
         }
 
-        print(f"[Report] Calling Groq ({GROQ_MODEL}) for full clinical report...")
-        response = requests.post(
+        mode = "streaming" if on_chunk else "full"
+        print(f"[Report] Calling Groq ({GROQ_MODEL}) for {mode} clinical report...")
+        if on_chunk:
+            consume = lambda response: _read_stream(response, on_chunk)
+        else:
+            consume = lambda response: response.json()["choices"][0]["message"]["content"]
+
+        report_text = groq_client.post(
             GROQ_ENDPOINT,
+            consume,
             json    = payload,
             headers = headers,
             timeout = REQUEST_TIMEOUT,
-        )
-        response.raise_for_status()
-
-        data        = response.json()
-        report_text = data["choices"][0]["message"]["content"].strip()
+            stream  = on_chunk is not None,
+        ).strip()
 
         if not report_text:
             print("[Report] Groq returned an empty response")
@@ -262,6 +295,10 @@ def generate_report(
         print(f"[Report] Generated successfully ({len(report_text)} chars)")
         return report_text
 
+    except ReportUnavailable as e:
+        # Rate-limited past our retry budget, or the circuit is open.
+        print(f"[Report] Report unavailable — {e}")
+        return None
     except requests.exceptions.Timeout:
         print(f"[Report] Groq timed out after {REQUEST_TIMEOUT}s")
         return None
@@ -282,6 +319,35 @@ def generate_report(
 
 # ─── Internal Helpers ─────────────────────────────────────────────────────────
 
+def _read_stream(response, on_chunk: Callable[[str], None]) -> str:
+    """
+    Consume an OpenAI-style SSE stream, forwarding each content delta to
+    on_chunk, and return the assembled text.
+
+    Lines are decoded as UTF-8 explicitly — text/event-stream carries no
+    charset, and requests would otherwise fall back to ISO-8859-1 and
+    mangle the report's box-drawing characters.
+    """
+    parts = []
+    for raw in response.iter_lines():
+        line = raw.decode("utf-8").strip() if raw else ""
+        if not line.startswith("data:"):
+            continue            # blank keep-alives, ": comments", event: lines
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            break
+
+        event = json.loads(data)
+        if "error" in event:
+            raise RuntimeError(f"Groq stream error: {event['error']}")
+        if not event.get("choices"):
+            continue            # usage-only trailer chunks
+        text = event["choices"][0].get("delta", {}).get("content")
+        if text:
+            parts.append(text)
+            on_chunk(text)
+    return "".join(parts)
+
 
 def _build_prompt(
     class_name:             str,
@@ -289,6 +355,7 @@ def _build_prompt(
     segmentation_performed: bool,
     gradcam_performed:      bool,
     model_accuracy:         str,
+    model_name:             str  = "ResNet50V2",
     patient_id:             int  = None,
     patient_name:           str  = None,
     patient_age:            int  = None,
@@ -375,7 +442,7 @@ Age               : {age_str}
 Gender            : {gender_str}
 Presenting Symptoms: {symptom_str}
 Scan Date         : {timestamp}
-AI System         : NeuroDL v2.0 — ResNet50V2 (Fine-tuned, {model_accuracy} accuracy)
+AI System         : NeuroDL v2.0 — {model_name} ({model_accuracy} accuracy)
 AI Diagnosis      : {class_name}
 Confidence Score  : {confidence_pct}
 Grad-CAM Analysis : {gcam_status}
@@ -404,7 +471,7 @@ PATIENT:          {name_str}
 AGE / GENDER:     {age_str} years / {gender_str}
 REFERENCE NO:     {pid_str}
 DATE OF SCAN:     {timestamp}
-REPORTING SYSTEM: NeuroDL v2.0 | ResNet50V2 | Accuracy: {model_accuracy}
+REPORTING SYSTEM: NeuroDL v2.0 | {model_name} | Accuracy: {model_accuracy}
 
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
@@ -412,7 +479,7 @@ CLINICAL INDICATION:
 [Write 2–3 sentences describing why the patient presented for this MRI, incorporating their reported symptoms: "{symptom_str}". If no symptoms reported, state the scan was performed as a screening or incidental workup.]
 
 TECHNIQUE:
-[Write 2 sentences describing the AI-assisted MRI analysis technique. Mention that NeuroDL v2.0 used a fine-tuned ResNet50V2 classifier at 224×224 resolution, with Grad-CAM explainability and pseudo-segmentation overlay where applicable.]
+[Write 2 sentences describing the AI-assisted MRI analysis technique. Mention that NeuroDL v2.0 used its {model_name} classifier at 224×224 resolution, with Grad-CAM explainability and pseudo-segmentation overlay where applicable.]
 
 FINDINGS:
 [Write 4–6 sentences. Describe what the AI detected: the specific tumour type or absence of tumour, its typical MRI characteristics based on the clinical knowledge above, what the confidence score of {confidence_pct} indicates about the certainty of the result, and what the Grad-CAM/segmentation analysis revealed. Be specific and clinical. Reference the patient's age and gender where relevant to the pathology.]
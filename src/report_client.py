@@ -0,0 +1,344 @@
+"""
+src/report_client.py
+────────────────────
+Pooled, rate-limit-aware HTTP client for the Groq report backend (NeuroDL v2.1).
+
+generate_report used to call requests.post once per scan: a fresh
+TCP + TLS handshake every time, no cap on concurrent calls, and no
+answer to 429s — a burst of scans became a burst of rate-limit errors
+and empty report panels. Every upstream call now goes through one
+ReportClient, which provides:
+
+  1. Keep-alive connection pool — one requests.Session shared by all
+     workers, sized to the concurrency limit
+  2. Concurrency limiter — at most REPORT_MAX_CONCURRENCY calls in
+     flight; others wait up to REPORT_ACQUIRE_TIMEOUT for a slot
+  3. Retries with full-jitter exponential backoff on 429 / 5xx /
+     connection errors / timeouts, honouring Retry-After when given
+  4. Circuit breaker — after REPORT_BREAKER_THRESHOLD consecutive failed
+     calls it opens and fails fast for REPORT_BREAKER_COOLDOWN seconds,
+     then lets a single probe through (half-open)
+  5. Upstream latency metrics (time to headers and total) for
+     /metrics/inference
+
+Failures the caller should show as "report unavailable" surface as
+ReportUnavailable. Non-retryable HTTP errors (401 bad key, 400 bad
+payload) are raised as requests.HTTPError, unchanged.
+
+Environment variables:
+    REPORT_MAX_CONCURRENCY  : concurrent upstream calls          (default: 4)
+    REPORT_ACQUIRE_TIMEOUT  : seconds to wait for a free slot    (default: 30)
+    REPORT_MAX_RETRIES      : retries after the first attempt    (default: 3)
+    REPORT_BACKOFF_BASE     : first backoff ceiling, seconds     (default: 0.5)
+    REPORT_BACKOFF_MAX      : max wait before any retry, seconds (default: 10)
+                              — a longer Retry-After gives up instead
+    REPORT_BREAKER_THRESHOLD: consecutive failures to open       (default: 5)
+    REPORT_BREAKER_COOLDOWN : seconds the breaker stays open     (default: 30)
+"""
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+# ─── Configuration ────────────────────────────────────────────────────────────
+
+REPORT_MAX_CONCURRENCY   = int(os.environ.get("REPORT_MAX_CONCURRENCY",     4))
+REPORT_ACQUIRE_TIMEOUT   = float(os.environ.get("REPORT_ACQUIRE_TIMEOUT",   30))
+REPORT_MAX_RETRIES       = int(os.environ.get("REPORT_MAX_RETRIES",         3))
+REPORT_BACKOFF_BASE      = float(os.environ.get("REPORT_BACKOFF_BASE",      0.5))
+REPORT_BACKOFF_MAX       = float(os.environ.get("REPORT_BACKOFF_MAX",       10))
+REPORT_BREAKER_THRESHOLD = int(os.environ.get("REPORT_BREAKER_THRESHOLD",   5))
+REPORT_BREAKER_COOLDOWN  = float(os.environ.get("REPORT_BREAKER_COOLDOWN",  30))
+
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+LATENCY_WINDOW   = 512     # recent calls kept for percentile metrics
+
+
+class ReportUnavailable(RuntimeError):
+    """The upstream is overloaded or unhealthy — show "report unavailable"."""
+
+
+# ─── Circuit breaker ──────────────────────────────────────────────────────────
+
+class CircuitBreaker:
+    """
+    closed    → calls flow; `threshold` consecutive failures open it
+    open      → calls fail fast until `cooldown` seconds have passed
+    half_open → one probe call is let through; success closes the
+                breaker, failure re-opens it for another cooldown
+    """
+
+    def __init__(self, threshold: int = REPORT_BREAKER_THRESHOLD,
+                 cooldown: float = REPORT_BREAKER_COOLDOWN):
+        self.threshold = max(1, int(threshold))
+        self.cooldown  = cooldown
+        self._lock     = threading.Lock()
+        self._state    = "closed"
+        self._failures = 0
+        self._opened   = 0.0
+        self._probing  = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._current_state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state    = "closed"
+            self._failures = 0
+            self._probing  = False
+
+    def release_probe(self) -> None:
+        """Hand back a half-open probe that never reached the upstream."""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.threshold:
+                if self._state != "open":
+                    print(f"[ReportClient] ⚠ Circuit open — failing fast for {self.cooldown:.0f}s")
+                self._state   = "open"
+                self._opened  = time.monotonic()
+                self._probing = False
+
+    def _current_state(self) -> str:
+        if self._state == "open" and time.monotonic() - self._opened >= self.cooldown:
+            self._state = "half_open"
+        return self._state
+
+
+# ─── Client ───────────────────────────────────────────────────────────────────
+
+class ReportClient:
+    """
+    Shared keep-alive session + concurrency limit + retries + breaker.
+
+    Args:
+        max_concurrency : calls in flight at once (also the pool size)
+        acquire_timeout : seconds to wait for a slot before giving up
+        max_retries     : retries after the first attempt
+        backoff_base    : ceiling of the first jittered backoff, seconds
+        backoff_max     : cap on any single wait; a longer Retry-After
+                          is treated as "give up now"
+        breaker         : CircuitBreaker (a default one is created)
+        name            : label used in logs and stats
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int   = REPORT_MAX_CONCURRENCY,
+        acquire_timeout: float = REPORT_ACQUIRE_TIMEOUT,
+        max_retries:     int   = REPORT_MAX_RETRIES,
+        backoff_base:    float = REPORT_BACKOFF_BASE,
+        backoff_max:     float = REPORT_BACKOFF_MAX,
+        breaker:         CircuitBreaker = None,
+        name:            str   = "groq",
+    ):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.acquire_timeout = acquire_timeout
+        self.max_retries     = max(0, int(max_retries))
+        self.backoff_base    = backoff_base
+        self.backoff_max     = backoff_max
+        self.breaker         = breaker or CircuitBreaker()
+        self.name            = name
+
+        # Retries are handled here (with Retry-After + breaker accounting),
+        # so the adapter itself never retries.
+        self.session = requests.Session()
+        adapter      = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency,
+                                   max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://",  adapter)
+
+        self._slots     = threading.BoundedSemaphore(self.max_concurrency)
+        self._lock      = threading.Lock()
+        self._in_flight = 0
+        self._ttfb_ms   = deque(maxlen=LATENCY_WINDOW)
+        self._total_ms  = deque(maxlen=LATENCY_WINDOW)
+        self._status    = {}
+        self._counters  = {"calls": 0, "attempts": 0, "retries": 0, "failures": 0,
+                           "short_circuited": 0, "slot_timeouts": 0}
+
+    def post(self, url: str, consume, **kwargs):
+        """
+        POST through the pool and return consume(response).
+
+        consume runs while the concurrency slot is still held, so a
+        streamed body counts against the limit until it is fully read.
+        A response is only retried before consume starts — once tokens
+        may have reached the client, a failure is final.
+
+        Raises:
+            ReportUnavailable     : breaker open, no free slot, retries exhausted,
+                                    or a request error a retry can't fix
+            requests.HTTPError    : non-retryable HTTP status (e.g. 401)
+        """
+        self._count("calls")
+        if not self.breaker.allow():
+            self._count("short_circuited")
+            raise ReportUnavailable(f"{self.name} circuit open — upstream unhealthy")
+
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            self._count("slot_timeouts")
+            self.breaker.release_probe()
+            raise ReportUnavailable(
+                f"{self.name} busy — no free slot after {self.acquire_timeout:.0f}s"
+            )
+        with self._lock:
+            self._in_flight += 1
+        try:
+            return self._post_with_retries(url, consume, kwargs)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            ttfb, total = list(self._ttfb_ms), list(self._total_ms)
+            return {
+                "name":            self.name,
+                "breaker":         self.breaker.state,
+                "in_flight":       self._in_flight,
+                "max_concurrency": self.max_concurrency,
+                "status_counts":   dict(sorted(self._status.items())),
+                "upstream_ms":     _percentiles(ttfb),
+                "total_ms":        _percentiles(total),
+                **self._counters,
+            }
+
+    # ── Internals ─────────────────────────────────────────────────
+
+    def _post_with_retries(self, url, consume, kwargs):
+        error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count("retries")
+            self._count("attempts")
+            t0 = time.perf_counter()
+
+            try:
+                response = self.session.post(url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self._record_latency(ttfb=None, total=time.perf_counter() - t0, status="error")
+                error, delay = e, self._backoff(attempt)
+            except requests.exceptions.RequestException as e:
+                # Redirect loops, bad URLs, undecodable bodies: a retry won't
+                # help, but the breaker must still see the failure.
+                self._record_latency(ttfb=None, total=time.perf_counter() - t0, status="error")
+                error = e
+                break
+            else:
+                ttfb = time.perf_counter() - t0
+                if response.status_code in RETRYABLE_STATUS:
+                    self._record_latency(ttfb, time.perf_counter() - t0, response.status_code)
+                    delay = _retry_after(response)
+                    delay = self._backoff(attempt) if delay is None else delay
+                    error = requests.HTTPError(
+                        f"{response.status_code} from {self.name}", response=response,
+                    )
+                    response.close()
+                else:
+                    return self._finish(response, consume, t0, ttfb)
+
+            if attempt == self.max_retries:
+                break
+            if delay > self.backoff_max:
+                print(f"[ReportClient] Retry-After {delay:.0f}s exceeds "
+                      f"{self.backoff_max:.0f}s — giving up")
+                break
+            print(f"[ReportClient] {error} — retry {attempt + 1}/{self.max_retries} "
+                  f"in {delay:.2f}s")
+            time.sleep(delay)
+
+        self._count("failures")
+        self.breaker.record_failure()
+        raise ReportUnavailable(f"{self.name} unavailable: {error}") from error
+
+    def _finish(self, response, consume, t0, ttfb):
+        try:
+            if response.status_code >= 400:
+                # 4xx is our fault (bad key / payload), not upstream health.
+                self._record_latency(ttfb, time.perf_counter() - t0, response.status_code)
+                if response.status_code < 500:
+                    self.breaker.record_success()
+                else:
+                    self._count("failures")
+                    self.breaker.record_failure()
+                response.raise_for_status()
+            try:
+                result = consume(response)
+            except Exception:
+                self._record_latency(ttfb, time.perf_counter() - t0, response.status_code)
+                self._count("failures")
+                self.breaker.record_failure()
+                raise
+            self._record_latency(ttfb, time.perf_counter() - t0, response.status_code)
+            self.breaker.record_success()
+            return result
+        finally:
+            response.close()
+
+    def _backoff(self, attempt: int) -> float:
+        """Full jitter: uniform(0, min(max, base · 2^attempt))."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _record_latency(self, ttfb, total, status) -> None:
+        with self._lock:
+            if ttfb is not None:
+                self._ttfb_ms.append(ttfb * 1000)
+            self._total_ms.append(total * 1000)
+            self._status[str(status)] = self._status.get(str(status), 0) + 1
+
+
+# ─── Helpers ──────────────────────────────────────────────────────────────────
+
+def _retry_after(response):
+    """Retry-After as seconds (delta-seconds or HTTP-date form), or None."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _percentiles(samples: list) -> dict:
+    if not samples:
+        return {"count": 0, "p50": None, "p95": None, "max": None}
+    arr = np.asarray(samples)
+    return {
+        "count": len(samples),
+        "p50":   round(float(np.percentile(arr, 50)), 1),
+        "p95":   round(float(np.percentile(arr, 95)), 1),
+        "max":   round(float(arr.max()), 1),
+    }
@@ -0,0 +1,390 @@
+"""
+src/result_cache.py
+───────────────────
+Content-addressed cache for model-side /predict results (NeuroDL v2.1).
+
+Clinicians re-upload the same MRI all the time — re-opening a case,
+retrying after a dropped socket — and each upload used to re-run
+preprocessing, ResNet50V2, Grad-CAM and pseudo-segmentation from
+scratch. Results are now keyed on a SHA-256 of the DECODED pixel data
+(so re-encoding or renaming the file doesn't matter) plus the model
+version, and kept in two tiers:
+
+  1. In-memory LRU bounded by RESULT_CACHE_MAX_BYTES
+  2. On-disk .npz files under RESULT_CACHE_DIR (survives restarts and
+     is shared by every worker on the node), bounded by
+     RESULT_CACHE_DISK_MAX_BYTES — oldest files are evicted first.
+     Each cache keeps a running size index of the directory instead of
+     walking it on every write. The walk happens at start-up, when the
+     index goes over budget, and after this process has written 10% of
+     the budget (other workers' files are only seen by a walk); eviction
+     then goes down to 90% of the budget
+
+Concurrent identical requests are coalesced: the first caller computes,
+everyone else waits for that result instead of running the model again.
+
+Only model outputs are cached. The LLM report is personalised with the
+patient's profile and symptoms, so it is never keyed on pixels alone.
+
+Entries are flat dicts whose values are np.ndarray, bytes, str, int,
+float, bool or None. The disk tier stores them with np.savez and loads
+with allow_pickle=False — nothing on disk is ever unpickled.
+
+Environment variables:
+    RESULT_CACHE_MAX_BYTES      : in-memory budget in bytes (default: 256 MB, 0 disables)
+    RESULT_CACHE_DIR            : on-disk tier directory    (default: "cache/results",
+                                  empty string disables the disk tier)
+    RESULT_CACHE_DISK_MAX_BYTES : on-disk budget in bytes   (default: 2 GB)
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# ─── Configuration ────────────────────────────────────────────────────────────
+
+RESULT_CACHE_MAX_BYTES      = int(os.environ.get("RESULT_CACHE_MAX_BYTES", 256 * 1024 ** 2))
+RESULT_CACHE_DIR            = os.environ.get("RESULT_CACHE_DIR", os.path.join("cache", "results"))
+RESULT_CACHE_DISK_MAX_BYTES = int(os.environ.get("RESULT_CACHE_DISK_MAX_BYTES", 2 * 1024 ** 3))
+
+# Disk eviction stops at this fraction of the budget; writing the
+# remaining headroom since the last directory walk triggers another.
+_DISK_LOW_WATER = 0.9
+
+
+# ─── Keys ─────────────────────────────────────────────────────────────────────
+
+def content_key(image: np.ndarray, model_version: str) -> str:
+    """
+    Hash decoded pixels + shape + dtype + model version into a cache key.
+
+    Two uploads of the same scan produce the same key even if the file
+    name or container (JPEG re-save aside) differ; any model change
+    produces a new key, so stale results are never served.
+    """
+    image = np.ascontiguousarray(image)
+    h     = hashlib.sha256()
+    h.update(model_version.encode("utf-8"))
+    h.update(f"|{image.shape}|{image.dtype}|".encode("utf-8"))
+    h.update(memoryview(image).cast("B"))
+    return h.hexdigest()
+
+
+# ─── Cache ────────────────────────────────────────────────────────────────────
+
+class _Flight:
+    """A computation in progress that other callers can wait on."""
+
+    __slots__ = ("event", "entry", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.entry = None
+        self.error = None
+
+
+class ResultCache:
+    """
+    Two-tier (memory LRU + disk) cache with single-flight computation.
+
+    Args:
+        max_bytes      : in-memory budget; 0 disables the memory tier
+        disk_dir       : directory for the disk tier; None/"" disables it
+        disk_max_bytes : disk budget; oldest entries are evicted first
+    """
+
+    def __init__(
+        self,
+        max_bytes:      int = RESULT_CACHE_MAX_BYTES,
+        disk_dir:       str = RESULT_CACHE_DIR,
+        disk_max_bytes: int = RESULT_CACHE_DISK_MAX_BYTES,
+    ):
+        self.max_bytes      = max(0, int(max_bytes))
+        self.disk_dir       = disk_dir or None
+        self.disk_max_bytes = max(0, int(disk_max_bytes))
+
+        self._lock      = threading.Lock()
+        self._entries   = OrderedDict()    # key → (entry, size)
+        self._bytes     = 0
+        self._inflight  = {}               # key → _Flight
+        self._counters  = {"memory_hits": 0, "disk_hits": 0, "coalesced": 0,
+                           "misses": 0, "evictions": 0}
+
+        self._disk_lock  = threading.Lock()
+        self._disk_index = OrderedDict()   # path → size, least recently used first
+        self._disk_bytes = 0
+        self._disk_since = 0               # bytes written since the last walk
+        if self.disk_dir is not None:
+            self._scan_disk()
+
+    # ── Public API ────────────────────────────────────────────────
+
+    def get(self, key: str):
+        """Return a cached entry (memory, then disk) or None."""
+        with self._lock:
+            entry = self._get_memory(key)
+        if entry is not None:
+            return entry
+
+        entry = self._read_disk(key)
+        if entry is not None:
+            with self._lock:
+                self._counters["disk_hits"] += 1
+                self._put_memory(key, entry)
+            return dict(entry)
+        return None
+
+    def put(self, key: str, entry: dict) -> None:
+        """Store an entry in both tiers. Never raises on disk errors."""
+        entry = dict(entry)
+        with self._lock:
+            self._put_memory(key, entry)
+        self._write_disk(key, entry)
+
+    def get_or_compute(self, key: str, compute) -> tuple:
+        """
+        Return (entry, cached) — computing it at most once per key.
+
+        If another thread is already computing `key`, wait for its
+        result instead of starting a second computation; that counts as
+        cached. If the computing thread raises, every waiter gets the
+        same exception and nothing is stored.
+        """
+        with self._lock:
+            entry = self._get_memory(key)
+            if entry is not None:
+                return entry, True
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+            else:
+                self._counters["coalesced"] += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return dict(flight.entry), True
+
+        try:
+            entry = self._read_disk(key)
+            if entry is not None:
+                with self._lock:
+                    self._counters["disk_hits"] += 1
+                    self._put_memory(key, entry)
+                cached = True
+            else:
+                with self._lock:
+                    self._counters["misses"] += 1
+                entry  = dict(compute())
+                self.put(key, entry)
+                cached = False
+            flight.entry = entry
+            return dict(entry), cached
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries":        len(self._entries),
+                "bytes":          self._bytes,
+                "max_bytes":      self.max_bytes,
+                "disk_enabled":   self.disk_dir is not None,
+                "disk_bytes":     self._disk_bytes,
+                "in_flight":      len(self._inflight),
+                **self._counters,
+            }
+
+    # ── Memory tier (caller holds _lock) ──────────────────────────
+
+    def _get_memory(self, key: str):
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        self._entries.move_to_end(key)
+        self._counters["memory_hits"] += 1
+        return dict(item[0])
+
+    def _put_memory(self, key: str, entry: dict) -> None:
+        size = _entry_size(entry)
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        self._entries[key] = (entry, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes and self._entries:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+            self._counters["evictions"] += 1
+
+    # ── Disk tier ─────────────────────────────────────────────────
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.npz")
+
+    def _read_disk(self, key: str):
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                entry = _unpack(data)
+        except FileNotFoundError:
+            self._unindex_disk(path)
+            return None
+        except Exception as e:
+            print(f"[ResultCache] ⚠ Dropping unreadable entry {key[:12]}: {e}")
+            _remove_quietly(path)
+            self._unindex_disk(path)
+            return None
+        try:
+            os.utime(path)    # refresh mtime → approximate LRU across workers
+            self._index_disk(path)
+        except OSError:
+            self._unindex_disk(path)      # evicted by another worker meanwhile
+        return entry
+
+    def _write_disk(self, key: str, entry: dict) -> None:
+        if self.disk_dir is None or self.disk_max_bytes == 0:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **_pack(entry))
+                size = f.tell()
+            os.replace(tmp, path)   # atomic — readers never see half a file
+            self._index_disk(path, size)
+        except Exception as e:
+            print(f"[ResultCache] ⚠ Disk write skipped for {key[:12]}: {e}")
+
+    def _index_disk(self, path: str, size: int = None) -> None:
+        """Mark `path` most recently used; size=None keeps (or stats) its size."""
+        with self._disk_lock:
+            old = self._disk_index.pop(path, None)
+            if size is not None:
+                self._disk_since += size
+            elif old is not None:
+                size = old
+            else:
+                size = os.path.getsize(path)
+            self._disk_index[path] = size
+            self._disk_bytes      += size - (old or 0)
+            headroom = self.disk_max_bytes * (1 - _DISK_LOW_WATER)
+            if self._disk_bytes > self.disk_max_bytes or self._disk_since > headroom:
+                self._evict_disk()
+
+    def _unindex_disk(self, path: str) -> None:
+        with self._disk_lock:
+            self._disk_bytes -= self._disk_index.pop(path, 0)
+
+    def _scan_disk(self) -> None:
+        """Rebuild the index from the directory, oldest mtime first."""
+        files = []
+        for root, _, names in os.walk(self.disk_dir):
+            for name in names:
+                if name.endswith(".npz"):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    files.append((st.st_mtime, st.st_size, path))
+        self._disk_index = OrderedDict((path, size) for _, size, path in sorted(files))
+        self._disk_bytes = sum(self._disk_index.values())
+        self._disk_since = 0
+
+    def _evict_disk(self) -> None:
+        """Re-walk, then evict oldest files down to the low-water mark (caller holds _disk_lock)."""
+        # Other workers write to the same directory, so this index may
+        # miss their files — re-walk before deciding whether to delete.
+        self._scan_disk()
+        if self._disk_bytes <= self.disk_max_bytes:
+            return
+        target = int(self.disk_max_bytes * _DISK_LOW_WATER)
+        while self._disk_bytes > target and self._disk_index:
+            path, size = self._disk_index.popitem(last=False)
+            _remove_quietly(path)
+            self._disk_bytes -= size
+
+
+# ─── Serialisation helpers ────────────────────────────────────────────────────
+#
+# np.savez only holds arrays, so each value is stored under a
+# "<type>:<name>" array name that tells _unpack how to restore it.
+
+def _pack(entry: dict) -> dict:
+    packed = {}
+    for name, value in entry.items():
+        if value is None:
+            packed[f"none:{name}"] = np.zeros(0, dtype=np.uint8)
+        elif isinstance(value, np.ndarray):
+            packed[f"array:{name}"] = value
+        elif isinstance(value, (bytes, bytearray)):
+            packed[f"bytes:{name}"] = np.frombuffer(bytes(value), dtype=np.uint8)
+        elif isinstance(value, str):
+            packed[f"str:{name}"] = np.frombuffer(value.encode("utf-8"), dtype=np.uint8)
+        elif isinstance(value, (bool, np.bool_)):
+            packed[f"bool:{name}"] = np.array(bool(value))
+        elif isinstance(value, (int, np.integer)):
+            packed[f"int:{name}"] = np.array(int(value), dtype=np.int64)
+        elif isinstance(value, (float, np.floating)):
+            packed[f"float:{name}"] = np.array(float(value), dtype=np.float64)
+        else:
+            raise TypeError(f"Cannot cache value of type {type(value).__name__} for '{name}'")
+    return packed
+
+
+def _unpack(data) -> dict:
+    entry = {}
+    for packed_name in data.files:
+        kind, name = packed_name.split(":", 1)
+        value = data[packed_name]
+        if kind == "none":
+            entry[name] = None
+        elif kind == "array":
+            entry[name] = value
+        elif kind == "bytes":
+            entry[name] = value.tobytes()
+        elif kind == "str":
+            entry[name] = value.tobytes().decode("utf-8")
+        elif kind == "bool":
+            entry[name] = bool(value)
+        elif kind == "int":
+            entry[name] = int(value)
+        elif kind == "float":
+            entry[name] = float(value)
+    return entry
+
+
+def _entry_size(entry: dict) -> int:
+    size = 0
+    for value in entry.values():
+        if isinstance(value, np.ndarray):
+            size += value.nbytes
+        elif isinstance(value, (bytes, bytearray, str)):
+            size += len(value)
+        else:
+            size += 8
+    return size
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
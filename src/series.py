@@ -0,0 +1,293 @@
+"""
+src/series.py
+─────────────
+DICOM series ingestion for /predict-series (NeuroDL v2.1).
+
+Partner PACS exports arrive as one single-frame .dcm file per slice,
+either zipped or as a multipart set. This module turns them into the
+(F, H, W) uint8 volume src/volume.py classifies:
+
+  1. Stream    — zip entries are read one at a time straight from the
+                 upload (zipfile on the file object, never extracted to
+                 disk); non-DICOM entries and DICOMDIR are skipped
+  2. Decode    — each slice is inflated, parsed, windowed and shrunk to
+                 the classifier's 224×224 in a process pool (workers get
+                 the still-compressed entry), with at most
+                 2 × SERIES_WORKERS slices in flight
+  3. Sort      — by position along the slice normal
+                 (ImagePositionPatient · ImageOrientationPatient normal)
+                 when every slice has it, else InstanceNumber, else name
+
+Only the 224×224 thumbnails are kept (~50 KB per slice), so a 500-slice
+series holds ~25 MB however large the source images are. The few slices
+that need a full-resolution Grad-CAM background are re-read from the
+upload afterwards (ingest_series()'s readers + slice_image()).
+
+Environment variables:
+    SERIES_WORKERS         : decode processes; ≤ 1 decodes in-process (default: min(4, CPUs))
+    SERIES_MAX_SLICES      : max slices per series                      (default: 1000)
+    SERIES_MAX_ENTRY_BYTES : max uncompressed size of one zip entry     (default: 67108864)
+"""
+
+import multiprocessing
+import os
+import struct
+import threading
+import time
+import zipfile
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import cv2
+import numpy as np
+import pydicom
+
+from src.preprocess import (
+    CLASSIFICATION_SIZE, _colour_to_uint8, dicom_frame_count, dicom_pixels,
+    read_dicom, window_to_uint8,
+)
+
+# ─── Configuration ────────────────────────────────────────────────────────────
+
+SERIES_WORKERS         = int(os.environ.get("SERIES_WORKERS", min(4, os.cpu_count() or 1)))
+SERIES_MAX_SLICES      = int(os.environ.get("SERIES_MAX_SLICES", "1000"))
+SERIES_MAX_ENTRY_BYTES = int(os.environ.get("SERIES_MAX_ENTRY_BYTES", str(64 * 1024 * 1024)))
+
+# Process pools per worker count, created on first use. "spawn", not
+# fork: the server process runs TensorFlow and socket threads, which a
+# forked child must not inherit.
+_POOLS      = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def _pool(workers: int) -> ProcessPoolExecutor:
+    with _POOLS_LOCK:
+        pool = _POOLS.get(workers)
+        if pool is None:
+            pool = _POOLS[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+            )
+        return pool
+
+
+# ─── Sources ──────────────────────────────────────────────────────────────────
+
+def _skipped_name(name: str) -> bool:
+    base = os.path.basename(name.rstrip("/"))
+    return (name.endswith("/") or base.upper() == "DICOMDIR" or base.startswith(".")
+            or name.startswith("__MACOSX/"))
+
+
+def _raw_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> bytes:
+    """An entry's still-compressed bytes, read past its local file header."""
+    fp = archive.fp
+    fp.seek(info.header_offset)
+    header = fp.read(30)
+    if header[:4] != b"PK\x03\x04":
+        raise ValueError(f"Corrupt zip entry '{info.filename}'")
+    name_len, extra_len = struct.unpack("<HH", header[26:30])
+    fp.seek(info.header_offset + 30 + name_len + extra_len)
+    return fp.read(info.compress_size)
+
+
+def _inflate(name: str, payload: bytes, method: int, crc, size: int = None) -> bytes:
+    """
+    Undo _raw_member(): stored / deflated payload → entry bytes, CRC-checked.
+
+    The declared size comes from the (client-written) central directory,
+    so inflation is capped at SERIES_MAX_ENTRY_BYTES itself and the output
+    must match `size` — a forged header cannot expand into a zip bomb.
+    """
+    if method == zipfile.ZIP_DEFLATED:
+        data = zlib.decompressobj(-15).decompress(payload, SERIES_MAX_ENTRY_BYTES + 1)
+        if len(data) > SERIES_MAX_ENTRY_BYTES:
+            raise ValueError(
+                f"Zip entry '{name}' inflates past {SERIES_MAX_ENTRY_BYTES / 1e6:.0f} MB"
+            )
+    else:
+        data = payload
+    if size is not None and len(data) != size:
+        raise ValueError(f"Zip entry '{name}' does not match its declared size")
+    if crc is not None and zlib.crc32(data) != crc:
+        raise ValueError(f"Zip entry '{name}' failed its CRC check")
+    return data
+
+
+def zip_entries(stream) -> list:
+    """
+    (name, read, packed) per file in a zip upload, in archive order.
+    `read()` returns the entry's bytes, decompressed on demand from
+    `stream`; `packed()` returns (payload, method, crc, size) for a pool
+    worker to inflate itself, so decompression runs in parallel too
+    (stored and deflated entries — anything else is inflated here). Both
+    paths go through _inflate's output cap.
+
+    Raises:
+        ValueError : not a zip, too many entries, or an oversized entry
+    """
+    try:
+        archive = zipfile.ZipFile(stream)
+    except zipfile.BadZipFile:
+        raise ValueError("Series upload is not a valid zip file")
+
+    entries = []
+    for info in archive.infolist():
+        if info.is_dir() or _skipped_name(info.filename):
+            continue
+        if info.file_size > SERIES_MAX_ENTRY_BYTES:
+            raise ValueError(
+                f"Zip entry '{info.filename}' is {info.file_size / 1e6:.0f} MB "
+                f"(limit {SERIES_MAX_ENTRY_BYTES / 1e6:.0f} MB)"
+            )
+        if info.compress_type in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED) and not info.flag_bits & 0x1:
+            packed = lambda info=info: (_raw_member(archive, info), info.compress_type,   # noqa: E731
+                                        info.CRC, info.file_size)
+            read   = lambda info=info, packed=packed: _inflate(info.filename, *packed())  # noqa: E731
+        else:
+            read   = lambda info=info: archive.read(info)                       # noqa: E731
+            packed = lambda read=read: (read(), zipfile.ZIP_STORED, None, None) # noqa: E731
+        entries.append((info.filename, read, packed))
+    if len(entries) > SERIES_MAX_SLICES:
+        raise ValueError(f"Series has {len(entries)} files (limit {SERIES_MAX_SLICES})")
+    return entries
+
+
+def file_entries(files) -> list:
+    """(name, read, packed) per uploaded FileStorage of a multipart slice set."""
+    def read(fs):
+        fs.stream.seek(0)
+        return fs.stream.read()
+
+    entries = [(fs.filename or f"slice-{i}", lambda fs=fs: read(fs),
+                lambda fs=fs: (read(fs), zipfile.ZIP_STORED, None, None))
+               for i, fs in enumerate(files) if not _skipped_name(fs.filename or "")]
+    if len(entries) > SERIES_MAX_SLICES:
+        raise ValueError(f"Series has {len(entries)} files (limit {SERIES_MAX_SLICES})")
+    return entries
+
+
+# ─── Per-slice decode (runs in the pool) ──────────────────────────────────────
+
+def _slice_position(ds):
+    """Distance along the slice normal, or None without the geometry tags."""
+    position    = getattr(ds, "ImagePositionPatient", None)
+    orientation = getattr(ds, "ImageOrientationPatient", None)
+    if position is None or orientation is None or len(orientation) != 6:
+        return None
+    normal = np.cross(np.asarray(orientation[:3], float), np.asarray(orientation[3:], float))
+    return float(np.dot(normal, np.asarray(position, float)))
+
+
+def _windowed(ds, name: str) -> np.ndarray:
+    if dicom_frame_count(ds) > 1:
+        raise ValueError(f"'{name}' is multi-frame — send multi-frame DICOM to /predict-volume")
+    pixels = dicom_pixels(ds)
+    if int(getattr(ds, "SamplesPerPixel", 1)) == 3:
+        return _colour_to_uint8(pixels)
+    return window_to_uint8(ds, pixels, verbose=False)
+
+
+def slice_image(data: bytes, name: str = "slice") -> np.ndarray:
+    """One slice at full resolution → windowed uint8 (H, W), or (H, W, 3) for RGB."""
+    return _windowed(read_dicom(data), name)
+
+
+def decode_slice(name: str, data: bytes, size: int = CLASSIFICATION_SIZE):
+    """
+    Decode one slice to its sort keys + a size×size uint8 thumbnail.
+
+    Returns:
+        dict: name, position float|None, instance int|None, thumb — or
+              None when `data` is not a DICOM file
+    """
+    try:
+        ds = read_dicom(data)
+    except pydicom.errors.InvalidDicomError:
+        return None
+    image    = _windowed(ds, name)
+    h, w     = image.shape[:2]
+    interp   = cv2.INTER_AREA if h * w > size * size else cv2.INTER_LINEAR
+    instance = getattr(ds, "InstanceNumber", None)
+    return {
+        "name":     name,
+        "position": _slice_position(ds),
+        "instance": int(instance) if instance not in (None, "") else None,
+        "thumb":    cv2.resize(image, (size, size), interpolation=interp),
+    }
+
+
+def decode_packed(name: str, payload: bytes, method: int, crc, size: int = None):
+    """Pool entry point: inflate a packed entry, then decode_slice()."""
+    return decode_slice(name, _inflate(name, payload, method, crc, size))
+
+
+# ─── Ingestion ────────────────────────────────────────────────────────────────
+
+def _decode_all(entries: list, workers: int) -> list:
+    """decode_slice() over every entry; at most 2 × workers payloads in flight."""
+    if workers <= 1:
+        return [decode_slice(name, read()) for name, read, _ in entries]
+
+    pool, results, pending = _pool(workers), [], set()
+    for name, _, packed in entries:
+        if len(pending) >= 2 * workers:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            results.extend(f.result() for f in done)
+        pending.add(pool.submit(decode_packed, name, *packed()))
+    results.extend(f.result() for f in wait(pending).done)
+    return results
+
+
+def sort_slices(slices: list) -> tuple:
+    """
+    Slices in anatomical order.
+
+    Returns:
+        tuple: (sorted list, key used: "position" | "instance" | "name")
+    """
+    if all(s["position"] is not None for s in slices):
+        return sorted(slices, key=lambda s: (s["position"], s["instance"] or 0, s["name"])), "position"
+    if all(s["instance"] is not None for s in slices):
+        return sorted(slices, key=lambda s: (s["instance"], s["name"])), "instance"
+    return sorted(slices, key=lambda s: s["name"]), "name"
+
+
+def ingest_series(entries: list, workers: int = None) -> dict:
+    """
+    Decode and order a series.
+
+    Args:
+        entries : (name, read, packed) from zip_entries / file_entries
+        workers : decode processes (default: SERIES_WORKERS)
+
+    Returns:
+        dict: frames (F, 224, 224[, 3]) uint8 in slice order, names list
+              aligned with frames, readers {name: reader}, sorted_by,
+              skipped int (non-DICOM files), decode_ms
+
+    Raises:
+        ValueError : no DICOM slices, mixed grey / colour, or a bad slice
+    """
+    workers = SERIES_WORKERS if workers is None else workers
+    t0      = time.perf_counter()
+    decoded = _decode_all(entries, workers)
+    slices  = [s for s in decoded if s is not None]
+    if not slices:
+        raise ValueError("Series contains no DICOM slices")
+    if len({s["thumb"].ndim for s in slices}) > 1:
+        raise ValueError("Series mixes greyscale and colour slices")
+
+    slices, sorted_by = sort_slices(slices)
+    frames = np.empty((len(slices),) + slices[0]["thumb"].shape, dtype=np.uint8)
+    for i, s in enumerate(slices):
+        frames[i] = s["thumb"]
+    print(f"[Series] {len(slices)} slice(s) decoded with {max(1, workers)} worker(s), "
+          f"sorted by {sorted_by}; {len(decoded) - len(slices)} non-DICOM skipped")
+    return {
+        "frames":    frames,
+        "names":     [s["name"] for s in slices],
+        "readers":   {name: read for name, read, _ in entries},
+        "sorted_by": sorted_by,
+        "skipped":   len(decoded) - len(slices),
+        "decode_ms": round((time.perf_counter() - t0) * 1000, 1),
+    }
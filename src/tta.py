@@ -0,0 +1,126 @@
+"""
+src/tta.py
+──────────
+Test-time augmentation (TTA) for low-confidence /predict results.
+
+A single forward pass gives doctors one softmax and nothing else. When
+the top-class confidence falls below TTA_CONFIDENCE_THRESHOLD, the
+preprocessed tensor is re-run as a horizontal flip plus small shifts in
+all four directions — built into ONE batch and sent through the
+classifier in one batched call. The softmax is averaged over the views
+(the original pass included) and the per-class variance across views is
+reported as an uncertainty signal alongside top-1 agreement.
+
+Confident scans never reach this module, so the common path pays
+nothing; the extra cost on the uncertain ones is timed by app.py and
+returned in the response's "timings".
+
+Environment variables:
+    TTA_ENABLED              : "1" to run TTA on uncertain scans by default (default: "0";
+                               /predict's `tta` form field overrides per request)
+    TTA_CONFIDENCE_THRESHOLD : run TTA only below this top-class confidence  (default: 0.80)
+    TTA_SHIFT_PX             : translation of the shifted views, in pixels   (default: 8)
+"""
+
+import os
+
+import numpy as np
+
+# ─── Configuration ────────────────────────────────────────────────────────────
+
+TTA_ENABLED   = os.environ.get("TTA_ENABLED", "0") == "1"
+TTA_THRESHOLD = float(os.environ.get("TTA_CONFIDENCE_THRESHOLD", "0.80"))
+TTA_SHIFT_PX  = int(os.environ.get("TTA_SHIFT_PX", "8"))
+
+
+def tta_signature(threshold: float = None, shift: int = None) -> str:
+    """Identifies the TTA rule — part of the result-cache key when TTA is on."""
+    threshold = TTA_THRESHOLD if threshold is None else threshold
+    shift     = TTA_SHIFT_PX if shift is None else shift
+    return f"tta:t={threshold:g}:shift={shift}"
+
+
+def needs_tta(predictions: np.ndarray, threshold: float = None) -> bool:
+    """True when the single-pass top-class confidence is below the threshold."""
+    threshold = TTA_THRESHOLD if threshold is None else threshold
+    return float(np.max(predictions)) < threshold
+
+
+# ─── Views ────────────────────────────────────────────────────────────────────
+
+def augment_views(image: np.ndarray, shift: int = None, include_identity: bool = False) -> np.ndarray:
+    """
+    Build the TTA batch for one preprocessed image.
+
+    Views: [identity,] horizontal flip, then shifts of `shift` px right,
+    left, down and up. Shifted-in borders are zero — the black background
+    of a normalised MRI slice — rather than wrapped-around anatomy.
+
+    Args:
+        image : (1, H, W, C) or (H, W, C) float tensor from preprocess_classification
+
+    Returns:
+        np.ndarray: (V, H, W, C), same dtype as the input
+    """
+    shift = TTA_SHIFT_PX if shift is None else int(shift)
+    x     = image[0] if image.ndim == 4 else image
+    h, w  = x.shape[:2]
+    if not 0 < shift < min(h, w):
+        raise ValueError(f"TTA shift must be between 1 and {min(h, w) - 1} px, got {shift}")
+
+    n     = 6 if include_identity else 5
+    views = np.zeros((n,) + x.shape, dtype=x.dtype)
+    i     = 0
+    if include_identity:
+        views[i] = x
+        i += 1
+    views[i]                 = x[:, ::-1]          # horizontal flip
+    views[i + 1, :, shift:]  = x[:, :-shift]       # right
+    views[i + 2, :, :-shift] = x[:, shift:]        # left
+    views[i + 3, shift:]     = x[:-shift]          # down
+    views[i + 4, :-shift]    = x[shift:]           # up
+    return views
+
+
+def aggregate_views(probs: np.ndarray) -> tuple:
+    """
+    Returns:
+        tuple: (mean (C,) float32, variance (C,) float32) over the views
+    """
+    probs = np.asarray(probs, dtype=np.float32)
+    return probs.mean(axis=0), probs.var(axis=0)
+
+
+# ─── Entry point ──────────────────────────────────────────────────────────────
+
+def run_tta(predict, preprocessed: np.ndarray, base_predictions: np.ndarray = None,
+            shift: int = None) -> dict:
+    """
+    Run TTA for one image with a single batched call to `predict`.
+
+    Args:
+        predict          : batch → (N, C) softmax (the classifier micro-batcher)
+        preprocessed     : (1, H, W, C) tensor the single pass saw
+        base_predictions : (C,) softmax of that single pass from the same
+                           model — reused as the identity view instead of
+                           being recomputed; None adds identity to the batch
+
+    Returns:
+        dict: predictions (C,) mean softmax, tta_views int,
+              tta_variance (C,) float32, tta_agreement float — fraction of
+              views whose top class matches the aggregated one
+    """
+    reuse = base_predictions is not None
+    batch = augment_views(preprocessed, shift, include_identity=not reuse)
+    probs = np.asarray(predict(batch), dtype=np.float32)
+    if reuse:
+        probs = np.vstack([np.asarray(base_predictions, dtype=np.float32)[None], probs])
+
+    mean, variance = aggregate_views(probs)
+    agreement      = float(np.mean(np.argmax(probs, axis=1) == int(np.argmax(mean))))
+    return {
+        "predictions":   mean,
+        "tta_views":     int(len(probs)),
+        "tta_variance":  variance,
+        "tta_agreement": agreement,
+    }
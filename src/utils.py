@@ -1,7 +1,11 @@
 
+import os
+import threading
+import time
+
+import numpy as np
 import tensorflow as tf
 from tensorflow.keras.models import load_model  # Import the function directly
-import os
 from keras import backend as K
 from keras.utils import register_keras_serializable
 
@@ -19,37 +23,150 @@ def dice_loss(y_true, y_pred, smooth=1e-6, weight_bg=0.2, weight_fg=0.8):
 
         return 1 - dice
 
-def load_local_model(model_path,custom_loss=False):
+# ─── Model registry ───────────────────────────────────────────────────────────
+#
+# Every caller of load_local_model shares one process-wide registry, so a
+# model file is deserialised once and then served from memory to every
+# thread. Entries are keyed on (absolute path, custom_loss) and stamped with
+# the file's size + mtime; if the artifact on disk changes, the next call
+# reloads it. Loads of the same key are serialised, different keys load in
+# parallel.
+
+_registry       = {}        # key → _RegistryEntry
+_registry_lock  = threading.Lock()
+_load_locks     = {}        # key → threading.Lock
+
+
+class _RegistryEntry:
+    __slots__ = ("model", "path", "fingerprint", "loaded_at", "load_ms",
+                 "weights_bytes", "rss_delta_bytes", "params", "hits")
+
+    def __init__(self, model, path, fingerprint, load_ms, rss_delta_bytes):
+        self.model           = model
+        self.path            = path
+        self.fingerprint     = fingerprint
+        self.loaded_at       = time.time()
+        self.load_ms         = load_ms
+        self.params          = int(model.count_params()) if hasattr(model, "count_params") else None
+        self.weights_bytes   = _weights_bytes(model)
+        self.rss_delta_bytes = rss_delta_bytes
+        self.hits            = 0
+
+
+def load_local_model(model_path, custom_loss=False):
     """
-    Load a model from the local directory and return the model object.
+    Return the model at model_path, loading it at most once per process.
+
+    The loaded model is cached in a thread-safe registry and shared by every
+    caller; it is reloaded automatically when the file's size or mtime
+    changes (e.g. a retrained model is copied over it).
 
     Args:
-        model_file_name (str): The name of the model file to load (e.g., 'ResNet50V2.keras').
-        local_model_dir (str): Local directory where the model is stored.
+        model_path (str): Path to the .keras file (e.g., 'models/ResNet50V2.keras').
+        custom_loss (bool): Register dice_loss while deserialising (segmentation model).
 
     Returns:
         model: The loaded model object.
-    
+
     Raises:
         FileNotFoundError: If the model file does not exist at the specified path.
     """
-    # Create the full local path for the model
-    local_model_path = model_path
-    print(f'Loading model from: {local_model_path}')  # Debug print
-    
-    
-    
-    if(custom_loss==True):
-        print(f' {local_model_path}  with custom loss loaded successfully')
-        # For segmentation model, pass the custom_objects parameter
-
-
-        return  load_model(local_model_path, custom_objects={'dice_loss': dice_loss})
-        
-    else:
-        # Check if the model file exists
-        if os.path.exists(local_model_path):
-            print(f' {local_model_path} loaded successfully')
-            return load_model(local_model_path)  # Load and return the model object
+    key = (os.path.abspath(model_path), bool(custom_loss))
+
+    try:
+        fingerprint = _fingerprint(key[0])
+    except FileNotFoundError:
+        with _registry_lock:
+            entry = _registry.get(key)
+        if entry is None:
+            raise FileNotFoundError(f'{model_path} not found.')
+        # Artifact briefly missing mid-deploy — keep serving what we have.
+        print(f'[Registry] ⚠ {model_path} missing on disk — serving cached copy')
+        return entry.model
+
+    with _registry_lock:
+        entry = _registry.get(key)
+        if entry is not None and entry.fingerprint == fingerprint:
+            entry.hits += 1
+            return entry.model
+        load_lock = _load_locks.setdefault(key, threading.Lock())
+
+    with load_lock:
+        # Another thread may have finished the same load while we waited.
+        with _registry_lock:
+            entry = _registry.get(key)
+            if entry is not None and entry.fingerprint == fingerprint:
+                entry.hits += 1
+                return entry.model
+
+        action = 'Reloading changed' if entry is not None else 'Loading'
+        print(f'[Registry] {action} model from: {model_path}')
+        rss0 = _rss_bytes()
+        t0   = time.time()
+        if custom_loss:
+            model = load_model(key[0], custom_objects={'dice_loss': dice_loss})
         else:
-            raise FileNotFoundError(f'{local_model_path} not found.')
+            model = load_model(key[0])
+        load_ms = round((time.time() - t0) * 1000, 1)
+        rss1    = _rss_bytes()
+
+        new_entry = _RegistryEntry(
+            model, model_path, fingerprint, load_ms,
+            rss_delta_bytes=(rss1 - rss0) if rss0 is not None and rss1 is not None else None,
+        )
+        with _registry_lock:
+            _registry[key] = new_entry
+        print(f'[Registry] ✓ {model_path} loaded in {load_ms:.0f} ms '
+              f'({new_entry.weights_bytes / 1024 ** 2:.1f} MB weights)')
+        return model
+
+
+def model_registry_stats():
+    """Per-model memory + load report for every model held by the registry."""
+    with _registry_lock:
+        entries = list(_registry.items())
+    report = {}
+    for (path, custom_loss), e in entries:
+        report[e.path] = {
+            'custom_loss':     custom_loss,
+            'params':          e.params,
+            'weights_bytes':   e.weights_bytes,
+            'rss_delta_bytes': e.rss_delta_bytes,
+            'load_ms':         e.load_ms,
+            'loaded_at':       e.loaded_at,
+            'hits':            e.hits,
+            'file_size':       e.fingerprint[0],
+        }
+    return report
+
+
+def clear_model_registry():
+    """Drop every cached model (tests, or freeing memory after a batch job)."""
+    with _registry_lock:
+        _registry.clear()
+        _load_locks.clear()
+
+
+def _fingerprint(path):
+    st = os.stat(path)
+    return (st.st_size, st.st_mtime_ns)
+
+
+def _weights_bytes(model):
+    total = 0
+    for w in getattr(model, 'weights', []):
+        try:
+            dtype  = getattr(w.dtype, 'name', w.dtype)     # tf.DType or Keras 3 str
+            total += int(np.prod(w.shape)) * np.dtype(dtype).itemsize
+        except TypeError:
+            continue
+    return total
+
+
+def _rss_bytes():
+    """Resident set size from /proc (Linux); None where unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
@@ -0,0 +1,237 @@
+"""
+src/volume.py
+─────────────
+Study-level inference over multi-frame DICOM volumes (NeuroDL v2.1).
+
+/predict classifies one 2-D image — for a multi-frame DICOM, the middle
+frame — so a tumour off the central slice is invisible. /predict-volume
+windows every frame in one vectorised pass (src.preprocess.window_to_uint8)
+and classifies the slices in batches through the classifier micro-batcher:
+
+  1. Coarse pass   — evenly spaced slices across the whole volume
+  2. Refine pass   — neighbours of the most suspicious slices so far,
+                     nearest first, until every slice is done or the
+                     slice / time budget runs out
+
+Small volumes simply get every slice; large ones stay inside
+VOLUME_MAX_SLICES and VOLUME_BUDGET_MS (checked before each batch,
+using the measured per-slice cost).
+
+A slice's suspicion is 1 − P(No Tumor). The study prediction is the
+suspicion-weighted mean softmax of the VOLUME_TOP_K most suspicious
+slices, so one clear tumour slice is not averaged away by dozens of
+healthy ones; Grad-CAM is then rendered only for those top-k slices.
+
+Environment variables:
+    VOLUME_BATCH_SIZE   : slices per classifier call      (default: INFERENCE_MAX_BATCH_SIZE)
+    VOLUME_MAX_SLICES   : max slices classified per study (default: 96)
+    VOLUME_BUDGET_MS    : time budget for slice classification, ms (default: 5000)
+    VOLUME_TOP_K        : slices in the study aggregate and given Grad-CAM (default: 3)
+    VOLUME_PIXEL_BUDGET : max Rows × Columns × frames a volume may decode
+                          (default: 160000000 — ~600 frames of 512²); each
+                          frame must also fit DECODE_PIXEL_BUDGET
+"""
+
+import os
+import time
+
+import cv2
+import numpy as np
+import pydicom
+
+from src.batching import MAX_BATCH_SIZE
+from src.preprocess import (
+    CLASSIFICATION_SIZE, DECODE_PIXEL_BUDGET, _colour_to_uint8, _dicom_source,
+    dicom_frame_count, dicom_pixels, preprocess_batch, read_dicom, window_to_uint8,
+)
+
+# ─── Configuration ────────────────────────────────────────────────────────────
+
+VOLUME_BATCH_SIZE = int(os.environ.get("VOLUME_BATCH_SIZE", MAX_BATCH_SIZE))
+VOLUME_MAX_SLICES = int(os.environ.get("VOLUME_MAX_SLICES", 96))
+VOLUME_BUDGET_MS  = float(os.environ.get("VOLUME_BUDGET_MS", 5000))
+VOLUME_TOP_K      = int(os.environ.get("VOLUME_TOP_K", 3))
+
+# DECODE_PIXEL_BUDGET is sized for one image; a whole study gets its own
+VOLUME_PIXEL_BUDGET = int(os.environ.get("VOLUME_PIXEL_BUDGET", "160000000"))
+
+NO_TUMOUR_CLASS = 2     # CLASS_NAMES index of "No Tumor"
+
+
+def suspicion(probs: np.ndarray) -> np.ndarray:
+    """1 − P(No Tumor) per slice."""
+    return 1.0 - np.asarray(probs, dtype=np.float32)[..., NO_TUMOUR_CLASS]
+
+
+# ─── Loading ──────────────────────────────────────────────────────────────────
+
+def load_volume(file_storage) -> np.ndarray:
+    """
+    Every frame of a DICOM upload, windowed in one vectorised pass.
+
+    Grey frames stay single-channel — preprocess_batch broadcasts them to
+    RGB while normalising, so the volume is never tripled in memory.
+
+    Returns:
+        np.ndarray: (F, H, W) uint8, or (F, H, W, 3) for RGB DICOMs
+
+    Raises:
+        ValueError : not a DICOM upload, no image, over VOLUME_PIXEL_BUDGET,
+                     or a single frame over DECODE_PIXEL_BUDGET
+    """
+    if not (file_storage.filename or "").lower().endswith(".dcm"):
+        raise ValueError("Volume analysis needs a DICOM (.dcm) file")
+    try:
+        ds = read_dicom(_dicom_source(file_storage), budget=VOLUME_PIXEL_BUDGET)
+    except pydicom.errors.InvalidDicomError:
+        raise ValueError(f"'{file_storage.filename}' is not a valid DICOM file.")
+    if int(ds.Rows) * int(ds.Columns) > DECODE_PIXEL_BUDGET:
+        raise ValueError(
+            f"DICOM frame too large: {ds.Rows}×{ds.Columns} "
+            f"(limit {DECODE_PIXEL_BUDGET / 1e6:.0f} MP per frame)"
+        )
+
+    frames = dicom_frame_count(ds)
+    pixels = dicom_pixels(ds)
+    colour = int(getattr(ds, "SamplesPerPixel", 1)) == 3
+    if pixels.ndim == (3 if colour else 2):
+        pixels = pixels[None]                               # single frame → (1, …)
+    print(f"[Volume] {frames} frame(s), stored {pixels.shape} {pixels.dtype}")
+    return _colour_to_uint8(pixels) if colour else window_to_uint8(ds, pixels)
+
+
+def slice_rgb(frame: np.ndarray) -> np.ndarray:
+    """One windowed slice as (H, W, 3) uint8 — the Grad-CAM background."""
+    return cv2.cvtColor(frame, cv2.COLOR_GRAY2RGB) if frame.ndim == 2 else frame
+
+
+# ─── Sampling ─────────────────────────────────────────────────────────────────
+
+def coarse_indices(n_slices: int, count: int) -> np.ndarray:
+    """`count` evenly spaced slice indices covering the whole volume."""
+    count = max(1, min(n_slices, count))
+    return np.unique(np.linspace(0, n_slices - 1, count).round().astype(int))
+
+
+def refine_indices(n_slices: int, done: dict, limit: int) -> list:
+    """
+    Up to `limit` unclassified slices to classify next.
+
+    Each unclassified slice inherits the suspicion of the more suspicious
+    of its two nearest classified neighbours; the highest score wins,
+    then the closest to that neighbour, then the lower index — so the
+    budget is spent filling in around suspicious slices first.
+    """
+    known = np.array(sorted(done), dtype=int)
+    todo  = np.setdiff1d(np.arange(n_slices), known)
+    if not todo.size or not limit:
+        return []
+    score = suspicion(np.stack([done[i] for i in known]))
+
+    pos   = np.searchsorted(known, todo)
+    left  = np.clip(pos - 1, 0, len(known) - 1)
+    right = np.clip(pos, 0, len(known) - 1)
+    s_l   = np.where(pos > 0, score[left], -1.0)
+    s_r   = np.where(pos < len(known), score[right], -1.0)
+    use_l = s_l >= s_r
+    best  = np.where(use_l, s_l, s_r)
+    dist  = np.abs(todo - np.where(use_l, known[left], known[right]))
+
+    order = np.lexsort((todo, dist, -best))[:limit]
+    return todo[order].tolist()
+
+
+def classify_volume(frames: np.ndarray, predict, batch_size: int = None,
+                    max_slices: int = None, budget_ms: float = None) -> dict:
+    """
+    Classify a windowed volume slice by slice, adaptively.
+
+    Args:
+        frames     : (F, H, W) or (F, H, W, 3) uint8 windowed slices
+        predict    : batch (N, 224, 224, 3) → (N, C) softmax (the micro-batcher)
+        batch_size : slices per predict call   (default: VOLUME_BATCH_SIZE)
+        max_slices : slice budget              (default: VOLUME_MAX_SLICES)
+        budget_ms  : classification time budget (default: VOLUME_BUDGET_MS)
+
+    Returns:
+        dict: indices (S,) int sorted, probs (S, C) float32 in that order,
+              n_slices, coarse int, refined int, complete bool,
+              stopped_by "complete" | "slices" | "time", elapsed_ms
+    """
+    batch_size = VOLUME_BATCH_SIZE if batch_size is None else batch_size
+    max_slices = VOLUME_MAX_SLICES if max_slices is None else max_slices
+    budget_s   = (VOLUME_BUDGET_MS if budget_ms is None else budget_ms) / 1000.0
+    n_slices   = len(frames)
+    limit      = max(1, min(n_slices, max_slices))
+
+    t0         = time.perf_counter()
+    done       = {}
+    per_slice  = None
+    stopped_by = "complete"
+    buf        = np.empty((batch_size, CLASSIFICATION_SIZE, CLASSIFICATION_SIZE, 3), np.float32)
+
+    def run(indices) -> bool:
+        """Classify `indices` batch by batch; False once the time budget is spent."""
+        nonlocal per_slice
+        for start in range(0, len(indices), batch_size):
+            chunk = indices[start:start + batch_size]
+            if done and per_slice is not None and \
+                    time.perf_counter() - t0 + per_slice * len(chunk) > budget_s:
+                return False
+            batch = preprocess_batch([frames[i] for i in chunk], out=buf[:len(chunk)])
+            probs = np.asarray(predict(batch), dtype=np.float32)
+            for i, p in zip(chunk, probs):
+                done[int(i)] = p
+            per_slice = (time.perf_counter() - t0) / len(done)
+        return True
+
+    # Coarse pass: the whole volume if it fits, else half the slice budget
+    coarse = coarse_indices(n_slices, limit if n_slices <= limit else max(1, limit // 2))
+    if not run(list(coarse)):
+        stopped_by = "time"
+
+    # Refine pass around the suspicious slices
+    while stopped_by == "complete" and len(done) < n_slices:
+        if len(done) >= limit:
+            stopped_by = "slices"
+            break
+        nxt = refine_indices(n_slices, done, min(batch_size, limit - len(done)))
+        if not nxt:
+            break
+        if not run(nxt):
+            stopped_by = "time"
+
+    indices = np.array(sorted(done), dtype=int)
+    return {
+        "indices":    indices,
+        "probs":      np.stack([done[i] for i in indices]),
+        "n_slices":   n_slices,
+        "coarse":     int(len(coarse)),
+        "refined":    int(len(done) - min(len(done), len(coarse))),
+        "complete":   len(done) == n_slices,
+        "stopped_by": "complete" if len(done) == n_slices else stopped_by,
+        "elapsed_ms": round((time.perf_counter() - t0) * 1000, 1),
+    }
+
+
+# ─── Aggregation ──────────────────────────────────────────────────────────────
+
+def aggregate_study(indices: np.ndarray, probs: np.ndarray, top_k: int = None) -> dict:
+    """
+    Study-level softmax: the top-k most suspicious slices, averaged with
+    their suspicion as weights — healthy slices that only make the top-k
+    because the volume is small barely dilute a clear finding.
+
+    Returns:
+        dict: probs (C,) float32, top_slices list[int] (most suspicious
+              first), suspicion (S,) float32 aligned with `indices`
+    """
+    top_k   = VOLUME_TOP_K if top_k is None else top_k
+    score   = suspicion(probs)
+    top     = np.argsort(-score, kind="stable")[:max(1, top_k)]
+    weights = score[top] if score[top].sum() > 1e-6 else np.ones(len(top), np.float32)
+    return {
+        "probs":      np.average(probs[top], axis=0, weights=weights).astype(np.float32),
+        "top_slices": [int(indices[i]) for i in top],
+        "suspicion":  score,
+    }
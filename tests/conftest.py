@@ -16,4 +16,6 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # but setting them here ensures no accidental production DB writes.
 os.environ.setdefault("DATABASE_URL", "sqlite:///test_neurodl.db")
 os.environ.setdefault("SECRET_KEY",   "test-secret-not-for-production")
-os.environ.setdefault("FLASK_ENV",    "testing")
\ No newline at end of file
+os.environ.setdefault("FLASK_ENV",    "testing")
+os.environ.setdefault("RESULT_CACHE_DIR", "")   # memory tier only — no cache files in the repo
+os.environ.setdefault("EAGER_MODEL_LOAD", "0")  # fixtures patch the loader after import
@@ -11,6 +11,7 @@ The model is MOCKED — tests run without GPU or model files.
 Database uses a temporary SQLite file, created fresh each session.
 """
 
+import base64
 import io
 import os
 import sys
@@ -49,8 +50,9 @@ def app_client(tmp_path_factory):
     mock_model.__call__ = mock.MagicMock(return_value=fake_preds)
 
     with mock.patch("app.load_local_model",            return_value=mock_model), \
-         mock.patch("app.generate_gradcam",             return_value=dummy_b64),  \
-         mock.patch("app.get_gradcam_heatmap",          return_value=np.zeros((7,7))), \
+         mock.patch("app.classify_with_gradcam",        return_value={
+             "predictions": fake_preds, "class_idx": 0,
+             "heatmap": np.zeros((7,7)), "overlay": base64.b64decode(dummy_b64)}), \
          mock.patch("app.gradcam_pseudo_segmentation",  return_value=dummy_b64),  \
          mock.patch("app.generate_report",              return_value="FINDINGS: Test report."):
 
@@ -133,6 +135,99 @@ class TestHealthCheck:
         assert "accuracy"      in data
 
 
+# ─── Readiness ────────────────────────────────────────────────────
+
+class TestReady:
+    def test_not_ready_returns_503(self, app_client, monkeypatch):
+        import app as flask_app
+        monkeypatch.setitem(flask_app.readiness, "ready", False)
+        res = app_client.get("/ready")
+        assert res.status_code == 503
+        assert res.get_json()["ready"] is False
+
+    def test_ready_after_load_reports_timings(self, app_client):
+        import app as flask_app
+        flask_app.load_models()        # loader + Grad-CAM are patched in app_client
+
+        res = app_client.get("/ready")
+        assert res.status_code == 200
+        data  = res.get_json()
+        model = data["models"]["classification"]
+        assert data["status"] == "ready"
+        assert model["load_ms"]   >= 0
+        assert model["warmup_ms"] >= 0
+        assert data["db_ms"]      >= 0
+
+    def test_health_check_is_separate(self, app_client):
+        assert app_client.get("/").get_json()["status"] == "online"
+
+
+# ─── Inference Metrics ────────────────────────────────────────────
+
+class TestInferenceMetrics:
+    def test_metrics_is_public(self, app_client):
+        assert app_client.get("/metrics/inference").status_code == 200
+
+    def test_metrics_structure(self, app_client):
+        stats = app_client.get("/metrics/inference").get_json()["classification"]
+        assert "queue_depth"          in stats
+        assert "batch_size_histogram" in stats
+        assert "queue_depth_histogram" in stats
+        assert "max_batch_size"       in stats
+
+
+# ─── Result-cache versioning ──────────────────────────────────────
+
+class TestModelVersion:
+    def test_backend_variant_changes_cache_key(self, app_client, tmp_path, monkeypatch):
+        from types import SimpleNamespace
+        import app as flask_app
+        from src.result_cache import content_key
+
+        monkeypatch.delenv("MODEL_VERSION", raising=False)
+        keras_path = tmp_path / "ResNet50V2.h5"
+        keras_path.write_bytes(b"weights")
+        for variant, size in (("float16", 10), ("int8", 20)):
+            (tmp_path / f"ResNet50V2_{variant}.tflite").write_bytes(b"\0" * size)
+
+        def version(kind, artifact):
+            backend = SimpleNamespace(name=kind, path=str(tmp_path / artifact))
+            return flask_app._model_version(str(keras_path), backend)
+
+        versions = {
+            version("keras",  "ResNet50V2.h5"),
+            version("tflite", "ResNet50V2_float16.tflite"),
+            version("tflite", "ResNet50V2_int8.tflite"),
+        }
+        assert len(versions) == 3
+        image = np.zeros((4, 4, 3), dtype=np.uint8)
+        assert len({content_key(image, v) for v in versions}) == 3
+
+        # An explicit MODEL_VERSION still keeps variants apart
+        monkeypatch.setenv("MODEL_VERSION", "2026.10")
+        assert (version("tflite", "ResNet50V2_float16.tflite")
+                != version("tflite", "ResNet50V2_int8.tflite"))
+
+
+class TestModelAccuracy:
+    def test_accuracy_follows_the_deciding_model(self, app_client):
+        import app as flask_app
+        from src.report import _build_prompt
+
+        preds = np.array([0.1, 0.1, 0.7, 0.1], dtype=np.float32)
+        small = flask_app._classification_response(preds, None, False, model_used="Custom CNN")
+        large = flask_app._classification_response(preds, None, False)
+        assert small["model_accuracy"] == flask_app.MODEL_ACCURACY["Custom CNN"]
+        assert large["model_accuracy"] == "94.92%"
+        assert small["model_accuracy"] != large["model_accuracy"]
+
+        prompt = _build_prompt("No Tumor", 0.7, False, False,
+                               model_accuracy=small["model_accuracy"],
+                               model_name=small["model_used"])
+        assert f"Custom CNN ({small['model_accuracy']} accuracy)" in prompt
+        assert "ResNet50V2" not in prompt
+
+
 # ─── Auth: Register ───────────────────────────────────────────────
 
 class TestRegister:
@@ -318,6 +413,308 @@ class TestPredict:
         total = sum(body["class_probabilities"].values())
         assert abs(total - 1.0) < 0.01, f"Probs sum to {total}, expected ~1.0"
 
+    def test_predict_cascade_reports_model_used(self, app_client, auth_headers,
+                                                sample_image, monkeypatch):
+        import app as flask_app
+        from src.cascade import Cascade
+
+        confident = np.array([[0.01, 0.01, 0.97, 0.01]], dtype=np.float32)
+        monkeypatch.setattr(flask_app, "cascade", Cascade(
+            small_predict = lambda batch: confident,
+            large_predict = flask_app.classification_engine.predict,
+            threshold     = 0.9,
+        ))
+        res = app_client.post("/predict",
+            data={"image": (io.BytesIO(sample_image), "scan.jpg", "image/jpeg")},
+            content_type="multipart/form-data",
+            headers=auth_headers,
+        )
+        assert res.status_code == 200
+        data = res.get_json()
+        assert data["model_used"] == "Custom CNN"
+        assert data["class_name"] == "No Tumor"
+        assert data["cached"] is False       # the cascade rule is part of the cache key
+
+    def test_predict_cascade_tta_credits_resnet(self, app_client, auth_headers,
+                                               sample_image, monkeypatch):
+        import app as flask_app
+        from src.cascade import Cascade
+
+        unsure = np.array([[0.05, 0.05, 0.7, 0.2]], dtype=np.float32)
+        monkeypatch.setattr(flask_app.classification_model, "predict",
+                            lambda batch, verbose=0: np.tile(unsure, (len(batch), 1)))
+        monkeypatch.setattr(flask_app, "cascade", Cascade(
+            small_predict = lambda batch: unsure,
+            large_predict = flask_app.classification_engine.predict,
+            threshold     = 0.5,             # the Custom CNN accepts its 70% answer
+        ))
+        res = app_client.post("/predict",
+            data={"image": (io.BytesIO(sample_image), "scan.jpg", "image/jpeg"), "tta": "1"},
+            content_type="multipart/form-data",
+            headers=auth_headers,
+        )
+        assert res.status_code == 200
+        data = res.get_json()
+        assert data["uncertainty"]["method"] == "tta"    # 70% is below the TTA threshold
+        assert data["model_used"]     == "ResNet50V2"
+        assert data["model_accuracy"] == flask_app.MODEL_ACCURACY["ResNet50V2"]
+
+    def test_predict_reports_timings_without_tta(self, app_client, auth_headers, sample_image):
+        res = app_client.post("/predict",
+            data={"image": (io.BytesIO(sample_image), "scan.jpg", "image/jpeg")},
+            content_type="multipart/form-data",
+            headers=auth_headers,
+        )
+        data = res.get_json()
+        assert data["uncertainty"] is None
+        assert "total_ms" in data["timings"]
+
+    def test_predict_tta_on_low_confidence(self, app_client, auth_headers,
+                                           sample_image, monkeypatch):
+        import app as flask_app
+
+        batch_sizes = []
+
+        def unsure(batch, verbose=0):
+            batch_sizes.append(len(batch))
+            return np.tile(np.array([[0.55, 0.15, 0.15, 0.15]], dtype=np.float32), (len(batch), 1))
+
+        monkeypatch.setattr(flask_app.classification_model, "predict", unsure)
+        res = app_client.post("/predict",
+            data={"image": (io.BytesIO(sample_image), "scan.jpg", "image/jpeg"), "tta": "1"},
+            content_type="multipart/form-data",
+            headers=auth_headers,
+        )
+        assert res.status_code == 200
+        data = res.get_json()
+        assert batch_sizes == [1, 5]           # single pass, then ONE augmented batch
+        assert data["uncertainty"]["method"]    == "tta"
+        assert data["uncertainty"]["views"]     == 6
+        assert data["uncertainty"]["agreement"] == 1.0
+        assert data["timings"]["tta_ms"] >= 0
+        assert data["cached"] is False          # TTA is part of the cache key
+
+    def test_predict_mc_dropout_stored_on_scan(self, app_client, auth_headers,
+                                               sample_image, monkeypatch):
+        import app as flask_app
+        import tensorflow as tf
+
+        layers = tf.keras.layers
+        model  = tf.keras.Sequential([
+            tf.keras.Input(shape=(224, 224, 3)),
+            layers.GlobalAveragePooling2D(),
+            layers.Dense(8, activation="relu"),
+            layers.Dropout(0.5),
+            layers.Dense(4, activation="softmax"),
+        ])
+        monkeypatch.setattr(flask_app, "classification_model", model)
+        res = app_client.post("/predict",
+            data={"image": (io.BytesIO(sample_image), "scan.jpg", "image/jpeg"),
+                  "mc_dropout": "1"},
+            content_type="multipart/form-data",
+            headers=auth_headers,
+        )
+        assert res.status_code == 200
+        data = res.get_json()
+        assert data["mc_dropout"]["samples"] == flask_app.MC_DROPOUT_SAMPLES
+        assert data["mc_dropout"]["predictive_entropy"] >= 0
+        assert "mc_dropout_ms" in data["timings"]
+
+        scan = app_client.get(f"/history/{data['scan_id']}", headers=auth_headers).get_json()
+        assert scan["predictive_entropy"] == pytest.approx(data["mc_dropout"]["predictive_entropy"], abs=1e-4)
+        assert scan["mutual_information"] is not None
+
+    def test_predict_volume_multi_frame_dicom(self, app_client, auth_headers, monkeypatch):
+        import app as flask_app
+        from tests.test_dicom import make_dicom
+
+        pytest.importorskip("pydicom")
+        volume = np.full((12, 32, 32), -1000, dtype=np.int16)
+        volume[9] = 200                                 # one bright (suspicious) slice
+
+        batch_sizes = []
+
+        def by_brightness(batch, verbose=0):
+            batch_sizes.append(len(batch))
+            tumour = batch.mean(axis=(1, 2, 3))
+            return np.stack([0.05 + 0.9 * tumour, np.full_like(tumour, 0.0),
+                             0.95 - 0.9 * tumour, np.full_like(tumour, 0.0)], axis=1)
+
+        monkeypatch.setattr(flask_app.classification_model, "predict", by_brightness)
+        res = app_client.post("/predict-volume",
+            data={"image": (io.BytesIO(make_dicom(volume)), "study.dcm", "application/dicom")},
+            content_type="multipart/form-data",
+            headers=auth_headers,
+        )
+        assert res.status_code == 200
+        data = res.get_json()
+        assert data["volume"]["frames"] == 12 and data["volume"]["complete"]
+        assert len(data["slices"]) == 12
+        assert max(batch_sizes) > 1                     # slices classified in batches
+        assert data["class_name"] == "Glioma Tumor"
+        assert data["top_slices"][0]["index"] == 9
+        assert data["gradcam_performed"] is True
+        assert data["scan_id"] is not None
+
+    def test_predict_series_zip_and_multipart(self, app_client, auth_headers, monkeypatch):
+        import app as flask_app
+        from tests.test_series import make_slice, make_zip
+
+        pytest.importorskip("pydicom")
+        monkeypatch.setattr("src.series.SERIES_WORKERS", 0)
+        monkeypatch.setattr(flask_app.classification_model, "predict", lambda batch, verbose=0: np.stack([
+            0.05 + 0.9 * batch.mean(axis=(1, 2, 3)), np.zeros(len(batch)),
+            0.95 - 0.9 * batch.mean(axis=(1, 2, 3)), np.zeros(len(batch))], axis=1))
+        files = {f"s{i}.dcm": make_slice(200 if i == 6 else -1000, instance=i) for i in (7, 2, 6, 0, 5, 1, 4, 3)}
+
+        res = app_client.post("/predict-series",
+            data={"series": (make_zip(files), "study.zip", "application/zip")},
+            content_type="multipart/form-data",
+            headers=auth_headers,
+        )
+        assert res.status_code == 200
+        data = res.get_json()
+        assert data["volume"]["frames"] == 8 and data["volume"]["sorted_by"] == "instance"
+        assert [s["file"] for s in data["slices"]] == [f"s{i}.dcm" for i in range(8)]
+        assert data["top_slices"][0]["index"] == 6
+        assert data["class_name"] == "Glioma Tumor" and data["gradcam_performed"] is True
+
+        res = app_client.post("/predict-series",
+            data={"slices": [(io.BytesIO(d), n, "application/dicom") for n, d in files.items()]},
+            content_type="multipart/form-data",
+            headers=auth_headers,
+        )
+        assert res.status_code == 200
+        assert res.get_json()["top_slices"][0]["index"] == 6
+
+    def test_predict_series_requires_an_upload(self, app_client, auth_headers):
+        res = app_client.post("/predict-series", data={}, headers=auth_headers)
+        assert res.status_code == 400
+
+    def test_predict_volume_rejects_non_dicom(self, app_client, auth_headers, sample_image):
+        res = app_client.post("/predict-volume",
+            data={"image": (io.BytesIO(sample_image), "scan.jpg", "image/jpeg")},
+            content_type="multipart/form-data",
+            headers=auth_headers,
+        )
+        assert res.status_code == 400
+
+    def test_predict_repeat_upload_is_cached(self, app_client, auth_headers, sample_image):
+        def upload():
+            return app_client.post("/predict",
+                data={"image": (io.BytesIO(sample_image), "scan.jpg", "image/jpeg")},
+                content_type="multipart/form-data",
+                headers=auth_headers,
+            ).get_json()
+        first, second = upload(), upload()
+        assert second["cached"] is True
+        assert second["class_probabilities"] == first["class_probabilities"]
+        assert second["scan_id"] != first["scan_id"]
+
+    def _upload(self, app_client, auth_headers, sample_image, **fields):
+        return app_client.post("/predict",
+            data={"image": (io.BytesIO(sample_image), "scan.jpg", "image/jpeg"), **fields},
+            content_type="multipart/form-data",
+            headers=auth_headers,
+        ).get_json()
+
+    def test_predict_returns_overlay_urls(self, app_client, auth_headers, sample_image):
+        import app as flask_app
+        body = self._upload(app_client, auth_headers, sample_image)
+        assert "gradcam_image" not in body                      # base64 is opt-in
+        assert body["gradcam_image_url"] == f"/scans/{body['scan_id']}/image/gradcam"
+        assert body["gradcam_image_type"] == "image/png"
+        # The mocked overlay's bytes, served back as stored and cacheable
+        res = app_client.get(body["gradcam_image_url"], headers=auth_headers)
+        assert res.status_code == 200 and res.mimetype == "image/png"
+        assert res.data == flask_app.classify_with_gradcam.return_value["overlay"]
+        assert "max-age" in res.headers["Cache-Control"]
+
+    def test_predict_base64_is_opt_in(self, app_client, auth_headers, sample_image):
+        import app as flask_app
+        body = self._upload(app_client, auth_headers, sample_image, images="base64")
+        png  = flask_app.classify_with_gradcam.return_value["overlay"]
+        assert base64.b64decode(body["gradcam_image"]) == png   # encoded once, base64'd once
+        assert body["gradcam_image_url"].startswith("/scans/")
+
+    def test_unsaved_overlay_served_as_artifact(self, app_client, auth_headers, sample_image, monkeypatch):
+        import app as flask_app
+
+        def db_down(**kwargs):
+            raise RuntimeError("database unavailable")
+
+        monkeypatch.setattr(flask_app, "save_scan", db_down)
+        body = self._upload(app_client, auth_headers, sample_image)
+        assert body["scan_id"] is None
+        assert body["gradcam_image_url"].startswith("/artifacts/")
+        res = app_client.get(body["gradcam_image_url"], headers=auth_headers)
+        assert res.status_code == 200 and res.mimetype == "image/png"
+        assert app_client.get(body["gradcam_image_url"]).status_code == 401
+        assert app_client.get("/artifacts/unknown", headers=auth_headers).status_code == 404
+
+    def test_gradcam_rerendered_for_any_class(self, app_client, auth_headers, sample_image, monkeypatch):
+        import cv2
+        import app as flask_app
+        from src.database import get_scan_gradcam_maps
+        from src.encoding import decode_image
+        from src.image_storage import read_image_bytes
+
+        # A scan the result cache has not seen, and a fused pass that returns all maps
+        rng      = np.random.default_rng(7)
+        scan     = cv2.imencode(".jpg", rng.integers(0, 255, (32, 32, 3), dtype=np.uint8))[1].tobytes()
+        heatmaps = rng.random((4, 7, 7)).astype(np.float32)
+        monkeypatch.setattr(flask_app.classify_with_gradcam, "return_value",
+                            {**flask_app.classify_with_gradcam.return_value, "heatmaps": heatmaps})
+
+        monkeypatch.setattr("src.render.RENDER_HEATMAP_SIDE", 16)   # background kept ≤ 16 px
+        body = self._upload(app_client, auth_headers, scan)
+        assert flask_app.classify_with_gradcam.call_args.kwargs["all_classes"] is True
+        url  = body["gradcam_classes_url"]
+        assert url == f"/scans/{body['scan_id']}/gradcam"
+        _, base_key = get_scan_gradcam_maps(body["scan_id"])
+        assert decode_image(read_image_bytes(base_key)).shape == (16, 16, 3)
+
+        glioma    = app_client.get(f"{url}?class=0", headers=auth_headers)
+        pituitary = app_client.get(f"{url}?class=Pituitary Tumor", headers=auth_headers)
+        assert glioma.status_code == pituitary.status_code == 200
+        assert glioma.mimetype == "image/png" and glioma.data != pituitary.data
+        assert app_client.get(f"{url}?class=9", headers=auth_headers).status_code == 400
+        assert app_client.get(url, headers=auth_headers).status_code == 400
+        assert app_client.get(f"{url}?class=0").status_code == 401
+
+        # GRADCAM_STORE_BACKGROUND=0: maps only, drawn on a blank canvas
+        monkeypatch.setattr(flask_app, "GRADCAM_STORE_BACKGROUND", False)
+        monkeypatch.setattr(flask_app, "RENDER_HEATMAP_SIDE", 16)
+        scan = cv2.imencode(".jpg", rng.integers(0, 255, (32, 32, 3), dtype=np.uint8))[1].tobytes()
+        body = self._upload(app_client, auth_headers, scan)
+        assert get_scan_gradcam_maps(body["scan_id"])[1] is None
+        res  = app_client.get(f"{body['gradcam_classes_url']}?class=1", headers=auth_headers)
+        assert res.status_code == 200 and decode_image(res.data).shape == (16, 16, 3)
+
+        # Scans saved without maps have nothing to re-render
+        plain = self._upload(app_client, auth_headers, sample_image)
+        assert "gradcam_classes_url" not in plain
+        assert app_client.get(f"/scans/{plain['scan_id']}/gradcam?class=0",
+                              headers=auth_headers).status_code == 404
+
+    def test_compare_gradcam_returns_artifact_urls(self, app_client, auth_headers, sample_image):
+        res = app_client.post("/compare-gradcam",
+            data={"image": (io.BytesIO(sample_image), "scan.jpg", "image/jpeg")},
+            content_type="multipart/form-data",
+            headers=auth_headers,
+        )
+        assert res.status_code == 200
+        body = res.get_json()
+        assert "finetuned" not in body and body["frozen_url"] is None
+        assert app_client.get(body["finetuned_url"], headers=auth_headers).status_code == 200
+
+        body = app_client.post("/compare-gradcam?images=base64",
+            data={"image": (io.BytesIO(sample_image), "scan.jpg", "image/jpeg")},
+            content_type="multipart/form-data",
+            headers=auth_headers,
+        ).get_json()
+        assert body["finetuned"] and body["frozen"] is None
+
     def test_predict_confidence_has_percent(self, app_client, auth_headers, sample_image):
         res = app_client.post("/predict",
             data={"image": (io.BytesIO(sample_image), "scan.jpg", "image/jpeg")},
@@ -327,6 +724,49 @@ class TestPredict:
         assert "%" in res.get_json()["confidence"]
 
 
+# ─── Predict: job mode ────────────────────────────────────────────
+
+class TestPredictJobs:
+    def _wait_for(self, app_client, auth_headers, job_id, timeout=10):
+        import time
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            job = app_client.get(f"/jobs/{job_id}", headers=auth_headers).get_json()
+            if job["status"] in ("done", "error"):
+                return job
+            time.sleep(0.05)
+        pytest.fail(f"Job {job_id} did not finish within {timeout}s")
+
+    def test_job_mode_returns_classification_immediately(self, app_client, auth_headers, sample_image):
+        res = app_client.post("/predict",
+            data={"image": (io.BytesIO(sample_image), "scan.jpg", "image/jpeg"),
+                  "mode": "job"},
+            content_type="multipart/form-data",
+            headers=auth_headers,
+        )
+        assert res.status_code == 202
+        body = res.get_json()
+        assert body["job_id"]
+        assert body["class_name"] == "Glioma Tumor"
+        assert len(body["class_probabilities"]) == 4
+
+        job = self._wait_for(app_client, auth_headers, body["job_id"])
+        assert job["status"] == "done", job["error"]
+        assert job["result"]["scan_id"]
+        assert job["result"]["report"] == "FINDINGS: Test report."
+        assert set(job["stages"]) >= {"database", "gradcam", "segmentation", "report"}
+        assert job["result"]["gradcam_image_url"] == f"/scans/{job['result']['scan_id']}/image/gradcam"
+
+        scan = app_client.get(f"/history/{job['result']['scan_id']}", headers=auth_headers).get_json()
+        assert scan["report_text"] == "FINDINGS: Test report."
+
+    def test_unknown_job_returns_404(self, app_client, auth_headers):
+        assert app_client.get("/jobs/does-not-exist", headers=auth_headers).status_code == 404
+
+    def test_jobs_require_auth(self, app_client):
+        assert app_client.get("/jobs/anything").status_code == 401
+
+
 # ─── History ──────────────────────────────────────────────────────
 
 class TestHistory:
@@ -0,0 +1,39 @@
+"""
+tests/test_artifacts.py
+───────────────────────
+ArtifactStore — short-lived, byte-bounded overlays for unsaved results.
+"""
+
+import time
+
+from src.artifacts import ArtifactStore
+
+
+class TestArtifactStore:
+    def test_round_trip(self):
+        store = ArtifactStore()
+        token = store.put(7, b"\x89PNG...", "image/png")
+        assert len(token) == 32
+        assert store.get(token) == (7, b"\x89PNG...", "image/png")
+        assert store.get("unknown") is None
+
+    def test_expired_artifacts_are_dropped(self):
+        store = ArtifactStore(ttl_seconds=0.05)
+        token = store.put(1, b"x" * 10, "image/png")
+        time.sleep(0.1)
+        assert store.get(token) is None
+        assert store.stats()["bytes"] == 0 and store.stats()["expired"] == 1
+
+    def test_oldest_evicted_over_budget(self):
+        store  = ArtifactStore(max_bytes=25)
+        first  = store.put(1, b"a" * 10, "image/png")
+        second = store.put(1, b"b" * 10, "image/png")
+        third  = store.put(1, b"c" * 10, "image/png")
+        assert store.get(first) is None
+        assert store.get(second) and store.get(third)
+        assert store.stats()["bytes"] == 20 and store.stats()["evicted"] == 1
+
+    def test_oversized_artifact_is_refused(self):
+        store = ArtifactStore(max_bytes=5)
+        assert store.put(1, b"x" * 6, "image/png") is None
+        assert store.stats()["items"] == 0
@@ -0,0 +1,116 @@
+"""
+tests/test_backends.py
+──────────────────────
+Inference backends — a tiny classifier exported to TFLite must match
+Keras within tolerance, handle changing batch sizes, and fall back to
+Keras when no export exists; quantized variants are served only once
+published in the manifest.
+"""
+
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+
+import src.backends as backends  # noqa: E402
+from src.utils import clear_model_registry  # noqa: E402
+
+
+@pytest.fixture
+def keras_path(tmp_path, monkeypatch):
+    tf.keras.utils.set_random_seed(0)
+    model = tf.keras.Sequential([
+        tf.keras.Input(shape=(32, 32, 3)),
+        tf.keras.layers.Conv2D(8, 3, strides=2, activation="relu"),
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dropout(0.5),
+        tf.keras.layers.Dense(4, activation="softmax"),
+    ])
+    path = str(tmp_path / "tiny.keras")
+    model.save(path)
+    monkeypatch.setattr(backends, "TFLITE_MODEL_DIR", str(tmp_path / "tflite"))
+    clear_model_registry()
+    yield path
+    clear_model_registry()
+
+
+@pytest.fixture
+def batch():
+    return np.random.default_rng(1).random((3, 32, 32, 3), dtype=np.float32)
+
+
+class TestBackends:
+    def test_tflite_matches_keras(self, keras_path, batch):
+        keras_backend = backends.load_backend(keras_path, "keras")
+        backends.export_tflite(keras_backend.model, backends.tflite_path_for(keras_path))
+        tflite_backend = backends.load_backend(keras_path, "tflite")
+
+        assert tflite_backend.name == "tflite"
+        report = backends.parity_report(keras_backend.predict(batch), tflite_backend.predict(batch))
+        assert report["top1_agreement"] == 1.0
+        assert report["max_abs_diff"] < 1e-5
+
+    def test_tflite_handles_changing_batch_sizes(self, keras_path, batch):
+        model = backends.load_backend(keras_path, "keras").model
+        backends.export_tflite(model, backends.tflite_path_for(keras_path))
+        engine = backends.load_backend(keras_path, "tflite")
+
+        for n in (1, 3, 2):
+            out = engine.predict(batch[:n])
+            assert out.shape == (n, 4)
+            np.testing.assert_allclose(out, model.predict(batch[:n], verbose=0), atol=1e-5)
+
+    def test_tflite_engine_is_cached(self, keras_path):
+        model = backends.load_backend(keras_path, "keras").model
+        backends.export_tflite(model, backends.tflite_path_for(keras_path))
+        assert backends.load_backend(keras_path, "tflite") is backends.load_backend(keras_path, "tflite")
+
+    def test_missing_export_falls_back_to_keras(self, keras_path):
+        assert backends.load_backend(keras_path, "tflite").name == "keras"
+
+    def test_unknown_backend_rejected(self, keras_path):
+        with pytest.raises(ValueError):
+            backends.load_backend(keras_path, "onnx")
+
+    def test_forward_accepts_backend_or_model(self, keras_path, batch):
+        backend = backends.load_backend(keras_path, "keras")
+        np.testing.assert_array_equal(
+            backends.forward(backend, batch), backends.forward(backend.model, batch),
+        )
+
+
+class TestQuantizedVariants:
+    def _publish(self, keras_path, tmp_path, monkeypatch, published):
+        qdir = tmp_path / "quantized"
+        monkeypatch.setattr(backends, "QUANTIZED_MODEL_DIR", str(qdir))
+        model = backends.load_backend(keras_path, "keras").model
+        rng   = np.random.default_rng(2)
+
+        def calibration():
+            for _ in range(8):
+                yield [rng.random((1, 32, 32, 3), dtype=np.float32)]
+
+        backends.export_tflite(model, backends.quantized_path_for(keras_path, "int8"),
+                               "int8", representative_data=calibration)
+        (qdir / "manifest.json").write_text(
+            '{"models": {"tiny": {"int8": {"published": %s}}}}' % str(published).lower()
+        )
+        return model
+
+    def test_published_int8_variant_is_served(self, keras_path, tmp_path, monkeypatch, batch):
+        model  = self._publish(keras_path, tmp_path, monkeypatch, published=True)
+        engine = backends.load_backend(keras_path, "keras", variant="int8")
+
+        assert engine.name == "tflite"
+        assert engine.path.endswith("tiny.int8.tflite")
+        report = backends.parity_report(model.predict(batch, verbose=0), engine.predict(batch))
+        assert report["max_abs_diff"] < 0.05
+
+    def test_unpublished_variant_falls_back_to_float(self, keras_path, tmp_path, monkeypatch):
+        self._publish(keras_path, tmp_path, monkeypatch, published=False)
+        assert backends.load_backend(keras_path, "keras", variant="int8").name == "keras"
+
+    def test_int8_requires_calibration_data(self, keras_path, tmp_path):
+        model = backends.load_backend(keras_path, "keras").model
+        with pytest.raises(ValueError):
+            backends.export_tflite(model, str(tmp_path / "x.tflite"), "int8")
@@ -0,0 +1,70 @@
+"""
+tests/test_batching.py
+──────────────────────
+MicroBatcher — concurrent requests are grouped into shared forward
+passes and every caller gets back exactly its own rows.
+"""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from src.batching import MicroBatcher
+
+
+def _echo_model(calls):
+    """Fake classifier: row i → [id, id, id, id] where id = batch[i, 0]."""
+    def predict(batch):
+        calls.append(batch.shape[0])
+        time.sleep(0.01)
+        return np.repeat(batch[:, :1], 4, axis=1)
+    return predict
+
+
+class TestMicroBatcher:
+    def test_each_request_gets_its_own_row(self):
+        calls   = []
+        engine  = MicroBatcher(_echo_model(calls), max_batch_size=8, max_wait_ms=50)
+        results = {}
+
+        def worker(i):
+            results[i] = engine.predict(np.full((1, 3), i, dtype=np.float32))
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+
+        for i in range(16):
+            assert results[i].shape == (1, 4)
+            assert np.all(results[i] == i)
+        assert sum(calls) == 16
+        assert max(calls) > 1, "concurrent requests were never batched"
+        assert max(calls) <= 8
+
+    def test_multi_row_requests_stay_together(self):
+        engine = MicroBatcher(_echo_model([]), max_batch_size=4, max_wait_ms=1)
+        batch  = np.arange(6, dtype=np.float32).reshape(6, 1)
+        out    = engine.predict(batch)
+        assert out.shape == (6, 4)
+        assert np.array_equal(out[:, 0], batch[:, 0])
+
+    def test_errors_propagate_to_callers(self):
+        def broken(batch):
+            raise RuntimeError("model exploded")
+        engine = MicroBatcher(broken, max_wait_ms=1)
+        with pytest.raises(RuntimeError, match="model exploded"):
+            engine.predict(np.zeros((1, 3), dtype=np.float32))
+        assert engine.stats()["errors"] == 1
+
+    def test_stats_histograms(self):
+        engine = MicroBatcher(_echo_model([]), max_batch_size=4, max_wait_ms=1)
+        for _ in range(3):
+            engine.predict(np.zeros((1, 3), dtype=np.float32))
+        stats = engine.stats()
+        assert stats["requests"] == 3
+        assert stats["rows"]     == 3
+        assert stats["queue_depth"] == 0
+        assert sum(stats["batch_size_histogram"].values()) == stats["batches"]
+        assert sum(stats["queue_depth_histogram"].values()) == stats["batches"]
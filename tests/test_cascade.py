@@ -0,0 +1,89 @@
+"""
+tests/test_cascade.py
+─────────────────────
+Custom CNN → ResNet50V2 cascade: calibration helpers, accept/escalate
+routing and meta-model stacking order.
+"""
+
+import numpy as np
+import pytest
+
+from src.cascade import (
+    LARGE_MODEL_NAME, META_MODEL_NAME, SMALL_MODEL_NAME,
+    Cascade, fit_temperature, temperature_scale,
+)
+
+
+def _rows(*probs):
+    return np.array(probs, dtype=np.float32)
+
+
+class TestCalibration:
+    def test_unit_temperature_is_identity(self):
+        p = _rows([0.7, 0.1, 0.1, 0.1], [0.25, 0.25, 0.25, 0.25])
+        np.testing.assert_allclose(temperature_scale(p, 1.0), p, atol=1e-6)
+
+    def test_high_temperature_softens(self):
+        p = _rows([0.97, 0.01, 0.01, 0.01])
+        assert temperature_scale(p, 2.0).max() < 0.97
+
+    def test_fit_temperature_softens_overconfident_model(self):
+        rng    = np.random.default_rng(0)
+        labels = rng.integers(0, 4, size=400)
+        # Always 95% sure, right only 60% of the time → needs T > 1
+        pred   = np.where(rng.random(400) < 0.6, labels, (labels + 1) % 4)
+        probs  = np.full((400, 4), 0.05 / 3, dtype=np.float32)
+        probs[np.arange(400), pred] = 0.95
+        assert fit_temperature(probs, labels) > 1.5
+
+
+class TestCascade:
+    def _cascade(self, small, large, meta=None, threshold=0.9):
+        calls = {"large": [], "meta": []}
+
+        def large_predict(batch):
+            calls["large"].append(len(batch))
+            return large[: len(batch)]
+
+        def meta_predict(stacked):
+            calls["meta"].append(stacked)
+            return np.tile(_rows([0.0, 0.0, 0.0, 1.0]), (len(stacked), 1))
+
+        cascade = Cascade(
+            small_predict = lambda batch: small,
+            large_predict = large_predict,
+            meta_predict  = meta_predict if meta else None,
+            temperature   = 1.0,
+            threshold     = threshold,
+        )
+        return cascade, calls
+
+    def test_confident_rows_are_accepted_without_escalation(self):
+        small = _rows([0.02, 0.02, 0.94, 0.02])
+        cascade, calls = self._cascade(small, large=_rows([1, 0, 0, 0]))
+
+        probs, used = cascade.classify(np.zeros((1, 8, 8, 3), dtype=np.float32))
+        assert used == [SMALL_MODEL_NAME]
+        assert int(np.argmax(probs[0])) == 2
+        assert calls["large"] == []
+
+    def test_only_uncertain_rows_escalate(self):
+        small = _rows([0.02, 0.02, 0.94, 0.02], [0.4, 0.3, 0.2, 0.1])
+        cascade, calls = self._cascade(small, large=_rows([0.0, 1.0, 0.0, 0.0]))
+
+        probs, used = cascade.classify(np.zeros((2, 8, 8, 3), dtype=np.float32))
+        assert used == [SMALL_MODEL_NAME, LARGE_MODEL_NAME]
+        assert calls["large"] == [1]
+        assert int(np.argmax(probs[1])) == 1
+        stats = cascade.stats()
+        assert stats["escalated"] == 1 and stats["escalation_rate"] == pytest.approx(0.5)
+
+    def test_meta_stacks_resnet_before_custom(self):
+        small = _rows([0.4, 0.3, 0.2, 0.1])
+        large = _rows([0.0, 1.0, 0.0, 0.0])
+        cascade, calls = self._cascade(small, large, meta=True)
+
+        probs, used = cascade.classify(np.zeros((1, 8, 8, 3), dtype=np.float32))
+        assert used == [META_MODEL_NAME]
+        np.testing.assert_allclose(calls["meta"][0], np.column_stack((large, small)))
+        assert int(np.argmax(probs[0])) == 3
@@ -0,0 +1,142 @@
+"""
+tests/test_dicom.py
+───────────────────
+In-memory DICOM loading in src/preprocess.py: single-frame, multi-frame
+and RGB branches, LUT windowing parity with the previous float32
+pipeline, and the pixel budget.
+"""
+
+import io
+import tempfile
+
+import numpy as np
+import pytest
+
+pydicom = pytest.importorskip("pydicom")
+
+from pydicom.dataset import Dataset, FileMetaDataset  # noqa: E402
+from pydicom.uid import (  # noqa: E402
+    ExplicitVRLittleEndian, SecondaryCaptureImageStorage, generate_uid,
+)
+from werkzeug.datastructures import FileStorage  # noqa: E402
+
+import src.preprocess as preprocess  # noqa: E402
+from src.preprocess import load_image, read_dicom, window_to_uint8  # noqa: E402
+
+
+def make_dicom(pixels: np.ndarray, rgb: bool = False, **tags) -> bytes:
+    """Uncompressed DICOM bytes for (H, W), (F, H, W) or (…, H, W, 3) pixels."""
+    ds = Dataset()
+    ds.file_meta = FileMetaDataset()
+    ds.file_meta.TransferSyntaxUID          = ExplicitVRLittleEndian
+    ds.file_meta.MediaStorageSOPClassUID    = SecondaryCaptureImageStorage
+    ds.file_meta.MediaStorageSOPInstanceUID = generate_uid()
+    ds.SOPClassUID    = SecondaryCaptureImageStorage
+    ds.SOPInstanceUID = ds.file_meta.MediaStorageSOPInstanceUID
+
+    spatial = pixels.shape[-3:-1] if rgb else pixels.shape[-2:]
+    frames  = pixels.shape[0] if pixels.ndim == (4 if rgb else 3) else None
+    ds.Rows, ds.Columns       = spatial
+    ds.SamplesPerPixel        = 3 if rgb else 1
+    ds.PhotometricInterpretation = "RGB" if rgb else "MONOCHROME2"
+    if rgb:
+        ds.PlanarConfiguration = 0
+    if frames:
+        ds.NumberOfFrames = frames
+    bits = pixels.dtype.itemsize * 8
+    ds.BitsAllocated, ds.BitsStored, ds.HighBit = bits, bits, bits - 1
+    ds.PixelRepresentation = int(pixels.dtype.kind == "i")
+    for name, value in tags.items():
+        setattr(ds, name, value)
+    ds.PixelData = np.ascontiguousarray(pixels).tobytes()
+
+    buf = io.BytesIO()
+    try:
+        ds.save_as(buf, enforce_file_format=True)           # pydicom ≥ 3
+    except TypeError:
+        ds.save_as(buf, write_like_original=False)          # pydicom 2.x
+    return buf.getvalue()
+
+
+def upload(data: bytes, name: str = "scan.dcm") -> FileStorage:
+    return FileStorage(stream=io.BytesIO(data), filename=name)
+
+
+def legacy_window(pixels, slope=1.0, intercept=0.0, center=40.0, width=400.0):
+    """The previous _load_dicom float32 pipeline (steps 1-4)."""
+    px    = pixels.astype(np.float32) * slope + intercept
+    lower = center - width / 2.0
+    upper = center + width / 2.0
+    px    = np.clip(px, lower, upper)
+    px    = (px - lower) / (upper - lower) * 255.0
+    return np.clip(px, 0, 255).astype(np.uint8)
+
+
+@pytest.fixture
+def ct_slice():
+    return np.random.default_rng(0).integers(-1024, 3000, (64, 80)).astype(np.int16)
+
+
+class TestBranches:
+    def test_single_frame(self, ct_slice):
+        data = make_dicom(ct_slice, RescaleSlope=1, RescaleIntercept=-1024,
+                          WindowCenter=40, WindowWidth=80)
+        out  = load_image(upload(data))
+        assert out.shape == (64, 80, 3) and out.dtype == np.uint8
+        ref  = legacy_window(ct_slice, 1, -1024, 40, 80)
+        assert np.abs(out[..., 0].astype(int) - ref).max() <= 1
+        assert (out[..., 0] == out[..., 2]).all()
+
+    def test_multi_frame_uses_middle_frame(self):
+        frames = np.stack([np.full((16, 16), v, np.uint16) for v in (0, 100, 200, 300, 400)])
+        data   = make_dicom(frames, WindowCenter=200, WindowWidth=400)
+        out    = load_image(upload(data))
+        assert out.shape == (16, 16, 3)
+        assert (out == legacy_window(frames[2], center=200, width=400)[0, 0]).all()
+
+    def test_rgb_is_not_windowed(self):
+        rgb = np.random.default_rng(1).integers(0, 256, (20, 24, 3)).astype(np.uint8)
+        out = load_image(upload(make_dicom(rgb, rgb=True)))
+        np.testing.assert_array_equal(out, rgb)
+
+    def test_default_brain_window(self, ct_slice):
+        out = load_image(upload(make_dicom(ct_slice)))
+        assert np.abs(out[..., 0].astype(int) - legacy_window(ct_slice)).max() <= 1
+
+    def test_invalid_file_raises_value_error(self):
+        with pytest.raises(ValueError):
+            load_image(upload(b"not a dicom at all" * 20))
+
+
+class TestWindowing:
+    @pytest.mark.parametrize("dtype,low,high", [
+        (np.uint8, 0, 256), (np.uint16, 0, 4096), (np.int16, -2048, 2048),
+    ])
+    def test_lut_matches_float_pipeline(self, dtype, low, high):
+        px = np.random.default_rng(2).integers(low, high, (3, 32, 32)).astype(dtype)
+        ds = Dataset()
+        ds.RescaleSlope, ds.RescaleIntercept = 2, -100
+        ds.WindowCenter, ds.WindowWidth      = 300, 1500
+        out = window_to_uint8(ds, px)
+        assert out.shape == px.shape and out.dtype == np.uint8
+        assert np.abs(out.astype(int) - legacy_window(px, 2, -100, 300, 1500)).max() <= 1
+
+    def test_float_pixels(self):
+        px = np.linspace(-500, 500, 100, dtype=np.float32).reshape(10, 10)
+        ds = Dataset()
+        out = window_to_uint8(ds, px, rgb=True)
+        assert out.shape == (10, 10, 3)
+        assert np.abs(out[..., 0].astype(int) - legacy_window(px)).max() <= 1
+
+
+class TestInMemory:
+    def test_no_temp_file(self, ct_slice, monkeypatch):
+        def forbidden(*args, **kwargs):
+            raise AssertionError("DICOM loading must not touch disk")
+        monkeypatch.setattr(tempfile, "NamedTemporaryFile", forbidden)
+        assert load_image(upload(make_dicom(ct_slice))).shape == (64, 80, 3)
+
+    def test_budget_checked_from_header(self, ct_slice, monkeypatch):
+        monkeypatch.setattr(preprocess, "DECODE_PIXEL_BUDGET", 1000)
+        with pytest.raises(ValueError, match="too large"):
+            read_dicom(make_dicom(ct_slice))
@@ -0,0 +1,118 @@
+"""
+tests/test_encoding.py
+──────────────────────
+Overlay encoding in src/encoding.py: one encode per image in the
+configured format, channel order, format detection from bytes and
+storage keys, and the Pillow fallback.
+"""
+
+import io
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+import src.encoding as encoding
+from src.encoding import (
+    decode_image, encode_image, encode_overlay, extension, format_for_key, mimetype,
+    sniff_format, to_base64,
+)
+
+
+@pytest.fixture
+def overlay():
+    """Smooth gradient with a pure-red corner — catches RGB/BGR swaps and lossy drift."""
+    y, x = np.mgrid[:96, :128]
+    rgb  = np.stack([x * 2, y * 2, np.full_like(x, 90)], axis=-1).astype(np.uint8)
+    rgb[:16, :16] = (255, 0, 0)
+    return rgb
+
+
+def decode(data: bytes) -> np.ndarray:
+    return np.asarray(Image.open(io.BytesIO(data)).convert("RGB"))
+
+
+# ─── Encoding ─────────────────────────────────────────────────────
+
+class TestEncodeImage:
+    @pytest.mark.parametrize("encoder", ["cv2", "pillow"])
+    def test_png_is_lossless_and_rgb(self, overlay, encoder):
+        data = encode_image(overlay, "png", encoder=encoder)
+        assert sniff_format(data) == "png"
+        assert np.array_equal(decode(data), overlay)
+
+    @pytest.mark.parametrize("fmt", ["jpeg", "webp"])
+    @pytest.mark.parametrize("encoder", ["cv2", "pillow"])
+    def test_lossy_formats_stay_close(self, overlay, fmt, encoder):
+        data = encode_image(overlay, fmt, encoder=encoder)
+        assert sniff_format(data) == fmt
+        out = decode(data).astype(np.int16)
+        assert np.abs(out - overlay).mean() < 3
+        assert out[4, 4, 0] > 200 and out[4, 4, 2] < 60              # red stays red
+
+    def test_png_level_trades_bytes_for_time(self, overlay):
+        fast, small = encode_image(overlay, "png", quality=0), encode_image(overlay, "png", quality=9)
+        assert len(small) < len(fast)
+        assert np.array_equal(decode(fast), decode(small))
+
+    def test_jpeg_quality_controls_size(self, overlay):
+        assert len(encode_image(overlay, "jpeg", quality=50)) < len(encode_image(overlay, "jpeg", quality=95))
+
+    def test_greyscale_and_jpg_alias(self):
+        grey = np.arange(64, dtype=np.uint8).reshape(8, 8)
+        assert sniff_format(encode_image(grey, "jpg")) == "jpeg"
+        assert np.array_equal(np.asarray(Image.open(io.BytesIO(encode_image(grey, "png")))), grey)
+
+    def test_unknown_format(self, overlay):
+        with pytest.raises(ValueError, match="Unsupported"):
+            encode_image(overlay, "gif")
+
+    def test_cv2_failure_falls_back_to_pillow(self, overlay, monkeypatch):
+        def broken(*args, **kwargs):
+            raise cv2.error("no codec")
+        monkeypatch.setattr(encoding.cv2, "imencode", broken)
+        assert np.array_equal(decode(encode_image(overlay, "png")), overlay)
+
+    def test_overlay_kind_uses_configured_format(self, overlay, monkeypatch):
+        monkeypatch.setitem(encoding.KIND_FORMATS, "segment", "webp")
+        assert sniff_format(encode_overlay(overlay, "segment")) == "webp"
+        assert sniff_format(encode_overlay(overlay, "gradcam")) == "png"
+
+
+# ─── Formats ──────────────────────────────────────────────────────
+
+class TestFormats:
+    def test_extensions_and_mimetypes(self):
+        assert (extension("png"), mimetype("png"))   == (".png", "image/png")
+        assert (extension("jpeg"), mimetype("jpg"))  == (".jpg", "image/jpeg")
+        assert (extension("webp"), mimetype("webp")) == (".webp", "image/webp")
+
+    def test_format_for_key(self):
+        assert format_for_key("scans/ab_segment.jpg") == "jpeg"
+        assert format_for_key("scans/ab_gradcam.webp") == "webp"
+        assert format_for_key("scans/ab_gradcam.png") == "png"
+        assert format_for_key(None) == "png"
+
+    def test_decode_image_round_trips_rgb(self, overlay):
+        assert np.array_equal(decode_image(encode_image(overlay, "png")), overlay)
+        with pytest.raises(ValueError):
+            decode_image(b"not an image")
+
+    def test_jpg_alias_in_env_config(self, monkeypatch):
+        import importlib
+        monkeypatch.setenv("SEGMENT_IMAGE_FORMAT", "JPG")
+        monkeypatch.setenv("GRADCAM_IMAGE_FORMAT", "jpg")
+        try:
+            assert importlib.reload(encoding).KIND_FORMATS == {"gradcam": "jpeg", "segment": "jpeg"}
+            monkeypatch.setenv("GRADCAM_IMAGE_FORMAT", "gif")
+            with pytest.raises(ValueError, match="GRADCAM_IMAGE_FORMAT"):
+                importlib.reload(encoding)
+        finally:
+            monkeypatch.undo()
+            importlib.reload(encoding)
+
+    def test_base64_is_ascii_text(self, overlay):
+        data = encode_image(overlay, "png")
+        assert isinstance(to_base64(data), str)
+        assert to_base64(data).startswith("iVBORw0KGgo")
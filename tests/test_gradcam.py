@@ -0,0 +1,131 @@
+"""
+tests/test_gradcam.py
+─────────────────────
+Grad-CAM on a tiny stand-in for the served model: a Sequential wrapping a
+functional sub-model named "resnet50v2" that contains a
+"conv5_block3_out" layer, followed by a small classification head —
+the same layout src/gradcam.py walks on the real ResNet50V2.
+"""
+
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+
+from src.encoding import decode_image, to_base64  # noqa: E402
+from src.gradcam import (  # noqa: E402
+    _get_grad_graph,
+    _get_jacobian_graph,
+    classify_with_gradcam,
+    generate_gradcam,
+    get_gradcam_heatmap,
+    pack_heatmaps,
+    render_gradcam,
+    unpack_heatmaps,
+)
+
+
+@pytest.fixture(scope="module")
+def tiny_model():
+    tf.keras.utils.set_random_seed(0)
+    inp = tf.keras.Input(shape=(32, 32, 3))
+    x   = tf.keras.layers.Conv2D(8, 3, strides=2, padding="same", activation="relu")(inp)
+    x   = tf.keras.layers.Conv2D(16, 3, strides=2, padding="same", name="conv5_block3_out")(x)
+    x   = tf.keras.layers.BatchNormalization(name="post_bn")(x)
+    x   = tf.keras.layers.Activation("relu", name="post_relu")(x)
+    backbone = tf.keras.Model(inp, x, name="resnet50v2")
+
+    model = tf.keras.Sequential([
+        tf.keras.Input(shape=(32, 32, 3)),
+        backbone,
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dense(4, activation="softmax"),
+    ])
+    return model
+
+
+@pytest.fixture
+def img_array():
+    rng = np.random.default_rng(1)
+    return rng.random((1, 32, 32, 3), dtype=np.float32)
+
+
+class TestFusedGradCAM:
+    def test_matches_separate_calls(self, tiny_model, img_array):
+        fused   = classify_with_gradcam(tiny_model, img_array, class_idx=1)
+        heatmap = get_gradcam_heatmap(tiny_model, img_array, class_idx=1)
+
+        assert fused is not None
+        np.testing.assert_allclose(fused["heatmap"], heatmap, atol=1e-5)
+        np.testing.assert_allclose(
+            fused["predictions"], tiny_model.predict(img_array, verbose=0), atol=1e-5,
+        )
+        assert to_base64(fused["overlay"]) == generate_gradcam(tiny_model, img_array, class_idx=1)
+
+    def test_defaults_to_top1_class(self, tiny_model, img_array):
+        fused = classify_with_gradcam(tiny_model, img_array)
+        assert fused["class_idx"] == int(np.argmax(fused["predictions"][0]))
+
+    def test_heatmap_is_normalised(self, tiny_model, img_array):
+        heatmap = classify_with_gradcam(tiny_model, img_array, class_idx=0)["heatmap"]
+        assert heatmap.dtype == np.float32
+        assert heatmap.min() >= 0.0 and heatmap.max() <= 1.0
+
+
+class TestAllClassGradCAM:
+    def test_every_class_matches_its_own_pass(self, tiny_model, img_array):
+        fused = classify_with_gradcam(tiny_model, img_array, class_idx=2, all_classes=True)
+
+        assert fused["heatmaps"].shape == (4, 8, 8)
+        for class_idx in range(4):
+            np.testing.assert_allclose(
+                fused["heatmaps"][class_idx],
+                get_gradcam_heatmap(tiny_model, img_array, class_idx=class_idx), atol=1e-5,
+            )
+        np.testing.assert_array_equal(fused["heatmap"], fused["heatmaps"][2])
+        np.testing.assert_allclose(
+            fused["predictions"], tiny_model.predict(img_array, verbose=0), atol=1e-5,
+        )
+
+    def test_defaults_to_top1_class(self, tiny_model, img_array):
+        fused = classify_with_gradcam(tiny_model, img_array, all_classes=True)
+        assert fused["class_idx"] == int(np.argmax(fused["predictions"][0]))
+        assert "heatmaps" not in classify_with_gradcam(tiny_model, img_array)
+
+    def test_stored_maps_rerender_the_overlay(self, tiny_model, img_array):
+        background = np.uint8(img_array[0] * 255)
+        fused      = classify_with_gradcam(tiny_model, img_array, class_idx=1,
+                                           original_image=background, all_classes=True)
+        blob       = pack_heatmaps(fused["heatmaps"])
+        restored   = unpack_heatmaps(blob)
+
+        assert len(blob) < 1024 and restored.dtype == np.float32
+        np.testing.assert_allclose(restored, fused["heatmaps"], atol=1e-3)   # float16
+        rerendered = decode_image(render_gradcam(background, restored[1])).astype(np.int16)
+        assert np.abs(rerendered - decode_image(fused["overlay"])).max() <= 2
+
+    def test_unpack_rejects_other_shapes(self):
+        with pytest.raises(ValueError):
+            unpack_heatmaps(pack_heatmaps(np.zeros((7, 7))))
+
+    def test_jacobian_graph_traced_once(self, tiny_model, img_array):
+        graph = _get_jacobian_graph(tiny_model, "conv5_block3_out")
+        for class_idx in (0, 3, None):
+            classify_with_gradcam(tiny_model, img_array, class_idx=class_idx, all_classes=True)
+
+        assert _get_jacobian_graph(tiny_model, "conv5_block3_out") is graph
+        assert graph.experimental_get_tracing_count() == 1
+
+
+class TestGradGraphRegistry:
+    def test_graph_built_and_traced_once(self, tiny_model, img_array):
+        graph = _get_grad_graph(tiny_model, "conv5_block3_out")
+        for class_idx in (0, 1, None):
+            get_gradcam_heatmap(tiny_model, img_array, class_idx=class_idx)
+        classify_with_gradcam(tiny_model, img_array)
+
+        assert _get_grad_graph(tiny_model, "conv5_block3_out") is graph
+        assert graph.experimental_get_tracing_count() == 1
+
+    def test_unknown_layer_returns_none(self, tiny_model, img_array):
+        assert get_gradcam_heatmap(tiny_model, img_array, 0, layer_name="nope") is None
@@ -0,0 +1,178 @@
+"""
+tests/test_inference.py
+───────────────────────
+Mask post-processing in src/inference.py: _clean_mask's bounded working
+grid and bincount component statistics, and the Grad-CAM pseudo-
+segmentation's working grid + single-partition thresholds — both checked
+against the previous full-resolution implementations.
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from src.inference import _clean_mask, _top_thresholds, pseudo_segmentation_mask
+
+
+def legacy_clean_mask(binary_mask, raw_scores=None, gradcam_hint=None):
+    """_clean_mask before v2.1 — full resolution, one pixel pass per component."""
+    mask = binary_mask.astype(np.uint8)
+    mask = (cv2.GaussianBlur(mask.astype(np.float32), (21, 21), sigmaX=8, sigmaY=8) > 0.25).astype(np.uint8)
+    H, W = mask.shape
+    k = max(15, min(H, W) // 20)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (k, k)), iterations=2)
+    k = max(7, min(H, W) // 40)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (k, k)), iterations=1)
+    n, labels, stats, centroids = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    if n <= 1:
+        return mask
+    if gradcam_hint is not None:
+        hint = cv2.resize(gradcam_hint.astype(np.float32), (W, H), interpolation=cv2.INTER_LINEAR)
+        py, px = np.unravel_index(np.argmax(hint), hint.shape)
+        best = min(range(1, n), key=lambda i: (centroids[i][0] - px) ** 2 + (centroids[i][1] - py) ** 2)
+    elif raw_scores is not None:
+        scores = raw_scores.astype(np.float32)
+        if scores.shape != (H, W):
+            scores = cv2.resize(scores, (W, H), interpolation=cv2.INTER_LINEAR)
+        best = max(range(1, n), key=lambda i: float(scores[labels == i].mean()))
+    else:
+        best = int(np.argmax(stats[1:, cv2.CC_STAT_AREA])) + 1
+    return (labels == best).astype(np.uint8)
+
+
+def legacy_pseudo_mask(heatmap, H, W, top_percent=10.0):
+    """gradcam_pseudo_segmentation's mask before v2.1 — full resolution, np.percentile per step."""
+    hm = np.clip(cv2.resize(heatmap.astype(np.float32), (W, H), interpolation=cv2.INTER_CUBIC), 0.0, 1.0)
+    sigma = min(H, W) / 50
+    k = int(sigma * 4) | 1
+    hm = cv2.GaussianBlur(hm, (k, k), sigmaX=sigma, sigmaY=sigma)
+    if hm.max() > 0:
+        hm = hm / hm.max()
+    hm_masked = hm.copy()
+    by, bx = int(H * 0.10), int(W * 0.10)
+    hm_masked[:by, :] = 0
+    hm_masked[-by:, :] = 0
+    hm_masked[:, :bx] = 0
+    hm_masked[:, -bx:] = 0
+    nonzero = hm_masked[hm_masked > 0]
+    if len(nonzero) == 0:
+        hm_masked = hm.copy()
+        nonzero = hm_masked[hm_masked > 0]
+
+    def select(pct):
+        t = np.percentile(nonzero, 100 - pct)
+        nl, lb, st, _ = cv2.connectedComponentsWithStats((hm_masked > t).astype(np.uint8), connectivity=8)
+        pl = int(lb[np.unravel_index(np.argmax(hm_masked), hm_masked.shape)])
+        if pl == 0 and nl > 1:
+            pl = int(np.argmax(st[1:, cv2.CC_STAT_AREA])) + 1
+        if pl == 0 or nl <= 1:
+            return None, 0
+        sel = (lb == pl).astype(np.uint8)
+        return sel, sel.sum()
+
+    sel, area = select(top_percent)
+    if sel is None:
+        return None
+    if area > int(H * W * 0.25):
+        for pct in [7.0, 5.0, 3.0]:
+            m2, a2 = select(pct)
+            if m2 is not None and a2 <= int(H * W * 0.25):
+                sel = m2
+                break
+    k = max(7, min(H, W) // 40)
+    return cv2.morphologyEx(sel, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (k, k)), iterations=1)
+
+
+def cams():
+    """A focal hotspot, two competing hotspots, a near-flat map and pure noise."""
+    rng    = np.random.default_rng(3)
+    focal  = np.zeros((7, 7), np.float32)
+    focal[2, 4], focal[3, 4] = 1.0, 0.6
+    twin   = np.zeros((7, 7), np.float32)
+    twin[2, 2], twin[4, 5]   = 1.0, 0.9
+    flat   = (0.8 + 0.2 * rng.random((7, 7))).astype(np.float32)
+    return {"focal": focal, "twin": twin, "flat": flat, "random": rng.random((7, 7)).astype(np.float32)}
+
+
+def blobs(size: int, seed: int = 0, noise: float = 0.002):
+    """Three discs of different size + salt noise, and a score map favouring the smallest."""
+    rng  = np.random.default_rng(seed)
+    mask = np.zeros((size, size), np.uint8)
+    for (cx, cy, r) in [(0.25, 0.3, 0.12), (0.7, 0.65, 0.08), (0.75, 0.2, 0.05)]:
+        cv2.circle(mask, (int(cx * size), int(cy * size)), int(r * size), 1, -1)
+    mask[rng.random((size, size)) < noise] = 1
+    scores = mask * 0.6
+    cv2.circle(scores, (int(0.75 * size), int(0.2 * size)), int(0.05 * size), 0.95, -1)
+    return mask, scores.astype(np.float32)
+
+
+def iou(a, b) -> float:
+    return float(np.logical_and(a, b).sum() / max(1, np.logical_or(a, b).sum()))
+
+
+# ─── Parity ───────────────────────────────────────────────────────
+
+class TestCleanMaskParity:
+    @pytest.mark.parametrize("kind", ["area", "scores", "gradcam"])
+    def test_identical_at_working_resolution(self, kind):
+        mask, scores = blobs(384)
+        hint = np.zeros((7, 7), np.float32)
+        hint[4, 5] = 1.0
+        kwargs = {"scores": {"raw_scores": scores}, "gradcam": {"gradcam_hint": hint}}.get(kind, {})
+        assert np.array_equal(_clean_mask(mask, **kwargs), legacy_clean_mask(mask, **kwargs))
+
+    @pytest.mark.parametrize("kind", ["area", "scores", "gradcam"])
+    def test_reduced_grid_matches_full_resolution(self, kind):
+        mask, scores = blobs(1536, noise=0.001)
+        hint = np.zeros((7, 7), np.float32)
+        hint[4, 5] = 1.0
+        kwargs = {"scores": {"raw_scores": scores}, "gradcam": {"gradcam_hint": hint}}.get(kind, {})
+        fast, slow = _clean_mask(mask, **kwargs), legacy_clean_mask(mask, **kwargs)
+        assert fast.shape == slow.shape == mask.shape
+        assert iou(fast, slow) > 0.97
+
+
+class TestCleanMaskSelection:
+    def test_scores_pick_the_most_confident_component(self):
+        mask, scores = blobs(256)
+        out = _clean_mask(mask, raw_scores=scores)
+        assert out[int(0.2 * 256), int(0.75 * 256)] == 1 and out.sum() < 0.02 * 256 ** 2
+
+    def test_empty_mask_stays_empty(self):
+        assert _clean_mask(np.zeros((2048, 1024), np.uint8)).shape == (2048, 1024)
+        assert _clean_mask(np.zeros((64, 64), np.uint8)).sum() == 0
+
+
+# ─── Pseudo-segmentation ──────────────────────────────────────────
+
+class TestPseudoSegmentation:
+    def test_thresholds_match_np_percentile(self):
+        values = np.random.default_rng(0).random(10_001).astype(np.float32)
+        pcts   = [10.0, 7.0, 5.0, 3.0]
+        np.testing.assert_allclose(_top_thresholds(values, pcts),
+                                   np.percentile(values, [100 - p for p in pcts]), rtol=1e-6)
+        assert _top_thresholds(np.array([0.5], np.float32), pcts).tolist() == [0.5] * 4
+
+    @pytest.mark.parametrize("name", ["focal", "twin", "flat", "random"])
+    def test_identical_at_working_resolution(self, name):
+        cam = cams()[name]
+        assert np.array_equal(pseudo_segmentation_mask(cam, 384, 320), legacy_pseudo_mask(cam, 384, 320))
+
+    @pytest.mark.parametrize("name", ["focal", "twin", "flat", "random"])
+    def test_reduced_grid_matches_full_resolution(self, name):
+        cam        = cams()[name]
+        fast, slow = pseudo_segmentation_mask(cam, 1536, 1280), legacy_pseudo_mask(cam, 1536, 1280)
+        assert fast.shape == slow.shape == (1536, 1280)
+        assert iou(fast, slow) > 0.97
+
+    def test_tightening_uses_the_shared_thresholds(self, capsys):
+        # one broad hotspot: its top 60% is a single blob over the 25% cap → tightened
+        yy, xx = np.mgrid[:7, :7]
+        cam    = (1.0 - np.hypot(yy - 3, xx - 3) / 6).astype(np.float32)
+        mask   = pseudo_segmentation_mask(cam, 384, 384, top_percent=60.0)
+        assert "Tightened" in capsys.readouterr().out
+        assert np.array_equal(mask, legacy_pseudo_mask(cam, 384, 384, top_percent=60.0))
+        assert 0 < mask.mean() <= 0.27                  # closing may add a sliver
+
+    def test_empty_heatmap(self):
+        assert pseudo_segmentation_mask(np.zeros((7, 7), np.float32), 256, 256) is None
@@ -0,0 +1,65 @@
+"""
+tests/test_jobs.py
+──────────────────
+JobRunner — bounded background execution with stage tracking.
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.jobs import JobQueueFull, JobRunner
+
+
+def _wait(job, timeout=5):
+    deadline = time.time() + timeout
+    while job.to_dict()["status"] not in ("done", "error"):
+        if time.time() > deadline:
+            pytest.fail("job did not finish")
+        time.sleep(0.01)
+    return job.to_dict()
+
+
+class TestJobRunner:
+    def test_stages_and_result_are_recorded(self):
+        runner = JobRunner(workers=1, queue_limit=0)
+
+        def work(job):
+            job.stage("gradcam", "running")
+            job.stage("gradcam", "done", gradcam_image="key.png")
+
+        job   = runner.submit(7, work, {"class_name": "Pituitary"})
+        state = _wait(job)
+        assert state["status"] == "done"
+        assert state["stages"] == {"gradcam": "done"}
+        assert state["result"] == {"class_name": "Pituitary", "gradcam_image": "key.png"}
+        assert runner.get(job.id) is job
+
+    def test_errors_are_captured(self):
+        runner = JobRunner(workers=1, queue_limit=0)
+
+        def broken(job):
+            raise RuntimeError("groq down")
+
+        state = _wait(runner.submit(1, broken))
+        assert state["status"] == "error"
+        assert state["error"] == "groq down"
+
+    def test_queue_limit_rejects_excess_jobs(self):
+        runner  = JobRunner(workers=1, queue_limit=1)
+        release = threading.Event()
+        first   = runner.submit(1, lambda job: release.wait())
+        second  = runner.submit(1, lambda job: None)
+        with pytest.raises(JobQueueFull):
+            runner.submit(1, lambda job: None)
+        release.set()
+        _wait(first); _wait(second)
+        _wait(runner.submit(1, lambda job: None))    # slots are released
+
+    def test_finished_jobs_expire(self):
+        runner = JobRunner(workers=1, queue_limit=0, ttl_seconds=0)
+        job    = runner.submit(1, lambda job: None)
+        _wait(job)
+        time.sleep(0.01)
+        assert runner.get(job.id) is None
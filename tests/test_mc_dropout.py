@@ -0,0 +1,108 @@
+"""
+tests/test_mc_dropout.py
+────────────────────────
+Monte-Carlo dropout: backbone/head split, one batched head call for all
+samples, the uncertainty metrics, and the Scan columns they land in.
+"""
+
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+
+import src.mc_dropout as mc  # noqa: E402
+
+
+def _classifier():
+    layers = tf.keras.layers
+    return tf.keras.Sequential([
+        tf.keras.Input(shape=(8, 8, 3)),
+        layers.Conv2D(4, 3, activation="relu"),
+        layers.GlobalAveragePooling2D(),
+        layers.BatchNormalization(),
+        layers.Dense(16, activation="relu"),
+        layers.Dropout(0.5),
+        layers.Dense(4, activation="softmax"),
+    ])
+
+
+@pytest.fixture
+def model():
+    tf.keras.utils.set_random_seed(0)
+    return _classifier()
+
+
+@pytest.fixture
+def batch():
+    return np.random.default_rng(0).random((2, 8, 8, 3), dtype=np.float32)
+
+
+class TestSplit:
+    def test_split_before_first_dropout(self, model):
+        backbone, head = mc.split_at_dropout(model)
+        assert isinstance(head[0], tf.keras.layers.Dropout)
+        assert backbone + head == list(model.layers)
+
+    def test_model_without_dropout_raises(self):
+        plain = tf.keras.Sequential([tf.keras.Input(shape=(4,)), tf.keras.layers.Dense(2)])
+        with pytest.raises(ValueError):
+            mc.split_at_dropout(plain)
+
+
+class TestSampling:
+    def test_shape_and_spread(self, model, batch):
+        probs = mc.sample_probs(model, batch, samples=16)
+        assert probs.shape == (2, 16, 4)
+        np.testing.assert_allclose(probs.sum(axis=-1), 1.0, atol=1e-5)
+        assert probs[0].std(axis=0).max() > 0          # dropout is active
+
+    def test_backbone_runs_once(self, model, batch, monkeypatch):
+        backbone, _ = mc.split_at_dropout(model)
+        calls       = []
+        real_call   = type(backbone[0]).__call__
+
+        def counting(self, *args, **kwargs):
+            if self is backbone[0]:
+                calls.append(args[0].shape[0])
+            return real_call(self, *args, **kwargs)
+
+        monkeypatch.setattr(type(backbone[0]), "__call__", counting)
+        mc._GRAPHS.pop(model, None)
+        mc.sample_probs(model, batch, samples=8)
+        assert calls == [2]                            # traced once, on N rows — not N·T
+
+    def test_mean_close_to_deterministic_pass(self, model, batch):
+        probs = mc.sample_probs(model, batch, samples=400)
+        det   = model.predict(batch, verbose=0)
+        assert np.abs(probs.mean(axis=1) - det).max() < 0.1
+
+
+class TestMetrics:
+    def test_agreeing_samples_have_no_mutual_information(self):
+        probs = np.tile([[0.7, 0.1, 0.1, 0.1]], (10, 1))
+        m     = mc.uncertainty_metrics(probs)
+        assert m["mutual_information"] == pytest.approx(0.0, abs=1e-9)
+        assert m["predictive_entropy"] > 0
+
+    def test_disagreeing_samples_raise_mutual_information(self):
+        probs = np.array([[0.97, 0.01, 0.01, 0.01], [0.01, 0.97, 0.01, 0.01]] * 5)
+        m     = mc.uncertainty_metrics(probs)
+        assert m["mutual_information"] > 0.5
+        assert m["predicted_class_std"] == pytest.approx(0.48)
+
+
+class TestScanColumns:
+    def test_init_db_adds_missing_columns(self, tmp_path, monkeypatch):
+        import src.database as database
+        from sqlalchemy import create_engine, inspect, text
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE scans (id INTEGER PRIMARY KEY, "
+                              "predicted_class VARCHAR(50) NOT NULL, "
+                              "confidence_score FLOAT NOT NULL)"))
+        monkeypatch.setattr(database, "engine", engine)
+        database._add_missing_columns()
+
+        columns = {c["name"] for c in inspect(engine).get_columns("scans")}
+        assert {"predictive_entropy", "mutual_information", "symptoms"} <= columns
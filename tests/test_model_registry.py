@@ -0,0 +1,89 @@
+"""
+tests/test_model_registry.py
+────────────────────────────
+Process-wide model registry behind src.utils.load_local_model — one
+deserialisation per artifact, shared across threads, reloaded when the
+file on disk changes.
+"""
+
+import os
+import threading
+
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+
+import src.utils as utils  # noqa: E402
+
+
+def _save_model(path, units):
+    model = tf.keras.Sequential([
+        tf.keras.Input(shape=(4,)),
+        tf.keras.layers.Dense(units, activation="softmax"),
+    ])
+    model.save(path)
+    return model
+
+
+@pytest.fixture
+def model_path(tmp_path):
+    utils.clear_model_registry()
+    path = str(tmp_path / "tiny.keras")
+    _save_model(path, units=3)
+    yield path
+    utils.clear_model_registry()
+
+
+@pytest.fixture
+def load_counter(monkeypatch):
+    calls = []
+    real  = utils.load_model
+
+    def counting_load(*args, **kwargs):
+        calls.append(args[0])
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(utils, "load_model", counting_load)
+    return calls
+
+
+class TestModelRegistry:
+    def test_second_load_is_served_from_memory(self, model_path, load_counter):
+        first  = utils.load_local_model(model_path)
+        second = utils.load_local_model(model_path)
+        assert first is second
+        assert len(load_counter) == 1
+
+    def test_concurrent_loads_deserialise_once(self, model_path, load_counter):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(utils.load_local_model(model_path)))
+                   for _ in range(8)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+
+        assert len(load_counter) == 1
+        assert all(m is results[0] for m in results)
+
+    def test_changed_artifact_is_reloaded(self, model_path, load_counter):
+        old = utils.load_local_model(model_path)
+        _save_model(model_path, units=5)
+        st = os.stat(model_path)
+        os.utime(model_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+        new = utils.load_local_model(model_path)
+        assert new is not old
+        assert new.output_shape == (None, 5)
+        assert len(load_counter) == 2
+
+    def test_missing_file_raises(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            utils.load_local_model(str(tmp_path / "nope.keras"))
+
+    def test_stats_report_memory(self, model_path):
+        utils.load_local_model(model_path)
+        utils.load_local_model(model_path)
+        stats = utils.model_registry_stats()[model_path]
+        assert stats["params"]        == 4 * 3 + 3
+        assert stats["weights_bytes"] == (4 * 3 + 3) * np.dtype(np.float32).itemsize
+        assert stats["hits"]          == 1
@@ -0,0 +1,172 @@
+"""
+tests/test_preprocess.py
+────────────────────────
+cv2 resize + fused normalise engine in src/preprocess.py: numerical
+parity with the previous skimage pipeline on Examples/Example.jpeg,
+channel handling, the out= / batch APIs, and reduced-resolution decoding
+with its pixel budget.
+"""
+
+import io
+import os
+import struct
+import threading
+import zlib
+
+import numpy as np
+import pytest
+from PIL import Image, ImageFile
+
+from src.preprocess import (
+    CLASSIFICATION_SIZE, DECODE_MAX_SIDE, load_image, preprocess_batch,
+    preprocess_both, preprocess_classification, preprocess_segmentation,
+)
+
+EXAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       "Examples", "Example.jpeg")
+
+
+def _skimage_reference(image, size=CLASSIFICATION_SIZE):
+    """The pre-v2.1 pipeline, verbatim."""
+    resize = pytest.importorskip("skimage.transform").resize
+    img = resize(image, (size, size), mode="constant", preserve_range=True)
+    if img.ndim == 2:
+        img = np.stack([img] * 3, axis=-1)
+    return np.expand_dims(img.astype(np.float32) / 255.0, axis=0)
+
+
+@pytest.fixture(scope="module")
+def example():
+    return np.array(Image.open(EXAMPLE).convert("RGB"))
+
+
+class TestParity:
+    def test_example_matches_skimage(self, example):
+        diff = np.abs(preprocess_classification(example) - _skimage_reference(example))
+        assert diff.mean() < 0.005
+        assert np.percentile(diff, 99) < 0.03
+
+    def test_upscaling_matches_skimage(self, example):
+        small = example[::8, ::8].copy()                      # ~91×163 → enlarged
+        diff  = np.abs(preprocess_classification(small) - _skimage_reference(small))
+        assert diff.mean() < 0.01
+
+    def test_grayscale_matches_skimage(self, example):
+        gray = example[..., 0].copy()
+        out  = preprocess_classification(gray)
+        assert out.shape == (1, 224, 224, 3)
+        assert np.abs(out - _skimage_reference(gray)).mean() < 0.005
+
+
+class TestEngine:
+    def test_shape_dtype_range(self, example):
+        out = preprocess_segmentation(example)
+        assert out.shape == (1, 224, 224, 3) and out.dtype == np.float32
+        assert 0.0 <= out.min() and out.max() <= 1.0
+
+    def test_rgba_drops_alpha(self, example):
+        rgba = np.dstack([example, np.full(example.shape[:2], 7, np.uint8)])
+        np.testing.assert_array_equal(preprocess_classification(rgba),
+                                      preprocess_classification(example))
+
+    def test_out_is_written_in_place(self, example):
+        out = np.zeros((1, 224, 224, 3), dtype=np.float32)
+        assert preprocess_classification(example, out=out) is out
+        assert out.any()
+
+    def test_wrong_out_raises(self, example):
+        with pytest.raises(ValueError):
+            preprocess_classification(example, out=np.zeros((1, 10, 10, 3), np.float32))
+
+    def test_results_do_not_alias_scratch_buffers(self, example):
+        first  = preprocess_classification(example)
+        before = first.copy()
+        preprocess_classification(255 - example)
+        np.testing.assert_array_equal(first, before)
+
+    def test_both_in_one_pass(self, example):
+        cls, seg = preprocess_both(example)
+        np.testing.assert_array_equal(cls, seg)
+        assert not np.shares_memory(cls, seg)
+
+    def test_batch_matches_single(self, example):
+        images = [example, example[::2, ::2], example[..., 1]]
+        batch  = preprocess_batch(images)
+        assert batch.shape == (3, 224, 224, 3)
+        for row, image in zip(batch, images):
+            np.testing.assert_array_equal(row, preprocess_classification(image)[0])
+
+    def test_threads_get_independent_buffers(self, example):
+        expected = preprocess_classification(example)
+        results  = []
+
+        def work():
+            for _ in range(5):
+                results.append(preprocess_classification(example))
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        assert all(np.array_equal(r, expected) for r in results)
+
+
+# ─── Decoding ─────────────────────────────────────────────────────
+
+def _upload(image: Image.Image, fmt: str, name: str):
+    from werkzeug.datastructures import FileStorage
+    buf = io.BytesIO()
+    image.save(buf, format=fmt)
+    buf.seek(0)
+    return FileStorage(stream=buf, filename=name)
+
+
+def _png_bomb(width: int, height: int):
+    """A valid 1×1 PNG whose IHDR claims width × height."""
+    from werkzeug.datastructures import FileStorage
+    buf = io.BytesIO()
+    Image.new("L", (1, 1)).save(buf, format="PNG")
+    data = bytearray(buf.getvalue())
+    ihdr = data.index(b"IHDR")
+    data[ihdr + 4:ihdr + 12] = struct.pack(">II", width, height)
+    data[ihdr + 17:ihdr + 21] = struct.pack(">I", zlib.crc32(bytes(data[ihdr:ihdr + 17])))
+    return FileStorage(stream=io.BytesIO(bytes(data)), filename="bomb.png")
+
+
+class TestReducedDecoding:
+    @pytest.fixture(scope="class")
+    def large(self, example):
+        return Image.fromarray(example).resize((4000, 2250))
+
+    def test_jpeg_decoded_just_above_max_side(self, large):
+        out = load_image(_upload(large, "JPEG", "big.jpg"))
+        assert DECODE_MAX_SIDE <= max(out.shape[:2]) < 2 * DECODE_MAX_SIDE
+        assert out.shape[2] == 3 and out.dtype == np.uint8
+
+    def test_png_reduced_after_decode(self, large):
+        out = load_image(_upload(large, "PNG", "big.png"))
+        assert DECODE_MAX_SIDE <= max(out.shape[:2]) < 2 * DECODE_MAX_SIDE
+
+    def test_small_images_untouched(self, example):
+        out = load_image(_upload(Image.fromarray(example), "PNG", "ex.png"))
+        np.testing.assert_array_equal(out, example)
+
+    def test_reduced_decode_keeps_classifier_input(self, large):
+        full    = preprocess_classification(np.array(large))
+        reduced = preprocess_classification(load_image(_upload(large, "JPEG", "big.jpg")))
+        assert np.abs(full - reduced).mean() < 0.01
+
+    def test_bomb_rejected_before_decoding(self, monkeypatch):
+        over_budget, over_pil_limit = _png_bomb(8000, 8000), _png_bomb(20000, 20000)
+        loads = []
+        monkeypatch.setattr(ImageFile.ImageFile, "load", lambda self: loads.append(self))
+        with pytest.raises(ValueError, match="too large"):
+            load_image(over_budget)
+        with pytest.raises(ValueError, match="too large"):
+            load_image(over_pil_limit)
+        assert loads == []
+
+    def test_budget_is_configurable(self, large, monkeypatch):
+        import src.preprocess as preprocess
+        monkeypatch.setattr(preprocess, "DECODE_PIXEL_BUDGET", 1000)
+        with pytest.raises(ValueError):
+            load_image(_upload(large, "JPEG", "big.jpg"))
@@ -0,0 +1,135 @@
+"""
+tests/test_render.py
+────────────────────
+The shared uint8 overlay renderer in src/render.py, checked against the
+previous float32 renderers of src/gradcam.py and src/inference.py.
+Rounding now happens per stage (LUT, addWeighted) instead of one final
+truncation, so pixels may differ by a couple of grey levels.
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+import src.render as render
+from src.render import fit_within, heatmap_overlay, mask_overlay
+
+
+def legacy_heatmap_overlay(background, heatmap):
+    """src/gradcam._render_overlay's blend before v2.1 (float32, full resolution)."""
+    H, W = background.shape[:2]
+    hm = np.clip(cv2.resize(heatmap, (W, H), interpolation=cv2.INTER_CUBIC), 0.0, 1.0)
+    sigma = min(H, W) / 40
+    k = int(sigma * 4) | 1
+    hm = cv2.GaussianBlur(hm, (k, k), sigmaX=sigma, sigmaY=sigma)
+    if hm.max() > 0:
+        hm = hm / hm.max()
+    jet = cv2.cvtColor(cv2.applyColorMap(np.uint8(255 * hm), cv2.COLORMAP_JET), cv2.COLOR_BGR2RGB)
+    out = 0.55 * jet.astype(np.float32) + 0.45 * background.astype(np.float32)
+    return np.clip(out, 0, 255).astype(np.uint8)
+
+
+def legacy_mask_overlay(image, mask):
+    """src/inference._render_mask_overlay's blend before v2.1."""
+    H, W = image.shape[:2]
+    canvas = image.astype(np.float32)
+    fill = np.zeros_like(canvas)
+    fill[mask == 1] = render.FILL_COLOR
+    m3 = mask[:, :, None].astype(np.float32)
+    canvas = canvas * (1 - m3 * render.FILL_ALPHA) + fill * m3 * render.FILL_ALPHA
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+    layer = np.zeros_like(canvas)
+    cv2.drawContours(layer, contours, -1, render.BORDER_COLOR, thickness=3)
+    b3 = cv2.drawContours(np.zeros((H, W), np.uint8), contours, -1, 255, thickness=3)[:, :, None] / 255.0
+    canvas = canvas * (1 - b3 * render.BORDER_ALPHA) + layer * b3 * render.BORDER_ALPHA
+    return np.clip(canvas, 0, 255).astype(np.uint8)
+
+
+def scan(h: int, w: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).integers(0, 256, (h, w, 3), dtype=np.uint8)
+
+
+def cam(seed: int = 0) -> np.ndarray:
+    hm = np.random.default_rng(seed).random((7, 7)).astype(np.float32)
+    return hm / hm.max()
+
+
+def lesion(h: int, w: int) -> np.ndarray:
+    mask = np.zeros((h, w), np.uint8)
+    cv2.ellipse(mask, (w // 2, h // 3), (w // 6, h // 8), 20, 0, 360, 1, -1)
+    cv2.circle(mask, (w // 5, 4 * h // 5), min(h, w) // 12, 1, -1)
+    return mask
+
+
+def diff(a, b) -> np.ndarray:
+    return np.abs(a.astype(np.int16) - b.astype(np.int16))
+
+
+# ─── Heatmap overlay ──────────────────────────────────────────────
+
+class TestHeatmapOverlay:
+    @pytest.mark.parametrize("shape", [(224, 224), (300, 420)])
+    def test_matches_float_renderer(self, shape):
+        bg, hm = scan(*shape), cam()
+        d = diff(heatmap_overlay(bg, hm), legacy_heatmap_overlay(bg, hm))
+        assert d.max() <= 2 and d.mean() < 0.6
+
+    def test_reduced_grid_stays_close(self):
+        bg, hm = scan(1200, 1024), cam(1)
+        d = diff(heatmap_overlay(bg, hm), legacy_heatmap_overlay(bg, hm))
+        assert d.mean() < 1.0 and np.percentile(d, 99.9) <= 4
+
+    def test_input_untouched_and_zero_heatmap(self):
+        bg = scan(64, 64)
+        before = bg.copy()
+        out = heatmap_overlay(bg, np.zeros((7, 7), np.float32))
+        assert np.array_equal(bg, before) and out.shape == bg.shape and out.dtype == np.uint8
+
+    def test_stripe_height_does_not_change_output(self, monkeypatch):
+        bg, hm = scan(257, 130), cam(2)
+        full = heatmap_overlay(bg, hm)
+        monkeypatch.setattr(render, "RENDER_STRIPE_ROWS", 7)
+        assert np.array_equal(heatmap_overlay(bg, hm), full)
+
+
+# ─── Mask overlay ─────────────────────────────────────────────────
+
+class TestFitWithin:
+    def test_shrinks_the_long_side_only_when_needed(self):
+        image = np.zeros((300, 1200, 3), np.uint8)
+        assert fit_within(image, 600).shape == (150, 600, 3)
+        assert fit_within(image, 2000) is image
+
+
+class TestMaskOverlay:
+    @pytest.mark.parametrize("shape", [(224, 224), (512, 384)])
+    def test_matches_float_renderer(self, shape):
+        img, mask = scan(*shape), lesion(*shape)
+        d = diff(mask_overlay(img, mask), legacy_mask_overlay(img, mask))
+        assert d.max() <= 1 and d.mean() < 0.1
+
+    def test_only_mask_and_border_are_touched(self):
+        img, mask = scan(256, 256), lesion(256, 256)
+        out = mask_overlay(img, mask)
+        near = cv2.dilate(mask, np.ones((5, 5), np.uint8)).astype(bool)
+        assert np.array_equal(out[~near], img[~near])
+        assert not np.array_equal(out[mask == 1], img[mask == 1])
+
+    def test_mask_touching_the_edge(self):
+        img  = scan(64, 64)
+        mask = np.zeros((64, 64), np.uint8)
+        mask[:20, 50:] = 1
+        assert diff(mask_overlay(img, mask), legacy_mask_overlay(img, mask)).max() <= 1
+
+    def test_empty_mask_returns_a_copy(self):
+        img = np.full((32, 32, 3), 90, np.uint8)
+        out = mask_overlay(img, np.zeros((32, 32), np.uint8))
+        assert np.array_equal(out, img)
+        out[0, 0] = 0
+        assert img[0, 0].tolist() == [90, 90, 90]
+
+    def test_stripe_height_does_not_change_output(self, monkeypatch):
+        img, mask = scan(300, 200), lesion(300, 200)
+        full = mask_overlay(img, mask)
+        monkeypatch.setattr(render, "RENDER_STRIPE_ROWS", 5)
+        assert np.array_equal(mask_overlay(img, mask), full)
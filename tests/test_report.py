@@ -0,0 +1,98 @@
+"""
+tests/test_report.py
+────────────────────
+Report generation against a local OpenAI-compatible stand-in server —
+both the plain JSON response and the SSE stream used for report_chunk.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import src.report as report
+
+CHUNKS = ["NEURODL AI-ASSISTED ", "MRI BRAIN REPORT\n", "━━━ ", "FINDINGS: ", "glioma."]
+
+
+class _StandIn(BaseHTTPRequestHandler):
+    """Answers /chat/completions like Groq: JSON, or SSE when stream=true."""
+
+    requests_seen = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        type(self).requests_seen.append(body)
+
+        if not body.get("stream"):
+            payload = json.dumps(
+                {"choices": [{"message": {"role": "assistant", "content": "".join(CHUNKS)}}]}
+            ).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        self.wfile.write(b": keep-alive\n\n")
+        first = {"choices": [{"index": 0, "delta": {"role": "assistant"}}]}
+        self.wfile.write(f"data: {json.dumps(first)}\n\n".encode("utf-8"))
+        for text in CHUNKS:
+            event = {"choices": [{"index": 0, "delta": {"content": text}}]}
+            self.wfile.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        self.wfile.write(b'data: {"choices": [], "usage": {"completion_tokens": 5}}\n\n')
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in(monkeypatch):
+    _StandIn.requests_seen = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    monkeypatch.setattr(report, "GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(
+        report, "GROQ_ENDPOINT", f"http://127.0.0.1:{server.server_port}/chat/completions",
+    )
+    yield _StandIn
+    server.shutdown()
+    server.server_close()
+
+
+def _generate(**kwargs):
+    return report.generate_report(
+        class_name             = "Glioma Tumor",
+        confidence             = 0.91,
+        segmentation_performed = True,
+        gradcam_performed      = True,
+        **kwargs,
+    )
+
+
+class TestGenerateReport:
+    def test_full_response(self, stand_in):
+        assert _generate() == "".join(CHUNKS).strip()
+        assert stand_in.requests_seen[0]["stream"] is False
+
+    def test_streaming_forwards_chunks_in_order(self, stand_in):
+        received = []
+        text     = _generate(on_chunk=received.append)
+
+        assert stand_in.requests_seen[0]["stream"] is True
+        assert received == CHUNKS
+        assert text == "".join(CHUNKS).strip()
+
+    def test_no_api_key_skips_request(self, stand_in, monkeypatch):
+        monkeypatch.setattr(report, "GROQ_API_KEY", None)
+        assert _generate(on_chunk=lambda text: None) is None
+        assert stand_in.requests_seen == []
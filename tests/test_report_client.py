@@ -0,0 +1,199 @@
+"""
+tests/test_report_client.py
+───────────────────────────
+ReportClient against a local fake upstream that injects 429s, 5xx and
+slow responses — retries, Retry-After, the circuit breaker, the
+concurrency limit and keep-alive reuse.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from src.report_client import CircuitBreaker, ReportClient, ReportUnavailable
+
+
+class _FakeUpstream(BaseHTTPRequestHandler):
+    """
+    Pops one scripted behaviour per request from `script`; when it runs
+    out, answers 200. Behaviours: ("ok",), ("status", code, retry_after),
+    ("slow", seconds).
+    """
+
+    protocol_version = "HTTP/1.1"     # keep-alive, so pooling is observable
+
+    script      = []
+    seen        = []
+    peers       = set()
+    active      = 0
+    max_active  = 0
+    lock        = threading.Lock()
+
+    def do_POST(self):
+        cls = type(self)
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with cls.lock:
+            cls.seen.append(time.monotonic())
+            cls.peers.add(self.client_address[1])
+            cls.active    += 1
+            cls.max_active = max(cls.max_active, cls.active)
+            behaviour      = cls.script.pop(0) if cls.script else ("ok",)
+        try:
+            if behaviour[0] == "slow":
+                time.sleep(behaviour[1])
+            if behaviour[0] == "status":
+                self._reply(behaviour[1], {"error": "injected"}, retry_after=behaviour[2])
+            else:
+                self._reply(200, {"choices": [{"message": {"content": "report"}}]})
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def _reply(self, code, body, retry_after=None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        if retry_after is not None:
+            self.send_header("Retry-After", str(retry_after))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def upstream():
+    _FakeUpstream.script, _FakeUpstream.seen, _FakeUpstream.peers = [], [], set()
+    _FakeUpstream.active = _FakeUpstream.max_active = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeUpstream)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    _FakeUpstream.url = f"http://127.0.0.1:{server.server_port}/chat/completions"
+    yield _FakeUpstream
+    server.shutdown()
+    server.server_close()
+
+
+def _content(response):
+    return response.json()["choices"][0]["message"]["content"]
+
+
+def _client(**kwargs):
+    kwargs.setdefault("backoff_base", 0.01)
+    kwargs.setdefault("backoff_max", 1.0)
+    return ReportClient(**kwargs)
+
+
+class TestRetries:
+    def test_429_honours_retry_after(self, upstream):
+        upstream.script = [("status", 429, 0.3)]
+        client = _client()
+
+        assert client.post(upstream.url, _content, json={}, timeout=5) == "report"
+        assert len(upstream.seen) == 2
+        assert upstream.seen[1] - upstream.seen[0] >= 0.3
+        stats = client.stats()
+        assert stats["retries"] == 1
+        assert stats["status_counts"] == {"200": 1, "429": 1}
+
+    def test_slow_response_is_retried_after_timeout(self, upstream):
+        upstream.script = [("slow", 0.5)]
+        client = _client()
+
+        assert client.post(upstream.url, _content, json={}, timeout=0.2) == "report"
+        assert client.stats()["status_counts"]["error"] == 1
+
+    def test_retries_exhausted_raises_unavailable(self, upstream):
+        upstream.script = [("status", 503, None)] * 3
+        client = _client(max_retries=2)
+
+        with pytest.raises(ReportUnavailable):
+            client.post(upstream.url, _content, json={}, timeout=5)
+        assert len(upstream.seen) == 3
+
+    def test_long_retry_after_gives_up_immediately(self, upstream):
+        upstream.script = [("status", 429, 120)]
+        client = _client(max_retries=3, backoff_max=5)
+
+        with pytest.raises(ReportUnavailable):
+            client.post(upstream.url, _content, json={}, timeout=5)
+        assert len(upstream.seen) == 1
+
+    def test_client_errors_are_not_retried(self, upstream):
+        upstream.script = [("status", 401, None)]
+        client = _client()
+
+        with pytest.raises(requests.HTTPError):
+            client.post(upstream.url, _content, json={}, timeout=5)
+        assert len(upstream.seen) == 1
+        assert client.breaker.state == "closed"
+
+
+class TestCircuitBreaker:
+    def test_opens_fails_fast_then_recovers(self, upstream):
+        upstream.script = [("status", 503, None)] * 2
+        client = _client(max_retries=0, breaker=CircuitBreaker(threshold=2, cooldown=0.3))
+
+        for _ in range(2):
+            with pytest.raises(ReportUnavailable):
+                client.post(upstream.url, _content, json={}, timeout=5)
+        assert client.breaker.state == "open"
+
+        with pytest.raises(ReportUnavailable, match="circuit open"):
+            client.post(upstream.url, _content, json={}, timeout=5)
+        assert len(upstream.seen) == 2            # failed fast, upstream untouched
+
+        time.sleep(0.35)
+        assert client.breaker.state == "half_open"
+        assert client.post(upstream.url, _content, json={}, timeout=5) == "report"
+        assert client.breaker.state == "closed"
+        assert client.stats()["short_circuited"] == 1
+
+    def test_failed_probe_does_not_jam_the_breaker(self, upstream, monkeypatch):
+        client = _client(max_retries=2, breaker=CircuitBreaker(threshold=1, cooldown=0.1))
+        upstream.script = [("status", 503, None)] * 3
+        with pytest.raises(ReportUnavailable):
+            client.post(upstream.url, _content, json={}, timeout=5)
+
+        time.sleep(0.15)
+        assert client.breaker.state == "half_open"
+        post = client.session.post
+
+        def redirect_loop(*args, **kwargs):
+            raise requests.exceptions.TooManyRedirects("Exceeded 30 redirects.")
+
+        monkeypatch.setattr(client.session, "post", redirect_loop)
+        with pytest.raises(ReportUnavailable, match="redirects"):
+            client.post(upstream.url, _content, json={}, timeout=5)
+        assert client.breaker.state == "open"     # the probe's failure was recorded
+        assert client.stats()["attempts"] == 4    # and it was not retried
+
+        monkeypatch.setattr(client.session, "post", post)
+        time.sleep(0.15)
+        assert client.post(upstream.url, _content, json={}, timeout=5) == "report"
+        assert client.breaker.state == "closed"
+
+
+class TestPooling:
+    def test_concurrency_limit_and_connection_reuse(self, upstream):
+        upstream.script = [("slow", 0.1)] * 8
+        client  = _client(max_concurrency=2)
+        results = []
+
+        def call():
+            results.append(client.post(upstream.url, _content, json={}, timeout=5))
+
+        threads = [threading.Thread(target=call) for _ in range(8)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+
+        assert results == ["report"] * 8
+        assert upstream.max_active <= 2
+        assert len(upstream.peers) <= 2, "connections were not reused"
+        assert client.stats()["upstream_ms"]["count"] == 8
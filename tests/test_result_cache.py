@@ -0,0 +1,107 @@
+"""
+tests/test_result_cache.py
+──────────────────────────
+ResultCache — content keys, LRU budget, disk tier and request coalescing.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from src.result_cache import ResultCache, content_key
+
+
+def _entry(n=4):
+    return {
+        "predictions":   np.full(4, 0.25, dtype=np.float32),
+        "heatmap":       np.zeros((7, 7), dtype=np.float32),
+        "gradcam_image": b"\x89PNG" * n,
+        "segment_image": None,
+    }
+
+
+class TestContentKey:
+    def test_same_pixels_same_key(self):
+        img = np.arange(48, dtype=np.uint8).reshape(4, 4, 3)
+        assert content_key(img, "v1") == content_key(img.copy(), "v1")
+
+    def test_model_version_and_pixels_change_key(self):
+        img = np.zeros((4, 4, 3), dtype=np.uint8)
+        assert content_key(img, "v1") != content_key(img, "v2")
+        other = img.copy(); other[0, 0, 0] = 1
+        assert content_key(img, "v1") != content_key(other, "v1")
+
+
+class TestResultCache:
+    def test_lru_respects_byte_budget(self):
+        size  = 4 * 4 + 7 * 7 * 4 + 4 * 10
+        cache = ResultCache(max_bytes=size * 2, disk_dir=None)
+        for k in ("a", "b", "c"):
+            cache.put(k, _entry(10))
+        assert cache.get("a") is None
+        assert cache.get("c") is not None
+        assert cache.stats()["bytes"] <= size * 2
+
+    def test_disk_tier_round_trip(self, tmp_path):
+        cache = ResultCache(max_bytes=0, disk_dir=str(tmp_path))
+        cache.put("k" * 64, _entry())
+        fresh = ResultCache(max_bytes=1 << 20, disk_dir=str(tmp_path))
+        entry = fresh.get("k" * 64)
+        assert entry["gradcam_image"] == _entry()["gradcam_image"]
+        assert entry["segment_image"] is None
+        np.testing.assert_array_equal(entry["predictions"], _entry()["predictions"])
+
+    def test_disk_writes_do_not_walk_the_directory(self, tmp_path, monkeypatch):
+        import src.result_cache as result_cache
+
+        walks = []
+        walk  = result_cache.os.walk
+        monkeypatch.setattr(result_cache.os, "walk", lambda d: walks.append(d) or walk(d))
+
+        cache = ResultCache(max_bytes=0, disk_dir=str(tmp_path), disk_max_bytes=1 << 30)
+        for i in range(20):
+            cache.put(f"{i:064d}", _entry())
+        assert len(walks) == 1                              # the start-up scan only
+        on_disk = sum(p.stat().st_size for p in tmp_path.rglob("*.npz"))
+        assert cache.stats()["disk_bytes"] == on_disk
+
+    def test_disk_eviction_counts_other_workers_files(self, tmp_path):
+        first  = ResultCache(max_bytes=0, disk_dir=str(tmp_path))
+        first.put("0" * 64, _entry())
+        one    = first.stats()["disk_bytes"]
+        budget = one * 5
+        worker = ResultCache(max_bytes=0, disk_dir=str(tmp_path), disk_max_bytes=budget)
+        other  = ResultCache(max_bytes=0, disk_dir=str(tmp_path), disk_max_bytes=budget)
+        for i in range(1, 4):
+            other.put(f"{i:064d}", _entry())
+            time.sleep(0.01)                                # distinct mtimes
+        for i in range(4, 7):
+            worker.put(f"{i:064d}", _entry())
+            time.sleep(0.01)
+
+        files = sorted(p.stem[-1] for p in tmp_path.rglob("*.npz"))
+        assert sum(p.stat().st_size for p in tmp_path.rglob("*.npz")) <= budget
+        assert files == ["2", "3", "4", "5", "6"]           # oldest evicted, wherever written
+        assert worker.get(f"{6:064d}") is not None
+
+    def test_concurrent_identical_requests_compute_once(self):
+        cache = ResultCache(max_bytes=1 << 20, disk_dir=None)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.05)
+            return _entry()
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_compute("key", compute)))
+            for _ in range(8)
+        ]
+        for t in threads: t.start()
+        for t in threads: t.join()
+
+        assert len(calls) == 1
+        assert sum(1 for _, cached in results if not cached) == 1
+        assert cache.get_or_compute("key", compute)[1] is True
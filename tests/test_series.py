@@ -0,0 +1,188 @@
+"""
+tests/test_series.py
+────────────────────
+DICOM series ingestion in src/series.py: streaming zip entries, slice
+ordering, the process-pool decode and the upload limits.
+"""
+
+import io
+import os
+import struct
+import subprocess
+import sys
+import zipfile
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pydicom")
+
+import src.series as series  # noqa: E402
+from src.series import (  # noqa: E402
+    decode_slice, ingest_series, slice_image, sort_slices, zip_entries,
+)
+from tests.test_dicom import make_dicom  # noqa: E402
+
+
+def make_slice(value: int, z: float = None, instance: int = None, size: int = 64) -> bytes:
+    tags = {"WindowCenter": 0, "WindowWidth": 400}
+    if z is not None:
+        tags.update(ImagePositionPatient=[0, 0, z], ImageOrientationPatient=[1, 0, 0, 0, 1, 0])
+    if instance is not None:
+        tags["InstanceNumber"] = instance
+    return make_dicom(np.full((size, size), value, dtype=np.int16), **tags)
+
+
+def forge_size(buf: io.BytesIO, size: int) -> io.BytesIO:
+    """Rewrite every entry's declared uncompressed size — a forged zip-bomb header."""
+    data = bytearray(buf.getvalue())
+    for sig, offset in ((b"PK\x03\x04", 22), (b"PK\x01\x02", 24)):
+        start = data.find(sig)
+        while start != -1:
+            data[start + offset:start + offset + 4] = struct.pack("<I", size)
+            start = data.find(sig, start + 4)
+    return io.BytesIO(bytes(data))
+
+
+def make_zip(files: dict) -> io.BytesIO:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in files.items():
+            zf.writestr(name, data)
+    buf.seek(0)
+    return buf
+
+
+# ─── Decoding ─────────────────────────────────────────────────────
+
+class TestDecodeSlice:
+    def test_thumbnail_and_sort_keys(self):
+        s = decode_slice("a.dcm", make_slice(200, z=-12.5, instance=3, size=300))
+        assert s["thumb"].shape == (224, 224) and s["thumb"].dtype == np.uint8
+        assert s["position"] == -12.5 and s["instance"] == 3
+        assert s["thumb"].max() == 255                  # 200 HU is at the window's top
+
+    def test_full_resolution_slice(self):
+        assert slice_image(make_slice(0, size=300)).shape == (300, 300)
+
+    def test_non_dicom_is_skipped(self):
+        assert decode_slice("notes.txt", b"not a dicom file") is None
+
+    def test_multi_frame_is_rejected(self):
+        with pytest.raises(ValueError, match="multi-frame"):
+            decode_slice("v.dcm", make_dicom(np.zeros((3, 8, 8), dtype=np.int16)))
+
+
+# ─── Ordering ─────────────────────────────────────────────────────
+
+class TestSortSlices:
+    def test_position_wins_over_instance_number(self):
+        slices = [{"name": "a", "position": 5.0, "instance": 1},
+                  {"name": "b", "position": -5.0, "instance": 2}]
+        ordered, key = sort_slices(slices)
+        assert [s["name"] for s in ordered] == ["b", "a"] and key == "position"
+
+    def test_instance_number_then_name(self):
+        slices = [{"name": "a", "position": None, "instance": 2},
+                  {"name": "b", "position": None, "instance": 1}]
+        assert sort_slices(slices)[1] == "instance"
+        slices[0]["instance"] = None
+        ordered, key = sort_slices(slices)
+        assert key == "name" and [s["name"] for s in ordered] == ["a", "b"]
+
+
+# ─── Ingestion ────────────────────────────────────────────────────
+
+class TestIngestSeries:
+    def shuffled_zip(self):
+        files = {f"IMG{i:03d}.dcm": make_slice(200 if i == 4 else -1000, z=float(i), instance=i)
+                 for i in (3, 0, 4, 1, 2)}
+        files.update({"DICOMDIR": b"x", "__MACOSX/._IMG000.dcm": b"x", "README.txt": b"hello"})
+        return make_zip(files)
+
+    def test_zip_is_sorted_and_junk_skipped(self):
+        result = ingest_series(zip_entries(self.shuffled_zip()), workers=0)
+        assert result["names"] == [f"IMG{i:03d}.dcm" for i in range(5)]
+        assert result["frames"].shape == (5, 224, 224)
+        assert result["skipped"] == 1                   # README.txt; DICOMDIR / __MACOSX never read
+        assert result["frames"][4].min() == 255 and result["frames"][0].max() == 0
+        assert result["sorted_by"] == "position"
+
+    def test_process_pool_matches_inline(self):
+        inline = ingest_series(zip_entries(self.shuffled_zip()), workers=0)
+        pooled = ingest_series(zip_entries(self.shuffled_zip()), workers=2)
+        assert pooled["names"] == inline["names"]
+        assert np.array_equal(pooled["frames"], inline["frames"])
+
+    def test_readers_return_the_original_slice(self):
+        result = ingest_series(zip_entries(self.shuffled_zip()), workers=0)
+        assert slice_image(result["readers"]["IMG004.dcm"]()).min() == 255
+
+    def test_packed_entries_inflate_in_the_worker(self):
+        name, read, packed = zip_entries(self.shuffled_zip())[0]
+        payload, method, crc, size = packed()
+        assert len(payload) < len(read())               # still compressed
+        assert series._inflate(name, payload, method, crc, size) == read()
+        with pytest.raises(ValueError, match="CRC"):
+            series._inflate(name, payload, method, crc ^ 1, size)
+
+    def test_no_dicom_slices(self):
+        with pytest.raises(ValueError, match="no DICOM"):
+            ingest_series(zip_entries(make_zip({"a.txt": b"hello"})), workers=0)
+
+
+class TestLimits:
+    def test_not_a_zip(self):
+        with pytest.raises(ValueError, match="zip"):
+            zip_entries(io.BytesIO(b"plain bytes"))
+
+    def test_oversized_entry_is_rejected_before_reading(self, monkeypatch):
+        monkeypatch.setattr(series, "SERIES_MAX_ENTRY_BYTES", 1000)
+        with pytest.raises(ValueError, match="limit"):
+            zip_entries(make_zip({"big.dcm": b"\0" * 5000}))
+
+    def test_forged_size_cannot_inflate_past_the_cap(self, monkeypatch):
+        monkeypatch.setattr(series, "SERIES_MAX_ENTRY_BYTES", 1000)
+        bomb    = forge_size(make_zip({"bomb.dcm": b"\0" * 50_000}), 100)
+        entries = zip_entries(bomb)                     # the header claims 100 B
+        name, read, packed = entries[0]
+        with pytest.raises(ValueError, match="inflates past"):
+            series.decode_packed(name, *packed())
+        with pytest.raises(ValueError, match="inflates past"):
+            read()
+
+    def test_forged_size_under_the_cap_is_rejected(self):
+        entries = zip_entries(forge_size(make_zip({"a.dcm": b"\0" * 500}), 100))
+        with pytest.raises(ValueError, match="declared size"):
+            series.decode_packed(entries[0][0], *entries[0][2]())
+
+    def test_slice_count_limit(self, monkeypatch):
+        monkeypatch.setattr(series, "SERIES_MAX_SLICES", 2)
+        with pytest.raises(ValueError, match="limit 2"):
+            zip_entries(make_zip({f"{i}.dcm": b"x" for i in range(3)}))
+
+
+class TestWorkerPool:
+    def test_spawned_workers_never_load_the_models(self, tmp_path):
+        """
+        Spawn re-imports the parent's main script in every worker. Run the
+        pool with app.py as __main__ and eager loading on, and check the
+        worker imported app.py without ever calling load_models().
+        """
+        root   = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        script = (
+            "import sys\n"
+            f"sys.modules['__main__'].__file__ = {os.path.join(root, 'app.py')!r}\n"
+            "import src.series as series\n"
+            "probe = \"(lambda m: (m.__file__, 'started_at' in m.readiness))"
+            "(__import__('sys').modules['__mp_main__'])\"\n"
+            "print(series._pool(1).submit(eval, probe).result())\n"
+        )
+        env = {**os.environ, "EAGER_MODEL_LOAD": "1", "RESULT_CACHE_DIR": "",
+               "DATABASE_URL": f"sqlite:///{tmp_path / 'worker.db'}"}
+        out = subprocess.run([sys.executable, "-c", script], cwd=root, env=env,
+                             capture_output=True, text=True, timeout=300)
+        assert out.returncode == 0, out.stderr[-2000:]
+        main_file, loaded = eval(out.stdout.strip().splitlines()[-1])
+        assert os.path.basename(main_file) == "app.py"             # the worker did import app.py
+        assert loaded is False
@@ -0,0 +1,90 @@
+"""
+tests/test_tta.py
+─────────────────
+Test-time augmentation for low-confidence scans: view construction,
+aggregation, and the single batched forward pass.
+"""
+
+import numpy as np
+import pytest
+
+from src.tta import aggregate_views, augment_views, needs_tta, run_tta, tta_signature
+
+
+@pytest.fixture
+def image():
+    rng = np.random.default_rng(0)
+    return rng.random((1, 32, 32, 3), dtype=np.float32)
+
+
+class TestViews:
+    def test_view_count_and_dtype(self, image):
+        assert augment_views(image, shift=4).shape == (5, 32, 32, 3)
+        views = augment_views(image, shift=4, include_identity=True)
+        assert views.shape == (6, 32, 32, 3)
+        assert views.dtype == np.float32
+        np.testing.assert_array_equal(views[0], image[0])
+
+    def test_flip_and_shifts(self, image):
+        x     = image[0]
+        views = augment_views(image, shift=4)
+        np.testing.assert_array_equal(views[0], x[:, ::-1])
+        np.testing.assert_array_equal(views[1, :, 4:], x[:, :-4])     # right
+        np.testing.assert_array_equal(views[2, :, :-4], x[:, 4:])     # left
+        np.testing.assert_array_equal(views[3, 4:], x[:-4])           # down
+        np.testing.assert_array_equal(views[4, :-4], x[4:])           # up
+
+    def test_shifted_in_border_is_background(self, image):
+        views = augment_views(image, shift=4)
+        assert not views[1, :, :4].any()
+        assert not views[4, -4:].any()
+
+    def test_invalid_shift_raises(self, image):
+        with pytest.raises(ValueError):
+            augment_views(image, shift=0)
+
+
+class TestAggregation:
+    def test_mean_and_variance(self):
+        probs = np.array([[0.6, 0.4], [0.8, 0.2]], dtype=np.float32)
+        mean, var = aggregate_views(probs)
+        np.testing.assert_allclose(mean, [0.7, 0.3], atol=1e-6)
+        np.testing.assert_allclose(var, [0.01, 0.01], atol=1e-6)
+
+    def test_threshold_gate(self):
+        assert needs_tta(np.array([0.5, 0.3, 0.2]), threshold=0.8)
+        assert not needs_tta(np.array([0.9, 0.05, 0.05]), threshold=0.8)
+
+    def test_signature_tracks_settings(self):
+        assert tta_signature(0.8, 8) != tta_signature(0.7, 8)
+        assert tta_signature(0.8, 8) != tta_signature(0.8, 4)
+
+
+class TestRunTTA:
+    def test_single_batched_call(self, image):
+        calls = []
+
+        def predict(batch):
+            calls.append(len(batch))
+            return np.tile([[0.5, 0.3, 0.1, 0.1]], (len(batch), 1))
+
+        result = run_tta(predict, image, shift=4)
+        assert calls == [6]
+        assert result["tta_views"] == 6
+        assert result["tta_agreement"] == 1.0
+        np.testing.assert_allclose(result["tta_variance"], 0.0, atol=1e-7)
+
+    def test_base_prediction_reused_as_identity(self, image):
+        calls = []
+        base  = np.array([0.1, 0.7, 0.1, 0.1], dtype=np.float32)
+
+        def predict(batch):
+            calls.append(len(batch))
+            return np.tile([[0.7, 0.1, 0.1, 0.1]], (len(batch), 1))
+
+        result = run_tta(predict, image, base_predictions=base, shift=4)
+        assert calls == [5]
+        assert result["tta_views"] == 6
+        assert int(np.argmax(result["predictions"])) == 0
+        assert result["tta_agreement"] == pytest.approx(5 / 6)
+        assert result["tta_variance"][1] > 0
@@ -0,0 +1,136 @@
+"""
+tests/test_volume.py
+────────────────────
+Study-level volume inference in src/volume.py: vectorised loading of
+multi-frame DICOMs, adaptive slice sampling under slice / time budgets,
+and top-k aggregation.
+"""
+
+import io
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pydicom")
+
+from werkzeug.datastructures import FileStorage  # noqa: E402
+
+import src.volume as volume  # noqa: E402
+from src.volume import (  # noqa: E402
+    aggregate_study, classify_volume, coarse_indices, load_volume,
+    refine_indices, suspicion,
+)
+from tests.test_dicom import make_dicom  # noqa: E402
+
+
+def tumour_at(*slices):
+    """Frames (F, 32, 32) uint8 that are bright only at `slices`."""
+    def build(n):
+        frames = np.zeros((n, 32, 32), dtype=np.uint8)
+        frames[list(slices)] = 255
+        return frames
+    return build
+
+
+def brightness_predict(calls=None):
+    """Fake classifier: bright slice → Glioma, dark slice → No Tumor."""
+    def predict(batch):
+        if calls is not None:
+            calls.append(len(batch))
+        tumour = batch.mean(axis=(1, 2, 3))
+        probs  = np.zeros((len(batch), 4), dtype=np.float32)
+        probs[:, 0] = 0.05 + 0.9 * tumour
+        probs[:, 2] = 0.95 - 0.9 * tumour
+        probs[:, 1] = probs[:, 3] = 0.0
+        return probs
+    return predict
+
+
+# ─── Loading ──────────────────────────────────────────────────────
+
+class TestLoadVolume:
+    def test_windows_every_frame(self):
+        pixels = np.arange(6 * 16 * 16, dtype=np.int16).reshape(6, 16, 16) % 800 - 400
+        data   = make_dicom(pixels, WindowCenter=0, WindowWidth=800)
+        frames = load_volume(FileStorage(stream=io.BytesIO(data), filename="v.dcm"))
+        assert frames.shape == (6, 16, 16) and frames.dtype == np.uint8
+        assert frames[0, 0, 0] == 0 and frames.max() == 254
+
+    def test_single_frame_gets_a_frame_axis(self):
+        data   = make_dicom(np.zeros((8, 8), dtype=np.uint16))
+        frames = load_volume(FileStorage(stream=io.BytesIO(data), filename="one.DCM"))
+        assert frames.shape == (1, 8, 8)
+
+    def test_long_study_uses_the_volume_budget(self):
+        # 160 × 512² = 42 MP — over the single-image DECODE_PIXEL_BUDGET
+        pixels = np.zeros((160, 512, 512), dtype=np.int16)
+        pixels[100] = 300
+        data   = make_dicom(pixels, WindowCenter=0, WindowWidth=400)
+        frames = load_volume(FileStorage(stream=io.BytesIO(data), filename="long.dcm"))
+        assert frames.shape == (160, 512, 512)
+        assert frames[100].min() == 255 and frames[99].max() == 127
+
+    def test_volume_and_frame_budgets(self, monkeypatch):
+        data = make_dicom(np.zeros((4, 16, 16), dtype=np.int16))
+        monkeypatch.setattr(volume, "VOLUME_PIXEL_BUDGET", 3 * 16 * 16)
+        with pytest.raises(ValueError, match="too large"):
+            load_volume(FileStorage(stream=io.BytesIO(data), filename="v.dcm"))
+        monkeypatch.setattr(volume, "VOLUME_PIXEL_BUDGET", 10 ** 9)
+        monkeypatch.setattr(volume, "DECODE_PIXEL_BUDGET", 16 * 16 - 1)
+        with pytest.raises(ValueError, match="per frame"):
+            load_volume(FileStorage(stream=io.BytesIO(data), filename="v.dcm"))
+
+    def test_rejects_non_dicom(self):
+        with pytest.raises(ValueError, match="DICOM"):
+            load_volume(FileStorage(stream=io.BytesIO(b"x"), filename="scan.png"))
+
+
+# ─── Sampling ─────────────────────────────────────────────────────
+
+class TestSampling:
+    def test_coarse_indices_span_the_volume(self):
+        idx = coarse_indices(100, 5)
+        assert idx[0] == 0 and idx[-1] == 99 and len(idx) == 5
+
+    def test_refine_starts_next_to_the_most_suspicious(self):
+        probs = {0: np.array([0, 0, 1, 0.]), 10: np.array([1, 0, 0, 0.]), 20: np.array([0, 0, 1, 0.])}
+        assert refine_indices(21, probs, 2) == [9, 11]
+
+    def test_small_volume_is_classified_completely(self):
+        calls  = []
+        result = classify_volume(tumour_at(3)(10), brightness_predict(calls), batch_size=4)
+        assert result["complete"] and result["stopped_by"] == "complete"
+        assert list(result["indices"]) == list(range(10))
+        assert calls == [4, 4, 2]
+
+    def test_slice_budget_refines_around_the_tumour(self):
+        # 12 coarse slices, stride 18: only slice 36 of the lesion is hit
+        frames = tumour_at(*range(30, 45))(200)
+        result = classify_volume(frames, brightness_predict(), batch_size=8, max_slices=24)
+        assert len(result["indices"]) == 24 and result["coarse"] == 12
+        assert result["stopped_by"] == "slices" and not result["complete"]
+        assert set(range(32, 41)) <= set(result["indices"].tolist())
+
+    def test_time_budget_still_runs_one_batch(self):
+        result = classify_volume(tumour_at()(64), brightness_predict(),
+                                 batch_size=8, max_slices=64, budget_ms=0)
+        assert len(result["indices"]) == 8
+        assert result["stopped_by"] == "time"
+
+
+# ─── Aggregation ──────────────────────────────────────────────────
+
+class TestAggregation:
+    def test_one_tumour_slice_is_not_averaged_away(self):
+        probs = np.tile(np.array([0.02, 0.02, 0.94, 0.02], dtype=np.float32), (30, 1))
+        probs[17] = [0.9, 0.05, 0.03, 0.02]
+        study = aggregate_study(np.arange(30), probs, top_k=1)
+        assert study["top_slices"] == [17]
+        assert int(np.argmax(study["probs"])) == 0
+        assert np.isclose(suspicion(probs)[17], 0.97)
+
+    def test_top_k_order_and_mean(self):
+        probs = np.array([[0, 0, 1, 0], [0.5, 0, 0.5, 0], [0.8, 0, 0.2, 0]], dtype=np.float32)
+        study = aggregate_study(np.array([4, 5, 6]), probs, top_k=2)
+        assert study["top_slices"] == [6, 5]
+        assert np.allclose(study["probs"], [0.89 / 1.3, 0, 0.41 / 1.3, 0])